@@ -0,0 +1,97 @@
+"""recommendation refresh jobs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 10:02:41.518203
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('QUEUED', 'RUNNING')")
+
+
+def upgrade() -> None:
+    op.create_table('recommendation_lists',
+    sa.Column('owner_type', sa.String(length=10), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('owner_version', sa.DateTime(), nullable=True),
+    sa.Column('scoring_version', sa.String(length=32), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('owner_type', 'owner_id')
+    )
+
+    # 回填物化标记：已有推荐列表按 owner 当前版本视为已物化（空列表没有记录，之后按需实时计算）
+    now = datetime.utcnow()
+    recommendations = sa.table(
+        "recommendations",
+        sa.column("owner_type", sa.String), sa.column("owner_id", sa.Integer), sa.column("scoring_version", sa.String)
+    )
+    lists = sa.table(
+        "recommendation_lists",
+        sa.column("owner_type", sa.String), sa.column("owner_id", sa.Integer), sa.column("owner_version", sa.DateTime),
+        sa.column("scoring_version", sa.String), sa.column("refreshed_at", sa.DateTime)
+    )
+    for side, owner_table in (("demand", "demands"), ("vendor", "enterprises")):
+        owners = sa.table(owner_table, sa.column("id", sa.Integer), sa.column("updated_at", sa.DateTime))
+        # 评分版本不一致的列表不回填，读取时重新物化
+        versions = sa.select(
+            recommendations.c.owner_id, sa.func.min(recommendations.c.scoring_version).label("scoring_version")
+        ).where(recommendations.c.owner_type == side).group_by(recommendations.c.owner_id).having(
+            sa.func.count(sa.distinct(recommendations.c.scoring_version)) == 1
+        ).subquery()
+        op.execute(lists.insert().from_select(
+            ["owner_type", "owner_id", "owner_version", "scoring_version", "refreshed_at"],
+            sa.select(
+                sa.literal(side), owners.c.id, owners.c.updated_at, versions.c.scoring_version, sa.literal(now, sa.DateTime)
+            ).join_from(owners, versions, versions.c.owner_id == owners.c.id)
+        ))
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'REFRESH_DEMAND'")
+            op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'REFRESH_VENDOR'")
+
+    # 旧数据库纳入管理时 jobs 表按当前模型补建，已包含 enterprise_id
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("jobs")}
+    if "enterprise_id" in columns:
+        return
+
+    # SQLite 重建表时不保留部分索引的条件，先删除后重建
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_jobs_active_demand', sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enterprise_id', sa.Integer(), nullable=True))
+        batch_op.alter_column('demand_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key('fk_jobs_enterprise_id', 'enterprises', ['enterprise_id'], ['id'])
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('uq_jobs_active_demand', ['job_type', 'demand_id'], unique=True, sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+        batch_op.create_index('uq_jobs_active_enterprise', ['job_type', 'enterprise_id'], unique=True, sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+
+def downgrade() -> None:
+    # 推荐刷新任务没有 demand_id，先删除；PostgreSQL 的枚举值无法删除，保留
+    op.execute("DELETE FROM jobs WHERE demand_id IS NULL")
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_jobs_active_enterprise', sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+        batch_op.drop_index('uq_jobs_active_demand', sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_jobs_enterprise_id', type_='foreignkey')
+        batch_op.alter_column('demand_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('enterprise_id')
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('uq_jobs_active_demand', ['job_type', 'demand_id'], unique=True, sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+    op.drop_table('recommendation_lists')
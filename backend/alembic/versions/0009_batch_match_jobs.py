@@ -0,0 +1,26 @@
+"""batch match jobs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 11:20:13.604318
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 批量匹配任务：SQLite 的枚举列为字符串，无需修改；PostgreSQL 需要新增枚举值
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'BATCH_MATCH'")
+
+
+def downgrade() -> None:
+    # PostgreSQL 的枚举值无法删除，只删除批量任务
+    op.execute("DELETE FROM jobs WHERE job_type = 'BATCH_MATCH'")
@@ -3,6 +3,8 @@ from .auth import router as auth_router
 from .enterprises import router as enterprises_router
 from .demands import router as demands_router
 from .recommendations import router as recommendations_router
+from .jobs import router as jobs_router
+from .system import router as system_router
 
 api_router = APIRouter()
 
@@ -10,5 +12,7 @@ api_router.include_router(auth_router)
 api_router.include_router(enterprises_router)
 api_router.include_router(demands_router)
 api_router.include_router(recommendations_router)
+api_router.include_router(jobs_router)
+api_router.include_router(system_router)
 
 __all__ = ["api_router"]
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timedelta
 from ..core import get_db, get_password_hash, verify_password, create_access_token
+from ..core.write_queue import write_queue
 from ..models import User
 from ..schemas import UserCreate, UserLogin, Token, UserResponse
 
@@ -56,9 +58,12 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="账户已被禁用"
         )
     
-    # 更新最后登录时间
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # 更新最后登录时间（由写线程合并提交）
+    last_login = datetime.utcnow()
+    write_queue.run(lambda session: session.query(User).filter(User.id == user.id).update(
+        {User.last_login: last_login}, synchronize_session=False
+    ), session=db)
+    set_committed_value(user, "last_login", last_login)
     
     # 创建访问token
     access_token = create_access_token(data={"sub": user.email, "user_id": user.id})
@@ -1,23 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 from datetime import datetime
-from ..core import get_db, get_current_user_dependency
+from ..core import get_db, get_primary_db, get_async_db, get_current_user_dependency, get_current_user_async
+from ..core.pagination import CURSOR_DESCRIPTION, paginate
+from ..core.write_queue import write_queue
 from ..core.permissions import (
     filter_demands_by_permission,
     PermissionChecker,
-    get_permission_checker
+    get_permission_checker,
+    get_permission_checker_async
 )
-from ..models import Demand, DemandStatus, Enterprise, User, UserRole
+from ..models import Demand, DemandStatus, Enterprise, User, UserRole, JobType
 from ..schemas import (
     DemandCreate,
     DemandUpdate,
     DemandResponse,
     DemandListResponse,
     DemandEvaluateRequest,
-    DemandEvaluateResponse
+    DemandEvaluateResponse,
+    DemandBatchMatchRequest,
+    DemandBatchEvaluateRequest,
+    DemandBatchEvaluateResponse,
+    JobSubmitResponse
 )
-from ..services import evaluation_service, matching_service
+from ..services import matching_service, job_queue
+from ..services import demand_workflow
+from ..services.job_queue import JobConflictError
+from ..services.dataset_ingest import open_upload, scan_dataset, DatasetTooLarge, UnsupportedDataset
+from ..services.tag_links import tag_filter
 
 router = APIRouter(prefix="/demands", tags=["需求管理"])
 
@@ -68,51 +83,69 @@ def create_demand(
     db.commit()
     db.refresh(new_demand)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_demand(new_demand, db)
+    
     return new_demand
 
 
 @router.get("", response_model=DemandListResponse)
-def list_demands(
+async def list_demands(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[str] = Query(None),
     enterprise_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    tags: Optional[List[str]] = Query(None, description="按标签筛选（可传多个，同义词按同一标签处理）"),
+    tag_mode: str = Query("and", pattern="^(and|or)$", description="and：包含全部标签；or：包含任一标签"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """获取需求列表 - 根据用户角色过滤"""
-    query = db.query(Demand)
-    
-    # 根据用户权限过滤
-    query = filter_demands_by_permission(query, current_user)
-    
-    # 应用额外过滤器
-    if status_filter:
-        query = query.filter(Demand.status == status_filter)
-    
-    if enterprise_id:
-        query = query.filter(Demand.enterprise_id == enterprise_id)
-    
-    # 按创建时间倒序
-    query = query.order_by(Demand.created_at.desc())
-    
-    total = query.count()
-    demands = query.offset(skip).limit(limit).all()
-    
-    return {
-        "total": total,
-        "items": demands
-    }
+    def load(session: Session) -> DemandListResponse:
+        query = session.query(Demand)
+        
+        # 根据用户权限过滤
+        query = filter_demands_by_permission(query, current_user)
+        
+        # 应用额外过滤器
+        if status_filter:
+            query = query.filter(Demand.status == status_filter)
+        
+        if enterprise_id:
+            query = query.filter(Demand.enterprise_id == enterprise_id)
+        
+        tag_condition = tag_filter(session, Demand, tags, tag_mode)
+        if tag_condition is not None:
+            query = query.filter(tag_condition)
+        
+        # 按创建时间倒序
+        query = query.order_by(Demand.created_at.desc())
+        
+        page = paginate(
+            query.options(selectinload(Demand.matches)), skip, limit, cursor, Demand.created_at, Demand.id
+        )
+        
+        # 在会话内完成序列化，返回后不再触发数据库访问
+        return DemandListResponse.model_validate({
+            "total": page.total,
+            "items": page.items,
+            "next_cursor": page.next_cursor
+        })
+    
+    return await db.run_sync(load)
 
 
 @router.get("/{demand_id}", response_model=DemandResponse)
-def get_demand(
+async def get_demand(
     demand_id: int,
-    db: Session = Depends(get_db),
-    permissions: PermissionChecker = Depends(get_permission_checker)
+    db: AsyncSession = Depends(get_async_db),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
 ):
     """获取需求详情 - 检查查看权限"""
-    demand = db.query(Demand).filter(Demand.id == demand_id).first()
+    demand = (await db.execute(
+        select(Demand).where(Demand.id == demand_id).options(selectinload(Demand.matches))
+    )).scalar_one_or_none()
     
     if not demand:
         raise HTTPException(
@@ -127,7 +160,7 @@ def get_demand(
             detail="没有权限查看该需求"
         )
     
-    return demand
+    return DemandResponse.model_validate(demand)
 
 
 @router.put("/{demand_id}", response_model=DemandResponse)
@@ -153,14 +186,72 @@ def update_demand(
             detail="没有权限修改该需求"
         )
     
-    # 更新字段
+    # 更新字段（由写线程合并提交）
     update_data = demand_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(demand, field, value)
     
+    def apply_update(session: Session):
+        target = session.get(Demand, demand_id)
+        for field, value in update_data.items():
+            setattr(target, field, value)
+    
+    write_queue.run(apply_update, session=db)
+    db.refresh(demand)
+    
+    # 同步匹配索引与推荐表
+    matching_service.index_demand(demand, db)
+    
+    return demand
+
+
+@router.post("/{demand_id}/dataset", response_model=DemandResponse)
+def upload_dataset(
+    demand_id: int,
+    file: UploadFile = File(..., description="数据集清单（CSV / JSONL）、单个媒体文件或 zip 压缩包"),
+    merge: bool = Query(False, description="为 true 时与已有的数据摘要合并，否则覆盖"),
+    db: Session = Depends(get_db),
+    permissions: PermissionChecker = Depends(get_permission_checker)
+):
+    """
+    上传数据集并生成数据摘要 - 仅创建者和管理员可以上传
+    
+    同步处理函数在线程池中执行，查询、扫描、提交与索引更新都不占用事件循环。
+    直接扫描 Starlette 接收上传时写入的临时文件（见 open_upload），统计各类型记录数、标注率与数据大小，
+    写入需求的 data_summary
+    """
+    demand = db.query(Demand).filter(Demand.id == demand_id).first()
+    
+    if not demand:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="需求不存在"
+        )
+    
+    if not permissions.can_modify_demand(demand):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有权限修改该需求"
+        )
+    
+    try:
+        stats = scan_dataset(open_upload(file), file.filename)
+    except DatasetTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except UnsupportedDataset as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    demand.data_summary = stats.to_summary(demand.data_summary if merge else None)
     db.commit()
     db.refresh(demand)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_demand(demand, db)
+    
     return demand
 
 
@@ -181,11 +272,43 @@ def submit_demand(demand_id: int, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(demand)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_demand(demand, db)
+    
     return demand
 
 
-@router.post("/{demand_id}/evaluate", response_model=DemandEvaluateResponse)
-def evaluate_demand(demand_id: int, db: Session = Depends(get_db)):
+def _submit_job(db: Session, job_type: JobType, demand: Demand, payload: Optional[dict] = None) -> JSONResponse:
+    """提交后台任务，返回 202 和任务ID"""
+    try:
+        job = job_queue.enqueue(db, job_type, demand, payload)
+    except JobConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="该需求已有参数不同的匹配任务尚未完成，请稍后重试"
+        )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder({
+            "job_id": job.id,
+            "demand_id": demand.id,
+            "status": job.status,
+            "message": "任务已提交，请通过任务状态接口查询结果"
+        }),
+        headers={"Location": f"/api/v1/jobs/{job.id}"}
+    )
+
+
+@router.post(
+    "/{demand_id}/evaluate",
+    response_model=DemandEvaluateResponse,
+    responses={202: {"model": JobSubmitResponse}}
+)
+def evaluate_demand(
+    demand_id: int,
+    async_mode: bool = Query(False, description="为 true 时提交后台任务并立即返回 202"),
+    db: Session = Depends(get_db)
+):
     """评估需求"""
     demand = db.query(Demand).filter(Demand.id == demand_id).first()
     
@@ -195,30 +318,11 @@ def evaluate_demand(demand_id: int, db: Session = Depends(get_db)):
             detail="需求不存在"
         )
     
-    # 准备评估数据
-    demand_dict = {
-        "title": demand.title,
-        "description": demand.description,
-        "industry_tags": demand.industry_tags or [],
-        "scenario_tags": demand.scenario_tags or [],
-        "kpis": demand.kpis or [],
-        "budget_min": demand.budget_min,
-        "budget_max": demand.budget_max,
-        "timeline_start": demand.timeline_start,
-        "timeline_end": demand.timeline_end,
-        "data_summary": demand.data_summary or {},
-        "confidentiality": demand.confidentiality.value if demand.confidentiality else "internal"
-    }
-    
-    # 执行评估
-    evaluation_result = evaluation_service.evaluate_demand(demand_dict)
+    if async_mode:
+        return _submit_job(db, JobType.EVALUATE, demand)
     
-    # 更新需求状态和评估结果
-    demand.status = DemandStatus.EVALUATED
-    demand.evaluation_result = evaluation_result
-    
-    db.commit()
-    db.refresh(demand)
+    # 执行评估并更新需求状态和评估结果
+    evaluation_result = demand_workflow.evaluate_demand(db, demand)
     
     return {
         "demand_id": demand.id,
@@ -227,10 +331,15 @@ def evaluate_demand(demand_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/{demand_id}/match", response_model=DemandResponse)
+@router.post(
+    "/{demand_id}/match",
+    response_model=DemandResponse,
+    responses={202: {"model": JobSubmitResponse}}
+)
 def match_demand(
     demand_id: int,
     top_k: int = Query(5, ge=1, le=20),
+    async_mode: bool = Query(False, description="为 true 时提交后台任务并立即返回 202"),
     db: Session = Depends(get_db)
 ):
     """匹配供应商"""
@@ -242,45 +351,105 @@ def match_demand(
             detail="需求不存在"
         )
     
-    # 准备匹配数据
-    demand_dict = {
-        "title": demand.title,
-        "description": demand.description,
-        "industry_tags": demand.industry_tags or [],
-        "scenario_tags": demand.scenario_tags or [],
-        "budget_max": demand.budget_max or 0,
-        "enterprise_location": "重庆"  # MVP阶段默认重庆
-    }
+    if async_mode:
+        return _submit_job(db, JobType.MATCH, demand, {"top_k": top_k})
     
-    # 执行匹配
-    match_results = matching_service.match_vendors(demand_dict, db, top_k)
+    # 执行匹配并更新需求的匹配结果
+    demand_workflow.match_demand(db, demand, top_k)
     
-    # 更新需求的匹配结果
-    demand.match_results = match_results
-    demand.status = DemandStatus.MATCHED
+    return demand
+
+
+@router.post("/batch-match", status_code=status.HTTP_202_ACCEPTED, response_model=JobSubmitResponse)
+def batch_match_demands(
+    request: DemandBatchMatchRequest,
+    db: Session = Depends(get_db),
+    permissions: PermissionChecker = Depends(get_permission_checker)
+):
+    """
+    批量匹配供应商（管理员专用）
     
-    db.commit()
-    db.refresh(demand)
+    按需求ID列表和/或状态筛选需求，提交后台任务并立即返回 202；
+    worker 中供应商数据只加载一次，在进程池中分块并行评分后批量写回匹配结果，
+    汇总信息（total / matched / vendor_count / elapsed_seconds）见任务结果
+    """
+    if not permissions.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以批量匹配需求"
+        )
     
-    return demand
+    if not request.demand_ids and not request.statuses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请指定需求ID或需求状态"
+        )
+    
+    job = job_queue.enqueue_batch(db, JobType.BATCH_MATCH, jsonable_encoder(request))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder({
+            "job_id": job.id,
+            "status": job.status,
+            "message": "批量匹配任务已提交，请通过任务状态接口查询结果"
+        }),
+        headers={"Location": f"/api/v1/jobs/{job.id}"}
+    )
+
+
+@router.post("/batch-evaluate", response_model=DemandBatchEvaluateResponse)
+def batch_evaluate_demands(
+    request: DemandBatchEvaluateRequest,
+    db: Session = Depends(get_db),
+    permissions: PermissionChecker = Depends(get_permission_checker)
+):
+    """
+    批量评估需求（管理员专用）
+    
+    按需求ID列表和/或状态筛选需求，一次查询取出评估所需的列，
+    批量计算评分后分批写回评估结果
+    """
+    if not permissions.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以批量评估需求"
+        )
+    
+    if not request.demand_ids and not request.statuses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请指定需求ID或需求状态"
+        )
+    
+    summary = demand_workflow.evaluate_demands(db, request.demand_ids, request.statuses)
+    
+    return {
+        **summary,
+        "message": f"已完成 {summary['evaluated']} 个需求的评估"
+    }
 
 
 @router.get("/recommended/{enterprise_id}")
 def get_recommended_demands(
     enterprise_id: int,
     top_k: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ):
     """
     为供应商企业推荐匹配的需求
     
+    推荐列表过期时返回过期的物化结果（stale 为 true），刷新任务由 worker 提交；
+    未物化时实时计算并写回分数缓存，因此固定使用主库。
+    保持同步处理函数（在线程池中执行）：未物化时实时运行匹配流水线（CPU 密集的向量化评分），
+    推荐表与任务队列也只提供同步会话的接口，放在事件循环中会阻塞其他请求
+    
     Args:
         enterprise_id: 供应商企业ID
         top_k: 返回top K个推荐结果
-        db: 数据库会话
+        db: 数据库会话（主库）
         
     Returns:
-        推荐需求列表
+        推荐需求列表，以及是否为过期的推荐结果
     """
     # 验证企业是否存在且为供应方
     enterprise = db.query(Enterprise).filter(
@@ -301,17 +470,14 @@ def get_recommended_demands(
         )
     
     # 获取推荐需求
-    recommended_demands = matching_service.match_demands_for_vendor(
-        vendor=enterprise,
-        db=db,
-        top_k=top_k
-    )
+    recommended_demands, stale = matching_service.recommendations.demands_for_vendor(db, enterprise, top_k)
     
     return {
         "enterprise_id": enterprise_id,
         "enterprise_name": enterprise.name,
         "total": len(recommended_demands),
-        "recommendations": recommended_demands
+        "recommendations": recommended_demands,
+        "stale": stale
     }
 
 
@@ -337,7 +503,12 @@ def delete_demand(
             detail="没有权限删除该需求"
         )
     
+    matching_service.score_cache.remove_demand(db, demand_id)
+    job_queue.remove_demand(db, demand_id)
     db.delete(demand)
     db.commit()
     
+    # 同步匹配索引与推荐表
+    matching_service.remove_demand(demand_id, db)
+    
     return None
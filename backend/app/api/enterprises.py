@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import random
 import string
-from ..core import get_db, get_current_user_dependency
+from ..core import get_db, get_async_db, get_current_user_dependency, get_current_user_async
+from ..core.pagination import CURSOR_DESCRIPTION, paginate
 from ..core.permissions import (
     filter_enterprises_by_permission,
     PermissionChecker,
-    get_permission_checker
+    get_permission_checker,
+    get_permission_checker_async
 )
 from ..models import Enterprise, EnterpriseStatus, User, UserRole, EnterpriseType
 from ..schemas import (
@@ -16,6 +19,8 @@ from ..schemas import (
     EnterpriseResponse,
     EnterpriseListResponse
 )
+from ..services import matching_service
+from ..services.tag_links import tag_filter
 
 router = APIRouter(prefix="/enterprises", tags=["企业管理"])
 
@@ -68,6 +73,9 @@ def register_enterprise(
     db.commit()
     db.refresh(new_enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(new_enterprise, db)
+    
     return new_enterprise
 
 
@@ -106,55 +114,69 @@ def create_enterprise(
     db.commit()
     db.refresh(new_enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(new_enterprise, db)
+    
     return new_enterprise
 
 
 @router.get("", response_model=EnterpriseListResponse)
-def list_enterprises(
+async def list_enterprises(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     status_filter: str = Query(None),
     enterprise_type: str = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    tags: Optional[List[str]] = Query(None, description="按标签筛选（可传多个，同义词按同一标签处理）"),
+    tag_mode: str = Query("and", pattern="^(and|or)$", description="and：包含全部标签；or：包含任一标签"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """获取企业列表 - 根据用户角色过滤"""
-    query = db.query(Enterprise)
-    
-    # 根据用户权限过滤（只有管理员可以看到所有企业）
-    # 需求方和供应方只能看到自己的企业和匹配的企业
-    # 但在列表页面，为简化逻辑，非管理员只能看自己的企业
-    if current_user.role != UserRole.ADMIN:
-        if current_user.enterprise_id:
-            query = query.filter(Enterprise.id == current_user.enterprise_id)
-        else:
-            # 如果没有关联企业，返回空列表
-            query = query.filter(False)
-    
-    # 应用额外过滤器
-    if status_filter:
-        query = query.filter(Enterprise.status == status_filter)
-    
-    if enterprise_type:
-        query = query.filter(Enterprise.enterprise_type == enterprise_type)
-    
-    total = query.count()
-    enterprises = query.offset(skip).limit(limit).all()
-    
-    return {
-        "total": total,
-        "items": enterprises
-    }
+    def load(session: Session) -> EnterpriseListResponse:
+        query = session.query(Enterprise)
+        
+        # 根据用户权限过滤（只有管理员可以看到所有企业）
+        # 需求方和供应方只能看到自己的企业和匹配的企业
+        # 但在列表页面，为简化逻辑，非管理员只能看自己的企业
+        if current_user.role != UserRole.ADMIN:
+            if current_user.enterprise_id:
+                query = query.filter(Enterprise.id == current_user.enterprise_id)
+            else:
+                # 如果没有关联企业，返回空列表
+                query = query.filter(False)
+        
+        # 应用额外过滤器
+        if status_filter:
+            query = query.filter(Enterprise.status == status_filter)
+        
+        if enterprise_type:
+            query = query.filter(Enterprise.enterprise_type == enterprise_type)
+        
+        tag_condition = tag_filter(session, Enterprise, tags, tag_mode)
+        if tag_condition is not None:
+            query = query.filter(tag_condition)
+        
+        page = paginate(query, skip, limit, cursor, Enterprise.created_at, Enterprise.id)
+        
+        # 在会话内完成序列化，返回后不再触发数据库访问
+        return EnterpriseListResponse.model_validate({
+            "total": page.total,
+            "items": page.items,
+            "next_cursor": page.next_cursor
+        })
+    
+    return await db.run_sync(load)
 
 
 @router.get("/{enterprise_id}", response_model=EnterpriseResponse)
-def get_enterprise(
+async def get_enterprise(
     enterprise_id: int,
-    db: Session = Depends(get_db),
-    permissions: PermissionChecker = Depends(get_permission_checker)
+    db: AsyncSession = Depends(get_async_db),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
 ):
     """获取企业详情 - 检查查看权限"""
-    enterprise = db.query(Enterprise).filter(Enterprise.id == enterprise_id).first()
+    enterprise = await db.get(Enterprise, enterprise_id)
     
     if not enterprise:
         raise HTTPException(
@@ -170,7 +192,7 @@ def get_enterprise(
             detail="没有权限查看该企业"
         )
     
-    return enterprise
+    return EnterpriseResponse.model_validate(enterprise)
 
 
 @router.put("/{enterprise_id}", response_model=EnterpriseResponse)
@@ -205,6 +227,9 @@ def update_enterprise(
     db.commit()
     db.refresh(enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(enterprise, db)
+    
     return enterprise
 
 
@@ -240,6 +265,9 @@ def verify_enterprise(
     db.commit()
     db.refresh(enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(enterprise, db)
+    
     return enterprise
 
 
@@ -279,6 +307,9 @@ def submit_qualification(
     db.commit()
     db.refresh(enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(enterprise, db)
+    
     return enterprise
 
 
@@ -324,6 +355,9 @@ def verify_qualification(
     db.commit()
     db.refresh(enterprise)
     
+    # 同步匹配索引与推荐表
+    matching_service.index_enterprise(enterprise, db)
+    
     return enterprise
 
 
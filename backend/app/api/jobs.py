@@ -0,0 +1,42 @@
+"""
+后台任务API
+查询评估、匹配等异步任务的状态与结果
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from ..core import get_db
+from ..core.permissions import PermissionChecker, get_permission_checker
+from ..models import Demand
+from ..schemas import JobResponse
+from ..services import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["后台任务"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    permissions: PermissionChecker = Depends(get_permission_checker)
+):
+    """获取任务状态 - 仅可查看有权限访问的需求的任务；供应商推荐刷新任务仅管理员可查看"""
+    job = job_queue.get(db, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    if job.demand_id is None:
+        allowed = permissions.is_admin()
+    else:
+        demand = db.query(Demand).filter(Demand.id == job.demand_id).first()
+        allowed = demand is not None and permissions.can_view_demand(demand)
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有权限查看该任务"
+        )
+    
+    return job
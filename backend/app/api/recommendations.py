@@ -3,23 +3,65 @@
 提供需求-供应商匹配推荐功能
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, raiseload
 from typing import List, Optional
-from ..core import get_db, get_current_user_dependency
-from ..core.permissions import PermissionChecker, get_permission_checker
-from ..models import Demand, Enterprise, User, UserRole, EnterpriseType
+from ..core import get_async_db, get_current_user_async
+from ..core.loader import BatchLoader
+from ..core.pagination import CURSOR_DESCRIPTION, paginate
+from ..core.permissions import PermissionChecker, get_permission_checker_async
+from ..models import Demand, DemandMatch, Enterprise, User, UserRole, EnterpriseType
 from ..schemas import DemandResponse, EnterpriseResponse
+from ..services import matching_service
 
 router = APIRouter(prefix="/recommendations", tags=["推荐管理"])
 
 
+def match_reason(match: DemandMatch) -> str:
+    """匹配理由（多条理由合并为一句）"""
+    return "；".join(match.reasons or [])
+
+
+def demand_payload(demand: Demand) -> dict:
+    """需求数据：各列的值加上匹配结果"""
+    data = {column.key: getattr(demand, column.key) for column in Demand.__table__.columns}
+    data["match_results"] = demand.match_results
+    return data
+
+
+def load_matches(loader: BatchLoader, demands: List[Demand], with_enterprise: bool = False):
+    """
+    批量填充一页需求的匹配结果与供应商
+
+    匹配结果一次 IN 查询；供应商与（可选的）需求方企业合并为一次 Enterprise 的 IN 查询，
+    查询次数与每页条数无关。
+
+    Args:
+        loader: 当前请求的批量加载器
+        demands: 本页的需求
+        with_enterprise: 是否同时填充需求方企业（demand.enterprise）
+    """
+    loader.prime(
+        demands, "matches", DemandMatch, "id", key="demand_id", many=True,
+        order_by=(DemandMatch.demand_id, DemandMatch.rank)
+    )
+    loader.load()
+    
+    loader.prime([match for demand in demands for match in demand.matches], "vendor", Enterprise, "vendor_id")
+    if with_enterprise:
+        loader.prime(demands, "enterprise", Enterprise, "enterprise_id")
+    loader.load()
+
+
 @router.get("/my-suppliers")
-def get_my_matched_suppliers(
+async def get_my_matched_suppliers(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency),
-    permissions: PermissionChecker = Depends(get_permission_checker)
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
 ):
     """
     获取匹配给我的供应商列表（需求方用户使用）
@@ -42,56 +84,60 @@ def get_my_matched_suppliers(
             detail="用户未关联企业"
         )
     
-    # 获取用户企业的需求
-    query = db.query(Demand)
-    
-    if permissions.is_demand():
-        query = query.filter(Demand.enterprise_id == current_user.enterprise_id)
-    
-    # 只获取已匹配的需求
-    query = query.filter(Demand.match_results.isnot(None))
-    query = query.order_by(Demand.created_at.desc())
-    
-    total = query.count()
-    demands = query.offset(skip).limit(limit).all()
-    
-    # 构建返回数据：需求 + 匹配的供应商
-    results = []
-    for demand in demands:
-        match_results = demand.match_results or []
+    def load(session: Session) -> dict:
+        # 获取用户企业的需求
+        query = session.query(Demand)
+        
+        if permissions.is_demand():
+            query = query.filter(Demand.enterprise_id == current_user.enterprise_id)
         
-        # 获取匹配的供应商企业信息
-        matched_suppliers = []
-        for match in match_results[:5]:  # 只取前5个推荐
-            supplier_id = match.get('vendor_id')
-            if supplier_id:
-                supplier = db.query(Enterprise).filter(Enterprise.id == supplier_id).first()
-                if supplier:
-                    matched_suppliers.append({
-                        "enterprise": supplier,
-                        "score": match.get('score', 0),
-                        "reason": match.get('reason', '')
-                    })
+        # 只获取已匹配的需求
+        query = query.filter(Demand.matches.any())
+        query = query.order_by(Demand.created_at.desc())
         
-        results.append({
-            "demand": demand,
-            "matched_suppliers": matched_suppliers,
-            "match_count": len(matched_suppliers)
+        # 关系由批量加载器填充（raiseload：遗漏时报错，不会逐条查询）
+        page = paginate(
+            query.options(raiseload("*")), skip, limit, cursor, Demand.created_at, Demand.id
+        )
+        load_matches(BatchLoader(session), page.items)
+        
+        # 构建返回数据：需求 + 匹配的供应商
+        results = []
+        for demand in page.items:
+            # 匹配的供应商企业信息（只取前5个推荐）
+            matched_suppliers = [
+                {
+                    "enterprise": match.vendor,
+                    "score": match.score,
+                    "reason": match_reason(match)
+                }
+                for match in demand.matches[:5]
+            ]
+            
+            results.append({
+                "demand": demand_payload(demand),
+                "matched_suppliers": matched_suppliers,
+                "match_count": len(matched_suppliers)
+            })
+        
+        # 在会话内完成序列化，返回后不再触发数据库访问
+        return jsonable_encoder({
+            "total": page.total,
+            "items": results,
+            "next_cursor": page.next_cursor
         })
     
-    return {
-        "total": total,
-        "items": results
-    }
+    return await db.run_sync(load)
 
 
 @router.get("/my-clients")
-def get_my_matched_clients(
+async def get_my_matched_clients(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency),
-    permissions: PermissionChecker = Depends(get_permission_checker)
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
 ):
     """
     获取匹配给我的需求客户列表（供应方用户使用）
@@ -114,60 +160,55 @@ def get_my_matched_clients(
             detail="用户未关联企业"
         )
     
-    # 验证企业是供应方
-    if not permissions.is_admin():
-        enterprise = db.query(Enterprise).filter(Enterprise.id == current_user.enterprise_id).first()
-        if not enterprise or enterprise.enterprise_type not in [EnterpriseType.SUPPLY, EnterpriseType.BOTH]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="企业类型不是供应方"
-            )
-    
-    # 获取所有已匹配的需求
-    query = db.query(Demand).filter(Demand.match_results.isnot(None))
-    query = query.order_by(Demand.created_at.desc())
-    
-    all_demands = query.all()
-    
-    # 过滤出匹配到当前供应商的需求
-    matched_demands = []
-    for demand in all_demands:
-        match_results = demand.match_results or []
+    def load(session: Session) -> dict:
+        # 验证企业是供应方
+        if not permissions.is_admin():
+            enterprise = session.query(Enterprise).filter(Enterprise.id == current_user.enterprise_id).first()
+            if not enterprise or enterprise.enterprise_type not in [EnterpriseType.SUPPLY, EnterpriseType.BOTH]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="企业类型不是供应方"
+                )
         
-        # 检查当前供应商是否在推荐列表中
-        for match in match_results:
-            if match.get('vendor_id') == current_user.enterprise_id:
-                # 获取需求企业信息
-                demand_enterprise = db.query(Enterprise).filter(
-                    Enterprise.id == demand.enterprise_id
-                ).first()
-                
-                matched_demands.append({
-                    "demand": demand,
-                    "client_enterprise": demand_enterprise,
-                    "match_score": match.get('score', 0),
-                    "match_reason": match.get('reason', '')
-                })
-                break
-    
-    # 分页
-    total = len(matched_demands)
-    start = skip
-    end = skip + limit
-    paginated_results = matched_demands[start:end]
+        # 匹配到当前供应商的需求（vendor_id 索引 + SQL 分页）
+        query = session.query(DemandMatch).join(DemandMatch.demand).filter(
+            DemandMatch.vendor_id == current_user.enterprise_id
+        ).order_by(Demand.created_at.desc(), Demand.id.desc())
+        
+        page = paginate(
+            query.options(raiseload("*"), contains_eager(DemandMatch.demand).raiseload("*")),
+            skip, limit, cursor, Demand.created_at, Demand.id,
+            key=lambda match: (match.demand.created_at, match.demand.id)
+        )
+        load_matches(BatchLoader(session), [match.demand for match in page.items], with_enterprise=True)
+        
+        paginated_results = [
+            {
+                "demand": demand_payload(match.demand),
+                "client_enterprise": match.demand.enterprise,
+                "match_score": match.score,
+                "match_reason": match_reason(match)
+            }
+            for match in page.items
+        ]
+        
+        # 在会话内完成序列化，返回后不再触发数据库访问
+        return jsonable_encoder({
+            "total": page.total,
+            "items": paginated_results,
+            "next_cursor": page.next_cursor
+        })
     
-    return {
-        "total": total,
-        "items": paginated_results
-    }
+    return await db.run_sync(load)
 
 
 @router.get("/admin/all-matches")
-def get_all_matches(
+async def get_all_matches(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    permissions: PermissionChecker = Depends(get_permission_checker)
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
 ):
     """
     获取所有匹配情况（管理员专用）
@@ -181,44 +222,60 @@ def get_all_matches(
             detail="只有管理员可以查看所有匹配情况"
         )
     
-    # 获取所有已匹配的需求
-    query = db.query(Demand).filter(Demand.match_results.isnot(None))
-    query = query.order_by(Demand.created_at.desc())
-    
-    total = query.count()
-    demands = query.offset(skip).limit(limit).all()
-    
-    # 构建完整的匹配数据
-    results = []
-    for demand in demands:
-        # 获取需求企业信息
-        demand_enterprise = db.query(Enterprise).filter(
-            Enterprise.id == demand.enterprise_id
-        ).first()
+    def load(session: Session) -> dict:
+        # 获取所有已匹配的需求
+        query = session.query(Demand).filter(Demand.matches.any())
+        query = query.order_by(Demand.created_at.desc())
         
-        match_results = demand.match_results or []
+        page = paginate(
+            query.options(raiseload("*")), skip, limit, cursor, Demand.created_at, Demand.id
+        )
+        load_matches(BatchLoader(session), page.items, with_enterprise=True)
         
-        # 获取所有匹配的供应商信息
-        matched_suppliers = []
-        for match in match_results:
-            supplier_id = match.get('vendor_id')
-            if supplier_id:
-                supplier = db.query(Enterprise).filter(Enterprise.id == supplier_id).first()
-                if supplier:
-                    matched_suppliers.append({
-                        "enterprise": supplier,
-                        "score": match.get('score', 0),
-                        "reason": match.get('reason', '')
-                    })
+        # 构建完整的匹配数据
+        results = []
+        for demand in page.items:
+            # 所有匹配的供应商信息
+            matched_suppliers = [
+                {
+                    "enterprise": match.vendor,
+                    "score": match.score,
+                    "reason": match_reason(match)
+                }
+                for match in demand.matches
+            ]
+            
+            results.append({
+                "demand": demand_payload(demand),
+                "demand_enterprise": demand.enterprise,
+                "matched_suppliers": matched_suppliers,
+                "match_count": len(matched_suppliers)
+            })
         
-        results.append({
-            "demand": demand,
-            "demand_enterprise": demand_enterprise,
-            "matched_suppliers": matched_suppliers,
-            "match_count": len(matched_suppliers)
+        # 在会话内完成序列化，返回后不再触发数据库访问
+        return jsonable_encoder({
+            "total": page.total,
+            "items": results,
+            "next_cursor": page.next_cursor
         })
     
-    return {
-        "total": total,
-        "items": results
-    }
+    return await db.run_sync(load)
+
+
+@router.get("/admin/score-cache")
+async def get_score_cache_stats(
+    db: AsyncSession = Depends(get_async_db),
+    permissions: PermissionChecker = Depends(get_permission_checker_async)
+):
+    """
+    匹配分数缓存统计（管理员专用）
+    
+    返回缓存命中/未命中次数、命中率、写入次数及缓存行数
+    """
+    if not permissions.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以查看缓存统计"
+        )
+    
+    return await db.run_sync(matching_service.score_cache.stats)
@@ -0,0 +1,34 @@
+"""
+系统监控API
+数据库连接池与写队列指标（管理员专用）
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from ..core.async_database import async_pool_status
+from ..core.database import engine, replicas
+from ..core.db_pool import pool_status
+from ..core.permissions import PermissionChecker, get_permission_checker
+from ..core.write_queue import write_queue
+
+router = APIRouter(prefix="/system", tags=["系统监控"])
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(permissions: PermissionChecker = Depends(get_permission_checker)):
+    """
+    数据库连接池指标（管理员专用）
+    
+    返回当前进程同步/异步引擎连接池的借出/空闲/溢出连接数、借出等待时间与超时次数，以及写队列的合并提交统计与只读副本的健康状态；
+    每个 uvicorn worker 进程有各自的连接池，返回的是处理本次请求的进程（pid）的指标
+    """
+    if not permissions.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以查看连接池指标"
+        )
+    
+    return {
+        "pool": pool_status(engine),
+        "async_pool": async_pool_status(),
+        "replicas": replicas.status(),
+        "write_queue": write_queue.stats()
+    }
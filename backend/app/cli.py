@@ -0,0 +1,202 @@
+"""
+命令行工具
+
+用法:
+    python -m app.cli rematch --ids 1,2,3
+    python -m app.cli rematch --status submitted evaluated --top-k 5 --workers 4
+    python -m app.cli evaluate --status submitted
+    python -m app.cli worker
+    python -m app.cli build-recommendations
+    python -m app.cli check-plans --analyze
+"""
+import argparse
+import sys
+from typing import List, Optional
+from .core.config import settings
+from .core.database import SessionLocal
+from .models import DemandStatus
+
+
+def _parse_ids(value: str) -> List[int]:
+    """解析逗号分隔的需求ID"""
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的需求ID: {value}")
+
+
+def rematch(args: argparse.Namespace) -> int:
+    """批量重新匹配需求"""
+    from .services import matching_service
+    from .services.batch_matching import BatchMatcher
+
+    matcher = BatchMatcher(
+        matching_service,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        write_size=settings.BATCH_MATCH_WRITE_SIZE
+    )
+    statuses = [DemandStatus(value) for value in args.status or []]
+
+    db = SessionLocal()
+    try:
+        demands = matcher.select_demands(db, args.ids, statuses)
+        print(f"待匹配需求: {len(demands)} 个")
+        if not demands:
+            return 0
+
+        def progress(done: int, total: int):
+            print(f"\r评分进度: {done}/{total} ({done * 100 // total}%)", end="", flush=True)
+
+        summary = matcher.rematch(db, demands, args.top_k, progress=progress)
+        print()
+        print(
+            f"✅ 已匹配 {summary['matched']}/{summary['total']} 个需求，"
+            f"供应商 {summary['vendor_count']} 个，耗时 {summary['elapsed_seconds']} 秒"
+        )
+        return 0
+    finally:
+        db.close()
+
+
+def evaluate(args: argparse.Namespace) -> int:
+    """批量评估需求"""
+    from .services import demand_workflow
+
+    statuses = [DemandStatus(value) for value in args.status or []]
+
+    db = SessionLocal()
+    try:
+        summary = demand_workflow.evaluate_demands(db, args.ids, statuses, write_size=args.write_size)
+        print(f"✅ 已评估 {summary['evaluated']}/{summary['total']} 个需求，耗时 {summary['elapsed_seconds']} 秒")
+        return 0
+    finally:
+        db.close()
+
+
+def worker(args: argparse.Namespace) -> int:
+    """运行后台任务 worker"""
+    from .services import job_queue
+    from .services.job_queue import default_worker_id
+
+    worker_id = args.worker_id or default_worker_id()
+    print(f"任务 worker 已启动: {worker_id}")
+
+    def report(job):
+        target = f"需求 {job.demand_id}" if job.demand_id is not None else f"企业 {job.enterprise_id}"
+        print(f"任务 {job.id} [{job.job_type.value}] {target}: {job.status.value}", flush=True)
+
+    try:
+        processed = job_queue.run_worker(
+            worker_id=worker_id,
+            poll_interval=args.poll_interval,
+            max_jobs=args.max_jobs,
+            stop_when_idle=args.once,
+            on_job=report,
+            sweep_interval=args.sweep_interval
+        )
+    except KeyboardInterrupt:
+        return 0
+    print(f"✅ 共处理 {processed} 个任务")
+    return 0
+
+
+def build_recommendations(args: argparse.Namespace) -> int:
+    """构建推荐物化表（首次部署时执行，或 --force 全量重建）"""
+    from .services import matching_service
+
+    store = matching_service.recommendations
+    db = SessionLocal()
+    try:
+        if args.force:
+            store.rebuild(db)
+        else:
+            store.ensure_built(db)
+        scheduled = store.schedule_stale(db)
+    finally:
+        db.close()
+    print(f"✅ 推荐表已构建，提交刷新任务 {scheduled} 个")
+    return 0
+
+
+def check_plans(args: argparse.Namespace) -> int:
+    """检查主要查询是否命中预期索引"""
+    from .core.query_plans import check_query_plans
+
+    db = SessionLocal()
+    try:
+        report = check_query_plans(db, analyze=args.analyze)
+    finally:
+        db.close()
+
+    for name, item in report.items():
+        print(f"{'✅' if item['ok'] else '❌'} {name}: 预期索引 {item['index']}")
+        for line in item["plan"]:
+            print(f"    {line}")
+    return 0 if all(item["ok"] for item in report.values()) else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=f"{settings.APP_NAME} 命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rematch_parser = subparsers.add_parser("rematch", help="批量重新匹配需求")
+    rematch_parser.add_argument("--ids", type=_parse_ids, help="需求ID，逗号分隔")
+    rematch_parser.add_argument(
+        "--status", nargs="+", choices=[s.value for s in DemandStatus], help="按需求状态筛选"
+    )
+    rematch_parser.add_argument("--top-k", type=int, default=5, help="每个需求保留的供应商数量")
+    rematch_parser.add_argument(
+        "--workers", type=int, default=settings.BATCH_MATCH_WORKERS, help="评分进程数，0 表示按 CPU 核数"
+    )
+    rematch_parser.add_argument(
+        "--chunk-size", type=int, default=settings.BATCH_MATCH_CHUNK_SIZE, help="每个进程任务包含的需求数"
+    )
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="批量评估需求")
+    evaluate_parser.add_argument("--ids", type=_parse_ids, help="需求ID，逗号分隔")
+    evaluate_parser.add_argument(
+        "--status", nargs="+", choices=[s.value for s in DemandStatus], help="按需求状态筛选"
+    )
+    evaluate_parser.add_argument(
+        "--write-size", type=int, default=settings.BATCH_EVALUATE_WRITE_SIZE, help="每个写事务更新的需求数"
+    )
+
+    worker_parser = subparsers.add_parser("worker", help="运行后台任务 worker（评估、匹配、推荐刷新）")
+    worker_parser.add_argument("--worker-id", help="worker 标识，默认 主机名:进程号")
+    worker_parser.add_argument(
+        "--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL, help="队列为空时的轮询间隔（秒）"
+    )
+    worker_parser.add_argument("--max-jobs", type=int, help="处理指定数量的任务后退出")
+    worker_parser.add_argument("--once", action="store_true", help="处理完当前队列后退出")
+    worker_parser.add_argument(
+        "--sweep-interval", type=float, default=settings.RECOMMENDATION_SWEEP_SECONDS,
+        help="检查过期推荐列表并提交刷新任务、清理已结束任务的间隔（秒），0 表示不检查"
+    )
+
+    build_parser = subparsers.add_parser("build-recommendations", help="构建推荐物化表并为过期列表提交刷新任务")
+    build_parser.add_argument("--force", action="store_true", help="全量重建（默认只在推荐表为空时构建）")
+
+    plans_parser = subparsers.add_parser("check-plans", help="检查主要查询的执行计划是否命中索引")
+    plans_parser.add_argument("--analyze", action="store_true", help="先执行 ANALYZE 更新统计信息")
+
+    args = parser.parse_args(argv)
+    if args.command == "rematch":
+        if not args.ids and not args.status:
+            parser.error("请指定 --ids 或 --status")
+        return rematch(args)
+    if args.command == "evaluate":
+        if not args.ids and not args.status:
+            parser.error("请指定 --ids 或 --status")
+        return evaluate(args)
+    if args.command == "worker":
+        return worker(args)
+    if args.command == "build-recommendations":
+        return build_recommendations(args)
+    if args.command == "check-plans":
+        return check_plans(args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
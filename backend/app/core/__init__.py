@@ -1,12 +1,14 @@
 from .config import settings
-from .database import Base, engine, get_db
+from .database import Base, engine, get_db, get_primary_db, get_read_db
+from .async_database import get_async_db, get_async_read_db
 from .security import (
     verify_password,
     get_password_hash,
     create_access_token,
     decode_access_token,
     get_current_user,
-    get_current_user_dependency
+    get_current_user_dependency,
+    get_current_user_async
 )
 
 __all__ = [
@@ -14,10 +16,15 @@ __all__ = [
     "Base",
     "engine",
     "get_db",
+    "get_primary_db",
+    "get_read_db",
+    "get_async_db",
+    "get_async_read_db",
     "verify_password",
     "get_password_hash",
     "create_access_token",
     "decode_access_token",
     "get_current_user",
-    "get_current_user_dependency"
+    "get_current_user_dependency",
+    "get_current_user_async"
 ]
@@ -0,0 +1,108 @@
+"""
+异步数据库引擎
+读多写少的列表/详情接口使用 AsyncSession：等待数据库时让出事件循环，不占用线程池线程，
+一个 worker 可以同时处理大量进行中的请求。驱动按 DATABASE_URL 选择：
+SQLite 使用 aiosqlite，PostgreSQL 使用 asyncpg。
+写操作仍使用同步会话（SQLite 下经写队列合并提交）。
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from .config import settings
+from .database import READ_METHODS, configure_engine, create_replica_set, engine_options
+from .db_pool import pool_status
+from .replicas import RoutingSession
+
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: Optional[str] = None) -> str:
+    """
+    异步引擎的连接串
+
+    Args:
+        url: 同步连接串，默认 DATABASE_URL；已指定 DATABASE_ASYNC_URL 时直接使用后者
+
+    Returns:
+        使用异步驱动的连接串
+    """
+    if url is None and settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+
+    parsed = make_url(url or settings.DATABASE_URL)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持异步访问的数据库: {backend}，请设置 DATABASE_ASYNC_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_replica_engines: List[AsyncEngine] = []
+_async_sessions: Optional[async_sessionmaker] = None
+_async_read_sessions: Optional[async_sessionmaker] = None
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    return configure_engine(create_async_engine(url, **engine_options(url, is_async=True)))
+
+
+def get_async_engine() -> AsyncEngine:
+    """异步引擎（首次使用时创建，未使用异步接口时不需要安装异步驱动）"""
+    global _async_engine, _async_replica_engines, _async_sessions, _async_read_sessions
+    if _async_engine is None:
+        _async_engine = _create_async_engine(async_database_url())
+        _async_replica_engines = [
+            _create_async_engine(async_database_url(url)) for url in settings.DATABASE_REPLICA_URLS
+        ]
+        _async_sessions = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+        _async_read_sessions = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False,
+            sync_session_class=RoutingSession, replicas=create_replica_set(_async_replica_engines)
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """创建异步会话"""
+    get_async_engine()
+    return _async_sessions()
+
+
+def AsyncReadSessionLocal() -> AsyncSession:
+    """创建读写分离的异步会话（未配置只读副本时全部使用主库）"""
+    get_async_engine()
+    return _async_read_sessions()
+
+
+def async_pool_status() -> Optional[Dict[str, Any]]:
+    """异步引擎的连接池状态，引擎尚未创建时为 None"""
+    return pool_status(_async_engine) if _async_engine is not None else None
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """只读异步数据库会话依赖注入：查询轮询分配到只读副本，写入的会话留在主库"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def get_async_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """异步数据库依赖注入（配置了只读副本时，GET 请求自动使用读写分离会话）"""
+    use_replicas = settings.DATABASE_REPLICA_URLS and request.method in READ_METHODS
+    async with (AsyncReadSessionLocal() if use_replicas else AsyncSessionLocal()) as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """
+    关闭异步引擎的连接
+
+    应用关闭时调用；aiosqlite 的每个连接各有一个线程，连接池中的连接不关闭时进程无法退出
+    """
+    for async_engine in [_async_engine, *_async_replica_engines]:
+        if async_engine is not None:
+            await async_engine.dispose()
@@ -10,6 +10,62 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./ai_platform.db"
+    DATABASE_AUTO_MIGRATE: bool = True  # 启动时执行 Alembic 升级；多实例部署建议关闭，发布前执行 alembic upgrade head
+    DATABASE_ASYNC_URL: str = ""  # 异步接口的连接串，为空时由 DATABASE_URL 推导（SQLite 使用 aiosqlite，PostgreSQL 使用 asyncpg）
+    DATABASE_REPLICA_URLS: List[str] = []  # 只读副本连接串（JSON 数组），GET 请求的查询轮询分配到副本，为空时全部使用主库
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 10.0  # 只读副本健康检查的间隔（秒），检查失败的副本在此期间改用主库
+    DATABASE_POOL_SIZE: int = 5  # 每个进程连接池保持的连接数（SQLite 使用默认连接池），数据库总连接数约为 worker 数 ×（POOL_SIZE + MAX_OVERFLOW）
+    DATABASE_MAX_OVERFLOW: int = 10  # 连接池满时允许临时创建的额外连接数
+    DATABASE_POOL_TIMEOUT: float = 30.0  # 连接池耗尽时等待连接的超时（秒）
+    DATABASE_POOL_RECYCLE: int = 1800  # 连接使用超过该时间（秒）后重建，-1 表示不重建
+    DATABASE_POOL_PRE_PING: bool = True  # 借出连接前检测连接是否可用
+    DATABASE_POOL_SLOW_WAIT_MS: float = 100.0  # 等待连接超过该时间（毫秒）时记录警告日志，0 表示不记录
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 0  # PostgreSQL 单条语句超时（毫秒），0 表示不限
+    SQLITE_JOURNAL_MODE: str = "WAL"  # SQLite 日志模式，WAL 下读操作不被写事务阻塞
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # SQLite 同步级别，WAL 下 NORMAL 只在检查点时 fsync
+    SQLITE_MMAP_SIZE: int = 256 * 1024 ** 2  # SQLite 内存映射读取的字节数，0 表示不使用
+    SQLITE_CACHE_SIZE: int = -64000  # SQLite 每个连接的页缓存，负数表示 KB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # SQLite 等待写锁的超时（毫秒）
+    SQLITE_WRITE_QUEUE: bool = True  # SQLite 下登录时间、需求修改、匹配结果的写操作由单个写线程合并提交，其余写操作各自提交
+    SQLITE_GROUP_COMMIT_MAX_BATCH: int = 64  # 写线程每次合并提交的最大写操作数
+    SQLITE_GROUP_COMMIT_WAIT_MS: float = 2.0  # 写线程收到写操作后等待更多写操作加入同一提交的时间（毫秒）
+    
+    # Matching
+    MATCH_FALLBACK_CANDIDATES: int = 50  # 无共同标签时参与评分的兜底候选数量
+    MATCH_TOPK_STRATEGY: str = "threshold"  # threshold（阈值算法）/ exhaustive（全量评分）
+    MATCH_FILTER_BUDGET_MS: float = 50.0  # 硬条件过滤阶段的时间预算（毫秒），超出时记录日志
+    MATCH_RETRIEVAL_CAP: int = 5000  # 候选检索阶段保留的候选数上限，0 表示不限
+    MATCH_RETRIEVAL_BUDGET_MS: float = 50.0  # 候选检索阶段的时间预算（毫秒），超出时记录日志
+    MATCH_SCORING_CAP: int = 100  # 向量化评分阶段保留的候选数上限，0 表示不限
+    MATCH_SCORING_BUDGET_MS: float = 200.0  # 向量化评分阶段的时间预算（毫秒），超出时记录日志
+    MATCH_RERANKER: str = ""  # 重排器：空表示不重排 / cases（成功案例与行业经验文本重排）
+    MATCH_RERANK_CAP: int = 20  # 重排器处理的候选数（评分结果的前 N 名）
+    MATCH_RERANK_BUDGET_MS: float = 300.0  # 重排阶段的时间预算（毫秒），超时保留评分阶段的排序
+    MATCH_RERANK_CONCURRENCY: int = 4  # 同时运行的重排数上限（含已超时仍在运行的），已满时跳过重排
+    MATCH_RERANK_CASE_WEIGHT: float = 0.3  # cases 重排器中案例文本相似度在语义维度中的占比
+    MATCH_CONFIDENTIAL_MIN_CREDIT: float = 80.0  # 机密需求要求的供应商最低信用分
+    MATCH_SECRET_MIN_CREDIT: float = 90.0  # 绝密需求要求的供应商最低信用分
+    MATCH_SCORE_CACHE_ENABLED: bool = True  # 是否持久化缓存需求-供应商匹配分数
+    RECOMMENDATION_TOP_N: int = 50  # 推荐物化表为每个需求/供应商保留的推荐数量
+    BATCH_MATCH_WORKERS: int = 0  # 批量匹配进程数，0 表示按 CPU 核数
+    BATCH_MATCH_CHUNK_SIZE: int = 50  # 批量匹配每个进程任务包含的需求数
+    BATCH_MATCH_WRITE_SIZE: int = 500  # 批量匹配每个写事务更新的需求数
+    BATCH_EVALUATE_WRITE_SIZE: int = 1000  # 批量评估每个写事务更新的需求数
+    SEMANTIC_INDEX_PATH: str = "./data/semantic_index.joblib"  # 语义相似度索引文件
+    VENDOR_FEATURES_DIR: str = "./data/vendor_features"  # 多进程共享的供应商特征文件目录，为空时不启用
+    VENDOR_FEATURES_KEEP_VERSIONS: int = 3  # 保留的供应商特征文件版本数
+    VENDOR_FEATURES_CHECK_INTERVAL: float = 1.0  # 检查供应商特征新版本的最小间隔（秒）
+    VENDOR_FEATURES_PUBLISH_DELAY: float = 2.0  # 供应商变更后延迟发布新版本的时间（秒），合并连续的修改
+    
+    # Dataset upload
+    DATASET_UPLOAD_MAX_BYTES: int = 20 * 1024 ** 3  # 单个数据集文件的大小上限（字节）
+    
+    # Jobs
+    JOB_POLL_INTERVAL: float = 1.0  # worker 队列为空时的轮询间隔（秒）
+    JOB_LEASE_SECONDS: int = 300  # 任务租约时长，超时未完成的任务可被重新领取
+    JOB_MAX_ATTEMPTS: int = 3  # 单个任务最多被领取的次数
+    JOB_RETENTION_DAYS: float = 7  # 已结束任务的保留天数，worker 定期清理，0 表示不清理
+    RECOMMENDATION_SWEEP_SECONDS: float = 60.0  # worker 检查过期推荐列表并提交刷新任务的间隔（秒），0 表示不检查
     
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -1,22 +1,159 @@
-from sqlalchemy import create_engine
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .db_pool import MeteredAsyncQueuePool, MeteredQueuePool, PoolMetrics
+from .replicas import ReplicaSet, RoutingSession
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+
+def sqlite_pragmas() -> list:
+    """SQLite 连接参数（按配置生成的 PRAGMA 语句）"""
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+    ]
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """每个新连接设置日志模式、同步级别与缓存"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def is_memory_sqlite(url: str) -> bool:
+    """是否为 SQLite 内存数据库（每个连接各自独立）"""
+    return "sqlite" in url and make_url(url).database in (None, "", ":memory:")
+
+
+def engine_options(url: Optional[str] = None, is_async: bool = False) -> dict:
+    """
+    生成引擎参数
+
+    SQLite 文件数据库使用默认大小的连接池（同样记录指标）；
+    其他数据库使用配置的连接池参数，PostgreSQL 设置单条语句超时。
+
+    Args:
+        url: 连接串，默认 DATABASE_URL
+        is_async: 是否为异步引擎（连接池与 PostgreSQL 连接参数不同）
+    """
+    url = url or settings.DATABASE_URL
+    pool_class = MeteredAsyncQueuePool if is_async else MeteredQueuePool
+    if "sqlite" in url:
+        options = {"connect_args": {"check_same_thread": False}}
+        if not is_memory_sqlite(url):
+            options["poolclass"] = pool_class
+        return options
+
+    options = {
+        "poolclass": pool_class,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+    timeout_ms = int(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+    if url.startswith("postgresql") and timeout_ms > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def configure_engine(new_engine):
+    """SQLite 连接使用配置的 PRAGMA，连接池指标使用配置的慢等待阈值"""
+    sync_engine = getattr(new_engine, "sync_engine", new_engine)
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    if isinstance(sync_engine.pool, (MeteredQueuePool, MeteredAsyncQueuePool)):
+        sync_engine.pool.metrics = PoolMetrics(settings.DATABASE_POOL_SLOW_WAIT_MS)
+    return new_engine
+
+
+def create_database_engine(url: Optional[str] = None, **kwargs):
+    """
+    创建引擎
+
+    Args:
+        url: 连接串，默认 DATABASE_URL
+        kwargs: 覆盖默认的引擎参数
+    """
+    url = url or settings.DATABASE_URL
+    options = engine_options(url)
+    options.update(kwargs)
+    return configure_engine(create_engine(url, **options))
+
+
+def create_replica_set(engines: List) -> ReplicaSet:
+    """只读副本集合：副本连接出错时标记为不可用，等待下次健康检查"""
+    replica_set = ReplicaSet(
+        [getattr(e, "sync_engine", e) for e in engines], settings.DATABASE_REPLICA_CHECK_INTERVAL
+    )
+    for replica in replica_set.engines:
+        event.listen(replica, "handle_error", _replica_error_handler(replica_set, replica))
+    return replica_set
+
+
+def _replica_error_handler(replica_set: ReplicaSet, replica):
+    def handle_error(context):
+        if context.is_disconnect or context.connection is None:
+            replica_set.mark_failed(replica)
+    return handle_error
+
+
+engine = create_database_engine()
+replicas = create_replica_set([create_database_engine(url) for url in settings.DATABASE_REPLICA_URLS])
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 读写分离会话：查询使用只读副本，写入后留在主库（未配置副本时全部使用主库）
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas
+)
 
 Base = declarative_base()
 
+# 使用只读副本的请求方法
+READ_METHODS = ("GET", "HEAD")
 
-def get_db():
-    """数据库依赖注入"""
+
+def get_read_db():
+    """只读数据库会话依赖注入：查询轮询分配到只读副本，写入的会话留在主库"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_primary_db():
+    """
+    主库数据库会话依赖注入
+
+    GET 接口中也会写入的（如读取推荐时为过期列表提交刷新任务）使用主库：
+    写入前的查询不读副本，避免依据副本上过期的数据决定是否写入
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db(request: Request):
+    """数据库依赖注入（配置了只读副本时，GET 请求自动使用读写分离会话）"""
+    db = ReadSessionLocal() if replicas and request.method in READ_METHODS else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,113 @@
+"""
+数据库连接池指标
+记录借出连接的等待时间与超时次数，配合连接池当前的借出/空闲/溢出连接数，
+用于按 uvicorn worker 数量确定连接池大小，并在连接池耗尽变成请求超时之前发现问题。
+每个 worker 进程有各自的连接池，指标也是进程内的。
+"""
+from typing import Any, Dict
+import logging
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """借出连接的等待统计"""
+
+    def __init__(self, slow_wait_ms: float = 100.0):
+        """
+        Args:
+            slow_wait_ms: 等待超过该时间（毫秒）的借出记录警告日志，0 表示不记录
+        """
+        self.slow_wait_ms = slow_wait_ms
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            slow = self.slow_wait_ms > 0 and wait_ms >= self.slow_wait_ms
+            if slow:
+                self.slow_checkouts += 1
+        if timed_out:
+            logger.warning("等待数据库连接超时（%.0f 毫秒），连接池已耗尽", wait_ms)
+        elif slow:
+            logger.warning("等待数据库连接 %.0f 毫秒，连接池接近耗尽", wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+
+
+class _MeteredPool:
+    """借出连接时记录等待时间（与 QueuePool 及其异步版本组合使用）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.metrics.record((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() 等重建连接池时保留累计指标
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    """记录借出等待时间的 QueuePool"""
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    """记录借出等待时间的 AsyncAdaptedQueuePool（异步引擎使用）"""
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """
+    连接池当前状态与累计指标
+
+    Returns:
+        pid / pool_class / size / max_overflow / checked_out / idle / overflow，
+        记录指标的连接池另有 checkouts / slow_checkouts / timeouts / wait_ms_avg / wait_ms_max
+    """
+    pool = engine.pool
+    status = {"pid": os.getpid(), "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        })
+    if isinstance(pool, _MeteredPool):
+        status.update(pool.metrics.snapshot())
+    return status
@@ -0,0 +1,111 @@
+"""
+请求级批量加载器
+处理一页数据时先登记所有对象需要的关联（如匹配结果的供应商、需求的企业），
+再按实体类型各用一次 IN 查询取回，并写入对象的关系属性，之后访问这些关系不再触发查询。
+同一请求中重复出现的 ID（多个需求匹配到同一供应商）只查询一次。
+加载器取回的对象不预加载任何关系（raiseload），关系只能通过 prime 填充，遗漏时直接报错而不是逐条查询。
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+
+# 单条 IN 查询的参数上限（SQLite 默认 999 个变量）
+IN_CHUNK_SIZE = 500
+
+
+class BatchLoader:
+    """
+    批量加载器（每个请求创建一个）
+
+    用法：
+        loader = BatchLoader(db)
+        loader.prime(matches, "vendor", Enterprise, "vendor_id")
+        loader.prime(demands, "enterprise", Enterprise, "enterprise_id")
+        loader.load()  # Enterprise 只查询一次
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        # (模型, 查询列) -> {值: [对象]}
+        self._cache: Dict[Tuple[Any, str], Dict[Any, List[Any]]] = defaultdict(dict)
+        self._pending: Dict[Tuple[Any, str], set] = defaultdict(set)
+        self._order_by: Dict[Tuple[Any, str], Sequence] = {}
+        self._primes: List[Tuple[list, str, Any, str, str, bool]] = []
+        self.queries = 0
+
+    def want(self, model, ids: Iterable[Any], key: str = "id", order_by: Sequence = ()):
+        """登记需要加载的记录：model.<key> 的取值"""
+        cached = self._cache[(model, key)]
+        self._pending[(model, key)].update(value for value in ids if value is not None and value not in cached)
+        if order_by:
+            self._order_by[(model, key)] = order_by
+
+    def prime(
+        self,
+        objects: Iterable[Any],
+        relation: str,
+        model,
+        local_key: str,
+        key: str = "id",
+        many: bool = False,
+        order_by: Sequence = ()
+    ):
+        """
+        登记对象的关系属性，load() 时批量加载并写入
+
+        Args:
+            objects: 需要填充关系的对象
+            relation: 关系属性名
+            model: 关系的目标模型
+            local_key: 对象上用于关联的属性（如 vendor_id；一对多关系为 id）
+            key: 目标模型上的关联列（默认 id；一对多关系为外键列，如 demand_id）
+            many: 是否为一对多关系（属性值为列表）
+            order_by: 一对多关系中列表的排序
+        """
+        objects = list(objects)
+        self.want(model, (getattr(obj, local_key) for obj in objects), key, order_by)
+        self._primes.append((objects, relation, model, local_key, key, many))
+
+    def load(self):
+        """执行所有待加载的查询（每个实体类型一次），并填充登记的关系属性"""
+        for (model, key), values in list(self._pending.items()):
+            if values:
+                self._fetch(model, key, sorted(values))
+        self._pending.clear()
+
+        primes, self._primes = self._primes, []
+        for objects, relation, model, local_key, key, many in primes:
+            for obj in objects:
+                value = self.get_all(model, getattr(obj, local_key), key)
+                set_committed_value(obj, relation, value if many else (value[0] if value else None))
+
+    def get(self, model, value: Any, key: str = "id") -> Optional[Any]:
+        """按主键（或唯一列）取已加载的记录，尚未加载的先批量加载"""
+        found = self.get_all(model, value, key)
+        return found[0] if found else None
+
+    def get_all(self, model, value: Any, key: str = "id") -> List[Any]:
+        """按关联列取已加载的全部记录"""
+        cached = self._cache[(model, key)]
+        if value is not None and value not in cached:
+            self.want(model, [value], key)
+            pending = sorted(self._pending.pop((model, key)))
+            self._fetch(model, key, pending)
+        return cached.get(value, [])
+
+    def _fetch(self, model, key: str, values: list):
+        column = getattr(model, key)
+        cached = self._cache[(model, key)]
+        for value in values:
+            cached.setdefault(value, [])
+        order_by = self._order_by.get((model, key), ())
+        for start in range(0, len(values), IN_CHUNK_SIZE):
+            query = self.db.query(model).options(raiseload("*")).filter(
+                column.in_(values[start:start + IN_CHUNK_SIZE])
+            )
+            if order_by:
+                query = query.order_by(*order_by)
+            self.queries += 1
+            for row in query:
+                cached[getattr(row, key)].append(row)
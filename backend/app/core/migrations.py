@@ -0,0 +1,65 @@
+"""
+数据库迁移
+通过 Alembic 把数据库升级到最新版本（迁移脚本位于 backend/alembic/versions）。
+
+此前由 Base.metadata.create_all 建表、没有 alembic_version 表的数据库，按已有的列判断所处版本，
+补建之后版本未修改过的缺失表并 stamp 到该版本，再继续升级。
+"""
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from .database import Base, engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 由 create_all 建表的旧数据库：(版本, 表, 该版本新增的列)，按从新到旧判断
+LEGACY_REVISIONS = [
+    ("0003", "demands", "evaluation_cache"),
+    ("0002", "enterprises", "min_project_budget"),
+]
+LEGACY_BASELINE = "0001"
+
+# 初始版本中的表；旧数据库缺少时按当前模型补建（之后的版本修改这些表时需先检查是否已是新结构）
+LEGACY_BASELINE_TABLES = ("jobs", "match_scores", "recommendations", "tags")
+
+
+def alembic_config(connection=None) -> Config:
+    """
+    应用内使用的 Alembic 配置（沿用应用的日志配置与数据库连接）
+
+    Args:
+        connection: 复用的数据库连接，None 时由迁移环境按 DATABASE_URL 创建
+    """
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(bind: Engine = engine, revision: str = "head"):
+    """把数据库升级到指定版本（默认最新）"""
+    with bind.begin() as connection:
+        config = alembic_config(connection)
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "demands" in tables:
+            _stamp_legacy(connection, config, tables)
+        command.upgrade(config, revision)
+
+
+def _stamp_legacy(connection, config: Config, tables: set):
+    """旧数据库纳入 Alembic 管理"""
+    inspector = inspect(connection)
+    current = LEGACY_BASELINE
+    for revision, table, column in LEGACY_REVISIONS:
+        if table in tables and column in {c["name"] for c in inspector.get_columns(table)}:
+            current = revision
+            break
+
+    missing = [Base.metadata.tables[name] for name in LEGACY_BASELINE_TABLES if name not in tables]
+    if missing:
+        Base.metadata.create_all(bind=connection, tables=missing)
+    command.stamp(config, current)
@@ -0,0 +1,87 @@
+"""
+列表分页
+默认使用 skip/limit（偏移分页，返回总数）；传入 cursor 时使用游标分页：
+按 (created_at, id) 倒序，游标记录上一页最后一条的 (created_at, id)，
+下一页从索引中该位置之后开始扫描，不统计总数，也不随页码加深而变慢。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+CURSOR_DESCRIPTION = "游标分页：首页传空值（cursor=），之后传上一页返回的 next_cursor；不传时按 skip/limit 分页"
+
+
+class Page(NamedTuple):
+    """一页数据：偏移分页时 total 为总数、next_cursor 为 None；游标分页时 total 为 None"""
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(created_at, id) -> 游标字符串"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """游标字符串 -> (created_at, id)，格式错误时返回 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+
+
+def after_cursor(created_at_column, id_column, created_at: datetime, row_id: int) -> list:
+    """按 (created_at, id) 倒序时位于游标之后的记录"""
+    return [
+        # 第一个条件确定时间列上的索引扫描范围，第二个条件排除同一时间已返回的记录
+        created_at_column <= created_at,
+        or_(created_at_column < created_at, and_(created_at_column == created_at, id_column < row_id))
+    ]
+
+
+def paginate(
+    query,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    created_at_column,
+    id_column,
+    key: Callable[[Any], Tuple[datetime, int]] = lambda item: (item.created_at, item.id)
+) -> Page:
+    """
+    分页查询
+
+    Args:
+        query: 已应用筛选条件的查询（偏移分页时沿用其排序）
+        skip: 偏移分页跳过的条数
+        limit: 每页条数
+        cursor: None 表示偏移分页；空字符串表示游标分页的第一页
+        created_at_column: 游标排序的时间列
+        id_column: 游标排序的 ID 列（时间相同时区分先后）
+        key: 从查询结果中取出 (created_at, id)
+
+    Returns:
+        Page
+    """
+    if cursor is None:
+        total = query.count()
+        return Page(query.offset(skip).limit(limit).all(), total, None)
+
+    query = query.order_by(None).order_by(created_at_column.desc(), id_column.desc())
+    if cursor:
+        query = query.filter(*after_cursor(created_at_column, id_column, *decode_cursor(cursor)))
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+    return Page(items, None, next_cursor)
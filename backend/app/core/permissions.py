@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from .database import get_db
 from ..models.user import User, UserRole
-from .security import get_current_user_dependency as get_current_user
+from .security import get_current_user_dependency as get_current_user, get_current_user_async
 
 
 def require_roles(allowed_roles: List[UserRole]):
@@ -161,6 +161,11 @@ def get_permission_checker(current_user: User = Depends(get_current_user)) -> Pe
     return PermissionChecker(current_user)
 
 
+async def get_permission_checker_async(current_user: User = Depends(get_current_user_async)) -> PermissionChecker:
+    """获取权限检查器（异步接口使用）"""
+    return PermissionChecker(current_user)
+
+
 def filter_enterprises_by_permission(
     query,
     user: User,
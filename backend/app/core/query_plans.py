@@ -0,0 +1,134 @@
+"""
+查询计划检查
+对需求列表、匹配与推荐的主要查询执行 EXPLAIN，确认命中预期的索引（支持 SQLite / PostgreSQL）
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from ..models.demand import Demand, DemandStatus
+from ..models.demand_match import DemandMatch
+from ..models.tag import DemandTag
+from ..models.enterprise import Enterprise, EnterpriseStatus
+from ..services.tag_index import VENDOR_TYPES, open_demand_filter
+from .pagination import after_cursor
+
+
+class PlannedQuery(NamedTuple):
+    """需要检查的查询：名称、预期使用的索引、构造查询语句的函数"""
+    name: str
+    index: str
+    build: Callable
+
+
+HOT_QUERIES: List[PlannedQuery] = [
+    PlannedQuery(
+        "需求列表（全部，按创建时间倒序）", "ix_demands_created_at",
+        lambda: select(Demand).order_by(Demand.created_at.desc()).limit(20)
+    ),
+    PlannedQuery(
+        "需求列表（本企业，按创建时间倒序）", "ix_demands_enterprise_created",
+        lambda: select(Demand).where(Demand.enterprise_id == 1).order_by(Demand.created_at.desc()).limit(20)
+    ),
+    PlannedQuery(
+        "需求列表（按状态，按创建时间倒序）", "ix_demands_status_created",
+        lambda: select(Demand).where(Demand.status == DemandStatus.SUBMITTED).order_by(Demand.created_at.desc()).limit(20)
+    ),
+    PlannedQuery(
+        "开放需求（匹配约束与标签索引）", "ix_demands_status_created",
+        lambda: select(Demand.id, Demand.industry_tags, Demand.scenario_tags).where(open_demand_filter())
+    ),
+    PlannedQuery(
+        "开放需求（按创建时间倒序）", "ix_demands_open_created",
+        lambda: select(Demand.id).where(open_demand_filter()).order_by(Demand.created_at.desc()).limit(20)
+    ),
+    PlannedQuery(
+        "需求列表（游标分页）", "ix_demands_created_at",
+        lambda: select(Demand).where(
+            *after_cursor(Demand.created_at, Demand.id, datetime(2024, 1, 1), 1000)
+        ).order_by(Demand.created_at.desc(), Demand.id.desc()).limit(21)
+    ),
+    PlannedQuery(
+        "需求列表（本企业，游标分页）", "ix_demands_enterprise_created",
+        lambda: select(Demand).where(
+            Demand.enterprise_id == 1, *after_cursor(Demand.created_at, Demand.id, datetime(2024, 1, 1), 1000)
+        ).order_by(Demand.created_at.desc(), Demand.id.desc()).limit(21)
+    ),
+    PlannedQuery(
+        "企业列表（游标分页）", "ix_enterprises_created_at",
+        lambda: select(Enterprise).where(
+            *after_cursor(Enterprise.created_at, Enterprise.id, datetime(2024, 1, 1), 1000)
+        ).order_by(Enterprise.created_at.desc(), Enterprise.id.desc()).limit(21)
+    ),
+    PlannedQuery(
+        "需求列表（按标签筛选）", "ix_demand_tags_tag",
+        lambda: select(Demand).where(Demand.id.in_(
+            select(DemandTag.demand_id).where(DemandTag.tag_id.in_([1, 2])).group_by(
+                DemandTag.demand_id
+            ).having(func.count() == 2)
+        )).order_by(Demand.created_at.desc()).limit(20)
+    ),
+    PlannedQuery(
+        "匹配到供应商的需求（推荐给我的客户）", "ix_demand_matches_vendor",
+        lambda: select(DemandMatch.id).where(DemandMatch.vendor_id == 1)
+    ),
+    PlannedQuery(
+        "需求的匹配结果（按排名）", "ix_demand_matches_demand_rank",
+        lambda: select(DemandMatch).where(DemandMatch.demand_id.in_([1, 2, 3])).order_by(DemandMatch.rank)
+    ),
+    PlannedQuery(
+        "已认证供应商（匹配候选）", "ix_enterprises_status_type",
+        lambda: select(Enterprise.id).where(
+            Enterprise.enterprise_type.in_(VENDOR_TYPES),
+            Enterprise.status == EnterpriseStatus.VERIFIED
+        )
+    ),
+]
+
+
+def explain(db: Session, statement) -> List[str]:
+    """
+    获取查询计划
+
+    Args:
+        db: 数据库会话
+        statement: 查询语句
+
+    Returns:
+        查询计划的各行文本
+    """
+    bind = db.get_bind()
+    sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "sqlite":
+        return [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    if bind.dialect.name == "postgresql":
+        # 测试库数据量小时规划器倾向顺序扫描，关闭后检查的是索引是否可用
+        with db.begin_nested():
+            db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            return [row[0] for row in db.connection().exec_driver_sql(f"EXPLAIN {sql}")]
+    raise ValueError(f"不支持检查 {bind.dialect.name} 的查询计划")
+
+
+def check_query_plans(db: Session, analyze: bool = False) -> Dict[str, dict]:
+    """
+    检查主要查询是否命中预期索引
+
+    Args:
+        db: 数据库会话
+        analyze: 是否先执行 ANALYZE 更新统计信息（规划器依据统计信息选择索引）
+
+    Returns:
+        {查询名称: {"index": 预期索引, "ok": 是否命中, "plan": 查询计划}}
+    """
+    if analyze:
+        db.execute(text("ANALYZE"))
+        db.commit()
+    report = {}
+    for query in HOT_QUERIES:
+        plan = explain(db, query.build())
+        report[query.name] = {
+            "index": query.index,
+            "ok": any(query.index in line for line in plan),
+            "plan": plan
+        }
+    return report
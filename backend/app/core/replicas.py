@@ -0,0 +1,139 @@
+"""
+只读副本路由
+配置 DATABASE_REPLICA_URLS 后，GET 请求的会话在第一次查询时轮询选择一个副本，减轻主库压力：
+- 会话此后的读取都使用这个副本，同一请求内的多次查询不会因各副本复制进度不同而前后不一致；
+- 只有普通 SELECT 发往副本；写操作、SELECT ... FOR UPDATE、直接取连接等都使用主库，
+  并且之后同一会话的查询也留在主库，保证读到自己刚写入的数据；
+- 副本定期做健康检查（SELECT 1），检查失败的副本暂时跳过，全部不可用时使用主库；
+- 先查询再决定写入的 GET 接口（如读取推荐时提交刷新任务）改用 get_primary_db，固定使用主库。
+"""
+from typing import Dict, List, Optional
+import itertools
+import logging
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    """一组只读副本引擎：轮询选择健康的副本"""
+
+    def __init__(self, engines: List[Engine], check_interval: float = 10.0):
+        """
+        Args:
+            engines: 副本的同步引擎（异步引擎传入其 sync_engine）
+            check_interval: 健康检查结果的有效期（秒），过期后下次选中时重新检查
+        """
+        self.engines = list(engines)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._healthy: Dict[int, bool] = {}
+        self._checked_at: Dict[int, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def pick(self) -> Optional[Engine]:
+        """
+        按轮询顺序选择一个健康的副本
+
+        Returns:
+            副本引擎；没有可用副本时为 None（使用主库）
+        """
+        if not self.engines:
+            return None
+        start = next(self._turn)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._is_healthy(index):
+                return self.engines[index]
+        return None
+
+    def mark_failed(self, engine: Engine):
+        """查询副本失败时标记为不可用，等待下次健康检查"""
+        for index, candidate in enumerate(self.engines):
+            if candidate is engine:
+                with self._lock:
+                    self._healthy[index] = False
+                    self._checked_at[index] = time.monotonic()
+
+    def status(self) -> List[Dict[str, object]]:
+        """各副本的健康状态（不触发检查）"""
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": self._healthy.get(index),
+            }
+            for index, engine in enumerate(self.engines)
+        ]
+
+    def _is_healthy(self, index: int) -> bool:
+        now = time.monotonic()
+        checked_at = self._checked_at.get(index)
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return self._healthy[index]
+
+        with self._lock:
+            # 其他线程刚完成检查时直接使用其结果
+            checked_at = self._checked_at.get(index)
+            if checked_at is not None and time.monotonic() - checked_at < self.check_interval:
+                return self._healthy[index]
+            self._checked_at[index] = time.monotonic()
+
+        healthy = self._check(self.engines[index])
+        if self._healthy.get(index) is not healthy:
+            if healthy:
+                logger.info("只读副本恢复可用: %s", self.engines[index].url.render_as_string(hide_password=True))
+            else:
+                logger.warning("只读副本健康检查失败，改用主库: %s", self.engines[index].url.render_as_string(hide_password=True))
+        self._healthy[index] = healthy
+        return healthy
+
+    @staticmethod
+    def _check(engine: Engine) -> bool:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    普通 SELECT 使用第一次选中的副本（会话存续期间固定不变）；其他语句（含 flush 与直接取连接）使用主库，
+    此后该会话的全部查询都使用主库（读到自己的写入）。
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.use_primary = not replicas
+        self.replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.use_primary and _is_plain_select(clause):
+            if self.replica is None:
+                # 没有可用副本时本次使用主库，下次查询再选择
+                self.replica = self.replicas.pick()
+            if self.replica is not None:
+                return self.replica
+        else:
+            self.use_primary = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def _is_plain_select(clause) -> bool:
+    """不加锁的 SELECT 语句"""
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
@@ -4,8 +4,10 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .config import settings
+from .async_database import get_async_db
 from .database import get_db
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -44,27 +46,8 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user(
-    db: Session,
-    token: str
-):
-    """
-    获取当前登录用户
-    
-    通过JWT token验证用户身份，并从数据库获取完整的用户信息
-    
-    Args:
-        db: 数据库会话
-        token: JWT access token
-    
-    Returns:
-        User: 当前登录的用户对象
-    
-    Raises:
-        HTTPException: 如果token无效或用户不存在
-    """
-    from ..models.user import User
-    
+def _token_user_id(token: str) -> int:
+    """从 token 中取出用户ID，token 无效时抛出 401"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无法验证凭据",
@@ -82,9 +65,17 @@ def get_current_user(
     except Exception:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    return user_id
+
+
+def _check_user(user):
+    """用户不存在或已禁用时抛出异常"""
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无法验证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(
@@ -95,6 +86,31 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session,
+    token: str
+):
+    """
+    获取当前登录用户
+    
+    通过JWT token验证用户身份，并从数据库获取完整的用户信息
+    
+    Args:
+        db: 数据库会话
+        token: JWT access token
+    
+    Returns:
+        User: 当前登录的用户对象
+    
+    Raises:
+        HTTPException: 如果token无效或用户不存在
+    """
+    from ..models.user import User
+    
+    user_id = _token_user_id(token)
+    return _check_user(db.query(User).filter(User.id == user_id).first())
+
+
 # 用于FastAPI Depends的辅助函数
 def get_current_user_dependency(
     token: str = Depends(oauth2_scheme),
@@ -102,3 +118,14 @@ def get_current_user_dependency(
 ):
     """用于FastAPI依赖注入的get_current_user包装"""
     return get_current_user(db, token)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """异步接口使用的 get_current_user（与接口共用同一个异步会话）"""
+    from ..models.user import User
+    
+    user_id = _token_user_id(token)
+    return _check_user(await db.get(User, user_id))
@@ -0,0 +1,260 @@
+"""
+SQLite 单写线程与合并提交
+SQLite 同一时间只允许一个写事务，多个请求各自提交时会互相等待写锁（database is locked），
+每次提交还要单独写一次 WAL。写操作改为提交到队列，由唯一的写线程取出后在同一事务中执行，
+一次提交完成一批写操作；读操作仍在请求自己的连接上进行，WAL 模式下不会被写事务阻塞。
+
+只有高频的小写操作经过队列（登录时间、需求字段修改、匹配结果、分数缓存）；注册、企业与需求的创建和删除、
+数据集上传、评估结果、后台任务等其余写操作仍在各自的会话中提交，与写线程之间由 busy_timeout
+排队等待写锁。因此提交写操作时调用方自己的会话不能持有写锁（有未提交的写操作），submit 会检查。
+"""
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import queue
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from .config import settings
+from .database import SessionLocal, create_database_engine, engine, is_memory_sqlite
+
+# 写操作：接收写线程的会话，返回普通值（会话提交后即关闭，不要返回 ORM 对象）
+WriteTask = Callable[[Session], Any]
+
+# 会话已刷新到数据库、尚未提交的写操作标记（session.info 的键）
+_PENDING_WRITES = "write_queue_pending_writes"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context):
+    session.info[_PENDING_WRITES] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_PENDING_WRITES] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_pending(session, transaction):
+    # 最外层事务结束（提交、回滚或关闭会话）后写锁释放；保存点结束时外层事务仍持有写锁
+    if transaction.parent is None:
+        session.info.pop(_PENDING_WRITES, None)
+
+
+def has_pending_writes(session: Session) -> bool:
+    """会话中是否有未提交的写操作（未刷新的对象变更，或已刷新/批量执行但未提交的写语句）"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get(_PENDING_WRITES))
+
+
+class WriteQueue:
+    """
+    写操作队列
+
+    未启用时（非 SQLite 或关闭 SQLITE_WRITE_QUEUE）写操作在调用线程中执行并提交：传入调用方会话时
+    直接使用该会话（不另外占用连接池中的连接），否则以独立会话执行，调用方式与结果一致。
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        enabled: bool = True,
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0
+    ):
+        """
+        Args:
+            session_factory: 创建写会话的工厂（启用时为写线程专用的引擎；未启用时只用于未传入调用方会话的写操作）
+            enabled: 是否启用写线程
+            max_batch: 每次合并提交的最大写操作数
+            max_wait_ms: 收到写操作后等待更多写操作加入同一提交的时间（毫秒）
+        """
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[Tuple[WriteTask, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.tasks = 0
+        self.retries = 0
+
+    # ---- 提交写操作 ----
+
+    def submit(self, task: WriteTask, session: Optional[Session] = None) -> Future:
+        """
+        提交写操作
+
+        Args:
+            task: 写操作，在写线程的会话中执行（不需要自己提交）；
+                  同批其他写操作失败时可能重新执行一次，不要包含数据库以外的副作用。
+            session: 调用方自己的会话。其中不能有未提交的写操作，否则调用方持有写锁等待写线程、
+                     写线程等待写锁，直到 busy_timeout 超时；传入时检查这一前提。
+                     未启用写线程时写操作在该会话中执行并提交
+
+        Returns:
+            写操作提交后完成的 Future，结果为 task 的返回值
+
+        Raises:
+            RuntimeError: 调用方会话中有未提交的写操作
+        """
+        if session is not None and has_pending_writes(session):
+            raise RuntimeError("调用方会话中有未提交的写操作，请先提交或回滚后再提交到写队列")
+
+        if not self.enabled or threading.current_thread() is self._thread:
+            # 写线程内的嵌套写操作直接执行，避免等待自己；
+            # 未启用时使用调用方的会话，请求已借出连接时不再从连接池借第二个连接
+            future = Future()
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._run_alone(task, session if not self.enabled else None))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        future = Future()
+        self._ensure_started()
+        self._queue.put((task, future))
+        return future
+
+    def run(self, task: WriteTask, timeout: Optional[float] = None, session: Optional[Session] = None) -> Any:
+        """提交写操作并等待其提交完成，写操作的异常在调用线程中重新抛出"""
+        return self.submit(task, session=session).result(timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """处理完已提交的写操作后停止写线程"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            if self._thread is thread and not thread.is_alive():
+                self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """合并提交统计"""
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "tasks": self.tasks,
+            "retries": self.retries,
+            "avg_batch_size": round(self.tasks / self.batches, 2) if self.batches else 0.0,
+            "pending": self._queue.qsize()
+        }
+
+    # ---- 写线程 ----
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = self._collect(batch)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # 无法创建会话等意外错误：结束本批写操作的等待，写线程继续运行
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stopping:
+                return
+
+    def _collect(self, batch: List[Tuple[WriteTask, Future]]) -> bool:
+        """在等待时间内收集更多写操作，返回是否收到了停止信号"""
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _commit(self, batch: List[Tuple[WriteTask, Future]]):
+        batch = [(task, future) for task, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        session = self.session_factory()
+        try:
+            results = [task(session) for task, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                self._count(1)
+                return
+            # 同批中有写操作失败：整批回滚后逐个单独提交，失败只影响该写操作本身
+            self.retries += 1
+            for task, future in batch:
+                try:
+                    future.set_result(self._run_alone(task))
+                except Exception as task_error:
+                    future.set_exception(task_error)
+            self._count(len(batch), batches=len(batch))
+            return
+        finally:
+            session.close()
+
+        self._count(len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run_alone(self, task: WriteTask, session: Optional[Session] = None) -> Any:
+        """单独执行并提交一个写操作；传入会话时在该会话中提交，不关闭会话"""
+        owned = session is None
+        if owned:
+            session = self.session_factory()
+        try:
+            result = task(session)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            if owned:
+                session.close()
+
+    def _count(self, tasks: int, batches: int = 1):
+        self.tasks += tasks
+        self.batches += batches
+
+
+def _writer_sessions():
+    """写线程专用的单连接引擎：请求线程占满连接池并等待写操作时，写线程仍能取得连接"""
+    writer_engine = create_database_engine(pool_size=1, max_overflow=0)
+    return sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+
+
+# 内存数据库每个连接各自独立，不能由另一个引擎写入
+_enabled = (
+    settings.SQLITE_WRITE_QUEUE
+    and engine.dialect.name == "sqlite"
+    and not is_memory_sqlite(settings.DATABASE_URL)
+)
+
+# 全局写队列
+write_queue = WriteQueue(
+    session_factory=_writer_sessions() if _enabled else SessionLocal,
+    enabled=_enabled,
+    max_batch=settings.SQLITE_GROUP_COMMIT_MAX_BATCH,
+    max_wait_ms=settings.SQLITE_GROUP_COMMIT_WAIT_MS
+)
@@ -1,11 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .core.database import Base, engine
+from .core.async_database import dispose_async_engine
+from .core.database import SessionLocal
+from .core.migrations import upgrade_database
+from .core.write_queue import write_queue
 from .api import api_router
+from .services import matching_service
 
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
+# 升级数据库到最新版本
+if settings.DATABASE_AUTO_MIGRATE:
+    upgrade_database()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -30,6 +35,34 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.on_event("startup")
+def load_matching_indexes():
+    """启动时加载匹配索引与供应商快照，之后由 ORM 事件保持同步"""
+    db = SessionLocal()
+    try:
+        matching_service.ensure_indexes(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def save_matching_indexes():
+    """关闭时持久化匹配索引"""
+    matching_service.save_indexes()
+
+
+@app.on_event("shutdown")
+def stop_write_queue():
+    """关闭时提交写队列中剩余的写操作"""
+    write_queue.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """关闭时释放异步引擎的连接"""
+    await dispose_async_engine()
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -1,14 +1,31 @@
-from .enterprise import Enterprise, EnterpriseStatus, EnterpriseType
+from .enterprise import Enterprise, EnterpriseStatus, EnterpriseType, EnterpriseCertification
 from .user import User, UserRole
-from .demand import Demand, DemandStatus, ConfidentialityLevel
+from .demand import Demand, DemandStatus, ConfidentialityLevel, OPEN_DEMAND_STATUSES
+from .demand_match import DemandMatch
+from .match_score import MatchScore
+from .recommendation import Recommendation, RecommendationList
+from .job import Job, JobType, JobStatus
+from .tag import Tag, DemandTag, EnterpriseTag
 
 __all__ = [
     "Enterprise",
     "EnterpriseStatus",
     "EnterpriseType",
+    "EnterpriseCertification",
     "User",
     "UserRole",
     "Demand",
     "DemandStatus",
-    "ConfidentialityLevel"
+    "ConfidentialityLevel",
+    "OPEN_DEMAND_STATUSES",
+    "DemandMatch",
+    "MatchScore",
+    "Recommendation",
+    "RecommendationList",
+    "Job",
+    "JobType",
+    "JobStatus",
+    "Tag",
+    "DemandTag",
+    "EnterpriseTag"
 ]
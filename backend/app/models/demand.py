@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, Float, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -18,6 +18,13 @@ class DemandStatus(str, enum.Enum):
     CLOSED = "closed"  # 已关闭
 
 
+# 对供应商开放推荐的需求状态
+OPEN_DEMAND_STATUSES = (DemandStatus.SUBMITTED, DemandStatus.EVALUATED, DemandStatus.MATCHED)
+
+# 开放需求部分索引的条件（Enum 列按成员名存储）；查询条件须以相同顺序的字面量书写才能使用该索引
+OPEN_DEMAND_INDEX_WHERE = "status IN (%s)" % ", ".join(f"'{status.name}'" for status in OPEN_DEMAND_STATUSES)
+
+
 class ConfidentialityLevel(str, enum.Enum):
     """保密等级"""
     PUBLIC = "public"  # 公开
@@ -64,6 +71,10 @@ class Demand(Base):
     
     # 保密与状态
     confidentiality = Column(Enum(ConfidentialityLevel), default=ConfidentialityLevel.INTERNAL)
+    
+    # 对供应商的硬性要求（匹配前在 SQL 中过滤）
+    min_vendor_credit = Column(Float, nullable=True)  # 供应商最低信用分
+    required_certifications = Column(JSON, default=list)  # 供应商必须具备的认证资质名称
     status = Column(Enum(DemandStatus), default=DemandStatus.DRAFT)
     priority = Column(Integer, default=5)  # 1-10，10最高
     
@@ -77,16 +88,7 @@ class Demand(Base):
     #   "confidence": 0.8,
     #   "notes": ["需要更多样本数据", "建议先进行PoC验证"]
     # }
-    
-    # 推荐结果
-    match_results = Column(JSON, default=list)
-    # [
-    #   {
-    #     "vendor_id": 123,
-    #     "score": 0.87,
-    #     "reasons": ["行业经验丰富", "语义相似度高", "成功率高"]
-    #   }
-    # ]
+    evaluation_cache = Column(JSON, nullable=True)  # 评估组件缓存：各组件输入的内容哈希与得分，重新评估时只计算变化的组件
     
     # 时间戳
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -95,3 +97,26 @@ class Demand(Base):
     
     # 关系
     enterprise = relationship("Enterprise", back_populates="demands")
+    matches = relationship(
+        "DemandMatch", back_populates="demand", order_by="DemandMatch.rank", cascade="all, delete-orphan"
+    )
+    
+    __table_args__ = (
+        # 需求列表：按企业 / 状态筛选，按创建时间倒序
+        Index("ix_demands_enterprise_created", "enterprise_id", "created_at"),
+        Index("ix_demands_status_created", "status", "created_at"),
+        Index("ix_demands_created_at", "created_at"),
+        # 开放需求（匹配与推荐只读取这部分需求；SQLite 与 PostgreSQL 均支持部分索引）
+        Index(
+            "ix_demands_open_created",
+            "created_at",
+            sqlite_where=text(OPEN_DEMAND_INDEX_WHERE),
+            postgresql_where=text(OPEN_DEMAND_INDEX_WHERE)
+        ),
+    )
+    
+    @property
+    def match_results(self) -> list:
+        """匹配结果（按排名，由 demand_matches 表组装；跳过已删除的供应商）"""
+        results = (match.to_result() for match in self.matches)
+        return [result for result in results if result is not None]
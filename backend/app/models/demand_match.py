@@ -0,0 +1,54 @@
+from typing import Optional
+from sqlalchemy import Column, Integer, DateTime, JSON, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..core.database import Base
+
+
+class DemandMatch(Base):
+    """需求匹配结果表：每个需求匹配到的供应商，按排名保存"""
+    __tablename__ = "demand_matches"
+
+    id = Column(Integer, primary_key=True)
+    demand_id = Column(Integer, ForeignKey("demands.id"), nullable=False)
+    vendor_id = Column(Integer, ForeignKey("enterprises.id"), nullable=False)
+    rank = Column(Integer, nullable=False)  # 排名，从 1 开始
+
+    # 匹配时的总分（total_score，0-100）及各维度得分
+    score = Column(Float, nullable=False)
+    breakdown = Column(JSON, nullable=False)
+    reasons = Column(JSON, default=list)  # 匹配理由
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # 关系
+    demand = relationship("Demand", back_populates="matches")
+    vendor = relationship("Enterprise", lazy="joined")
+
+    __table_args__ = (
+        # 需求的匹配结果（按排名）/ 匹配到某供应商的需求
+        Index("ix_demand_matches_demand_rank", "demand_id", "rank"),
+        Index("ix_demand_matches_vendor", "vendor_id", "demand_id"),
+    )
+
+    def to_result(self) -> Optional[dict]:
+        """
+        转换为匹配结果（与匹配服务返回的结构一致）
+
+        分数、各维度得分与理由是匹配时的结果；供应商名称、联系邮箱、信用分与能力标签取自企业表的当前值，
+        不是匹配时的值。供应商已被删除时返回 None。
+        """
+        vendor = self.vendor
+        if vendor is None:
+            return None
+        return {
+            "vendor_id": self.vendor_id,
+            "vendor_name": vendor.name,
+            "vendor_eid": vendor.eid,
+            "score": self.score,
+            "score_breakdown": self.breakdown,
+            "reasons": self.reasons or [],
+            "contact_email": vendor.contact_email,
+            "credit_score": vendor.credit_score,
+            "ai_capabilities": vendor.ai_capabilities
+        }
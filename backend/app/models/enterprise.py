@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, Float
+from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -54,6 +54,7 @@ class Enterprise(Base):
     team_size = Column(Integer, default=0)  # 团队规模
     team_structure = Column(String(500))  # 团队构成
     certifications = Column(JSON, default=list)  # 认证资质
+    min_project_budget = Column(Float, nullable=True, index=True)  # 承接项目的最低预算（元），用于预算档位过滤
     
     # 需求方资质信息（需求方企业专用）
     qualification_status = Column(String(50), default="unverified")  # 资质状态：unverified/pending/verified/rejected
@@ -67,10 +68,10 @@ class Enterprise(Base):
     
     # 认证信息
     status = Column(Enum(EnterpriseStatus), default=EnterpriseStatus.PENDING)
-    certification_level = Column(String(50), default="普通会员")  # 普通会员/认证企业/优选企业
+    certification_level = Column(String(50), default="普通会员", index=True)  # 普通会员/认证企业/优选企业
     
     # 信用信息
-    credit_score = Column(Float, default=80.0)  # 信用分，默认80分
+    credit_score = Column(Float, default=80.0, index=True)  # 信用分，默认80分
     
     # 时间戳
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -79,3 +80,18 @@ class Enterprise(Base):
     # 关系
     users = relationship("User", back_populates="enterprise")
     demands = relationship("Demand", back_populates="enterprise")
+    
+    __table_args__ = (
+        # 已认证供应商：status = VERIFIED 且 enterprise_type IN (SUPPLY, BOTH)
+        Index("ix_enterprises_status_type", "status", "enterprise_type"),
+        # 企业列表游标分页：按 (created_at, id) 倒序
+        Index("ix_enterprises_created_at", "created_at"),
+    )
+
+
+class EnterpriseCertification(Base):
+    """企业认证资质索引表：由 certifications 字段同步，按资质名称查找企业"""
+    __tablename__ = "enterprise_certifications"
+    
+    name = Column(String(200), primary_key=True)  # 资质名称
+    enterprise_id = Column(Integer, ForeignKey("enterprises.id", ondelete="CASCADE"), primary_key=True, index=True)
@@ -0,0 +1,69 @@
+from sqlalchemy import Column, Integer, String, Enum, DateTime, JSON, Text, ForeignKey, Index, text
+from datetime import datetime
+import enum
+from ..core.database import Base
+
+
+class JobType(str, enum.Enum):
+    """后台任务类型"""
+    EVALUATE = "evaluate"  # 需求评估
+    MATCH = "match"  # 供应商匹配
+    REFRESH_DEMAND = "refresh_demand"  # 刷新需求的推荐列表（demand_id）
+    REFRESH_VENDOR = "refresh_vendor"  # 刷新供应商的推荐列表（enterprise_id）
+    BATCH_MATCH = "batch_match"  # 批量匹配（payload 中的需求ID/状态）
+
+
+class JobStatus(str, enum.Enum):
+    """后台任务状态"""
+    QUEUED = "queued"  # 排队中
+    RUNNING = "running"  # 执行中
+    SUCCEEDED = "succeeded"  # 已完成
+    FAILED = "failed"  # 失败
+
+
+class Job(Base):
+    """后台任务队列表（评估/匹配/推荐刷新/批量匹配），由独立的 worker 进程领取执行"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    job_type = Column(Enum(JobType), nullable=False)
+    # 任务对象：需求任务使用 demand_id，供应商推荐刷新使用 enterprise_id，批量任务均为空
+    demand_id = Column(Integer, ForeignKey("demands.id"), nullable=True)
+    enterprise_id = Column(Integer, ForeignKey("enterprises.id"), nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+
+    # 任务参数（如 top_k）与执行结果
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # 领取信息：worker 标识、租约到期时间（到期未完成视为 worker 异常退出，可被重新领取）
+    attempts = Column(Integer, default=0, nullable=False)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+        # 同一需求同一类型最多只有一个未完成的任务（SQLite 与 PostgreSQL 均支持部分索引）
+        Index(
+            "uq_jobs_active_demand",
+            "job_type",
+            "demand_id",
+            unique=True,
+            sqlite_where=text("status IN ('QUEUED', 'RUNNING')"),
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')")
+        ),
+        Index(
+            "uq_jobs_active_enterprise",
+            "job_type",
+            "enterprise_id",
+            unique=True,
+            sqlite_where=text("status IN ('QUEUED', 'RUNNING')"),
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')")
+        ),
+    )
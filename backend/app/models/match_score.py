@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, ForeignKey, Index
+from datetime import datetime
+from ..core.database import Base
+
+
+class MatchScore(Base):
+    """需求-供应商匹配分数缓存表"""
+    __tablename__ = "match_scores"
+    
+    demand_id = Column(Integer, ForeignKey("demands.id"), primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("enterprises.id"), primary_key=True)
+    
+    # 加权总分（0-1）及六个维度的原始得分
+    score = Column(Float, nullable=False)
+    components = Column(JSON, nullable=False)
+    # [industry_match, semantic_similarity, success_rate, budget_match, geo_proximity, credit_score]
+    
+    # 计算时双方的版本（updated_at）以及评分配置版本（权重 + 语义索引）
+    demand_version = Column(DateTime, nullable=True)
+    vendor_version = Column(DateTime, nullable=True)
+    scoring_version = Column(String(32), nullable=False)
+    
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_match_scores_vendor_id", "vendor_id"),
+    )
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Index, UniqueConstraint, PrimaryKeyConstraint
+from datetime import datetime
+from ..core.database import Base
+
+
+class Recommendation(Base):
+    """推荐物化表：每个供应商的前 N 个推荐需求 + 每个需求的前 N 个推荐供应商"""
+    __tablename__ = "recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # vendor: owner 为供应商、target 为需求；demand: owner 为需求、target 为供应商
+    owner_type = Column(String(10), nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    target_id = Column(Integer, nullable=False)
+    
+    # 加权总分（0-1）及六个维度的原始得分
+    score = Column(Float, nullable=False)
+    components = Column(JSON, nullable=False)
+    
+    # 写入时的评分配置版本（权重 + 语义索引），列表是否有效见 RecommendationList
+    scoring_version = Column(String(32), nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("owner_type", "owner_id", "target_id", name="uq_recommendations_pair"),
+        Index("ix_recommendations_owner_score", "owner_type", "owner_id", "score"),
+        Index("ix_recommendations_target", "owner_type", "target_id"),
+    )
+
+
+class RecommendationList(Base):
+    """
+    推荐列表的物化标记：有标记的 owner 已物化（列表可以为空），版本不一致时列表已过期（仍可读取），没有标记时实时计算
+    """
+    __tablename__ = "recommendation_lists"
+    
+    owner_type = Column(String(10), nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    
+    # 物化时 owner（需求/供应商）的 updated_at，owner 之后被修改则列表失效
+    owner_version = Column(DateTime, nullable=True)
+    # 物化时的评分配置版本，权重、语义索引或标签同义词变化后列表失效
+    scoring_version = Column(String(32), nullable=True)
+    
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("owner_type", "owner_id"),
+    )
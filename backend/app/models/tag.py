@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
+from datetime import datetime
+from ..core.database import Base
+
+
+class Tag(Base):
+    """标签词典表：规范名称与同义词，企业/需求标签写入时登记"""
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)  # 规范名称
+    synonyms = Column(JSON, default=list)  # 同义词（大小写不敏感）
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DemandTag(Base):
+    """需求-标签关联表：由行业标签与场景标签同步，按标签筛选需求"""
+    __tablename__ = "demand_tags"
+    
+    demand_id = Column(Integer, ForeignKey("demands.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index("ix_demand_tags_tag", "tag_id", "demand_id"),
+    )
+
+
+class EnterpriseTag(Base):
+    """企业-标签关联表：由行业标签与AI能力同步，按标签筛选企业"""
+    __tablename__ = "enterprise_tags"
+    
+    enterprise_id = Column(Integer, ForeignKey("enterprises.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index("ix_enterprise_tags_tag", "tag_id", "enterprise_id"),
+    )
@@ -21,9 +21,13 @@ from .demand import (
     DemandListResponse,
     DemandEvaluateRequest,
     DemandEvaluateResponse,
+    DemandBatchMatchRequest,
+    DemandBatchEvaluateRequest,
+    DemandBatchEvaluateResponse,
     EvaluationResult,
     MatchResult
 )
+from .job import JobResponse, JobSubmitResponse
 
 __all__ = [
     "EnterpriseBase",
@@ -44,6 +48,11 @@ __all__ = [
     "DemandListResponse",
     "DemandEvaluateRequest",
     "DemandEvaluateResponse",
+    "DemandBatchMatchRequest",
+    "DemandBatchEvaluateRequest",
+    "DemandBatchEvaluateResponse",
     "EvaluationResult",
-    "MatchResult"
+    "MatchResult",
+    "JobResponse",
+    "JobSubmitResponse"
 ]
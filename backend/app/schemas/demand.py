@@ -24,6 +24,8 @@ class DemandBase(BaseModel):
     timeline_end: Optional[datetime] = None
     confidentiality: ConfidentialityLevel = ConfidentialityLevel.INTERNAL
     priority: int = Field(default=5, ge=1, le=10)
+    min_vendor_credit: Optional[float] = Field(None, ge=0, le=100)
+    required_certifications: Optional[List[str]] = Field(default_factory=list)
 
 
 class DemandCreate(DemandBase):
@@ -44,6 +46,8 @@ class DemandUpdate(BaseModel):
     timeline_end: Optional[datetime] = None
     confidentiality: Optional[ConfidentialityLevel] = None
     priority: Optional[int] = None
+    min_vendor_credit: Optional[float] = Field(None, ge=0, le=100)
+    required_certifications: Optional[List[str]] = None
     status: Optional[DemandStatus] = None
 
 
@@ -92,8 +96,9 @@ class DemandResponse(DemandBase):
 
 class DemandListResponse(BaseModel):
     """需求列表响应"""
-    total: int
+    total: Optional[int] = None  # 游标分页时不统计总数
     items: List[DemandResponse]
+    next_cursor: Optional[str] = None  # 游标分页的下一页游标，没有更多数据时为空
 
 
 class DemandEvaluateRequest(BaseModel):
@@ -106,3 +111,24 @@ class DemandEvaluateResponse(BaseModel):
     demand_id: int
     evaluation: EvaluationResult
     message: str
+
+
+class DemandBatchMatchRequest(BaseModel):
+    """批量匹配请求：指定需求ID或按状态筛选"""
+    demand_ids: Optional[List[int]] = None
+    statuses: Optional[List[DemandStatus]] = None
+    top_k: int = Field(default=5, ge=1, le=20)
+
+
+class DemandBatchEvaluateRequest(BaseModel):
+    """批量评估请求：指定需求ID或按状态筛选"""
+    demand_ids: Optional[List[int]] = None
+    statuses: Optional[List[DemandStatus]] = None
+
+
+class DemandBatchEvaluateResponse(BaseModel):
+    """批量评估响应"""
+    total: int
+    evaluated: int
+    elapsed_seconds: float
+    message: str
@@ -26,6 +26,7 @@ class EnterpriseBase(BaseModel):
     team_size: Optional[int] = 0
     team_structure: Optional[str] = None
     certifications: Optional[List[dict]] = Field(default_factory=list)
+    min_project_budget: Optional[float] = Field(None, ge=0)
     
     # 需求方资质信息
     qualification_status: Optional[str] = "unverified"
@@ -59,6 +60,7 @@ class EnterpriseUpdate(BaseModel):
     team_size: Optional[int] = None
     team_structure: Optional[str] = None
     certifications: Optional[List[dict]] = None
+    min_project_budget: Optional[float] = Field(None, ge=0)
     qualification_status: Optional[str] = None
     qualification_data: Optional[dict] = None
     established_year: Optional[str] = None
@@ -86,5 +88,6 @@ class EnterpriseResponse(EnterpriseBase):
 
 class EnterpriseListResponse(BaseModel):
     """企业列表响应"""
-    total: int
+    total: Optional[int] = None  # 游标分页时不统计总数
     items: List[EnterpriseResponse]
+    next_cursor: Optional[str] = None  # 游标分页的下一页游标，没有更多数据时为空
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from ..models.job import JobType, JobStatus
+
+
+class JobResponse(BaseModel):
+    """后台任务响应"""
+    id: int
+    job_type: JobType
+    demand_id: Optional[int] = None
+    enterprise_id: Optional[int] = None  # 供应商推荐刷新任务
+    status: JobStatus
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class JobSubmitResponse(BaseModel):
+    """异步提交响应（202）"""
+    job_id: int
+    demand_id: Optional[int] = None  # 批量任务为空
+    status: JobStatus
+    message: str
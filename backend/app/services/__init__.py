@@ -1,7 +1,11 @@
 from .evaluation_service import evaluation_service
 from .matching_service import matching_service
+from .batch_matching import batch_matcher
+from .job_queue import job_queue
 
 __all__ = [
     "evaluation_service",
-    "matching_service"
+    "matching_service",
+    "batch_matcher",
+    "job_queue"
 ]
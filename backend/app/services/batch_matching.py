@@ -0,0 +1,237 @@
+"""
+批量匹配
+供应商特征矩阵与文本向量只加载一次，按块在进程池中并行为多个需求评分，
+再分批写回匹配结果（demand_matches）和需求状态。
+接口提交的批量匹配作为后台任务由 worker 执行（见 job_queue），进程池不在 Web 进程中创建。
+
+与单个需求的匹配流水线（match_pipeline）的关系：
+- 硬条件过滤相同（constrained_vendor_ids）；
+- 不经过候选检索阶段，对全部满足硬性要求的供应商评分，与推荐物化表相同
+  （候选检索只为控制单次请求的延迟而剪枝，批量评分没有这个需要）；
+- 评分后的前 N 名经过流水线的重排阶段（pipeline.rerank），
+  因此结果与单个需求读取推荐表（recommendations.vendors_for_demand）一致。
+"""
+from typing import List, Dict, Any, Optional, Sequence, Callable, Iterator, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import time
+import numpy as np
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models import Demand, DemandStatus
+from .demand_matches import save_matches
+from .scoring_engine import VendorFeatures, SCORE_DIMENSIONS, rank_order, score_vendors
+from .tag_index import is_open_demand
+from .vendor_snapshot import VendorProfile
+from .recommendation_store import demand_match_data
+from .matching_service import matching_service
+
+
+# 评分进程内共享的上下文，由进程池 initializer 设置一次
+_context: Dict[str, Any] = {}
+
+
+def _init_worker(features: VendorFeatures, vendor_matrix, weights: Dict[str, float], keep: int):
+    """vendor_matrix 为空时使用特征中的 TF-IDF 行（与需求向量同一次拟合）"""
+    _context.update(features=features, vendor_matrix=vendor_matrix, weights=weights, keep=keep)
+
+
+def _score_chunk(chunk: List[tuple]) -> List[Tuple[int, List[Tuple[int, List[float]]]]]:
+    """
+    为一块需求评分
+
+    Args:
+        chunk: [(需求ID, 需求数据, 需求文本向量, 满足硬性要求的供应商下标)]
+
+    Returns:
+        [(需求ID, [(供应商下标, 六个维度原始得分)])]，每个需求保留前 keep 个供应商
+    """
+    features = _context["features"]
+    vendor_matrix = _context["vendor_matrix"]
+    if vendor_matrix is None:
+        vendor_matrix = features.text_vectors
+
+    results = []
+    for demand_id, demand_data, query, allowed in chunk:
+        semantic = None
+        if vendor_matrix is not None and query is not None and query.nnz:
+            semantic = (vendor_matrix @ query.T).toarray().ravel()
+
+        scores = score_vendors(features, demand_data, _context["weights"], semantic=semantic)
+        total = scores["total"]
+        if allowed is not None:
+            total = np.full(len(total), -np.inf)
+            total[allowed] = scores["total"][allowed]
+        top = rank_order(total, features.ids)[:_context["keep"]]
+        top = top[np.isfinite(total[top])]
+        results.append((demand_id, [
+            (int(i), [float(scores[dim][i]) for dim in SCORE_DIMENSIONS]) for i in top
+        ]))
+    return results
+
+
+class BatchMatcher:
+    """多个需求的批量匹配"""
+
+    def __init__(self, matching, workers: int = 0, chunk_size: int = 50, write_size: int = 500):
+        """
+        Args:
+            matching: 匹配服务，提供索引、权重与结果格式化
+            workers: 评分进程数，0 表示按 CPU 核数
+            chunk_size: 每个进程任务包含的需求数
+            write_size: 每个写事务更新的需求数
+        """
+        self.matching = matching
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.write_size = write_size
+
+    def select_demands(
+        self,
+        db: Session,
+        demand_ids: Optional[Sequence[int]] = None,
+        statuses: Optional[Sequence[DemandStatus]] = None
+    ) -> List[Demand]:
+        """按需求ID和/或状态筛选待匹配的需求"""
+        query = db.query(Demand)
+        if demand_ids:
+            query = query.filter(Demand.id.in_(list(demand_ids)))
+        if statuses:
+            query = query.filter(Demand.status.in_(list(statuses)))
+        return query.order_by(Demand.id).all()
+
+    def rematch(
+        self,
+        db: Session,
+        demands: List[Demand],
+        top_k: int = 5,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        为一批需求重新匹配供应商
+
+        Args:
+            db: 数据库会话
+            demands: 待匹配的需求
+            top_k: 每个需求保留的供应商数量
+            progress: 进度回调 (已评分数量, 总数)
+
+        Returns:
+            汇总信息：total / matched / vendor_count / elapsed_seconds
+        """
+        started = time.time()
+        self.matching.ensure_indexes(db)
+
+        # 供应商档案取自快照，不再加载完整的企业记录
+        vendors = self.matching.vendor_snapshot.profiles()
+
+        results: Dict[int, list] = {}
+        if demands:
+            # 全部供应商的特征直接取自映射文件，评分进程按目录各自映射，不复制数组
+            features = self.matching.vendor_features(vendors)
+            vendor_matrix, queries, fit_id = self.matching.semantic_index.batch_vectors(vendors, demands)
+            if features.path is not None and features.text_vectors is not None and features.text_fit_id == fit_id:
+                vendor_matrix = None
+
+            tasks = []
+            for pos, demand in enumerate(demands):
+                demand_data = demand_match_data(demand)
+                # 满足需求硬性要求的供应商下标，None 表示不限制
+                pool = self.matching.constrained_vendor_ids(db, demand_data)
+                allowed = None if pool is None else np.flatnonzero(np.isin(features.ids, list(pool)))
+                tasks.append((demand.id, demand_data, None if queries is None else queries[pos], allowed))
+            chunks = [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+
+            # 启用重排时保留重排阶段要处理的前 N 名，写回前重排再取前 top_k
+            keep = max(top_k, self.matching.pipeline.rerank_cap)
+            initargs = (features, vendor_matrix, dict(self.matching.weights), keep)
+            for chunk_results in self._run(chunks, initargs):
+                results.update(chunk_results)
+                if progress:
+                    progress(len(results), len(demands))
+
+        matched = self._write(db, demands, vendors, results, top_k)
+
+        return {
+            "total": len(demands),
+            "matched": matched,
+            "vendor_count": len(vendors),
+            "elapsed_seconds": round(time.time() - started, 3)
+        }
+
+    def _run(self, chunks: List[List[tuple]], initargs: tuple) -> Iterator[list]:
+        """单块时在当前进程内评分，否则分发到进程池"""
+        workers = min(self.workers or os.cpu_count() or 1, len(chunks))
+        if workers <= 1:
+            _init_worker(*initargs)
+            try:
+                for chunk in chunks:
+                    yield _score_chunk(chunk)
+            finally:
+                _context.clear()
+            return
+
+        # spawn 启动，避免 fork 继承 Web 进程中的线程与数据库连接
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=initargs
+        ) as pool:
+            futures = [pool.submit(_score_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _match_results(
+        self, db: Session, demand: Demand, vendors: List[VendorProfile], top: list, top_k: int
+    ) -> List[Dict[str, Any]]:
+        """评分结果的前 N 名经过流水线的重排阶段（未启用重排时直接格式化）"""
+        pipeline = self.matching.pipeline
+        if pipeline.reranker is None:
+            return [self.matching.vendor_match_result(vendors[index], components) for index, components in top]
+        return pipeline.rerank(
+            demand_match_data(demand), db,
+            [vendors[index] for index, _ in top], [components for _, components in top], top_k
+        )
+
+    def _write(
+        self, db: Session, demands: List[Demand], vendors: List[VendorProfile], results: Dict[int, list], top_k: int
+    ) -> int:
+        """分批写回匹配结果，每批一个事务"""
+        newly_open = [demand.id for demand in demands if not is_open_demand(demand)]
+
+        matched = 0
+        for start in range(0, len(demands), self.write_size):
+            mappings = []
+            matches = {}
+            for demand in demands[start:start + self.write_size]:
+                top = results.get(demand.id)
+                if top is None:
+                    continue
+                matches[demand.id] = self._match_results(db, demand, vendors, top, top_k)
+                mappings.append({
+                    "id": demand.id,
+                    "status": DemandStatus.MATCHED,
+                    # 匹配结果不是需求内容的变化，保留 updated_at，避免分数缓存失效
+                    "updated_at": demand.updated_at
+                })
+            save_matches(db, matches)
+            db.bulk_update_mappings(Demand, mappings)
+            db.commit()
+            matched += len(mappings)
+
+        # 之前未开放的需求变为已匹配后，同步匹配索引与推荐表
+        if newly_open:
+            self.matching.index_demands(db.query(Demand).filter(Demand.id.in_(newly_open)).all(), db)
+
+        return matched
+
+
+# 全局批量匹配实例
+batch_matcher = BatchMatcher(
+    matching_service,
+    workers=settings.BATCH_MATCH_WORKERS,
+    chunk_size=settings.BATCH_MATCH_CHUNK_SIZE,
+    write_size=settings.BATCH_MATCH_WRITE_SIZE
+)
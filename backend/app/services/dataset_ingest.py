@@ -0,0 +1,358 @@
+"""
+数据集清单导入
+流式接收上传的数据集清单或压缩包（CSV、JSONL、图片等文件的 zip 包），统计各类型记录数与标注率，
+生成需求的 data_summary。直接扫描 Starlette 解析上传时写入的临时文件（不再复制一份），
+CSV 通过 mmap 逐行扫描，JSONL 与压缩包内的文件逐行流式读取，任何时候都不会把整个文件读入内存。
+"""
+from typing import Dict, Any, Optional, Iterator, Iterable, Set, Callable, BinaryIO
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+import posixpath
+import zipfile
+from fastapi import UploadFile
+from ..core.config import settings
+
+
+# 清单文件格式（记录数按格式名统计，引用了媒体文件的记录按媒体类型统计）
+MANIFEST_FORMATS = {".csv": "csv", ".tsv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# 媒体文件扩展名对应的数据类型
+MEDIA_TYPES = {
+    **dict.fromkeys((".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"), "image"),
+    **dict.fromkeys((".wav", ".mp3", ".flac", ".aac", ".ogg", ".m4a"), "audio"),
+    **dict.fromkeys((".mp4", ".avi", ".mov", ".mkv", ".flv"), "video"),
+    **dict.fromkeys((".txt",), "text")
+}
+
+# 视为标注的列名 / 字段名
+LABEL_COLUMNS = {
+    "label", "labels", "class", "class_name", "category", "target", "tag", "tags",
+    "annotation", "annotations", "y", "标签", "类别", "标注", "分类"
+}
+
+# 视为文件路径的列名 / 字段名
+PATH_COLUMNS = {
+    "path", "file", "filename", "file_name", "filepath", "file_path", "image", "image_path",
+    "img", "audio", "audio_path", "video", "url", "uri", "文件", "路径"
+}
+
+# 压缩包中不作为类别名的目录名（其余目录名视为图片分类标注，即 ImageFolder 目录结构）
+GENERIC_DIRS = {
+    "images", "image", "imgs", "img", "data", "dataset", "train", "val", "valid", "validation",
+    "test", "audio", "audios", "video", "videos", "text", "texts", "raw", "unlabeled", "samples"
+}
+
+# 嗅探 CSV 分隔符时读取的字节数
+SNIFF_BYTES = 64 * 1024
+
+# mmap 扫描 CSV 时每读过这么多字节释放一次已扫描的页，使常驻内存不随文件大小增长
+RELEASE_BYTES = 64 * 1024 * 1024
+
+
+class DatasetTooLarge(Exception):
+    """上传的数据集超过大小上限"""
+
+
+class UnsupportedDataset(Exception):
+    """不支持的数据集文件类型"""
+
+
+class DatasetStats:
+    """数据集统计：各类型记录数、已标注记录数与数据大小"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.labeled_counts: Dict[str, int] = {}
+        self.size_bytes = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def labeled(self) -> int:
+        return sum(self.labeled_counts.values())
+
+    def add(self, data_type: str, labeled: bool, count: int = 1):
+        self.counts[data_type] = self.counts.get(data_type, 0) + count
+        if labeled:
+            self.labeled_counts[data_type] = self.labeled_counts.get(data_type, 0) + count
+
+    def to_summary(self, existing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        生成 data_summary
+
+        Args:
+            existing: 已有的 data_summary，指定时与本次统计合并（为同一需求上传多个文件）
+        """
+        counts = dict(self.counts)
+        labeled = self.labeled
+        size_bytes = self.size_bytes
+        if existing:
+            previous = existing.get("counts", {})
+            for data_type, count in previous.items():
+                counts[data_type] = counts.get(data_type, 0) + count
+            # 旧摘要可能是手工填写的，没有已标注数时按标注率折算
+            labeled += existing.get("labeled_count", round(existing.get("labeled_ratio", 0) * sum(previous.values())))
+            size_bytes += existing.get("size_bytes", 0)
+
+        total = sum(counts.values())
+        return {
+            "types": sorted(counts, key=lambda data_type: -counts[data_type]),
+            "counts": counts,
+            "labeled_count": labeled,
+            "labeled_ratio": round(min(labeled / total, 1.0), 4) if total else 0.0,
+            "size_bytes": size_bytes
+        }
+
+
+def _has_value(value: Any) -> bool:
+    """标注字段是否有值"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, (list, dict)):
+        return bool(value)
+    return True
+
+
+def _media_type(path: str) -> Optional[str]:
+    return MEDIA_TYPES.get(posixpath.splitext(path.strip().lower())[1])
+
+
+# ---- CSV ----
+
+def _mmap_lines(mm: mmap.mmap) -> Iterator[str]:
+    """逐行读取内存映射文件（解码为文本，保留换行符以便 csv 处理引号内的换行）"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    release = hasattr(mmap, "MADV_DONTNEED")
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    released = 0
+    for line in iter(mm.readline, b""):
+        yield decoder.decode(line)
+        if release and mm.tell() - released >= RELEASE_BYTES:
+            # 只读文件映射的页可随时从页缓存重新读入，释放后不影响后续读取
+            released = mm.tell() - mm.tell() % mmap.PAGESIZE
+            mm.madvise(mmap.MADV_DONTNEED, 0, released)
+
+
+def _scan_csv_rows(
+    lines: Iterable[str],
+    sample: str,
+    fallback_type: str,
+    stats: DatasetStats,
+    on_labeled_path: Optional[Callable[[str], None]] = None
+):
+    """按表头识别标注列与路径列，逐行统计；on_labeled_path 接收已标注记录引用的媒体文件路径"""
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(lines, dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [name.strip().lower() for name in header]
+    label_columns = [i for i, name in enumerate(columns) if name in LABEL_COLUMNS]
+    path_columns = [i for i, name in enumerate(columns) if name in PATH_COLUMNS]
+
+    for row in reader:
+        if not row or not any(field.strip() for field in row):
+            continue
+        labeled = any(i < len(row) and row[i].strip() for i in label_columns)
+        data_type = None
+        for i in path_columns:
+            if i < len(row):
+                data_type = _media_type(row[i])
+                if data_type:
+                    if labeled and on_labeled_path:
+                        on_labeled_path(row[i].strip())
+                    break
+        stats.add(data_type or fallback_type, labeled)
+
+
+def scan_csv(source: BinaryIO, stats: DatasetStats):
+    """通过 mmap 逐行扫描 CSV 文件"""
+    if os.fstat(source.fileno()).st_size == 0:
+        return
+    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        sample = mm[:SNIFF_BYTES].decode("utf-8-sig", errors="replace")
+        _scan_csv_rows(_mmap_lines(mm), sample, "csv", stats)
+
+
+def _scan_csv_member(
+    archive: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    stats: DatasetStats,
+    on_labeled_path: Callable[[str], None]
+):
+    """扫描压缩包内的 CSV（解压流不支持 mmap，先读开头嗅探分隔符，再重新打开按行流式读取）"""
+    with archive.open(info) as stream:
+        sample = stream.read(SNIFF_BYTES).decode("utf-8-sig", errors="replace")
+    with archive.open(info) as stream:
+        lines = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+        _scan_csv_rows(lines, sample, "csv", stats, on_labeled_path)
+
+
+# ---- JSONL ----
+
+def _scan_jsonl_lines(
+    lines: Iterable[bytes],
+    stats: DatasetStats,
+    on_labeled_path: Optional[Callable[[str], None]] = None
+):
+    """逐条统计 JSONL 记录；on_labeled_path 接收已标注记录引用的媒体文件路径"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            stats.add("jsonl", False)
+            continue
+        fields = {str(key).strip().lower(): value for key, value in record.items()}
+        labeled = any(_has_value(fields.get(name)) for name in LABEL_COLUMNS)
+        data_type = None
+        for name in PATH_COLUMNS:
+            value = fields.get(name)
+            if isinstance(value, str):
+                data_type = _media_type(value)
+                if data_type:
+                    if labeled and on_labeled_path:
+                        on_labeled_path(value.strip())
+                    break
+        stats.add(data_type or "jsonl", labeled)
+
+
+def scan_jsonl(source: BinaryIO, stats: DatasetStats):
+    """逐行扫描 JSONL 文件（带缓冲的按行读取，内存占用只与单行长度有关）"""
+    source.seek(0)
+    _scan_jsonl_lines(source, stats)
+
+
+# ---- ZIP ----
+
+def _folder_label(member: str) -> bool:
+    """按 ImageFolder 约定，文件所在目录名即类别名"""
+    parent = posixpath.basename(posixpath.dirname(member)).lower()
+    return bool(parent) and parent not in GENERIC_DIRS
+
+
+def scan_zip(source: BinaryIO, stats: DatasetStats):
+    """
+    扫描压缩包
+
+    媒体文件只读取中央目录按扩展名计数，不解压；包内的 CSV / JSONL 清单流式解压扫描。
+    清单中引用包内媒体文件的记录不重复计数，只用于标注这些媒体文件；
+    媒体文件在清单中有标注或位于类别目录下（ImageFolder）即视为已标注。
+    """
+    manifest = DatasetStats()
+    with zipfile.ZipFile(source) as archive:
+        media, manifests = {}, []
+        for info in archive.infolist():
+            name = info.filename
+            base = posixpath.basename(name)
+            if info.is_dir() or name.startswith("__MACOSX/") or base.startswith("."):
+                continue
+            ext = posixpath.splitext(base.lower())[1]
+            if ext in MANIFEST_FORMATS:
+                manifests.append((info, MANIFEST_FORMATS[ext]))
+                stats.size_bytes += info.file_size
+            elif ext in MEDIA_TYPES:
+                media[name] = info
+
+        # 只记录包内存在的媒体文件，集合大小不超过中央目录中的文件数
+        labeled_members: Set[str] = set()
+        for info, manifest_format in manifests:
+            manifest_dir = posixpath.dirname(info.filename)
+
+            def on_labeled_path(member_path: str):
+                # 清单中的文件路径可能相对于清单所在目录或压缩包根目录
+                member_path = member_path.replace("\\", "/")
+                for key in (posixpath.join(manifest_dir, member_path), member_path):
+                    key = posixpath.normpath(key)
+                    if key in media:
+                        labeled_members.add(key)
+                        return
+
+            if manifest_format == "csv":
+                _scan_csv_member(archive, info, manifest, on_labeled_path)
+            else:
+                with archive.open(info) as stream:
+                    _scan_jsonl_lines(stream, manifest, on_labeled_path)
+
+        media_types = set()
+        for name, info in media.items():
+            data_type = MEDIA_TYPES[posixpath.splitext(name.lower())[1]]
+            media_types.add(data_type)
+            stats.add(data_type, name in labeled_members or _folder_label(name))
+            stats.size_bytes += info.file_size
+
+    # 清单中引用包内已有媒体类型的记录已按文件计数，其余记录单独计数
+    for data_type, count in manifest.counts.items():
+        if data_type not in media_types:
+            labeled = manifest.labeled_counts.get(data_type, 0)
+            stats.add(data_type, True, labeled)
+            stats.add(data_type, False, count - labeled)
+
+
+def scan_dataset(source: BinaryIO, filename: str) -> DatasetStats:
+    """
+    按文件名扩展名扫描数据集文件
+
+    Args:
+        source: 磁盘上的数据集文件（二进制只读，需支持 fileno 与 seek）
+        filename: 原始文件名（用于判断格式）
+
+    Returns:
+        数据集统计
+    """
+    ext = posixpath.splitext((filename or "").lower())[1]
+    stats = DatasetStats()
+    if ext == ".zip":
+        try:
+            scan_zip(source, stats)
+        except zipfile.BadZipFile:
+            raise UnsupportedDataset("压缩包已损坏或不是 zip 格式")
+        return stats
+
+    stats.size_bytes = os.fstat(source.fileno()).st_size
+    if MANIFEST_FORMATS.get(ext) == "csv":
+        scan_csv(source, stats)
+    elif MANIFEST_FORMATS.get(ext) == "jsonl":
+        scan_jsonl(source, stats)
+    elif ext in MEDIA_TYPES:
+        stats.add(MEDIA_TYPES[ext], False)
+    else:
+        raise UnsupportedDataset(f"不支持的数据集文件类型: {ext or filename}")
+    return stats
+
+
+def open_upload(upload: UploadFile) -> BinaryIO:
+    """
+    上传文件在磁盘上的文件对象，直接用于扫描
+
+    Starlette 解析 multipart 请求时已把文件体写入 SpooledTemporaryFile（超过 1MB 落盘到系统临时目录，
+    位置由 TMPDIR 决定），处理函数执行时文件已完整接收；直接扫描该文件，不再复制到另一个临时文件。
+    取 fileno() 时仍在内存中的小文件会先落盘，CSV 才能 mmap。
+    文件随请求结束由 FastAPI 关闭并删除。
+
+    Raises:
+        DatasetTooLarge: 超过 DATASET_UPLOAD_MAX_BYTES（请求体本身的上限应在反向代理上配置）
+    """
+    source = upload.file
+    size = os.fstat(source.fileno()).st_size
+    if size > settings.DATASET_UPLOAD_MAX_BYTES:
+        raise DatasetTooLarge(f"数据集超过大小上限 {settings.DATASET_UPLOAD_MAX_BYTES} 字节")
+    source.seek(0)
+    return source
@@ -0,0 +1,41 @@
+"""
+需求匹配结果存储
+匹配结果按 (需求, 供应商, 排名) 逐行写入 demand_matches 表，
+“匹配到我的需求”等查询直接走 vendor_id / demand_id 索引并在 SQL 中分页
+"""
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+from ..models import DemandMatch
+
+
+def match_rows(demand_id: int, match_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """匹配结果转换为 demand_matches 行（排名从 1 开始）"""
+    return [
+        {
+            "demand_id": demand_id,
+            "vendor_id": match["vendor_id"],
+            "rank": rank,
+            "score": match["score"],
+            "breakdown": match.get("score_breakdown") or {},
+            "reasons": match.get("reasons") or []
+        }
+        for rank, match in enumerate(match_results, start=1)
+    ]
+
+
+def save_matches(db: Session, results: Dict[int, List[Dict[str, Any]]]):
+    """
+    替换需求的匹配结果（不提交事务）
+
+    Args:
+        db: 数据库会话
+        results: {需求ID: 按排名排列的匹配结果}
+    """
+    if not results:
+        return
+    db.query(DemandMatch).filter(
+        DemandMatch.demand_id.in_(list(results))
+    ).delete(synchronize_session=False)
+    rows = [row for demand_id, match_results in results.items() for row in match_rows(demand_id, match_results)]
+    if rows:
+        db.bulk_insert_mappings(DemandMatch, rows)
@@ -0,0 +1,174 @@
+"""
+需求评估与匹配流程
+同步接口与后台任务 worker 共用，保证两种模式的结果与状态变化一致
+"""
+from typing import Dict, List, Any, Optional, Sequence
+import time
+from sqlalchemy.orm import Session
+from ..models import Demand, DemandStatus
+from ..core.config import settings
+from ..core.write_queue import write_queue
+from .demand_matches import save_matches
+from .evaluation_service import evaluation_service
+from .matching_service import matching_service
+from .tag_index import is_open_demand
+
+
+# 评估用到的需求列（批量评估只查询这些列）
+EVALUATION_COLUMNS = (
+    Demand.title, Demand.description, Demand.industry_tags, Demand.scenario_tags, Demand.kpis,
+    Demand.budget_min, Demand.budget_max, Demand.timeline_start, Demand.timeline_end,
+    Demand.data_summary, Demand.confidentiality
+)
+
+
+def evaluation_input(demand: Demand) -> Dict[str, Any]:
+    """准备评估数据（demand 可以是需求对象，也可以是包含评估列的查询行）"""
+    return {
+        "title": demand.title,
+        "description": demand.description,
+        "industry_tags": demand.industry_tags or [],
+        "scenario_tags": demand.scenario_tags or [],
+        "kpis": demand.kpis or [],
+        "budget_min": demand.budget_min,
+        "budget_max": demand.budget_max,
+        "timeline_start": demand.timeline_start,
+        "timeline_end": demand.timeline_end,
+        "data_summary": demand.data_summary or {},
+        "confidentiality": demand.confidentiality.value if demand.confidentiality else "internal"
+    }
+
+
+def evaluate_demand(db: Session, demand: Demand) -> Dict[str, Any]:
+    """
+    评估需求并保存评估结果（只重新计算输入发生变化的评估组件）
+
+    Returns:
+        评估结果
+    """
+    evaluation_result, cache, recomputed = evaluation_service.evaluate_incremental(
+        evaluation_input(demand), demand.evaluation_cache, demand.evaluation_result
+    )
+
+    # 需求内容未变且已是已评估状态，无需写回
+    if not recomputed and demand.status == DemandStatus.EVALUATED:
+        return evaluation_result
+
+    # 更新需求状态和评估结果
+    was_open = is_open_demand(demand)
+    db.query(Demand).filter(Demand.id == demand.id).update(
+        {
+            Demand.status: DemandStatus.EVALUATED,
+            Demand.evaluation_result: evaluation_result,
+            Demand.evaluation_cache: cache,
+            # 评估结果不是需求内容的变化，保留 updated_at，避免分数缓存失效
+            Demand.updated_at: demand.updated_at
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    db.refresh(demand)
+
+    # 同步匹配索引；需求内容未变，已开放的需求无需更新推荐表，新开放的需求由后台任务刷新
+    matching_service.index_demand(demand, None if was_open else db)
+
+    return evaluation_result
+
+
+def evaluate_demands(
+    db: Session,
+    demand_ids: Optional[Sequence[int]] = None,
+    statuses: Optional[Sequence[DemandStatus]] = None,
+    write_size: int = settings.BATCH_EVALUATE_WRITE_SIZE
+) -> Dict[str, Any]:
+    """
+    批量评估需求并保存评估结果
+
+    一次查询取出评估所需的列，批量计算后分批写回 evaluation_result 和 status，
+    评估结果与逐个调用 evaluate_demand 相同；内容未变且已评估的需求跳过
+
+    Args:
+        db: 数据库会话
+        demand_ids: 需求ID，与 statuses 同时指定时取交集
+        statuses: 需求状态
+        write_size: 每个写事务更新的需求数
+
+    Returns:
+        汇总信息：total / evaluated（重新计算的需求数） / elapsed_seconds
+    """
+    started = time.time()
+
+    query = db.query(
+        Demand.id, Demand.status, Demand.updated_at, Demand.evaluation_result, Demand.evaluation_cache,
+        *EVALUATION_COLUMNS
+    )
+    if demand_ids:
+        query = query.filter(Demand.id.in_(list(demand_ids)))
+    if statuses:
+        query = query.filter(Demand.status.in_(list(statuses)))
+    rows = query.order_by(Demand.id).all()
+
+    results, caches, changed = evaluation_service.evaluate_many_incremental(
+        [evaluation_input(row) for row in rows],
+        [row.evaluation_cache for row in rows],
+        [row.evaluation_result for row in rows]
+    )
+
+    mappings = [
+        {
+            "id": row.id,
+            "evaluation_result": result,
+            "evaluation_cache": cache,
+            "status": DemandStatus.EVALUATED,
+            # 评估结果不是需求内容的变化，保留 updated_at，避免分数缓存失效
+            "updated_at": row.updated_at
+        }
+        for row, result, cache, is_changed in zip(rows, results, caches, changed)
+        if is_changed or row.status != DemandStatus.EVALUATED
+    ]
+    for start in range(0, len(mappings), write_size):
+        db.bulk_update_mappings(Demand, mappings[start:start + write_size])
+        db.commit()
+
+    # 之前未开放的需求变为已评估后，同步匹配索引与推荐表
+    newly_open = [row.id for row in rows if not is_open_demand(row)]
+    if newly_open:
+        matching_service.index_demands(db.query(Demand).filter(Demand.id.in_(newly_open)).all(), db)
+
+    return {
+        "total": len(rows),
+        "evaluated": sum(changed),
+        "elapsed_seconds": round(time.time() - started, 3)
+    }
+
+
+def match_demand(db: Session, demand: Demand, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    为需求匹配供应商并保存匹配结果
+
+    Returns:
+        匹配结果列表
+    """
+    # 执行匹配（已物化且未过期的需求直接读取推荐表，保存的结果不使用过期的列表）
+    was_open = is_open_demand(demand)
+    version = demand.updated_at
+    match_results, _ = matching_service.recommendations.vendors_for_demand(db, demand, top_k, allow_stale=False)
+
+    # 更新需求的匹配结果（由写线程合并提交）
+    demand_id = demand.id
+
+    def save(session: Session):
+        save_matches(session, {demand_id: match_results})
+        session.query(Demand).filter(Demand.id == demand_id).update(
+            # 匹配结果不是需求内容的变化，保留 updated_at，避免分数缓存失效
+            {Demand.status: DemandStatus.MATCHED, Demand.updated_at: version},
+            synchronize_session=False
+        )
+
+    write_queue.run(save, session=db)
+    db.refresh(demand)
+
+    # 同步匹配索引；需求内容未变，已开放的需求无需更新推荐表
+    matching_service.index_demand(demand, None if was_open else db)
+
+    return match_results
@@ -2,8 +2,18 @@
 智能评估服务 - 规则引擎实现
 基于需求信息和数据健康度进行AI项目可行性评估
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Sequence, Optional, Tuple
+import bisect
+import hashlib
+import json
+import math
 import random
+import numpy as np
+
+
+def _lookup(thresholds: Sequence[float], values: Sequence[Any], x: float) -> Any:
+    """阈值升序排列，x 不低于第 i 个阈值（且低于第 i+1 个）时取 values[i + 1]"""
+    return values[bisect.bisect_right(thresholds, x)]
 
 
 class EvaluationService:
@@ -32,6 +42,50 @@ class EvaluationService:
         "其他": 0.5
     }
     
+    # 数据量加分：样本总数不低于阈值时取对应加分
+    DATA_COUNT_THRESHOLDS = (100, 1000, 5000, 10000)
+    DATA_COUNT_BONUS = (0, 5, 10, 15, 20)
+    
+    # 标注率加分（第一个阈值为最小正数，即标注率大于 0）
+    LABELED_RATIO_THRESHOLDS = (math.ulp(0.0), 0.2, 0.5, 0.8)
+    LABELED_RATIO_BONUS = (0, 5, 10, 15, 20)
+    
+    # 数据健康度对应的风险分与风险因素
+    DATA_RISK_THRESHOLDS = (50, 70)
+    DATA_RISK_SCORES = (30, 15, 0)
+    DATA_RISK_FACTORS = ("数据样本量不足或质量较低", "数据准备度需要提升", None)
+    
+    # 风险分对应的风险等级
+    RISK_LEVEL_THRESHOLDS = (25, 50)
+    RISK_LEVELS = ("low", "medium", "high")
+    
+    # 平均分对应的交付路径（direct 另需数据健康度达到 DIRECT_MIN_DATA_HEALTH）
+    PATH_THRESHOLDS = (60, 80)
+    PATHS = ("poc", "pilot", "direct")
+    DIRECT_MIN_DATA_HEALTH = 70
+    
+    # 评估组件（按计算顺序）及其依赖的上游组件；交付路径、综合评分与建议由组件得分组合得到
+    COMPONENTS = ("data_health", "technical_feasibility", "readiness", "risks", "confidence")
+    # 组合结果时直接读取的需求字段（建议内容），其哈希与组件哈希一起缓存
+    ASSEMBLY = "assembly"
+    COMPONENT_UPSTREAM = {
+        "readiness": ("data_health",),
+        "risks": ("data_health",)
+    }
+    
+    def __init__(self):
+        # 评分规则版本：阈值或权重表变化后，已缓存的组件得分随之失效
+        rules = {
+            name: getattr(self, name) for name in (
+                "INDUSTRY_MATURITY", "SCENARIO_DIFFICULTY", "DATA_COUNT_THRESHOLDS", "DATA_COUNT_BONUS",
+                "LABELED_RATIO_THRESHOLDS", "LABELED_RATIO_BONUS", "DATA_RISK_THRESHOLDS", "DATA_RISK_SCORES",
+                "RISK_LEVEL_THRESHOLDS", "PATH_THRESHOLDS", "DIRECT_MIN_DATA_HEALTH"
+            )
+        }
+        self.rules_version = hashlib.md5(
+            json.dumps(rules, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+    
     def evaluate_demand(self, demand_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         评估需求可行性
@@ -42,31 +96,131 @@ class EvaluationService:
         Returns:
             评估结果字典
         """
-        # 1. 数据健康度评分
-        data_health_score = self._evaluate_data_health(demand_data.get("data_summary", {}))
-        
-        # 2. 技术可行性评分
-        technical_feasibility = self._evaluate_technical_feasibility(demand_data)
-        
-        # 3. 项目就绪度评分
-        readiness_score = self._evaluate_readiness(demand_data, data_health_score)
+        values = {}
+        for name in self.COMPONENTS:
+            values[name] = self._compute_component(name, demand_data, values)
+        return self._assemble(demand_data, values)
+    
+    def evaluate_incremental(
+        self,
+        demand_data: Dict[str, Any],
+        cache: Optional[Dict[str, Any]] = None,
+        cached_result: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+        """
+        增量评估需求可行性
         
-        # 4. 风险评估
-        risk_level, risk_factors = self._evaluate_risks(demand_data, data_health_score)
+        各组件按输入内容哈希缓存得分，只重新计算输入（或所依赖组件的得分）发生变化的组件；
+        全部输入未变化时直接返回上次的评估结果，不做任何评分计算
         
-        # 5. 推荐交付路径
+        Args:
+            demand_data: 需求数据字典
+            cache: 上次评估保存的组件缓存
+            cached_result: 上次的评估结果
+            
+        Returns:
+            (评估结果, 新的组件缓存, 重新计算的组件名称)，结果与 evaluate_demand 相同
+        """
+        hashes = self.component_hashes(demand_data)
+        cached = {}
+        if cache and cache.get("rules") == self.rules_version:
+            cached = cache.get("components", {})
+        
+        unchanged = all(cached.get(name, {}).get("hash") == digest for name, digest in hashes.items())
+        if unchanged and cached_result is not None:
+            return cached_result, cache, []
+        
+        values, recomputed = {}, []
+        for name in self.COMPONENTS:
+            entry = cached.get(name)
+            upstream_changed = any(
+                values[upstream] != cached.get(upstream, {}).get("value")
+                for upstream in self.COMPONENT_UPSTREAM.get(name, ())
+            )
+            if entry and entry.get("hash") == hashes[name] and not upstream_changed:
+                values[name] = entry["value"]
+            else:
+                values[name] = self._compute_component(name, demand_data, values)
+                recomputed.append(name)
+        
+        return self._assemble(demand_data, values), self.component_cache(hashes, values), recomputed
+    
+    def component_hashes(self, demand_data: Dict[str, Any]) -> Dict[str, str]:
+        """各评估组件输入字段的内容哈希"""
+        industry_tags = demand_data.get("industry_tags", [])
+        scenario_tags = demand_data.get("scenario_tags", [])
+        inputs = {
+            "data_health": demand_data.get("data_summary", {}),
+            # 技术可行性只取第一个行业标签和场景标签
+            "technical_feasibility": [
+                industry_tags[0] if industry_tags else None,
+                scenario_tags[0] if scenario_tags else None
+            ],
+            "readiness": [
+                demand_data.get(key) for key in
+                ("description", "kpis", "budget_min", "budget_max", "timeline_start", "timeline_end")
+            ],
+            "risks": [
+                demand_data.get(key) for key in ("budget_max", "timeline_end", "kpis", "confidentiality")
+            ],
+            "confidence": [
+                demand_data.get("description"), demand_data.get("kpis"), demand_data.get("budget_max"),
+                bool(demand_data.get("data_summary")), bool(industry_tags), bool(scenario_tags)
+            ],
+            # 建议中的行业合规提示检查全部行业标签（不只是第一个）
+            self.ASSEMBLY: [
+                sorted(industry_tags),
+                (demand_data.get("data_summary") or {}).get("labeled_ratio", 0),
+                demand_data.get("kpis"), demand_data.get("budget_max")
+            ]
+        }
+        return {
+            name: hashlib.md5(
+                json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+            ).hexdigest()
+            for name, value in inputs.items()
+        }
+    
+    def component_cache(self, hashes: Dict[str, str], values: Dict[str, Any]) -> Dict[str, Any]:
+        """由输入哈希与组件得分（未舍入）构建组件缓存"""
+        components = {name: {"hash": hashes[name], "value": values[name]} for name in self.COMPONENTS}
+        components[self.ASSEMBLY] = {"hash": hashes[self.ASSEMBLY]}
+        return {"rules": self.rules_version, "components": components}
+    
+    def _compute_component(self, name: str, demand_data: Dict[str, Any], values: Dict[str, Any]) -> Any:
+        """计算单个评估组件，values 中已包含其上游组件的得分"""
+        if name == "data_health":
+            return self._evaluate_data_health(demand_data.get("data_summary", {}))
+        if name == "technical_feasibility":
+            return self._evaluate_technical_feasibility(demand_data)
+        if name == "readiness":
+            return self._evaluate_readiness(demand_data, values["data_health"])
+        if name == "risks":
+            return list(self._evaluate_risks(demand_data, values["data_health"]))
+        return self._calculate_confidence(demand_data, values["data_health"])
+    
+    def _assemble(self, demand_data: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+        """由各组件得分组合交付路径、综合评分与建议，得到评估结果"""
+        data_health_score = values["data_health"]
+        technical_feasibility = values["technical_feasibility"]
+        readiness_score = values["readiness"]
+        risk_level, risk_factors = values["risks"]
+        risk_factors = list(risk_factors)
+        confidence = values["confidence"]
+        
+        # 推荐交付路径
         recommended_path = self._recommend_delivery_path(
             technical_feasibility,
             readiness_score,
             data_health_score
         )
         
-        # 6. 综合评分
+        # 综合评分
         overall_score = (technical_feasibility * 0.4 + 
                         readiness_score * 0.35 + 
                         data_health_score * 0.25)
         
-        # 7. 生成建议
+        # 生成建议
         notes = self._generate_recommendations(
             demand_data,
             data_health_score,
@@ -75,9 +229,6 @@ class EvaluationService:
             risk_factors
         )
         
-        # 8. 计算置信度
-        confidence = self._calculate_confidence(demand_data, data_health_score)
-        
         return {
             "feasibility_score": round(technical_feasibility, 2),
             "readiness_score": round(readiness_score, 2),
@@ -90,6 +241,200 @@ class EvaluationService:
             "notes": notes
         }
     
+    def evaluate_many(self, demand_datas: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量评估需求可行性
+        
+        逐条读取字段后，各项评分按列用 NumPy 计算，阶梯阈值用 np.searchsorted 查表；
+        加法顺序与单条评估一致，结果与逐条调用 evaluate_demand 完全相同
+        
+        Args:
+            demand_datas: 需求数据字典列表
+            
+        Returns:
+            与输入顺序一致的评估结果字典列表
+        """
+        return self._evaluate_many(demand_datas)[0]
+    
+    def evaluate_many_incremental(
+        self,
+        demand_datas: Sequence[Dict[str, Any]],
+        caches: Sequence[Optional[Dict[str, Any]]],
+        cached_results: Sequence[Optional[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[bool]]:
+        """
+        批量增量评估：全部输入未变化的需求直接复用上次的评估结果，其余需求批量重新评估
+        
+        Returns:
+            (评估结果列表, 组件缓存列表, 是否重新评估的标记列表)
+        """
+        results = list(cached_results)
+        caches = list(caches)
+        changed = []
+        hashes = []
+        for i, demand_data in enumerate(demand_datas):
+            digests = self.component_hashes(demand_data)
+            cache = caches[i] or {}
+            cached = cache.get("components", {}) if cache.get("rules") == self.rules_version else {}
+            unchanged = all(cached.get(name, {}).get("hash") == digest for name, digest in digests.items())
+            if not unchanged or results[i] is None:
+                changed.append(i)
+                hashes.append(digests)
+        
+        batch, values = self._evaluate_many([demand_datas[i] for i in changed])
+        for pos, i in enumerate(changed):
+            results[i] = batch[pos]
+            caches[i] = self.component_cache(hashes[pos], values[pos])
+        
+        flags = [False] * len(demand_datas)
+        for i in changed:
+            flags[i] = True
+        return results, caches, flags
+    
+    def _evaluate_many(
+        self, demand_datas: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """批量评估，同时返回每个需求的各组件得分（未舍入）"""
+        n = len(demand_datas)
+        if n == 0:
+            return [], []
+        
+        # 1. 取出评分用到的字段
+        summaries = [d.get("data_summary", {}) for d in demand_datas]
+        industry_tags = [d.get("industry_tags", []) for d in demand_datas]
+        scenario_tags = [d.get("scenario_tags", []) for d in demand_datas]
+        has_summary = np.array([bool(summary) for summary in summaries])
+        total_count = np.array([
+            sum(summary.get("counts", {}).values()) if summary else 0 for summary in summaries
+        ], dtype=float)
+        labeled_ratio = np.array([
+            summary.get("labeled_ratio", 0) if summary else 0 for summary in summaries
+        ], dtype=float)
+        type_count = np.array([len(summary.get("types", [])) if summary else 0 for summary in summaries])
+        has_industry = np.array([bool(tags) for tags in industry_tags])
+        has_scenario = np.array([bool(tags) for tags in scenario_tags])
+        maturity = np.array([
+            self.INDUSTRY_MATURITY.get(tags[0], 0.5) if tags else 0.0 for tags in industry_tags
+        ])
+        difficulty = np.array([
+            self.SCENARIO_DIFFICULTY.get(tags[0], 0.5) if tags else 0.0 for tags in scenario_tags
+        ])
+        long_description = np.array([
+            bool(d.get("description") and len(d["description"]) > 100) for d in demand_datas
+        ])
+        has_kpis = np.array([bool(d.get("kpis", [])) for d in demand_datas])
+        has_budget_min = np.array([bool(d.get("budget_min")) for d in demand_datas])
+        has_budget_max = np.array([bool(d.get("budget_max")) for d in demand_datas])
+        has_timeline_start = np.array([bool(d.get("timeline_start")) for d in demand_datas])
+        has_timeline_end = np.array([bool(d.get("timeline_end")) for d in demand_datas])
+        budget_max = np.array([d.get("budget_max") or 0 for d in demand_datas], dtype=float)
+        confidential = np.array([
+            d.get("confidentiality", "internal") in ["confidential", "secret"] for d in demand_datas
+        ])
+        medical_or_finance = np.array(["医疗" in tags or "金融" in tags for tags in industry_tags])
+        
+        # 2. 数据健康度
+        count_bonus = np.take(self.DATA_COUNT_BONUS, np.searchsorted(self.DATA_COUNT_THRESHOLDS, total_count, side="right"))
+        ratio_bonus = np.take(self.LABELED_RATIO_BONUS, np.searchsorted(self.LABELED_RATIO_THRESHOLDS, labeled_ratio, side="right"))
+        data_health = 50.0 + count_bonus + ratio_bonus + np.minimum(type_count * 5, 10)
+        data_health = np.where(has_summary, np.minimum(data_health, 100.0), 30.0)
+        
+        # 3. 技术可行性
+        technical_feasibility = 60.0 + np.where(has_industry, maturity * 20, 0.0)
+        technical_feasibility = technical_feasibility + np.where(has_scenario, difficulty * 20, 0.0)
+        technical_feasibility = np.minimum(technical_feasibility, 100.0)
+        
+        # 4. 项目就绪度
+        readiness = 40.0 + np.where(long_description, 15, 0)
+        readiness = readiness + np.where(has_kpis, 15, 0)
+        readiness = readiness + np.where(has_budget_min & has_budget_max, 10, 0)
+        readiness = readiness + np.where(has_timeline_start & has_timeline_end, 10, 0)
+        readiness = np.minimum(readiness + (data_health / 100) * 10, 100.0)
+        
+        # 5. 风险
+        data_risk = np.searchsorted(self.DATA_RISK_THRESHOLDS, data_health, side="right")
+        low_budget = budget_max < 100000
+        risk_score = (
+            np.take(self.DATA_RISK_SCORES, data_risk) +
+            np.where(low_budget, 20, 0) +
+            np.where(has_timeline_end, 0, 10) +
+            np.where(has_kpis, 0, 15) +
+            np.where(confidential, 10, 0)
+        )
+        risk_level = np.searchsorted(self.RISK_LEVEL_THRESHOLDS, risk_score, side="right")
+        
+        # 6. 交付路径
+        avg_score = (technical_feasibility + readiness + data_health) / 3
+        path = np.searchsorted(self.PATH_THRESHOLDS, avg_score, side="right")
+        path = np.where((path == 2) & (data_health < self.DIRECT_MIN_DATA_HEALTH), 1, path)
+        
+        # 7. 综合评分
+        overall = technical_feasibility * 0.4 + readiness * 0.35 + data_health * 0.25
+        
+        # 8. 置信度
+        confidence = 0.5 + np.where(long_description, 0.1, 0.0)
+        confidence = confidence + np.where(has_kpis, 0.1, 0.0)
+        confidence = confidence + np.where(has_summary, 0.15, 0.0)
+        confidence = confidence + np.where(has_budget_max, 0.05, 0.0)
+        confidence = confidence + np.where(has_industry, 0.05, 0.0)
+        confidence = confidence + np.where(has_scenario, 0.05, 0.0)
+        confidence = np.minimum(confidence, 1.0)
+        
+        # 9. 风险因素与建议（文本按行组装，顺序与单条评估一致）
+        low_readiness = readiness < 70
+        results, values = [], []
+        for i in range(n):
+            risk_factors = []
+            if self.DATA_RISK_FACTORS[data_risk[i]]:
+                risk_factors.append(self.DATA_RISK_FACTORS[data_risk[i]])
+            if low_budget[i]:
+                risk_factors.append("预算可能不足以支撑完整项目交付")
+            if not has_timeline_end[i]:
+                risk_factors.append("缺少明确的交付时间要求")
+            if not has_kpis[i]:
+                risk_factors.append("缺少明确的效果评估指标")
+            if confidential[i]:
+                risk_factors.append("高保密等级可能限制供应商选择")
+            
+            notes = []
+            if data_health[i] < 60:
+                notes.append("建议增加数据样本数量，目标至少5000条以上")
+            if labeled_ratio[i] < 0.5:
+                notes.append("建议提高数据标注比例至50%以上，以提升模型训练效果")
+            if low_readiness[i]:
+                if not has_kpis[i]:
+                    notes.append("建议明确项目KPI指标，如准确率、召回率等具体目标")
+                if not has_budget_max[i]:
+                    notes.append("建议确定项目预算范围，便于匹配合适的供应商")
+            if technical_feasibility[i] < 70:
+                notes.append("建议先进行技术预研和PoC验证，降低项目风险")
+            if medical_or_finance[i]:
+                notes.append("注意相关行业的合规性要求和数据隐私保护")
+            if len(notes) == 0:
+                notes.append("需求准备充分，可以直接进入供应商匹配流程")
+            
+            # 保留两位小数使用内置 round，与单条评估的舍入方式一致
+            results.append({
+                "feasibility_score": round(float(technical_feasibility[i]), 2),
+                "readiness_score": round(float(readiness[i]), 2),
+                "data_health_score": round(float(data_health[i]), 2),
+                "overall_score": round(float(overall[i]), 2),
+                "risk_level": self.RISK_LEVELS[risk_level[i]],
+                "risk_factors": risk_factors,
+                "recommended_path": self.PATHS[path[i]],
+                "confidence": round(float(confidence[i]), 2),
+                "notes": notes
+            })
+            values.append({
+                "data_health": float(data_health[i]),
+                "technical_feasibility": float(technical_feasibility[i]),
+                "readiness": float(readiness[i]),
+                "risks": [self.RISK_LEVELS[risk_level[i]], list(risk_factors)],
+                "confidence": float(confidence[i])
+            })
+        
+        return results, values
+    
     def _evaluate_data_health(self, data_summary: Dict[str, Any]) -> float:
         """评估数据健康度"""
         if not data_summary:
@@ -99,25 +444,11 @@ class EvaluationService:
         
         # 数据量评分
         total_count = sum(data_summary.get("counts", {}).values())
-        if total_count >= 10000:
-            score += 20
-        elif total_count >= 5000:
-            score += 15
-        elif total_count >= 1000:
-            score += 10
-        elif total_count >= 100:
-            score += 5
+        score += _lookup(self.DATA_COUNT_THRESHOLDS, self.DATA_COUNT_BONUS, total_count)
         
         # 标注率评分
         labeled_ratio = data_summary.get("labeled_ratio", 0)
-        if labeled_ratio >= 0.8:
-            score += 20
-        elif labeled_ratio >= 0.5:
-            score += 15
-        elif labeled_ratio >= 0.2:
-            score += 10
-        elif labeled_ratio > 0:
-            score += 5
+        score += _lookup(self.LABELED_RATIO_THRESHOLDS, self.LABELED_RATIO_BONUS, labeled_ratio)
         
         # 数据类型多样性
         data_types = data_summary.get("types", [])
@@ -177,15 +508,13 @@ class EvaluationService:
         risk_score = 0
         
         # 数据风险
-        if data_health < 50:
-            risk_factors.append("数据样本量不足或质量较低")
-            risk_score += 30
-        elif data_health < 70:
-            risk_factors.append("数据准备度需要提升")
-            risk_score += 15
+        data_risk = bisect.bisect_right(self.DATA_RISK_THRESHOLDS, data_health)
+        if self.DATA_RISK_FACTORS[data_risk]:
+            risk_factors.append(self.DATA_RISK_FACTORS[data_risk])
+            risk_score += self.DATA_RISK_SCORES[data_risk]
         
-        # 预算风险
-        budget_max = demand_data.get("budget_max", 0)
+        # 预算风险（未填写预算按 0 计）
+        budget_max = demand_data.get("budget_max") or 0
         if budget_max < 100000:
             risk_factors.append("预算可能不足以支撑完整项目交付")
             risk_score += 20
@@ -208,12 +537,7 @@ class EvaluationService:
             risk_score += 10
         
         # 确定风险等级
-        if risk_score >= 50:
-            risk_level = "high"
-        elif risk_score >= 25:
-            risk_level = "medium"
-        else:
-            risk_level = "low"
+        risk_level = _lookup(self.RISK_LEVEL_THRESHOLDS, self.RISK_LEVELS, risk_score)
         
         return risk_level, risk_factors
     
@@ -226,12 +550,11 @@ class EvaluationService:
         """推荐交付路径"""
         avg_score = (technical_feasibility + readiness_score + data_health) / 3
         
-        if avg_score >= 80 and data_health >= 70:
-            return "direct"  # 直接交付
-        elif avg_score >= 60:
-            return "pilot"  # 试点项目
-        else:
-            return "poc"  # 概念验证
+        # 直接交付 / 试点项目 / 概念验证；数据健康度不足时最多为试点项目
+        path = bisect.bisect_right(self.PATH_THRESHOLDS, avg_score)
+        if path == 2 and data_health < self.DIRECT_MIN_DATA_HEALTH:
+            path = 1
+        return self.PATHS[path]
     
     def _generate_recommendations(
         self,
@@ -0,0 +1,185 @@
+"""
+供应商特征文件
+把供应商档案和特征矩阵（标签位图、信用分、地理标记、TF-IDF 行）写成带版本的 .npy 文件目录，
+多个 Web / worker 进程以只读内存映射共享同一份页缓存，新进程无需扫描企业表即可开始匹配。
+发布新版本时先写临时目录，再原子替换 CURRENT 指针；读取方检查到新指针后切换到新版本。
+"""
+from typing import Dict, List, Optional, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from .scoring_engine import VendorFeatures
+from .tag_dictionary import TagDictionary
+from .vendor_snapshot import VendorProfile
+
+try:
+    import fcntl
+except ImportError:  # Windows：只在进程内互斥
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 文件格式版本，结构变化时递增，旧版本目录将被忽略
+FEATURE_FORMAT_VERSION = 1
+
+POINTER_FILE = "CURRENT"
+LOCK_FILE = "publish.lock"
+VERSIONS_DIR = "versions"
+
+
+def _profile_row(profile: VendorProfile) -> list:
+    return [
+        profile.id, profile.eid, profile.name, profile.industry_tags, profile.ai_capabilities,
+        profile.credit_score, profile.geo_local, profile.contact_email,
+        profile.updated_at.isoformat() if profile.updated_at else None
+    ]
+
+
+def _profile_from_row(row: list) -> VendorProfile:
+    *fields, updated_at = row
+    return VendorProfile(*fields, datetime.fromisoformat(updated_at) if updated_at else None)
+
+
+class PublishedVendors:
+    """一个已发布版本：供应商档案（与特征矩阵行顺序一致）及按需映射的特征矩阵"""
+
+    def __init__(self, path: str, version: str, built_at: float, profiles: List[VendorProfile]):
+        self.path = path
+        self.version = version
+        self.built_at = built_at  # 构建时读取数据库的时间，之前提交的变更都已包含
+        self.profiles = profiles
+        self._positions: Dict[int, int] = {p.id: row for row, p in enumerate(profiles)}
+        self._features: Optional[VendorFeatures] = None
+        self._lock = threading.Lock()
+
+    def features(self, dictionary: TagDictionary) -> Optional[VendorFeatures]:
+        """只读映射特征矩阵；标签词典与发布时不一致时返回 None"""
+        with self._lock:
+            if self._features is None or self._features.dictionary is not dictionary:
+                try:
+                    self._features = VendorFeatures.load(os.path.join(self.path, "features"), dictionary)
+                except ValueError:
+                    return None
+            return self._features
+
+    def row_of(self, profile: VendorProfile) -> Optional[int]:
+        """档案在特征矩阵中的行；档案不是本版本中的对象（已被本进程的提交覆盖）时返回 None"""
+        row = self._positions.get(profile.id)
+        if row is None or self.profiles[row] is not profile:
+            return None
+        return row
+
+
+class VendorFeatureStore:
+    """带版本的供应商特征文件目录"""
+
+    def __init__(self, directory: str, keep_versions: int = 3, check_interval: float = 1.0):
+        """
+        Args:
+            directory: 特征文件目录，为空时不启用（各进程从数据库加载）
+            keep_versions: 保留的历史版本数（仍在映射旧版本的进程可继续读取）
+            check_interval: 检查 CURRENT 指针的最小间隔（秒）
+        """
+        self.directory = directory
+        self.keep_versions = max(keep_versions, 1)
+        self.check_interval = check_interval
+        self._current: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    # ---- 读取 ----
+
+    def current_version(self, force: bool = False) -> Optional[str]:
+        """当前发布的版本（按 check_interval 节流读取指针文件）"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if force or now - self._checked_at >= self.check_interval:
+            try:
+                with open(os.path.join(self.directory, POINTER_FILE), encoding="utf-8") as f:
+                    self._current = f.read().strip() or None
+            except FileNotFoundError:
+                self._current = None
+            self._checked_at = now
+        return self._current
+
+    def open(self, version: str) -> Optional[PublishedVendors]:
+        """打开某个版本；文件缺失或格式不符时返回 None"""
+        path = os.path.join(self.directory, VERSIONS_DIR, version)
+        try:
+            with open(os.path.join(path, "profiles.json"), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("format") != FEATURE_FORMAT_VERSION:
+            return None
+        profiles = [_profile_from_row(row) for row in state["profiles"]]
+        return PublishedVendors(path, version, state["built_at"], profiles)
+
+    # ---- 发布 ----
+
+    @contextmanager
+    def publishing(self) -> Iterator[None]:
+        """发布互斥：多个进程的构建与指针替换依次进行，后发布的版本总是读取了更新的数据"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, profiles: List[VendorProfile], features: VendorFeatures, built_at: float) -> str:
+        """
+        写入新版本并原子替换指针（调用方需持有 publishing()）
+
+        Args:
+            profiles: 供应商档案，顺序与特征矩阵的行一致
+            features: 特征矩阵
+            built_at: 构建时读取数据库的时间
+
+        Returns:
+            新版本号
+        """
+        version = f"{time.time_ns():020d}-{os.getpid()}"
+        versions_dir = os.path.join(self.directory, VERSIONS_DIR)
+        tmp_path = os.path.join(versions_dir, f".{version}.tmp")
+        os.makedirs(os.path.join(tmp_path, "features"))
+
+        features.save(os.path.join(tmp_path, "features"))
+        with open(os.path.join(tmp_path, "profiles.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FEATURE_FORMAT_VERSION,
+                "built_at": built_at,
+                "profiles": [_profile_row(p) for p in profiles]
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(versions_dir, version))
+
+        pointer_tmp = os.path.join(self.directory, f"{POINTER_FILE}.{os.getpid()}.tmp")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(self.directory, POINTER_FILE))
+
+        self._current = version
+        self._checked_at = time.monotonic()
+        self._cleanup(versions_dir, version)
+        return version
+
+    def _cleanup(self, versions_dir: str, current: str):
+        """删除超出保留数量的旧版本（已映射的文件在 POSIX 上仍可读取）"""
+        versions = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+        for name in versions[:-self.keep_versions]:
+            if name != current:
+                shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
@@ -0,0 +1,434 @@
+"""
+后台任务队列
+任务持久化在数据库 jobs 表中（SQLite / PostgreSQL 均可），worker 进程可部署在不同节点上，
+按需求优先级领取评估、匹配、推荐刷新与批量匹配任务执行
+"""
+from typing import Dict, Any, Optional, Callable, Iterable
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+import time
+from sqlalchemy import or_, and_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models import Job, JobType, JobStatus, Demand, DemandStatus, Enterprise
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+# 推荐刷新任务的对象列（供应商任务没有 demand_id）
+REFRESH_JOB_COLUMNS = {
+    JobType.REFRESH_DEMAND: Job.demand_id,
+    JobType.REFRESH_VENDOR: Job.enterprise_id,
+}
+
+# 单条 IN 查询中的ID数量上限
+QUERY_CHUNK_SIZE = 500
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobConflictError(Exception):
+    """同一需求已有参数不同的未完成任务"""
+
+
+class JobQueue:
+    """数据库任务队列"""
+
+    # 每次领取时按优先级取出的候选任务数（并发 worker 抢占失败时依次尝试下一个）
+    CLAIM_BATCH_SIZE = 10
+
+    # 推荐刷新期间对象再次被修改时，同一任务内最多重新刷新的次数
+    REFRESH_ROUNDS = 3
+
+    # 每次清理删除的已结束任务数（分批删除，避免长时间持有写锁）
+    PRUNE_BATCH_SIZE = 1000
+
+    def __init__(self, lease_seconds: int = 300, max_attempts: int = 3, retention_days: float = 7):
+        """
+        Args:
+            lease_seconds: 任务租约时长，超时未完成的任务可被其他 worker 重新领取
+            max_attempts: 单个任务最多被领取的次数
+            retention_days: 已结束任务的保留天数，0 表示不清理
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+
+    # ---- 提交与查询 ----
+
+    def enqueue(self, db: Session, job_type: JobType, demand: Demand, payload: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        提交任务；同一需求已有未完成的同类任务时直接返回该任务
+
+        Returns:
+            新建或已存在的任务
+
+        Raises:
+            JobConflictError: 已有的匹配任务 top_k 与本次不同（同一需求同时只能有一个未完成的匹配任务）
+        """
+        payload = payload or {}
+        existing = self._active_job(db, job_type, demand.id)
+        if existing is not None:
+            return self._check_duplicate(existing, payload)
+
+        job = Job(job_type=job_type, demand_id=demand.id, payload=payload)
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # 并发提交时由部分唯一索引去重
+            db.rollback()
+            existing = self._active_job(db, job_type, demand.id)
+            if existing is None:
+                raise
+            return self._check_duplicate(existing, payload)
+        db.refresh(job)
+        return job
+
+    def _check_duplicate(self, existing: Job, payload: Dict[str, Any]) -> Job:
+        """匹配任务的结果条数由 top_k 决定，参数不同时不能复用已有任务"""
+        if existing.job_type == JobType.MATCH:
+            if (existing.payload or {}).get("top_k", 5) != payload.get("top_k", 5):
+                raise JobConflictError(f"需求 {existing.demand_id} 已有参数不同的匹配任务 {existing.id} 未完成")
+        return existing
+
+    def enqueue_batch(self, db: Session, job_type: JobType, payload: Dict[str, Any]) -> Job:
+        """提交批量任务（没有单个任务对象，不去重）"""
+        job = Job(job_type=job_type, payload=payload)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def enqueue_refresh(self, db: Session, job_type: JobType, owner_ids: Iterable[int]) -> int:
+        """
+        批量提交推荐刷新任务并提交事务；已有未完成刷新任务的对象跳过
+
+        Args:
+            job_type: REFRESH_DEMAND（需求ID）或 REFRESH_VENDOR（供应商ID）
+            owner_ids: 需要刷新推荐列表的需求/供应商ID
+
+        Returns:
+            新提交的任务数
+        """
+        column = REFRESH_JOB_COLUMNS[job_type]
+        owner_ids = sorted(set(owner_ids))
+        active = set()
+        for start in range(0, len(owner_ids), QUERY_CHUNK_SIZE):
+            active.update(owner_id for (owner_id,) in db.query(column).filter(
+                Job.job_type == job_type,
+                column.in_(owner_ids[start:start + QUERY_CHUNK_SIZE]),
+                Job.status.in_(ACTIVE_JOB_STATUSES)
+            ))
+        missing = [owner_id for owner_id in owner_ids if owner_id not in active]
+        if not missing:
+            return 0
+
+        db.add_all([Job(job_type=job_type, payload={}, **{column.key: owner_id}) for owner_id in missing])
+        try:
+            db.commit()
+            return len(missing)
+        except IntegrityError:
+            # 并发提交时由部分唯一索引去重，逐个重试
+            db.rollback()
+
+        added = 0
+        for owner_id in missing:
+            db.add(Job(job_type=job_type, payload={}, **{column.key: owner_id}))
+            try:
+                db.commit()
+                added += 1
+            except IntegrityError:
+                db.rollback()
+        return added
+
+    def get(self, db: Session, job_id: int) -> Optional[Job]:
+        return db.query(Job).filter(Job.id == job_id).first()
+
+    def remove_demand(self, db: Session, demand_id: int):
+        """删除某个需求的全部任务（需求删除时调用，随请求事务提交）"""
+        db.query(Job).filter(Job.demand_id == demand_id).delete(synchronize_session=False)
+
+    def _active_job(self, db: Session, job_type: JobType, demand_id: int) -> Optional[Job]:
+        return db.query(Job).filter(
+            Job.job_type == job_type,
+            Job.demand_id == demand_id,
+            Job.status.in_(ACTIVE_JOB_STATUSES)
+        ).first()
+
+    # ---- 领取与执行 ----
+
+    def _claimable(self, now: datetime):
+        """排队中的任务，以及租约已过期的执行中任务"""
+        return or_(
+            Job.status == JobStatus.QUEUED,
+            and_(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now)
+        )
+
+    def claim(self, db: Session, worker_id: str) -> Optional[Job]:
+        """
+        按需求优先级（高优先）和提交顺序领取一个任务
+
+        候选任务在 PostgreSQL 上以 FOR UPDATE SKIP LOCKED 读取；
+        领取本身是带状态条件的 UPDATE，SQLite 上同样只有一个 worker 能成功。
+        """
+        now = datetime.utcnow()
+        candidates = db.query(Job.id).outerjoin(Demand, Demand.id == Job.demand_id).filter(
+            self._claimable(now)
+        ).order_by(
+            func.coalesce(Demand.priority, 5).desc(), Job.id
+        ).limit(self.CLAIM_BATCH_SIZE)
+        if db.bind.dialect.name == "postgresql":
+            candidates = candidates.with_for_update(of=Job, skip_locked=True)
+
+        for (job_id,) in candidates.all():
+            claimed = db.query(Job).filter(Job.id == job_id, self._claimable(now)).update({
+                Job.status: JobStatus.RUNNING,
+                Job.worker_id: worker_id,
+                Job.started_at: now,
+                Job.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+                Job.attempts: Job.attempts + 1
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                continue
+
+            job = self.get(db, job_id)
+            if job.attempts > self.max_attempts:
+                self._finish(db, job_id, worker_id, JobStatus.FAILED, error="超过最大重试次数")
+                continue
+            return job
+
+        db.commit()
+        return None
+
+    def execute(self, db: Session, job: Job) -> Dict[str, Any]:
+        """执行任务，返回任务结果"""
+        # 工作流与匹配服务依赖推荐表，推荐表又通过本队列提交刷新任务，执行时再导入
+        from . import demand_workflow
+        from .matching_service import matching_service
+        from .batch_matching import batch_matcher
+
+        if job.job_type == JobType.BATCH_MATCH:
+            payload = job.payload or {}
+            statuses = [DemandStatus(value) for value in payload.get("statuses") or []]
+            demands = batch_matcher.select_demands(db, payload.get("demand_ids"), statuses)
+            job_id, worker_id = job.id, job.worker_id
+            return batch_matcher.rematch(
+                db, demands, payload.get("top_k", 5),
+                # 批量任务可能超过租约时长，评分过程中续租，避免被其他 worker 重复领取
+                progress=lambda done, total: self.renew(db, job_id, worker_id)
+            )
+
+        if job.job_type == JobType.REFRESH_VENDOR:
+            vendor = db.query(Enterprise).filter(Enterprise.id == job.enterprise_id).first()
+            if not vendor:
+                raise LookupError("企业不存在")
+            rounds = self._refresh(db, vendor, matching_service.recommendations.refresh_vendor)
+            return {"enterprise_id": vendor.id, "rounds": rounds}
+
+        demand = db.query(Demand).filter(Demand.id == job.demand_id).first()
+        if not demand:
+            raise LookupError("需求不存在")
+
+        if job.job_type == JobType.REFRESH_DEMAND:
+            rounds = self._refresh(db, demand, matching_service.recommendations.refresh_demand)
+            return {"demand_id": demand.id, "rounds": rounds}
+
+        if job.job_type == JobType.EVALUATE:
+            return {"evaluation": demand_workflow.evaluate_demand(db, demand)}
+
+        top_k = (job.payload or {}).get("top_k", 5)
+        return {"match_results": demand_workflow.match_demand(db, demand, top_k)}
+
+    def _refresh(self, db: Session, owner, refresh: Callable[[Session, Any], None]) -> int:
+        """
+        刷新推荐列表，直到刷新期间对象没有再被修改
+
+        执行中的任务会让同一对象的新刷新请求直接返回该任务，刷新完成后对象若已变化需在本任务内重做。
+        """
+        for rounds in range(1, self.REFRESH_ROUNDS + 1):
+            version = owner.updated_at
+            refresh(db, owner)
+            db.refresh(owner)
+            if owner.updated_at == version:
+                break
+        return rounds
+
+    def renew(self, db: Session, job_id: int, worker_id: str) -> bool:
+        """延长执行中任务的租约（仅限领取该任务的 worker）"""
+        renewed = db.query(Job).filter(
+            Job.id == job_id, Job.status == JobStatus.RUNNING, Job.worker_id == worker_id
+        ).update({
+            Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+        }, synchronize_session=False)
+        db.commit()
+        return bool(renewed)
+
+    def run_one(self, worker_id: Optional[str] = None) -> Optional[Job]:
+        """
+        领取并执行一个任务
+
+        Returns:
+            已处理的任务；队列为空时返回 None
+        """
+        worker_id = worker_id or default_worker_id()
+        db = SessionLocal()
+        try:
+            job = self.claim(db, worker_id)
+            if job is None:
+                return None
+
+            job_id = job.id
+            try:
+                result = self.execute(db, job)
+            except Exception as exc:
+                logger.exception("任务 %s 执行失败", job_id)
+                db.rollback()
+                finished = self._finish(db, job_id, worker_id, JobStatus.FAILED, error=str(exc))
+            else:
+                finished = self._finish(db, job_id, worker_id, JobStatus.SUCCEEDED, result=result)
+            if not finished:
+                logger.warning("任务 %s 的租约已被其他 worker 接管，丢弃本次执行结果", job_id)
+
+            job = self.get(db, job_id)
+            db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def prune(self, db: Session, older_than: datetime) -> int:
+        """
+        分批删除结束时间早于 older_than 的成功/失败任务
+
+        Returns:
+            删除的任务数
+        """
+        removed = 0
+        while True:
+            job_ids = [job_id for (job_id,) in db.query(Job.id).filter(
+                Job.status.in_((JobStatus.SUCCEEDED, JobStatus.FAILED)),
+                Job.finished_at < older_than
+            ).limit(self.PRUNE_BATCH_SIZE)]
+            if not job_ids:
+                return removed
+            removed += db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+            db.commit()
+
+    def prune_finished(self) -> int:
+        """按保留天数清理已结束的任务，失败只记录日志"""
+        if not self.retention_days:
+            return 0
+        db = SessionLocal()
+        try:
+            return self.prune(db, datetime.utcnow() - timedelta(days=self.retention_days))
+        except Exception:
+            logger.exception("清理已结束的任务失败")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def schedule_stale_refreshes(self) -> int:
+        """
+        为过期或缺失的推荐列表提交刷新任务（推荐表为空时先全量构建），失败只记录日志
+
+        Returns:
+            新提交的刷新任务数
+        """
+        # 推荐表通过本队列提交刷新任务，执行时再导入
+        from .matching_service import matching_service
+
+        db = SessionLocal()
+        try:
+            return matching_service.recommendations.schedule_stale(db)
+        except Exception:
+            logger.exception("提交推荐刷新任务失败")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def run_worker(
+        self,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 1.0,
+        max_jobs: Optional[int] = None,
+        stop_when_idle: bool = False,
+        on_job: Optional[Callable[[Job], None]] = None,
+        sweep_interval: float = 0.0
+    ) -> int:
+        """
+        worker 主循环：持续领取任务，队列为空时按 poll_interval 轮询
+
+        Args:
+            worker_id: worker 标识，默认 主机名:进程号
+            poll_interval: 队列为空时的轮询间隔（秒）
+            max_jobs: 处理指定数量的任务后退出
+            stop_when_idle: 队列为空时退出
+            on_job: 每个任务完成后的回调
+            sweep_interval: 检查过期推荐列表并提交刷新任务、清理已结束任务的间隔（秒），0 表示不检查
+
+        Returns:
+            处理的任务数
+        """
+        worker_id = worker_id or default_worker_id()
+        processed = 0
+        next_sweep = time.monotonic()
+        while max_jobs is None or processed < max_jobs:
+            if sweep_interval and time.monotonic() >= next_sweep:
+                self.schedule_stale_refreshes()
+                self.prune_finished()
+                next_sweep = time.monotonic() + sweep_interval
+            job = self.run_one(worker_id)
+            if job is None:
+                if stop_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+            processed += 1
+            if on_job:
+                on_job(job)
+        return processed
+
+    def _finish(
+        self,
+        db: Session,
+        job_id: int,
+        worker_id: str,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        记录任务结果（仅限仍持有租约的 worker）
+
+        Returns:
+            租约已过期并被其他 worker 重新领取时返回 False，结果不写入
+        """
+        finished = db.query(Job).filter(
+            Job.id == job_id, Job.status == JobStatus.RUNNING, Job.worker_id == worker_id
+        ).update({
+            Job.status: status,
+            Job.result: result,
+            Job.error: error,
+            Job.finished_at: datetime.utcnow(),
+            Job.lease_expires_at: None
+        }, synchronize_session=False)
+        db.commit()
+        return bool(finished)
+
+
+# 全局任务队列实例
+job_queue = JobQueue(
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retention_days=settings.JOB_RETENTION_DAYS
+)
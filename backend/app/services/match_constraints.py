@@ -0,0 +1,248 @@
+"""
+匹配硬性约束
+把需求对供应商的硬性要求（最低信用分、必备资质、保密等级对应的认证级别、预算档位）
+转换为企业表上可走索引的 SQL 条件，在评分前排除不可能成交的供应商，评分只处理剩余的供应商。
+反向匹配（供应商 -> 需求）把供应商的信用分、认证级别、最低承接预算代入需求表上的 SQL 条件，
+只有带必备资质或机密场景标签的需求才在 Python 中判断。
+
+企业的认证资质（JSON 字段）由 ORM 事件同步到 enterprise_certifications 索引表，按资质名称查找企业。
+"""
+from typing import List, Optional, Set, Any, Iterable
+from sqlalchemy import String, and_, cast, event, func, not_, or_, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models import Enterprise, EnterpriseCertification, EnterpriseStatus, Demand, ConfidentialityLevel
+from .tag_dictionary import tag_dictionary
+from .tag_index import VENDOR_TYPES, open_demand_filter
+
+
+# 机密/绝密需求只开放给以下认证级别的供应商
+CONFIDENTIAL_VENDOR_LEVELS = {
+    ConfidentialityLevel.CONFIDENTIAL: ("认证企业", "优选企业"),
+    ConfidentialityLevel.SECRET: ("优选企业",)
+}
+
+
+def certification_names(certifications: Any) -> List[str]:
+    """认证资质列表中的资质名称（元素为 {"name": ...} 或字符串），去重并保持顺序"""
+    names = []
+    for item in certifications or []:
+        name = item.get("name") if isinstance(item, dict) else item
+        if isinstance(name, str) and name.strip() and name.strip() not in names:
+            names.append(name.strip())
+    return names
+
+
+def _get(demand: Any, key: str, default: Any = None) -> Any:
+    if isinstance(demand, dict):
+        return demand.get(key, default)
+    return getattr(demand, key, default)
+
+
+class MatchConstraints:
+    """一个需求对供应商的硬性要求"""
+
+    __slots__ = ("min_credit", "certifications", "levels", "budget", "overlap_tags")
+
+    def __init__(
+        self,
+        min_credit: Optional[float] = None,
+        certifications: Iterable[str] = (),
+        levels: Optional[tuple] = None,
+        budget: Optional[float] = None,
+        overlap_tags: Iterable[str] = ()
+    ):
+        """
+        Args:
+            min_credit: 供应商最低信用分
+            certifications: 供应商必须全部具备的资质名称
+            levels: 允许的供应商认证级别，None 表示不限
+            budget: 需求预算上限，供应商的最低承接预算不得高于该值
+            overlap_tags: 供应商能力标签必须与其中至少一个重合（机密需求）
+        """
+        self.min_credit = min_credit
+        self.certifications = list(certifications)
+        self.levels = levels
+        self.budget = budget
+        self.overlap_tags = list(overlap_tags)
+
+    @classmethod
+    def for_demand(cls, demand: Any) -> "MatchConstraints":
+        """由需求对象或需求匹配数据构建"""
+        confidentiality = _get(demand, "confidentiality")
+        if confidentiality is not None:
+            confidentiality = ConfidentialityLevel(confidentiality)
+        levels = CONFIDENTIAL_VENDOR_LEVELS.get(confidentiality)
+
+        floors = [_get(demand, "min_vendor_credit")]
+        if confidentiality == ConfidentialityLevel.CONFIDENTIAL:
+            floors.append(settings.MATCH_CONFIDENTIAL_MIN_CREDIT)
+        elif confidentiality == ConfidentialityLevel.SECRET:
+            floors.append(settings.MATCH_SECRET_MIN_CREDIT)
+        floors = [floor for floor in floors if floor]
+
+        budget = _get(demand, "budget_max")
+        return cls(
+            min_credit=max(floors) if floors else None,
+            certifications=_get(demand, "required_certifications") or [],
+            levels=levels,
+            budget=budget if budget else None,
+            # 机密需求不向能力标签毫无重合的供应商开放；需求未填写场景标签时无法判断，不限制
+            overlap_tags=(_get(demand, "scenario_tags") or []) if levels else []
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.min_credit is None and not self.certifications and self.levels is None and
+            self.budget is None and not self.overlap_tags
+        )
+
+    # ---- 正向匹配：SQL 条件 ----
+
+    def vendor_predicates(self) -> list:
+        """企业表上的过滤条件（信用分、认证级别、最低承接预算均有索引，资质走索引表）"""
+        predicates = []
+        if self.min_credit is not None:
+            predicates.append(Enterprise.credit_score >= self.min_credit)
+        if self.levels is not None:
+            predicates.append(Enterprise.certification_level.in_(self.levels))
+        if self.budget is not None:
+            predicates.append(or_(
+                Enterprise.min_project_budget.is_(None),
+                Enterprise.min_project_budget <= self.budget
+            ))
+        if self.certifications:
+            names = certification_names(self.certifications)
+            predicates.append(Enterprise.id.in_(
+                select(EnterpriseCertification.enterprise_id).where(
+                    EnterpriseCertification.name.in_(names)
+                ).group_by(EnterpriseCertification.enterprise_id).having(
+                    func.count(EnterpriseCertification.name) == len(names)
+                )
+            ))
+        return predicates
+
+    def vendor_ids(self, db: Session) -> Optional[Set[int]]:
+        """
+        满足 SQL 条件的已认证供应商ID（只查询ID列）
+
+        Returns:
+            供应商ID集合；没有 SQL 条件时返回 None，表示不限制
+        """
+        predicates = self.vendor_predicates()
+        if not predicates:
+            return None
+        rows = db.query(Enterprise.id).filter(
+            Enterprise.enterprise_type.in_(VENDOR_TYPES),
+            Enterprise.status == EnterpriseStatus.VERIFIED,
+            *predicates
+        )
+        return {vendor_id for vendor_id, in rows}
+
+    # ---- 反向匹配：单个供应商的判断 ----
+
+    def allows(self, vendor: Enterprise) -> bool:
+        """供应商是否满足全部要求（与 SQL 条件及标签重合判断一致）"""
+        if self.min_credit is not None and (vendor.credit_score or 0.0) < self.min_credit:
+            return False
+        if self.levels is not None and vendor.certification_level not in self.levels:
+            return False
+        if self.budget is not None and vendor.min_project_budget is not None and vendor.min_project_budget > self.budget:
+            return False
+        if self.certifications:
+            if not set(certification_names(self.certifications)) <= set(certification_names(vendor.certifications)):
+                return False
+        if self.overlap_tags:
+            demand_masks = tag_dictionary.masks([], self.overlap_tags)
+            vendor_masks = tag_dictionary.masks([], vendor.ai_capabilities)
+            if not (demand_masks.keywords | demand_masks.related) & vendor_masks.keywords:
+                return False
+        return True
+
+
+def _json_not_empty(column):
+    """JSON 列表字段非空（只用于缩小需要在 Python 中判断的范围）"""
+    return func.coalesce(cast(column, String), "[]").notin_(["[]", "null"])
+
+
+def _excluding_predicates(vendor: Enterprise) -> list:
+    """需求表上的条件：供应商的信用分、认证级别或最低承接预算不满足该需求（与 for_demand + allows 一致）"""
+    credit = vendor.credit_score or 0.0
+    predicates = [Demand.min_vendor_credit > credit]
+    for confidentiality, floor in (
+        (ConfidentialityLevel.CONFIDENTIAL, settings.MATCH_CONFIDENTIAL_MIN_CREDIT),
+        (ConfidentialityLevel.SECRET, settings.MATCH_SECRET_MIN_CREDIT)
+    ):
+        if floor and floor > credit:
+            predicates.append(Demand.confidentiality == confidentiality)
+    denied = [
+        confidentiality for confidentiality, levels in CONFIDENTIAL_VENDOR_LEVELS.items()
+        if vendor.certification_level not in levels
+    ]
+    if denied:
+        predicates.append(Demand.confidentiality.in_(denied))
+    if vendor.min_project_budget is not None:
+        # 预算为空或 0 表示不限
+        predicates.append(and_(Demand.budget_max != 0, Demand.budget_max < vendor.min_project_budget))
+    return predicates
+
+
+def excluded_demand_ids(db: Session, vendor: Enterprise) -> Set[int]:
+    """
+    开放需求中该供应商不满足硬性要求的需求ID
+
+    信用分、认证级别、预算在 SQL 中判断，只返回ID列；
+    必备资质与机密需求的能力标签重合只对其余带这两类要求的需求在 Python 中判断。
+    """
+    excluding = or_(*_excluding_predicates(vendor))
+    excluded = {demand_id for demand_id, in db.query(Demand.id).filter(open_demand_filter(), excluding)}
+
+    rows = db.query(
+        Demand.id, Demand.confidentiality, Demand.required_certifications, Demand.scenario_tags
+    ).filter(
+        open_demand_filter(),
+        # 比较结果为 NULL（如需求未设置最低信用分）时不算排除
+        not_(func.coalesce(excluding, False)),
+        or_(
+            _json_not_empty(Demand.required_certifications),
+            and_(Demand.confidentiality.in_(list(CONFIDENTIAL_VENDOR_LEVELS)), _json_not_empty(Demand.scenario_tags))
+        )
+    )
+    for row in rows:
+        constraints = MatchConstraints(
+            certifications=row.required_certifications or [],
+            overlap_tags=(row.scenario_tags or []) if row.confidentiality in CONFIDENTIAL_VENDOR_LEVELS else []
+        )
+        if not constraints.allows(vendor):
+            excluded.add(row.id)
+    return excluded
+
+
+# ---- 认证资质索引表同步 ----
+
+def _sync_certifications(connection, target: Enterprise, replace: bool = True):
+    table = EnterpriseCertification.__table__
+    if replace:
+        connection.execute(table.delete().where(table.c.enterprise_id == target.id))
+    names = certification_names(target.certifications)
+    if names:
+        connection.execute(table.insert(), [{"name": name, "enterprise_id": target.id} for name in names])
+
+
+@event.listens_for(Enterprise, "after_insert")
+def _certifications_inserted(mapper, connection, target):
+    _sync_certifications(connection, target, replace=False)
+
+
+@event.listens_for(Enterprise, "after_update")
+def _certifications_updated(mapper, connection, target):
+    if sa_inspect(target).attrs.certifications.history.has_changes():
+        _sync_certifications(connection, target)
+
+
+@event.listens_for(Enterprise, "after_delete")
+def _certifications_deleted(mapper, connection, target):
+    table = EnterpriseCertification.__table__
+    connection.execute(table.delete().where(table.c.enterprise_id == target.id))
@@ -0,0 +1,390 @@
+"""
+分阶段匹配流水线
+正向匹配（需求 -> 供应商）依次经过以下阶段，每个阶段有候选数上限和时间预算：
+1. 硬条件过滤：已认证、供应方类型（加载供应商快照时在 SQL 中完成），以及需求的硬性要求（见 match_constraints）
+2. 候选检索：阈值算法直接检索前 N 名，或按标签倒排索引取候选
+3. 向量化评分：六个维度批量评分，保留前 N 名
+4. 重排（可选）：较昂贵的重排器只处理评分结果的前 N 名，超出时间预算时放弃，保留评分阶段的排序
+
+前三个阶段是廉价的内存操作，超出预算只记录日志；重排阶段在线程中执行，超时即返回，
+保证 /match 的尾延迟有上界。超时的重排无法中断，会在后台继续运行到结束，因此同时运行的重排数
+有上限（MATCH_RERANK_CONCURRENCY），已满时直接跳过重排，避免超时的重排不断累积。
+"""
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Set, Sequence
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import logging
+import threading
+import time
+import numpy as np
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models import Enterprise
+from .scoring_engine import SCORE_DIMENSIONS, rank_top_k
+from .semantic_index import vendor_case_text
+from .vendor_snapshot import VendorProfile
+
+logger = logging.getLogger(__name__)
+
+# 语义相似度在六个维度中的位置
+SEMANTIC_COLUMN = SCORE_DIMENSIONS.index("semantic_similarity")
+
+
+class MatchContext:
+    """一次匹配在各阶段之间传递的状态"""
+
+    def __init__(self, demand_data: Dict[str, Any], db: Session, top_k: int):
+        self.demand_data = demand_data
+        self.db = db
+        self.top_k = top_k
+        self.pool: Optional[Set[int]] = None  # 硬条件过滤后的供应商ID，None 表示快照中的全部供应商
+        self.candidates: Optional[List[VendorProfile]] = None
+        self.totals: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None  # N×6 原始得分
+        self.timings: Dict[str, float] = {}  # 各阶段耗时（毫秒）
+        self.degraded: List[str] = []  # 超出预算而放弃的阶段
+
+    @property
+    def scored(self) -> bool:
+        """候选是否已完成评分（之后的检索、评分阶段跳过）"""
+        return self.totals is not None
+
+    def set_scored(self, vendors: List[VendorProfile], totals: np.ndarray, components: np.ndarray):
+        self.candidates = list(vendors)
+        self.totals = totals
+        self.components = components
+
+    def ranked(self, limit: int) -> np.ndarray:
+        """按展示分数降序、ID 升序排列的前 limit 行"""
+        return rank_top_k(self.totals, limit, [vendor.id for vendor in self.candidates])
+
+    def keep(self, rows: Sequence[int]):
+        """只保留给定行（按给定顺序）"""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.candidates = [self.candidates[i] for i in rows]
+        self.totals = self.totals[rows]
+        self.components = self.components[rows]
+
+
+class MatchStage(ABC):
+    """流水线阶段"""
+
+    name = "stage"
+
+    def __init__(self, cap: int = 0, budget_ms: float = 0.0):
+        """
+        Args:
+            cap: 阶段输出的候选数上限，0 表示不限（不少于请求的 top_k）
+            budget_ms: 时间预算（毫秒），0 表示不限
+        """
+        self.cap = cap
+        self.budget_ms = budget_ms
+
+    def limit(self, top_k: int) -> int:
+        return max(self.cap, top_k) if self.cap else 0
+
+    @abstractmethod
+    def run(self, matching, ctx: MatchContext):
+        """执行阶段，读取并更新匹配上下文"""
+
+
+class HardFilterStage(MatchStage):
+    """
+    硬条件过滤：供应商快照只包含 SQL 过滤后的已认证供应方；
+    需求有硬性要求（最低信用分、必备资质、保密等级、预算档位）时再查询满足要求的供应商ID
+    """
+
+    name = "filter"
+
+    def run(self, matching, ctx: MatchContext):
+        if ctx.scored:
+            return
+        matching.ensure_indexes(ctx.db)
+        ctx.pool = matching.constrained_vendor_ids(ctx.db, ctx.demand_data)
+
+
+class ThresholdRetrievalStage(MatchStage):
+    """阈值算法：从索引中直接检索并评分前 N 名（索引与快照不一致时交给后续阶段）"""
+
+    name = "threshold"
+
+    def run(self, matching, ctx: MatchContext):
+        if ctx.scored or matching.topk_strategy != "threshold":
+            return
+        ranked = matching.rank_vendors_threshold(ctx.demand_data, ctx.db, max(self.cap, ctx.top_k), ctx.pool)
+        if ranked is not None:
+            ctx.set_scored(*ranked)
+
+
+class TagRetrievalStage(MatchStage):
+    """标签检索：至少共享一个标签的候选，超出上限时按标签重合度截断"""
+
+    name = "retrieval"
+
+    def run(self, matching, ctx: MatchContext):
+        if ctx.scored:
+            return
+        industry_tags = ctx.demand_data.get("industry_tags", [])
+        scenario_tags = ctx.demand_data.get("scenario_tags", [])
+        candidate_ids = matching.tag_index.vendor_candidates(industry_tags, scenario_tags, min_count=ctx.top_k)
+        if ctx.pool is not None:
+            candidate_ids = ctx.pool if candidate_ids is None else candidate_ids & ctx.pool
+
+        limit = self.limit(ctx.top_k)
+        if limit:
+            if candidate_ids is None and len(matching.vendor_snapshot) > limit:
+                candidate_ids = [p.id for p in matching.vendor_snapshot.profiles()]
+            if candidate_ids is not None and len(candidate_ids) > limit:
+                candidate_ids = matching.tag_index.top_vendor_candidates(
+                    candidate_ids, industry_tags, scenario_tags, limit
+                )
+
+        # 从快照读取候选供应商档案（按ID升序，与数据库查询顺序一致）
+        ctx.candidates = matching.vendor_snapshot.profiles(candidate_ids)
+
+
+class VectorScoringStage(MatchStage):
+    """向量化评分六个维度，保留前 N 名"""
+
+    name = "scoring"
+
+    def run(self, matching, ctx: MatchContext):
+        if ctx.scored:
+            return
+        ctx.set_scored(*matching.score_vendor_candidates(
+            ctx.demand_data, ctx.db, vendors=ctx.candidates or [], top_k=ctx.top_k
+        ))
+        limit = self.limit(ctx.top_k)
+        if limit and len(ctx.candidates) > limit:
+            ctx.keep(ctx.ranked(limit))
+
+
+class Reranker(ABC):
+    """重排器：为评分阶段的前 N 名重新计算六个维度得分"""
+
+    name = "reranker"
+
+    @abstractmethod
+    def rerank(
+        self,
+        demand_data: Dict[str, Any],
+        vendors: List[VendorProfile],
+        components: np.ndarray
+    ) -> np.ndarray:
+        """
+        Args:
+            demand_data: 需求数据
+            vendors: 候选供应商档案
+            components: 评分阶段的 N×6 原始得分（副本，可直接修改）
+
+        Returns:
+            重排后的 N×6 原始得分
+        """
+
+
+class CaseExperienceReranker(Reranker):
+    """
+    案例经验重排：读取候选供应商的成功案例与行业经验，
+    用语义索引的向量化器计算与需求文本的相似度，按比例并入语义相似度维度
+    """
+
+    name = "cases"
+
+    def __init__(self, semantic_index, weight: float = 0.3, session_factory=SessionLocal):
+        """
+        Args:
+            semantic_index: 语义索引（提供向量化器）
+            weight: 案例文本相似度在语义维度中的占比
+            session_factory: 数据库会话工厂（重排在独立线程中执行，不共享请求的会话）
+        """
+        self.semantic_index = semantic_index
+        self.weight = weight
+        self.session_factory = session_factory
+
+    def rerank(self, demand_data, vendors, components):
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                Enterprise.id, Enterprise.success_cases, Enterprise.industry_experience
+            ).filter(Enterprise.id.in_([v.id for v in vendors])).all()
+        finally:
+            db.close()
+
+        texts = {row.id: vendor_case_text(row) for row in rows}
+        positions = [i for i, v in enumerate(vendors) if texts.get(v.id)]
+        if not positions:
+            return components
+
+        similarities = self.semantic_index.score_texts(demand_data, [texts[vendors[i].id] for i in positions])
+        if similarities is None:
+            return components
+
+        semantic = components[positions, SEMANTIC_COLUMN]
+        components[positions, SEMANTIC_COLUMN] = (1 - self.weight) * semantic + self.weight * similarities
+        return components
+
+
+# 可通过 MATCH_RERANKER 配置的重排器
+RERANKERS = {
+    CaseExperienceReranker.name: lambda matching: CaseExperienceReranker(
+        matching.semantic_index, weight=settings.MATCH_RERANK_CASE_WEIGHT
+    )
+}
+
+
+class RerankStage(MatchStage):
+    """
+    可选的重排阶段：只处理前 N 名，超出时间预算时保留评分阶段的排序
+
+    有时间预算时重排在共享线程池中执行。超时后重排线程仍在运行（Future.cancel 对运行中的任务无效），
+    所以用信号量限制同时运行的重排数：重排结束（而不是等待超时）才释放名额，名额用完时跳过重排。
+    """
+
+    name = "rerank"
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(max(1, settings.MATCH_RERANK_CONCURRENCY))
+
+    def __init__(self, reranker: Optional[Reranker], cap: int = 20, budget_ms: float = 0.0):
+        super().__init__(cap, budget_ms)
+        self.reranker = reranker
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.MATCH_RERANK_CONCURRENCY), thread_name_prefix="match-rerank"
+                )
+            return cls._executor
+
+    def _rerank_and_release(self, demand_data, vendors, components) -> np.ndarray:
+        try:
+            return self.reranker.rerank(demand_data, vendors, components)
+        finally:
+            self._slots.release()
+
+    def run(self, matching, ctx: MatchContext):
+        if self.reranker is None or not ctx.candidates:
+            return
+
+        rows = ctx.ranked(self.limit(ctx.top_k) or len(ctx.candidates))
+        vendors = [ctx.candidates[i] for i in rows]
+        components = ctx.components[rows].copy()
+
+        if self.budget_ms:
+            if not self._slots.acquire(blocking=False):
+                ctx.degraded.append(self.name)
+                logger.warning("同时运行的重排已达上限，跳过重排器 %s，使用评分阶段的排序", self.reranker.name)
+                return
+            try:
+                future = self._pool().submit(self._rerank_and_release, ctx.demand_data, vendors, components)
+            except Exception:
+                self._slots.release()
+                raise
+            try:
+                reranked = future.result(timeout=self.budget_ms / 1000)
+            except FutureTimeoutError:
+                ctx.degraded.append(self.name)
+                logger.warning("重排器 %s 超出时间预算 %.0fms，使用评分阶段的排序", self.reranker.name, self.budget_ms)
+                return
+            except Exception:
+                ctx.degraded.append(self.name)
+                logger.exception("重排器 %s 执行失败，使用评分阶段的排序", self.reranker.name)
+                return
+        else:
+            reranked = self.reranker.rerank(ctx.demand_data, vendors, components)
+
+        ctx.components[rows] = reranked
+        ctx.totals[rows] = [matching._weighted_total(*scores) for scores in reranked.tolist()]
+
+
+class MatchPipeline:
+    """正向匹配流水线"""
+
+    def __init__(self, matching, stages: List[MatchStage]):
+        """
+        Args:
+            matching: 匹配服务，提供索引、评分与结果格式化
+            stages: 按顺序执行的阶段
+        """
+        self.matching = matching
+        self.stages = stages
+
+    @classmethod
+    def from_settings(cls, matching) -> "MatchPipeline":
+        """按配置构建：硬条件过滤 -> 阈值检索 / 标签检索 -> 向量化评分 -> 可选重排"""
+        reranker = None
+        if settings.MATCH_RERANKER:
+            factory = RERANKERS.get(settings.MATCH_RERANKER)
+            if factory is None:
+                logger.warning("未知的重排器 %s，不启用重排", settings.MATCH_RERANKER)
+            else:
+                reranker = factory(matching)
+
+        # 阈值算法只需检索出重排阶段要处理的数量
+        threshold_cap = settings.MATCH_RERANK_CAP if reranker is not None else 0
+
+        return cls(matching, [
+            HardFilterStage(budget_ms=settings.MATCH_FILTER_BUDGET_MS),
+            ThresholdRetrievalStage(cap=threshold_cap, budget_ms=settings.MATCH_RETRIEVAL_BUDGET_MS),
+            TagRetrievalStage(cap=settings.MATCH_RETRIEVAL_CAP, budget_ms=settings.MATCH_RETRIEVAL_BUDGET_MS),
+            VectorScoringStage(cap=settings.MATCH_SCORING_CAP, budget_ms=settings.MATCH_SCORING_BUDGET_MS),
+            RerankStage(reranker, cap=settings.MATCH_RERANK_CAP, budget_ms=settings.MATCH_RERANK_BUDGET_MS)
+        ])
+
+    @property
+    def reranker(self) -> Optional[Reranker]:
+        for stage in self.stages:
+            if isinstance(stage, RerankStage):
+                return stage.reranker
+        return None
+
+    @property
+    def rerank_cap(self) -> int:
+        """重排阶段处理的候选数，未启用重排时为 0"""
+        for stage in self.stages:
+            if isinstance(stage, RerankStage) and stage.reranker is not None:
+                return stage.cap
+        return 0
+
+    def run(self, ctx: MatchContext) -> MatchContext:
+        """依次执行各阶段；已评分的上下文（如来自推荐表）只经过之后的重排"""
+        for stage in self.stages:
+            started = time.perf_counter()
+            stage.run(self.matching, ctx)
+            elapsed = (time.perf_counter() - started) * 1000
+            ctx.timings[stage.name] = ctx.timings.get(stage.name, 0.0) + elapsed
+            if stage.budget_ms and elapsed > stage.budget_ms and stage.name not in ctx.degraded:
+                logger.warning("匹配阶段 %s 耗时 %.1fms，超出预算 %.0fms", stage.name, elapsed, stage.budget_ms)
+        return ctx
+
+    def match(self, demand_data: Dict[str, Any], db: Session, top_k: int) -> List[Dict[str, Any]]:
+        """为需求匹配前 top_k 个供应商"""
+        return self.results(self.run(MatchContext(demand_data, db, top_k)))
+
+    def rerank(
+        self,
+        demand_data: Dict[str, Any],
+        db: Session,
+        vendors: List[VendorProfile],
+        components: List[List[float]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """对已评分的候选（如推荐表中的前 N 名）执行重排后取前 top_k"""
+        ctx = MatchContext(demand_data, db, top_k)
+        matrix = np.array(components, dtype=float).reshape(len(vendors), len(SCORE_DIMENSIONS))
+        totals = np.array([self.matching._weighted_total(*row) for row in matrix.tolist()])
+        ctx.set_scored(vendors, totals, matrix)
+        return self.results(self.run(ctx))
+
+    def results(self, ctx: MatchContext) -> List[Dict[str, Any]]:
+        """只为最终的 top_k 构建得分明细和匹配理由"""
+        if not ctx.candidates:
+            return []
+        return [
+            self.matching.vendor_match_result(ctx.candidates[i], ctx.components[i].tolist())
+            for i in ctx.ranked(ctx.top_k)
+        ]
@@ -2,10 +2,33 @@
 匹配推荐服务
 基于多维度评分实现需求与供应商的智能匹配
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Set
+import heapq
+import logging
 import random
+import threading
+import time
+import numpy as np
 from sqlalchemy.orm import Session
-from ..models import Enterprise, EnterpriseType
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models import Enterprise
+from .scoring_engine import VendorFeatures, SCORE_DIMENSIONS, rank_top_k, score_vendors
+from .score_cache import ScoreCache, scoring_version
+from .recommendation_store import RecommendationStore, VENDOR_SIDE, DEMAND_SIDE
+from .tag_index import TagIndex, LOCAL_CITY, is_indexable_vendor, is_open_demand, open_demand_filter
+from .tag_dictionary import TagMasks, tag_dictionary, popcount
+from .semantic_index import SemanticIndex
+from .vendor_snapshot import VendorProfile, vendor_snapshot, load_profiles
+from .feature_store import VendorFeatureStore, PublishedVendors
+from .match_pipeline import MatchPipeline
+from .match_constraints import MatchConstraints, excluded_demand_ids
+from .topk import SortedAccess, rank_key, threshold_top_k
+
+logger = logging.getLogger(__name__)
+
+# 候选ID超过该数量时不再使用 IN 过滤，直接按硬条件全量查询
+MAX_CANDIDATE_IN_CLAUSE = 5000
 
 
 class MatchingService:
@@ -21,6 +44,225 @@ class MatchingService:
             "geo_proximity": 0.05,        # 地理位置
             "credit_score": 0.10          # 信用评分
         }
+        
+        # 标签词典，标签解析为整数位图
+        self.tag_dictionary = tag_dictionary
+        
+        # 标签倒排索引，用于候选集生成
+        self.tag_index = TagIndex(
+            fallback_limit=settings.MATCH_FALLBACK_CANDIDATES,
+            dictionary=self.tag_dictionary
+        )
+        
+        # 供应商档案快照，正向匹配不再查询供应商表
+        self.vendor_snapshot = vendor_snapshot
+        
+        # 多进程共享的供应商特征文件（档案 + 特征矩阵，只读内存映射）
+        self.feature_store = VendorFeatureStore(
+            settings.VENDOR_FEATURES_DIR,
+            keep_versions=settings.VENDOR_FEATURES_KEEP_VERSIONS,
+            check_interval=settings.VENDOR_FEATURES_CHECK_INTERVAL
+        )
+        self.publish_delay = settings.VENDOR_FEATURES_PUBLISH_DELAY
+        self._published: Optional[PublishedVendors] = None
+        self._publish_timer: Optional[threading.Timer] = None
+        self._vendor_lock = threading.RLock()
+        
+        # 文本语义索引，用于语义相似度维度
+        self.semantic_index = SemanticIndex(settings.SEMANTIC_INDEX_PATH)
+        
+        # 需求-供应商分数缓存
+        self.score_cache = ScoreCache(enabled=settings.MATCH_SCORE_CACHE_ENABLED)
+        
+        # 推荐物化表（每个需求/供应商的前 N 个推荐）
+        self.recommendations = RecommendationStore(self, top_n=settings.RECOMMENDATION_TOP_N)
+        
+        # Top-K 检索策略：threshold（阈值算法提前终止）/ exhaustive（全量评分）
+        self.topk_strategy = settings.MATCH_TOPK_STRATEGY
+        
+        # 正向匹配流水线：硬条件过滤 -> 候选检索 -> 向量化评分 -> 可选重排
+        self.pipeline = MatchPipeline.from_settings(self)
+    
+    def index_enterprise(self, enterprise: Enterprise, db: Optional[Session] = None):
+        """企业创建、更新或审核后同步匹配索引；传入会话时提交推荐表的后台刷新任务"""
+        self.tag_index.index_vendor(enterprise)
+        if is_indexable_vendor(enterprise):
+            self.semantic_index.upsert_vendor(enterprise)
+        else:
+            self.semantic_index.remove_vendor(enterprise.id)
+        if db is not None:
+            self.recommendations.schedule(db, VENDOR_SIDE, [enterprise.id])
+    
+    def remove_enterprise(self, enterprise_id: int, db: Optional[Session] = None):
+        """企业删除后同步匹配索引；传入会话时移出推荐表，受影响的需求列表由后台任务重算"""
+        self.tag_index.remove_vendor(enterprise_id)
+        self.semantic_index.remove_vendor(enterprise_id)
+        if db is not None:
+            stale = self.recommendations.remove_vendor(db, enterprise_id)
+            self.recommendations.schedule(db, DEMAND_SIDE, stale)
+    
+    def index_demand(self, demand, db: Optional[Session] = None):
+        """需求创建、更新或状态变化后同步匹配索引；传入会话时提交推荐表的后台刷新任务"""
+        self.index_demands([demand], db)
+    
+    def index_demands(self, demands: Sequence, db: Optional[Session] = None):
+        """批量同步需求的匹配索引；传入会话时一次提交全部刷新任务"""
+        for demand in demands:
+            self.tag_index.index_demand(demand)
+            if is_open_demand(demand):
+                self.semantic_index.upsert_demand(demand)
+            else:
+                self.semantic_index.remove_demand(demand.id)
+        if db is not None:
+            self.recommendations.schedule(db, DEMAND_SIDE, [demand.id for demand in demands])
+    
+    def remove_demand(self, demand_id: int, db: Optional[Session] = None):
+        """需求删除后同步匹配索引；传入会话时移出推荐表，受影响的供应商列表由后台任务重算"""
+        self.tag_index.remove_demand(demand_id)
+        self.semantic_index.remove_demand(demand_id)
+        if db is not None:
+            stale = self.recommendations.remove_demand(db, demand_id)
+            self.recommendations.schedule(db, VENDOR_SIDE, stale)
+    
+    def ensure_indexes(self, db: Session):
+        """首次使用时加载标签词典、语义索引、供应商快照与标签索引；已有其他进程发布的新版本时切换"""
+        self.tag_dictionary.ensure_loaded(db)
+        self.semantic_index.ensure_loaded(db)
+        
+        with self._vendor_lock:
+            was_loaded = self.tag_index.is_loaded
+            changed, removed = self._refresh_vendors(db)
+            self.tag_index.ensure_loaded(db, self.vendor_snapshot.profiles())
+            if was_loaded:
+                for profile in changed:
+                    self.tag_index.index_vendor_profile(profile)
+                for vendor_id in removed:
+                    self.tag_index.remove_vendor(vendor_id)
+        
+        for vendor_id in removed:
+            self.semantic_index.remove_vendor(vendor_id)
+        if changed:
+            self._sync_vendor_texts(db, changed)
+    
+    def _refresh_vendors(self, db: Session) -> Tuple[List[VendorProfile], List[int]]:
+        """
+        加载供应商快照，或切换到其他进程发布的新版本
+        
+        尚无发布版本时由本进程从数据库构建并发布，之后启动的进程直接映射文件
+        
+        Returns:
+            (新增或变化的档案, 被移除的供应商ID)
+        """
+        snapshot = self.vendor_snapshot
+        version = self.feature_store.current_version()
+        if snapshot.is_loaded and (version is None or version == snapshot.version):
+            return [], []
+        
+        if version is None and self.feature_store.enabled:
+            try:
+                version = self.publish_vendor_features(db)
+            except OSError:
+                logger.exception("供应商特征文件发布失败，从数据库加载快照")
+        
+        published = self.feature_store.open(version) if version else None
+        if published is None:
+            if snapshot.is_loaded:
+                return [], []
+            snapshot.load(db)
+            return snapshot.profiles(), []
+        
+        self._published = published
+        return snapshot.replace(published.profiles, published.version, published.built_at)
+    
+    def publish_vendor_features(self, db: Session) -> str:
+        """
+        从数据库构建供应商档案与特征矩阵并发布新版本
+        
+        Returns:
+            新版本号
+        """
+        with self.feature_store.publishing():
+            built_at = time.time()
+            profiles = load_profiles(db)
+            
+            # TF-IDF 行取自语义索引，先补齐其中缺失或过期的供应商文本
+            self._sync_vendor_texts(db, profiles)
+            features = VendorFeatures(profiles, self.tag_dictionary)
+            features.text_vectors, features.text_fit_id = self.semantic_index.vendor_vectors(
+                [p.id for p in profiles]
+            )
+            return self.feature_store.publish(profiles, features, built_at)
+    
+    def schedule_vendor_publish(self):
+        """供应商变更提交后延迟发布新版本（合并连续修改），其他进程随后切换"""
+        if not self.feature_store.enabled:
+            return
+        with self._vendor_lock:
+            if self._publish_timer is not None:
+                return
+            self._publish_timer = threading.Timer(self.publish_delay, self._publish_in_background)
+            self._publish_timer.daemon = True
+            self._publish_timer.start()
+    
+    def _publish_in_background(self):
+        with self._vendor_lock:
+            self._publish_timer = None
+        db = SessionLocal()
+        try:
+            self.publish_vendor_features(db)
+        except Exception:
+            logger.exception("供应商特征文件发布失败")
+        finally:
+            db.close()
+    
+    def vendor_features(self, vendors: Sequence[VendorProfile]) -> VendorFeatures:
+        """
+        一组供应商档案的特征矩阵
+        
+        档案都来自已映射的版本时直接取映射文件中的行（全部供应商时不复制），否则现场构建
+        """
+        published = self._published
+        if published is not None and published.version == self.vendor_snapshot.version:
+            features = published.features(self.tag_dictionary)
+            if features is not None:
+                rows = [published.row_of(v) for v in vendors]
+                if None not in rows:
+                    if rows == list(range(len(features))):
+                        return features
+                    return features.take(rows)
+        return VendorFeatures(vendors, self.tag_dictionary)
+    
+    def constrained_vendor_ids(self, db: Session, demand_data: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        满足需求硬性要求的供应商ID（SQL 条件 + 机密需求的能力标签重合）
+        
+        Returns:
+            供应商ID集合；需求没有硬性要求时返回 None，表示不限制
+        """
+        constraints = MatchConstraints.for_demand(demand_data)
+        if constraints.is_empty:
+            return None
+        pool = constraints.vendor_ids(db)
+        if constraints.overlap_tags:
+            overlap = self.tag_index.vendors_with_keywords(constraints.overlap_tags)
+            pool = overlap if pool is None else pool & overlap
+        return pool
+    
+    def _sync_vendor_texts(self, db: Session, vendors: Sequence[VendorProfile]):
+        """
+        补齐语义索引中缺失或过期的供应商文本
+        
+        快照不含文本字段，只为版本不一致的供应商（如其他进程修改过的记录）读取完整记录
+        """
+        stale_ids = self.semantic_index.stale_vendor_ids(vendors)
+        for start in range(0, len(stale_ids), MAX_CANDIDATE_IN_CLAUSE):
+            chunk = stale_ids[start:start + MAX_CANDIDATE_IN_CLAUSE]
+            for vendor in db.query(Enterprise).filter(Enterprise.id.in_(chunk)).all():
+                self.semantic_index.upsert_vendor(vendor)
+    
+    def save_indexes(self):
+        """持久化语义索引（应用关闭时调用）"""
+        self.semantic_index.save()
     
     def match_demands_for_vendor(
         self,
@@ -39,49 +281,122 @@ class MatchingService:
         Returns:
             推荐需求列表
         """
-        from ..models import Demand, DemandStatus
+        self.ensure_indexes(db)
         
-        # 获取所有已发布的需求
-        demands = db.query(Demand).filter(
-            Demand.status.in_([DemandStatus.SUBMITTED, DemandStatus.EVALUATED, DemandStatus.MATCHED])
-        ).all()
+        if self.topk_strategy == "threshold":
+            matches = self._match_demands_threshold(vendor, db, top_k)
+            if matches is not None:
+                return matches
         
-        if not demands:
-            return []
+        return self._match_demands_exhaustive(vendor, db, top_k)
+    
+    def _match_demands_exhaustive(
+        self,
+        vendor: Enterprise,
+        db: Session,
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """对全部候选需求评分后排序取前 top_k"""
+        demands, totals, components = self.score_demand_candidates(vendor, db, min_count=top_k, top_k=top_k)
         
-        # 为每个需求计算匹配分数
-        matches = []
-        for demand in demands:
-            demand_data = {
-                "title": demand.title,
-                "description": demand.description,
-                "industry_tags": demand.industry_tags or [],
-                "scenario_tags": demand.scenario_tags or [],
-                "budget_max": demand.budget_max or 0,
-                "enterprise_location": "重庆"
-            }
+        # 按分数排序，只为前 top_k 构建结果
+        order = sorted(range(len(demands)), key=lambda i: rank_key(totals[i], demands[i].id))
+        
+        return [
+            self._format_demand_match(demands[i], self._build_breakdown(*components[i]))
+            for i in order[:top_k]
+        ]
+    
+    def score_demand_candidates(
+        self,
+        vendor: Enterprise,
+        db: Session,
+        min_count: int = 0,
+        demands: Optional[list] = None,
+        use_cache: bool = True,
+        top_k: int = 0
+    ) -> Tuple[list, List[float], List[tuple]]:
+        """
+        为供应商的全部候选开放需求评分
+        
+        Args:
+            vendor: 供应商企业对象
+            db: 数据库会话
+            min_count: 候选不足时补齐到的数量
+            demands: 指定参与评分的需求，为空时通过倒排索引生成候选
+            use_cache: 是否读写分数缓存
+            top_k: 新计算的得分中只有排在前 top_k 名的写回缓存
             
-            score_breakdown = self._calculate_match_score(demand_data, vendor)
+        Returns:
+            (候选需求列表, 加权总分列表, 六个维度原始得分列表)
+        """
+        from ..models import Demand
+        
+        if demands is None:
+            # 通过倒排索引获取至少共享一个标签的候选需求
+            candidate_ids = self.tag_index.demand_candidates(
+                vendor.industry_tags or [],
+                vendor.ai_capabilities or [],
+                min_count=min_count
+            )
             
-            matches.append({
-                "demand_id": demand.id,
-                "demand_title": demand.title,
-                "demand_description": demand.description[:200] + "..." if len(demand.description) > 200 else demand.description,
-                "enterprise_id": demand.enterprise_id,
-                "industry_tags": demand.industry_tags,
-                "scenario_tags": demand.scenario_tags,
-                "budget_range": f"{demand.budget_min}-{demand.budget_max}" if demand.budget_min and demand.budget_max else "面议",
-                "score": score_breakdown["total_score"],
-                "score_breakdown": score_breakdown,
-                "match_reasons": self._generate_match_reasons(score_breakdown),
-                "created_at": demand.created_at.isoformat() if demand.created_at else None,
-                "status": demand.status.value if demand.status else "submitted"
-            })
+            # 获取已发布的候选需求
+            query = db.query(Demand).filter(
+                open_demand_filter()
+            )
+            if candidate_ids is not None and len(candidate_ids) <= MAX_CANDIDATE_IN_CLAUSE:
+                query = query.filter(Demand.id.in_(candidate_ids))
+            demands = query.all()
+        
+        # 排除该供应商不满足其硬性要求的需求
+        excluded = excluded_demand_ids(db, vendor)
+        if excluded:
+            demands = [demand for demand in demands if demand.id not in excluded]
         
-        # 按分数排序
-        matches.sort(key=lambda x: x["score"], reverse=True)
+        if not demands:
+            return [], [], []
         
-        return matches[:top_k]
+        # 读取缓存，只为需求或供应商发生变化的组合重新计算
+        if use_cache:
+            pairs = self.score_cache.for_vendor(db, vendor.id, vendor.updated_at, self.current_scoring_version())
+        else:
+            pairs = self.score_cache.uncached()
+        cached = [pairs.get(demand.id, demand.updated_at) for demand in demands]
+        stale = [demand for demand, entry in zip(demands, cached) if entry is None]
+        
+        # 一次稀疏矩阵乘法计算供应商与需要重算的需求的文本相似度
+        semantic_scores = self.semantic_index.score_demands(vendor, stale) if stale else None
+        
+        # 为每个需求计算匹配分数（供应商一侧的标签位图只解析一次）
+        vendor_masks = self.tag_dictionary.masks(vendor.industry_tags, vendor.ai_capabilities)
+        totals, components = [], []
+        stale_position = 0
+        for demand, entry in zip(demands, cached):
+            if entry is None:
+                demand_data = {
+                    "title": demand.title,
+                    "description": demand.description,
+                    "industry_tags": demand.industry_tags or [],
+                    "scenario_tags": demand.scenario_tags or [],
+                    "budget_max": demand.budget_max or 0,
+                    "enterprise_location": "重庆"
+                }
+                semantic_score = None
+                if semantic_scores is not None:
+                    semantic_score = float(semantic_scores[stale_position])
+                stale_position += 1
+                
+                scores = self._match_components(demand_data, vendor, semantic_score, vendor_masks=vendor_masks)
+                entry = (self._weighted_total(*scores), scores)
+                pairs.put(demand.id, demand.updated_at, *entry)
+            
+            totals.append(entry[0])
+            components.append(tuple(entry[1]))
+        pairs.flush(demands[i].id for i in heapq.nsmallest(
+            top_k, range(len(demands)), key=lambda i: rank_key(totals[i], demands[i].id)
+        ))
+        
+        return demands, totals, components
     
     def match_vendors(
         self,
@@ -100,55 +415,381 @@ class MatchingService:
         Returns:
             匹配结果列表
         """
-        # 获取所有供应方企业
-        vendors = db.query(Enterprise).filter(
-            Enterprise.enterprise_type.in_([EnterpriseType.SUPPLY, EnterpriseType.BOTH]),
-            Enterprise.status == "verified"
-        ).all()
+        return self.pipeline.match(demand_data, db, top_k)
+    
+    def score_vendor_candidates(
+        self,
+        demand_data: Dict[str, Any],
+        db: Session,
+        min_count: int = 0,
+        vendors: Optional[List[VendorProfile]] = None,
+        use_cache: bool = True,
+        top_k: int = 0
+    ) -> Tuple[List[VendorProfile], np.ndarray, np.ndarray]:
+        """
+        向量化评分需求的全部候选供应商
+        
+        Args:
+            demand_data: 需求数据
+            db: 数据库会话
+            min_count: 候选不足时补齐到的数量
+            vendors: 指定参与评分的供应商档案，为空时通过倒排索引生成候选
+            use_cache: 是否读写分数缓存
+            top_k: 新计算的得分中只有排在前 top_k 名的写回缓存
+            
+        Returns:
+            (候选供应商档案列表, 加权总分数组, N×6 原始得分矩阵)
+        """
+        if vendors is None:
+            # 通过倒排索引获取至少共享一个标签的候选供应商
+            candidate_ids = self.tag_index.vendor_candidates(
+                demand_data.get("industry_tags", []),
+                demand_data.get("scenario_tags", []),
+                min_count=min_count
+            )
+            
+            # 从快照读取候选供应商档案（按ID升序，与数据库查询顺序一致）
+            vendors = self.vendor_snapshot.profiles(candidate_ids)
         
         if not vendors:
-            return []
+            return [], np.empty(0), np.empty((0, len(SCORE_DIMENSIONS)))
+        
+        # 读取缓存，只为需求或供应商发生变化的组合重新计算
+        pairs = self._pairs_for_demand(db, demand_data) if use_cache else self.score_cache.uncached()
+        totals = np.empty(len(vendors))
+        components = np.empty((len(vendors), len(SCORE_DIMENSIONS)))
+        stale = []
+        for i, vendor in enumerate(vendors):
+            entry = pairs.get(vendor.id, vendor.updated_at)
+            if entry is None:
+                stale.append(i)
+            else:
+                totals[i], components[i] = entry
+        
+        if stale:
+            stale_vendors = [vendors[i] for i in stale]
+            
+            # 一次稀疏矩阵乘法计算需求与需要重算的供应商的文本相似度
+            semantic_scores = self.semantic_index.score_vendors(demand_data, stale_vendors)
+            
+            # 向量化计算各维度得分（特征取自共享的映射文件）
+            features = self.vendor_features(stale_vendors)
+            scores = score_vendors(features, demand_data, self.weights, semantic=semantic_scores)
+            stale_components = np.column_stack([scores[dim] for dim in SCORE_DIMENSIONS])
+            totals[stale] = scores["total"]
+            components[stale] = stale_components
+            
+            for position, vendor in enumerate(stale_vendors):
+                pairs.put(vendor.id, vendor.updated_at, scores["total"][position], stale_components[position])
+        pairs.flush(vendors[i].id for i in rank_top_k(totals, top_k, [vendor.id for vendor in vendors]))
+        
+        return vendors, totals, components
+    
+    def rank_vendors_threshold(
+        self,
+        demand_data: Dict[str, Any],
+        db: Session,
+        top_k: int,
+        pool: Optional[Set[int]] = None
+    ) -> Optional[Tuple[List[VendorProfile], np.ndarray, np.ndarray]]:
+        """
+        用阈值算法从索引中检索并评分前 top_k 个供应商
+        
+        有序列表：信用分（决定成功率和信用两个维度）、行业标签命中、文本相似度；
+        预算和地理位置以上界计入阈值。评分只读取内存索引，供应商档案取自快照。
+        
+        Args:
+            pool: 满足硬性要求的供应商ID，为空时不限制
         
-        # 为每个供应商计算匹配分数
-        matches = []
-        for vendor in vendors:
-            score_breakdown = self._calculate_match_score(demand_data, vendor)
+        Returns:
+            (按得分降序的供应商档案, 加权总分数组, N×6 原始得分矩阵)；
+            索引与快照不一致时返回 None，由调用方退回标签检索 + 向量化评分
+        """
+        w = self.weights
+        demand_masks = self.tag_dictionary.masks(
+            demand_data.get("industry_tags", []), demand_data.get("scenario_tags", [])
+        )
+        location = demand_data.get("enterprise_location", "重庆")
+        budget_score = self._calc_budget_match(demand_data.get("budget_max", 0), None)
+        ranking = self.semantic_index.rank_vendors(demand_data)
+        pairs = self._pairs_for_demand(db, demand_data)
+        
+        def random_access(vendor_id: int) -> Optional[float]:
+            if pool is not None and vendor_id not in pool:
+                return None
+            profile = self.tag_index.vendor_profile(vendor_id)
+            if profile is None:
+                return None
+            vendor_masks, credit, geo_local, version = profile
+            
+            entry = pairs.get(vendor_id, version)
+            if entry is not None:
+                return entry[0]
+            
+            if ranking is not None:
+                semantic_score = ranking.get(vendor_id)
+            else:
+                semantic_score = self._calc_semantic_similarity(demand_masks, vendor_masks)
+            scores = (
+                self._calc_industry_match(demand_masks, vendor_masks),
+                semantic_score,
+                self._success_rate_for_credit(credit),
+                budget_score,
+                self._calc_geo_proximity(location, LOCAL_CITY if geo_local else ""),
+                self._normalize_credit_score(credit)
+            )
+            total = self._weighted_total(*scores)
+            pairs.put(vendor_id, version, total, scores)
+            return total
+        
+        with self.tag_index.locked() as index:
+            streams = [SortedAccess(
+                (
+                    (vendor_id, w["success_rate"] * self._success_rate_for_credit(credit) +
+                     w["credit_score"] * self._normalize_credit_score(credit))
+                    for vendor_id, credit in index.vendors_by_credit()
+                ),
+                complete=True
+            )]
+            constant_bound = w["budget_match"] * budget_score
+            constant_bound += w["geo_proximity"] * (1.0 if "重庆" in location else 0.8)
+            
+            if demand_masks.industry:
+                streams.append(self._industry_stream(
+                    index.vendors_with_industry(demand_masks.industry), index.vendors_missing_industry()
+                ))
+            else:
+                constant_bound += w["industry_match"] * 0.5
+            
+            if ranking is not None:
+                streams.append(self._semantic_stream(ranking))
+            else:
+                constant_bound += w["semantic_similarity"] * (1.0 if demand_masks.keywords else 0.5)
             
-            matches.append({
-                "vendor_id": vendor.id,
-                "vendor_name": vendor.name,
-                "vendor_eid": vendor.eid,
-                "score": score_breakdown["total_score"],
-                "score_breakdown": score_breakdown,
-                "reasons": self._generate_match_reasons(score_breakdown),
-                "contact_email": vendor.contact_email,
-                "credit_score": vendor.credit_score,
-                "ai_capabilities": vendor.ai_capabilities
-            })
+            top = threshold_top_k(top_k, streams, random_access, constant_bound)
+        
+        # 只写回前 top_k 名，随机访问过的其余供应商不写回
+        pairs.flush(vendor_id for _, vendor_id in top)
+        entries = [pairs.peek(vendor_id) for _, vendor_id in top]
+        vendors = self.vendor_snapshot.get_many(vendor_id for _, vendor_id in top)
+        if len(vendors) != len(top):
+            return None
+        
+        return (
+            [vendors[vendor_id] for _, vendor_id in top],
+            np.array([entry[0] for entry in entries], dtype=float),
+            np.array([entry[1] for entry in entries], dtype=float).reshape(len(top), len(SCORE_DIMENSIONS))
+        )
+    
+    def _match_demands_threshold(
+        self,
+        vendor: Enterprise,
+        db: Session,
+        top_k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        用阈值算法从索引中检索前 top_k 个开放需求（反向匹配）
         
-        # 按分数排序
-        matches.sort(key=lambda x: x["score"], reverse=True)
+        有序列表：预算档位、行业标签命中、文本相似度；供应商一侧的成功率、
+        地理位置和信用对所有需求相同，作为常量计入阈值。供应商不满足其硬性要求的需求不参与。
+        
+        Returns:
+            推荐结果；索引与数据库不一致时返回 None，由调用方退回全量评分
+        """
+        from ..models import Demand
+        
+        w = self.weights
+        vendor_masks = self.tag_dictionary.masks(vendor.industry_tags, vendor.ai_capabilities)
+        success_score = self._calc_success_rate(vendor)
+        geo_score = self._calc_geo_proximity("重庆", vendor.address or "")
+        credit_score = self._normalize_credit_score(vendor.credit_score)
+        ranking = self.semantic_index.rank_demands(vendor)
+        pairs = self.score_cache.for_vendor(db, vendor.id, vendor.updated_at, self.current_scoring_version())
+        excluded = excluded_demand_ids(db, vendor)
+        
+        def random_access(demand_id: int) -> Optional[float]:
+            if demand_id in excluded:
+                return None
+            profile = self.tag_index.demand_profile(demand_id)
+            if profile is None:
+                return None
+            demand_masks, budget_max, version = profile
+            
+            entry = pairs.get(demand_id, version)
+            if entry is not None:
+                return entry[0]
+            
+            if ranking is not None:
+                semantic_score = ranking.get(demand_id)
+            else:
+                semantic_score = self._calc_semantic_similarity(demand_masks, vendor_masks)
+            scores = (
+                self._calc_industry_match(demand_masks, vendor_masks),
+                semantic_score,
+                success_score,
+                self._calc_budget_match(budget_max, vendor),
+                geo_score,
+                credit_score
+            )
+            total = self._weighted_total(*scores)
+            pairs.put(demand_id, version, total, scores)
+            return total
+        
+        with self.tag_index.locked() as index:
+            streams = [SortedAccess(
+                (
+                    (demand_id, w["budget_match"] * self._calc_budget_match(budget_max, vendor))
+                    for demand_id, budget_max in index.demands_by_budget()
+                ),
+                complete=True
+            )]
+            constant_bound = (
+                w["success_rate"] * success_score +
+                w["geo_proximity"] * geo_score +
+                w["credit_score"] * credit_score
+            )
+            
+            if vendor_masks.industry:
+                streams.append(self._industry_stream(
+                    index.demands_with_industry(vendor_masks.industry), index.demands_missing_industry()
+                ))
+            else:
+                constant_bound += w["industry_match"] * 0.5
+            
+            if ranking is not None:
+                streams.append(self._semantic_stream(ranking))
+            else:
+                constant_bound += w["semantic_similarity"] * (1.0 if vendor_masks.keywords else 0.5)
+            
+            top = threshold_top_k(top_k, streams, random_access, constant_bound)
+        
+        pairs.flush(demand_id for _, demand_id in top)
+        breakdowns = {demand_id: self._build_breakdown(*pairs.peek(demand_id)[1]) for _, demand_id in top}
+        if not top:
+            return []
+        
+        demands = {
+            d.id: d for d in db.query(Demand).filter(
+                Demand.id.in_(list(breakdowns)),
+                open_demand_filter()
+            ).all()
+        }
+        if len(demands) != len(breakdowns):
+            return None
         
-        return matches[:top_k]
+        return [self._format_demand_match(demands[demand_id], breakdowns[demand_id]) for _, demand_id in top]
+    
+    def current_scoring_version(self) -> str:
+        """当前评分配置版本（权重 + 语义索引拟合 + 标签同义词）"""
+        return scoring_version(self.weights, self.semantic_index.fit_id, self.tag_dictionary.version)
+    
+    def _pairs_for_demand(self, db: Session, demand_data: Dict[str, Any]):
+        """需求一侧的分数缓存；需求数据不带 id 时不缓存"""
+        return self.score_cache.for_demand(
+            db,
+            demand_data.get("id"),
+            demand_data.get("updated_at"),
+            self.current_scoring_version()
+        )
+    
+    def _industry_stream(self, matched: set, untagged: set) -> SortedAccess:
+        """行业维度的有序访问：命中标签 1.0 > 无标签 0.5 > 其余 0.3"""
+        weight = self.weights["industry_match"]
+        
+        def items():
+            for item_id in matched:
+                yield item_id, weight * 1.0
+            for item_id in untagged:
+                if item_id not in matched:
+                    yield item_id, weight * 0.5
+        
+        return SortedAccess(items(), floor=weight * 0.3)
+    
+    def _semantic_stream(self, ranking) -> SortedAccess:
+        """语义维度的有序访问：按文本相似度降序"""
+        weight = self.weights["semantic_similarity"]
+        return SortedAccess(
+            ((item_id, weight * similarity) for item_id, similarity in ranking.iter_desc()),
+            floor=0.0
+        )
+    
+    def vendor_match_result(self, vendor: VendorProfile, components: List[float]) -> Dict[str, Any]:
+        """由六个维度原始得分构建供应商匹配结果"""
+        return self._format_vendor_match(vendor, self._build_breakdown(*components))
+    
+    def demand_match_result(self, demand, components: List[float]) -> Dict[str, Any]:
+        """由六个维度原始得分构建需求推荐结果"""
+        return self._format_demand_match(demand, self._build_breakdown(*components))
+    
+    def _format_vendor_match(self, vendor: VendorProfile, score_breakdown: Dict[str, float]) -> Dict[str, Any]:
+        """供应商匹配结果"""
+        return {
+            "vendor_id": vendor.id,
+            "vendor_name": vendor.name,
+            "vendor_eid": vendor.eid,
+            "score": score_breakdown["total_score"],
+            "score_breakdown": score_breakdown,
+            "reasons": self._generate_match_reasons(score_breakdown),
+            "contact_email": vendor.contact_email,
+            "credit_score": vendor.credit_score,
+            "ai_capabilities": vendor.ai_capabilities
+        }
+    
+    def _format_demand_match(self, demand, score_breakdown: Dict[str, float]) -> Dict[str, Any]:
+        """需求推荐结果"""
+        return {
+            "demand_id": demand.id,
+            "demand_title": demand.title,
+            "demand_description": demand.description[:200] + "..." if len(demand.description) > 200 else demand.description,
+            "enterprise_id": demand.enterprise_id,
+            "industry_tags": demand.industry_tags,
+            "scenario_tags": demand.scenario_tags,
+            "budget_range": f"{demand.budget_min}-{demand.budget_max}" if demand.budget_min and demand.budget_max else "面议",
+            "score": score_breakdown["total_score"],
+            "score_breakdown": score_breakdown,
+            "match_reasons": self._generate_match_reasons(score_breakdown),
+            "created_at": demand.created_at.isoformat() if demand.created_at else None,
+            "status": demand.status.value if demand.status else "submitted"
+        }
     
     def _calculate_match_score(
         self,
         demand_data: Dict[str, Any],
-        vendor: Enterprise
+        vendor: Enterprise,
+        semantic_score: Optional[float] = None
     ) -> Dict[str, Any]:
-        """计算单个供应商的匹配分数"""
+        """
+        计算单个供应商的匹配分数
+        
+        Args:
+            demand_data: 需求数据
+            vendor: 供应商企业对象
+            semantic_score: 文本索引给出的语义相似度，为空时按标签规则计算
+        """
+        return self._build_breakdown(*self._match_components(demand_data, vendor, semantic_score))
+    
+    def _match_components(
+        self,
+        demand_data: Dict[str, Any],
+        vendor: Enterprise,
+        semantic_score: Optional[float] = None,
+        demand_masks: Optional[TagMasks] = None,
+        vendor_masks: Optional[TagMasks] = None
+    ) -> tuple:
+        """计算六个维度的原始得分（0-1）；可传入预先解析的标签位图"""
+        if demand_masks is None:
+            demand_masks = self.tag_dictionary.masks(
+                demand_data.get("industry_tags", []), demand_data.get("scenario_tags", [])
+            )
+        if vendor_masks is None:
+            vendor_masks = self.tag_dictionary.masks(vendor.industry_tags, vendor.ai_capabilities)
         
         # 1. 行业匹配度
-        industry_score = self._calc_industry_match(
-            demand_data.get("industry_tags", []),
-            vendor.industry_tags or []
-        )
+        industry_score = self._calc_industry_match(demand_masks, vendor_masks)
         
-        # 2. 语义相似度（模拟）
-        semantic_score = self._calc_semantic_similarity(
-            demand_data.get("scenario_tags", []),
-            vendor.ai_capabilities or []
-        )
+        # 2. 语义相似度
+        if semantic_score is None:
+            semantic_score = self._calc_semantic_similarity(demand_masks, vendor_masks)
         
         # 3. 历史成功率（模拟）
         success_score = self._calc_success_rate(vendor)
@@ -168,8 +809,26 @@ class MatchingService:
         # 6. 信用评分
         credit_score = self._normalize_credit_score(vendor.credit_score)
         
-        # 计算加权总分
-        total_score = (
+        return (
+            industry_score,
+            semantic_score,
+            success_score,
+            budget_score,
+            geo_score,
+            credit_score
+        )
+    
+    def _weighted_total(
+        self,
+        industry_score: float,
+        semantic_score: float,
+        success_score: float,
+        budget_score: float,
+        geo_score: float,
+        credit_score: float
+    ) -> float:
+        """计算加权总分（0-1）"""
+        return (
             industry_score * self.weights["industry_match"] +
             semantic_score * self.weights["semantic_similarity"] +
             success_score * self.weights["success_rate"] +
@@ -177,6 +836,20 @@ class MatchingService:
             geo_score * self.weights["geo_proximity"] +
             credit_score * self.weights["credit_score"]
         )
+    
+    def _build_breakdown(
+        self,
+        industry_score: float,
+        semantic_score: float,
+        success_score: float,
+        budget_score: float,
+        geo_score: float,
+        credit_score: float
+    ) -> Dict[str, Any]:
+        """由各维度得分构建得分明细（百分制）"""
+        total_score = self._weighted_total(
+            industry_score, semantic_score, success_score, budget_score, geo_score, credit_score
+        )
         
         return {
             "total_score": round(total_score * 100, 2),
@@ -190,16 +863,15 @@ class MatchingService:
     
     def _calc_industry_match(
         self,
-        demand_industries: List[str],
-        vendor_industries: List[str]
+        demand_masks: TagMasks,
+        vendor_masks: TagMasks
     ) -> float:
         """计算行业匹配度"""
-        if not demand_industries or not vendor_industries:
+        if not demand_masks.industry or not vendor_masks.industry:
             return 0.5  # 无标签时给中等分
         
         # 计算交集
-        common = set(demand_industries) & set(vendor_industries)
-        if common:
+        if demand_masks.industry & vendor_masks.industry:
             return 1.0
         
         # 部分相关行业也给予一定分数
@@ -207,29 +879,22 @@ class MatchingService:
     
     def _calc_semantic_similarity(
         self,
-        demand_scenarios: List[str],
-        vendor_capabilities: List[str]
+        demand_masks: TagMasks,
+        vendor_masks: TagMasks
     ) -> float:
-        """计算语义相似度（简化版本）"""
-        if not demand_scenarios or not vendor_capabilities:
+        """计算语义相似度（标签规则，文本索引不可用时使用）"""
+        demand_keywords, capability_keywords = demand_masks.keywords, vendor_masks.keywords
+        if not demand_keywords or not capability_keywords:
             return 0.5
         
-        # 简单的关键词匹配
-        demand_keywords = set(s.lower() for s in demand_scenarios)
-        capability_keywords = set(c.lower() for c in vendor_capabilities)
-        
-        common = demand_keywords & capability_keywords
-        
+        common = popcount(demand_keywords & capability_keywords)
         if common:
             # Jaccard相似度
-            union = demand_keywords | capability_keywords
-            return len(common) / len(union)
+            return common / popcount(demand_keywords | capability_keywords)
         
-        # 模糊匹配（包含关系）
-        for demand_kw in demand_keywords:
-            for cap_kw in capability_keywords:
-                if demand_kw in cap_kw or cap_kw in demand_kw:
-                    return 0.7
+        # 模糊匹配（标签间存在包含关系，已在标签词典中预先计算）
+        if demand_masks.related & capability_keywords:
+            return 0.7
         
         return 0.4
     
@@ -237,8 +902,10 @@ class MatchingService:
         """计算历史成功率（模拟）"""
         # 在MVP阶段，基于信用分模拟
         # 实际应该从项目表中统计
-        credit_score = vendor.credit_score
-        
+        return self._success_rate_for_credit(vendor.credit_score)
+    
+    def _success_rate_for_credit(self, credit_score: float) -> float:
+        """信用分对应的模拟成功率（随信用分单调不减）"""
         if credit_score >= 90:
             return 0.95
         elif credit_score >= 80:
@@ -304,3 +971,6 @@ class MatchingService:
 
 # 创建全局匹配服务实例
 matching_service = MatchingService()
+
+# 本进程提交供应商变更后发布新的特征文件版本
+vendor_snapshot.on_change = matching_service.schedule_vendor_publish
@@ -0,0 +1,569 @@
+"""
+推荐物化表
+保存每个供应商的前 N 个推荐需求和每个需求的前 N 个推荐供应商，推荐接口直接按索引读取。
+需求或供应商变化时提交后台刷新任务（见 job_queue），worker 只对其本身重新评分，再增量更新对方的推荐列表。
+每个已物化的列表有一条标记（RecommendationList），记录物化时对象与评分配置的版本：
+有标记的列表即使为空也直接读取，版本已变化时读取过期的列表并标记为过期；没有标记时本次实时计算。
+读取不写数据库：过期或缺失列表的刷新任务由 worker 定期提交（schedule_stale），
+首次部署时的全量构建由 worker 或命令行（python -m app.cli build-recommendations）执行。
+"""
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+from datetime import datetime
+import threading
+import numpy as np
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.orm import Session
+from ..models import Recommendation, RecommendationList, Enterprise, EnterpriseStatus, Demand, Job, JobType
+from .scoring_engine import SCORE_DIMENSIONS, rank_order, score_vendors
+from .topk import display_score, rank_key
+from .tag_index import VENDOR_TYPES, is_indexable_vendor, is_open_demand, open_demand_filter
+from .vendor_snapshot import VendorProfile
+from .job_queue import ACTIVE_JOB_STATUSES, REFRESH_JOB_COLUMNS, job_queue
+
+# owner_type 取值
+VENDOR_SIDE = "vendor"  # 供应商 -> 推荐需求
+DEMAND_SIDE = "demand"  # 需求 -> 推荐供应商
+
+# 各侧列表的刷新任务类型
+REFRESH_JOB_TYPES = {VENDOR_SIDE: JobType.REFRESH_VENDOR, DEMAND_SIDE: JobType.REFRESH_DEMAND}
+
+# 单条 IN 查询中的ID数量上限
+QUERY_CHUNK_SIZE = 500
+
+# (target_id, 排序分数, 六个维度原始得分)
+Entry = Tuple[int, float, List[float]]
+
+
+def ranking_score(total: float) -> float:
+    """
+    推荐表保存的排序分数：展示分数换算回 0-1
+
+    展示分数相同的记录排序分数也相同，按 (score 降序, target_id 升序) 读取时与匹配服务的 rank_key 一致。
+    """
+    return display_score(total) / 100
+
+
+def demand_match_data(demand: Demand) -> Dict[str, Any]:
+    """构建需求的匹配数据"""
+    return {
+        "id": demand.id,
+        "updated_at": demand.updated_at,  # 分数缓存版本
+        "title": demand.title,
+        "description": demand.description,
+        "industry_tags": demand.industry_tags or [],
+        "scenario_tags": demand.scenario_tags or [],
+        "budget_max": demand.budget_max or 0,
+        "enterprise_location": "重庆",  # MVP阶段默认重庆
+        # 硬性要求（见 match_constraints）
+        "confidentiality": demand.confidentiality,
+        "min_vendor_credit": demand.min_vendor_credit,
+        "required_certifications": demand.required_certifications or []
+    }
+
+
+class RecommendationStore:
+    """
+    推荐物化表的读取与增量维护
+
+    物化列表对全部已认证供应商 × 全部开放需求评分（不经过标签候选过滤），
+    评分规则与 MatchingService 完全相同。
+    """
+
+    def __init__(self, matching, top_n: int = 50):
+        """
+        Args:
+            matching: 匹配服务，提供评分与结果格式化
+            top_n: 每个需求/供应商保留的推荐数量
+        """
+        self.matching = matching
+        self.top_n = top_n
+        self._checked = False
+        self._lock = threading.Lock()
+
+    # ---- 读取 ----
+
+    def demands_for_vendor(
+        self, db: Session, vendor: Enterprise, top_k: int, allow_stale: bool = True
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        供应商的推荐需求
+
+        已物化时按 (owner, score) 索引读取；未物化或 top_k 超出保留数量时实时计算。
+
+        Args:
+            allow_stale: 列表已过期（刷新任务尚未完成）时是否仍读取物化结果，否则实时计算
+
+        Returns:
+            (推荐需求列表, 是否为过期的物化结果)
+        """
+        read = self._read(db, VENDOR_SIDE, vendor, top_k)
+        if read is None or (read[1] and not allow_stale):
+            return self.matching.match_demands_for_vendor(vendor, db, top_k), False
+
+        rows, stale = read
+        demands = {d.id: d for d in db.query(Demand).filter(Demand.id.in_([r[0] for r in rows]))}
+        return [
+            self.matching.demand_match_result(demands[target_id], components)
+            for target_id, components in rows if target_id in demands
+        ], stale
+
+    def vendors_for_demand(
+        self, db: Session, demand: Demand, top_k: int, allow_stale: bool = True
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        需求的推荐供应商
+
+        已物化时按 (owner, score) 索引读取；未物化或 top_k 超出保留数量时实时计算。
+
+        Args:
+            allow_stale: 列表已过期（刷新任务尚未完成）时是否仍读取物化结果，否则实时计算
+
+        Returns:
+            (推荐供应商列表, 是否为过期的物化结果)
+        """
+        # 启用重排时读取重排阶段要处理的前 N 名，重排后再取前 top_k
+        pipeline = self.matching.pipeline
+        limit = max(top_k, min(pipeline.rerank_cap, self.top_n))
+        read = self._read(db, DEMAND_SIDE, demand, top_k, limit)
+        if read is None or (read[1] and not allow_stale):
+            return self.matching.match_vendors(demand_match_data(demand), db, top_k), False
+
+        rows, stale = read
+
+        self.matching.ensure_indexes(db)
+        vendors = self.matching.vendor_snapshot.get_many(r[0] for r in rows)
+        rows = [(target_id, components) for target_id, components in rows if target_id in vendors]
+        if pipeline.reranker is not None:
+            return pipeline.rerank(
+                demand_match_data(demand), db,
+                [vendors[target_id] for target_id, _ in rows], [components for _, components in rows], top_k
+            ), stale
+        return [
+            self.matching.vendor_match_result(vendors[target_id], components) for target_id, components in rows
+        ], stale
+
+    def _read(
+        self, db: Session, side: str, owner, top_k: int, limit: Optional[int] = None
+    ) -> Optional[Tuple[List[Tuple[int, list]], bool]]:
+        """
+        按分数降序读取前 limit（默认 top_k）条推荐（只读，不提交刷新任务，也不构建推荐表）
+
+        Returns:
+            (已物化的列表（可以为空）, 是否已过期)；top_k 超出保留数量或未物化时返回 None
+        """
+        if top_k > self.top_n:
+            return None
+
+        marker = db.query(RecommendationList.owner_version, RecommendationList.scoring_version).filter(
+            RecommendationList.owner_type == side,
+            RecommendationList.owner_id == owner.id
+        ).first()
+        if marker is None:
+            return None
+        # 对象或评分配置在物化后发生变化：刷新任务完成前读取过期的列表
+        stale = marker.owner_version != owner.updated_at \
+            or marker.scoring_version != self.matching.current_scoring_version()
+
+        rows = db.query(Recommendation.target_id, Recommendation.components).filter(
+            Recommendation.owner_type == side,
+            Recommendation.owner_id == owner.id
+        ).order_by(
+            Recommendation.score.desc(), Recommendation.target_id
+        ).limit(limit or top_k).all()
+        return rows, stale
+
+    # ---- 全量构建 ----
+
+    def ensure_built(self, db: Session):
+        """没有任何已物化的列表时（首次部署）全量构建一次（worker 与命令行调用，不在请求中执行）"""
+        if self._checked:
+            return
+        with self._lock:
+            if self._checked:
+                return
+            if db.query(RecommendationList.owner_id).first() is None:
+                self.rebuild(db)
+            self._checked = True
+
+    def rebuild(self, db: Session):
+        """
+        为全部已认证供应商和开放需求重建推荐列表
+
+        供应商特征矩阵只构建一次；逐个需求向量化评分，同时得到该需求的前 N 个供应商，
+        并合并进各供应商的前 N 个需求（每个供应商保留 N 个槽位和当前最低分）。
+        """
+        self.matching.ensure_indexes(db)
+        vendors = self._load_vendors(db)
+        demands = self._load_demands(db)
+        version = self.matching.current_scoring_version()
+
+        db.query(Recommendation).delete(synchronize_session=False)
+        db.query(RecommendationList).delete(synchronize_session=False)
+        # 全部供应商与开放需求的列表都已物化（包括空列表）
+        self._mark(db, VENDOR_SIDE, vendors, version)
+        self._mark(db, DEMAND_SIDE, demands, version)
+        if not vendors or not demands:
+            db.commit()
+            return
+
+        features = self.matching.vendor_features(vendors)
+        slots = np.full((len(vendors), self.top_n), -np.inf)
+        slot_demands = np.full((len(vendors), self.top_n), -1, dtype=np.int64)
+        slot_components = np.zeros((len(vendors), self.top_n, len(SCORE_DIMENSIONS)))
+        floor_slot = np.zeros(len(vendors), dtype=np.int64)
+        floors = np.full(len(vendors), -np.inf)
+
+        demand_lists = []
+        for demand in demands:
+            demand_data = demand_match_data(demand)
+            semantic = self.matching.semantic_index.score_vendors(demand_data, vendors)
+            scores = score_vendors(features, demand_data, self.matching.weights, semantic=semantic)
+            total = np.round(scores["total"] * 100, 2) / 100  # 排序分数，同 ranking_score
+            components = np.column_stack([scores[dim] for dim in SCORE_DIMENSIONS])
+
+            # 不满足需求硬性要求的供应商不进入双方的推荐列表
+            pool = self.matching.constrained_vendor_ids(db, demand_data)
+            if pool is not None:
+                total = np.where(np.isin(features.ids, list(pool)), total, -np.inf)
+
+            top = rank_order(total, features.ids)[:self.top_n]
+            top = top[np.isfinite(total[top])]
+            demand_lists.append((demand.id, [
+                (int(features.ids[i]), float(total[i]), components[i].tolist()) for i in top
+            ]))
+
+            # 分数高于供应商当前最低分时替换该槽位
+            better = np.flatnonzero(total > floors)
+            if len(better):
+                slot = floor_slot[better]
+                slots[better, slot] = total[better]
+                slot_demands[better, slot] = demand.id
+                slot_components[better, slot] = components[better]
+                # 最低分相同的槽位中替换需求ID最大的一个（排名最后）
+                rows = slots[better]
+                lowest = rows == rows.min(axis=1, keepdims=True)
+                floor_slot[better] = np.where(lowest, slot_demands[better], -2).argmax(axis=1)
+                floors[better] = slots[better, floor_slot[better]]
+
+        for demand_id, entries in demand_lists:
+            self._insert(db, DEMAND_SIDE, demand_id, entries, version)
+        for row, vendor in enumerate(vendors):
+            filled = np.flatnonzero(slot_demands[row] >= 0)
+            self._insert(db, VENDOR_SIDE, vendor.id, [
+                (int(slot_demands[row, i]), float(slots[row, i]), slot_components[row, i].tolist())
+                for i in filled
+            ], version)
+        db.commit()
+
+    # ---- 增量维护 ----
+
+    def schedule(self, db: Session, side: str, owner_ids: Iterable[int]):
+        """提交推荐列表的后台刷新任务（写请求中不做评分，刷新完成前读取过期的列表）"""
+        job_queue.enqueue_refresh(db, REFRESH_JOB_TYPES[side], owner_ids)
+
+    def schedule_stale(self, db: Session, limit: int = 500) -> int:
+        """
+        为过期或缺失的推荐列表提交刷新任务（worker 定期调用）
+
+        写请求提交刷新任务失败、评分配置变化、或对象变为可推荐而未提交任务时，由此补齐；
+        推荐表为空（首次部署）时先全量构建。
+
+        Args:
+            limit: 每侧最多提交的任务数，其余在下次调用时提交
+
+        Returns:
+            新提交的刷新任务数
+        """
+        self.ensure_built(db)
+        version = self.matching.current_scoring_version()
+        eligible_filters = {
+            DEMAND_SIDE: (Demand, open_demand_filter()),
+            VENDOR_SIDE: (Enterprise, and_(
+                Enterprise.enterprise_type.in_(VENDOR_TYPES), Enterprise.status == EnterpriseStatus.VERIFIED
+            ))
+        }
+        scheduled = 0
+        for side, (model, eligible) in eligible_filters.items():
+            job_type = REFRESH_JOB_TYPES[side]
+            column = REFRESH_JOB_COLUMNS[job_type]
+            owner_ids = [owner_id for (owner_id,) in db.query(model.id).outerjoin(
+                RecommendationList, and_(
+                    RecommendationList.owner_type == side, RecommendationList.owner_id == model.id
+                )
+            ).filter(
+                or_(
+                    # 可推荐的对象没有列表或列表已过期
+                    and_(eligible, or_(
+                        RecommendationList.owner_id.is_(None),
+                        RecommendationList.owner_version.is_distinct_from(model.updated_at),
+                        RecommendationList.scoring_version.is_distinct_from(version)
+                    )),
+                    # 不再可推荐的对象仍有列表（刷新时移除）
+                    and_(RecommendationList.owner_id.isnot(None), ~eligible)
+                ),
+                ~exists().where(
+                    Job.job_type == job_type, column == model.id, Job.status.in_(ACTIVE_JOB_STATUSES)
+                )
+            ).order_by(model.id).limit(limit)]
+            if owner_ids:
+                scheduled += job_queue.enqueue_refresh(db, job_type, owner_ids)
+        return scheduled
+
+    def refresh_demand(self, db: Session, demand: Demand):
+        """
+        需求提交/更新后：重算该需求的推荐供应商，并增量更新各供应商的推荐需求
+
+        由 worker 执行；无法增量确定结果的供应商列表在此一并重算。
+        """
+        self.ensure_built(db)
+        if not is_open_demand(demand):
+            self._rebuild_owners(db, VENDOR_SIDE, self.remove_demand(db, demand.id))
+            return
+
+        entries = self._score_demand(db, demand)
+        self._replace(db, DEMAND_SIDE, demand, entries)
+        stale = self._merge_target(db, VENDOR_SIDE, demand.id, entries)
+        db.commit()
+        self._rebuild_owners(db, VENDOR_SIDE, stale)
+
+    def refresh_vendor(self, db: Session, vendor: Enterprise):
+        """
+        供应商更新/认证后：重算该供应商的推荐需求，并增量更新各需求的推荐供应商
+
+        由 worker 执行；无法增量确定结果的需求列表在此一并重算。
+        """
+        self.ensure_built(db)
+        if not is_indexable_vendor(vendor):
+            self._rebuild_owners(db, DEMAND_SIDE, self.remove_vendor(db, vendor.id))
+            return
+
+        entries = self._score_vendor(db, vendor)
+        self._replace(db, VENDOR_SIDE, vendor, entries)
+        stale = self._merge_target(db, DEMAND_SIDE, vendor.id, entries)
+        db.commit()
+        self._rebuild_owners(db, DEMAND_SIDE, stale)
+
+    def remove_demand(self, db: Session, demand_id: int) -> Set[int]:
+        """
+        需求删除或关闭后移出全部推荐列表
+
+        Returns:
+            需要完整重算的供应商ID（由调用方重算或提交刷新任务）
+        """
+        self._delete_owner(db, DEMAND_SIDE, demand_id)
+        stale = self._merge_target(db, VENDOR_SIDE, demand_id, [])
+        db.commit()
+        return stale
+
+    def remove_vendor(self, db: Session, vendor_id: int) -> Set[int]:
+        """
+        供应商删除或不再满足条件后移出全部推荐列表
+
+        Returns:
+            需要完整重算的需求ID（由调用方重算或提交刷新任务）
+        """
+        self._delete_owner(db, VENDOR_SIDE, vendor_id)
+        stale = self._merge_target(db, DEMAND_SIDE, vendor_id, [])
+        db.commit()
+        return stale
+
+    # ---- 内部实现 ----
+
+    def _load_vendors(self, db: Session) -> List[VendorProfile]:
+        """全部已认证供应商的档案（取自快照，按ID升序）"""
+        self.matching.ensure_indexes(db)
+        return self.matching.vendor_snapshot.profiles()
+
+    @staticmethod
+    def _load_demands(db: Session) -> List[Demand]:
+        return db.query(Demand).filter(
+            open_demand_filter()
+        ).order_by(Demand.id).all()
+
+    def _score_vendor(self, db: Session, vendor: Enterprise) -> List[Entry]:
+        """供应商与全部开放需求的分数"""
+        self.matching.ensure_indexes(db)
+        demands, totals, components = self.matching.score_demand_candidates(
+            vendor, db, demands=self._load_demands(db), use_cache=False
+        )
+        return [
+            (demand.id, ranking_score(total), list(scores))
+            for demand, total, scores in zip(demands, totals, components)
+        ]
+
+    def _score_demand(self, db: Session, demand: Demand) -> List[Entry]:
+        """需求与全部满足其硬性要求的已认证供应商的分数"""
+        self.matching.ensure_indexes(db)
+        demand_data = demand_match_data(demand)
+        vendors = self._load_vendors(db)
+        pool = self.matching.constrained_vendor_ids(db, demand_data)
+        if pool is not None:
+            vendors = [vendor for vendor in vendors if vendor.id in pool]
+        vendors, totals, components = self.matching.score_vendor_candidates(
+            demand_data, db, vendors=vendors, use_cache=False
+        )
+        return [
+            (vendor.id, ranking_score(float(total)), scores.tolist())
+            for vendor, total, scores in zip(vendors, totals, components)
+        ]
+
+    def _replace(self, db: Session, side: str, owner, entries: List[Entry]):
+        """用完整评分结果覆盖某个 owner 的推荐列表，并标记为按 owner 当前版本物化"""
+        version = self.matching.current_scoring_version()
+        self._delete_owner(db, side, owner.id)
+        top = sorted(entries, key=lambda e: rank_key(e[1], e[0]))[:self.top_n]
+        self._insert(db, side, owner.id, top, version)
+        self._mark(db, side, [owner], version)
+
+    def _mark(self, db: Session, side: str, owners: list, version: str):
+        """写入物化标记（owner 为需求、企业或供应商档案，记录其 updated_at）"""
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(RecommendationList, [
+            {
+                "owner_type": side,
+                "owner_id": owner.id,
+                "owner_version": owner.updated_at,
+                "scoring_version": version,
+                "refreshed_at": now
+            }
+            for owner in owners
+        ])
+
+    def _insert(self, db: Session, side: str, owner_id: int, entries: List[Entry], version: str):
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(Recommendation, [
+            {
+                "owner_type": side,
+                "owner_id": owner_id,
+                "target_id": target_id,
+                "score": score,
+                "components": components,
+                "scoring_version": version,
+                "updated_at": now
+            }
+            for target_id, score, components in entries
+        ])
+
+    def _delete_owner(self, db: Session, side: str, owner_id: int):
+        db.query(Recommendation).filter(
+            Recommendation.owner_type == side,
+            Recommendation.owner_id == owner_id
+        ).delete(synchronize_session=False)
+        db.query(RecommendationList).filter(
+            RecommendationList.owner_type == side,
+            RecommendationList.owner_id == owner_id
+        ).delete(synchronize_session=False)
+
+    def _merge_target(self, db: Session, side: str, target_id: int, entries: List[Entry]) -> Set[int]:
+        """
+        将某个 target 的新分数合并进各 owner 的推荐列表
+
+        Args:
+            side: owner 一侧
+            target_id: 发生变化的需求/供应商
+            entries: target 与各 owner 的新分数（owner_id, score, components）
+
+        Returns:
+            无法增量确定结果、需要完整重算的 owner ID
+        """
+        scores = {owner_id: (score, components) for owner_id, score, components in entries}
+        current = {
+            owner_id: row_id
+            for row_id, owner_id in db.query(Recommendation.id, Recommendation.owner_id).filter(
+                Recommendation.owner_type == side,
+                Recommendation.target_id == target_id
+            )
+        }
+        owners = set(scores) | set(current)
+        stats = self._owner_stats(db, side, owners)
+        version = self.matching.current_scoring_version()
+
+        now = datetime.utcnow()
+        inserts, updates, deletes = [], [], []
+        overflow: Set[int] = set()
+        stale: Set[int] = set()
+        for owner_id in owners:
+            count, floor = stats.get(owner_id, (0, None))
+            full = count >= self.top_n
+            row_id = current.get(owner_id)
+
+            if owner_id not in scores:
+                # 不再参与匹配：移出列表，列表原本已满时需要从列表外补齐
+                deletes.append(row_id)
+                if full:
+                    stale.add(owner_id)
+                continue
+
+            score, components = scores[owner_id]
+            if row_id is not None:
+                updates.append({
+                    "id": row_id,
+                    "score": score,
+                    "components": components,
+                    "scoring_version": version,
+                    "updated_at": now
+                })
+                # 分数跌到原第 N 名以下时，列表外的记录可能更高
+                if full and score < floor:
+                    stale.add(owner_id)
+            elif not full or score > floor:
+                inserts.append({
+                    "owner_type": side,
+                    "owner_id": owner_id,
+                    "target_id": target_id,
+                    "score": score,
+                    "components": components,
+                    "scoring_version": version,
+                    "updated_at": now
+                })
+                if full:
+                    overflow.add(owner_id)
+            elif score == floor:
+                # 与第 N 名同分时按ID决定先后，完整重算
+                stale.add(owner_id)
+
+        for start in range(0, len(deletes), QUERY_CHUNK_SIZE):
+            db.query(Recommendation).filter(
+                Recommendation.id.in_(deletes[start:start + QUERY_CHUNK_SIZE])
+            ).delete(synchronize_session=False)
+        db.bulk_update_mappings(Recommendation, updates)
+        db.bulk_insert_mappings(Recommendation, inserts)
+
+        # 新记录挤入已满的列表后，去掉最后一名
+        for owner_id in overflow - stale:
+            lowest = db.query(Recommendation.id).filter(
+                Recommendation.owner_type == side,
+                Recommendation.owner_id == owner_id
+            ).order_by(Recommendation.score, Recommendation.target_id.desc()).first()
+            db.query(Recommendation).filter(Recommendation.id == lowest[0]).delete(synchronize_session=False)
+
+        return stale
+
+    def _owner_stats(self, db: Session, side: str, owner_ids: Iterable[int]) -> Dict[int, Tuple[int, float]]:
+        """各 owner 推荐列表的 (长度, 最低分)"""
+        owner_ids = list(owner_ids)
+        stats = {}
+        for start in range(0, len(owner_ids), QUERY_CHUNK_SIZE):
+            rows = db.query(
+                Recommendation.owner_id, func.count(Recommendation.id), func.min(Recommendation.score)
+            ).filter(
+                Recommendation.owner_type == side,
+                Recommendation.owner_id.in_(owner_ids[start:start + QUERY_CHUNK_SIZE])
+            ).group_by(Recommendation.owner_id).all()
+            stats.update({owner_id: (count, floor) for owner_id, count, floor in rows})
+        return stats
+
+    def _rebuild_owners(self, db: Session, side: str, owner_ids: Set[int]):
+        """完整重算部分 owner 的推荐列表（先评分后写入）"""
+        if not owner_ids:
+            return
+        if side == VENDOR_SIDE:
+            owners = db.query(Enterprise).filter(Enterprise.id.in_(owner_ids)).all()
+            scored = [(vendor, self._score_vendor(db, vendor)) for vendor in owners]
+        else:
+            owners = db.query(Demand).filter(Demand.id.in_(owner_ids)).all()
+            scored = [(demand, self._score_demand(db, demand)) for demand in owners]
+
+        for owner, entries in scored:
+            self._replace(db, side, owner, entries)
+        db.commit()
@@ -0,0 +1,252 @@
+"""
+匹配分数缓存
+按 (demand_id, vendor_id) 持久化匹配得分，只有需求、供应商或评分配置发生变化时才重新计算。
+每次请求只写回排在前 top_k 名的新得分（阈值算法随机访问过的其余候选不写回），经写队列提交
+"""
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Tuple, Sequence, Iterable
+from datetime import datetime
+import hashlib
+import json
+import logging
+import threading
+from sqlalchemy import delete, tuple_
+from sqlalchemy.orm import Session
+from ..core.write_queue import WriteQueue, write_queue
+from ..models import MatchScore
+
+logger = logging.getLogger(__name__)
+
+
+def scoring_version(weights: Dict[str, float], semantic_fit_id: Optional[str], tag_version: str = "") -> str:
+    """评分配置版本：权重、语义索引拟合或标签同义词变化后变化，旧缓存随之失效"""
+    payload = json.dumps({"weights": weights, "semantic": semantic_fit_id, "tags": tag_version}, sort_keys=True)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+class PairScores:
+    """
+    单次匹配请求中一侧固定（需求或供应商）的缓存视图
+
+    创建时一次性预取该侧全部缓存行，之后的查询均为内存字典访问；
+    未命中的结果在 flush() 时只写回调用方给定的前 top_k 名。
+    """
+
+    def __init__(
+        self,
+        cache: "ScoreCache",
+        db: Session,
+        fixed_side: str,
+        fixed_id: int,
+        fixed_version: Optional[datetime],
+        version: str,
+        rows: Dict[int, Tuple[Optional[datetime], float, List[float]]]
+    ):
+        self._cache = cache
+        self._db = db
+        self._fixed_side = fixed_side
+        self._fixed_id = fixed_id
+        self._fixed_version = fixed_version
+        self._version = version
+        self._rows = rows
+        self._pending: Dict[int, Tuple[Optional[datetime], float, List[float]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, other_id: int, other_version: Optional[datetime]) -> Optional[Tuple[float, List[float]]]:
+        """查询另一侧记录的缓存得分，版本不一致视为未命中"""
+        row = self._rows.get(other_id)
+        if row is not None and row[0] == other_version:
+            self.hits += 1
+            return row[1], row[2]
+        self.misses += 1
+        return None
+
+    def peek(self, other_id: int) -> Optional[Tuple[float, List[float]]]:
+        """读取本次请求中已命中或新计算的得分（不计入统计）"""
+        row = self._rows.get(other_id)
+        return None if row is None else (row[1], row[2])
+
+    def put(self, other_id: int, other_version: Optional[datetime], score: float, components: Sequence[float]):
+        """记录新计算的得分，排在前 top_k 名时由 flush() 写入数据库"""
+        entry = (other_version, float(score), [float(c) for c in components])
+        self._rows[other_id] = entry
+        self._pending[other_id] = entry
+
+    def flush(self, keep: Iterable[int] = ()):
+        """
+        累计命中统计，写回 keep 中新计算的得分
+
+        Args:
+            keep: 本次请求的前 top_k 名的ID；其余新计算的得分只在本次请求内有效
+        """
+        self._cache.record(self.hits, self.misses)
+        self.hits = self.misses = 0
+        pending = [(other_id, self._pending[other_id]) for other_id in keep if other_id in self._pending]
+        self._pending = {}
+        if not pending:
+            return
+
+        rows = []
+        for other_id, (other_version, score, components) in pending:
+            if self._fixed_side == "demand":
+                demand_id, vendor_id = self._fixed_id, other_id
+                demand_version, vendor_version = self._fixed_version, other_version
+            else:
+                demand_id, vendor_id = other_id, self._fixed_id
+                demand_version, vendor_version = other_version, self._fixed_version
+            rows.append({
+                "demand_id": demand_id,
+                "vendor_id": vendor_id,
+                "score": score,
+                "components": components,
+                "demand_version": demand_version,
+                "vendor_version": vendor_version,
+                "scoring_version": self._version,
+                "computed_at": datetime.utcnow()
+            })
+        self._cache.write(self._db, rows)
+
+
+class _DisabledPairScores:
+    """缓存关闭时的空实现：只在本次请求内保留计算结果，不读写数据库"""
+
+    def __init__(self):
+        self._rows: Dict[int, Tuple[float, List[float]]] = {}
+
+    def get(self, other_id, other_version):
+        return None
+
+    def peek(self, other_id):
+        return self._rows.get(other_id)
+
+    def put(self, other_id, other_version, score, components):
+        self._rows[other_id] = (float(score), list(components))
+
+    def flush(self, keep=()):
+        pass
+
+
+class ScoreCache:
+    """匹配分数缓存（数据库持久化）"""
+
+    # 单条 DELETE 语句中的主键对数量上限
+    WRITE_CHUNK_SIZE = 500
+
+    def __init__(self, enabled: bool = True, writer: WriteQueue = write_queue):
+        """
+        Args:
+            enabled: 是否读写缓存
+            writer: 写回缓存使用的写队列（不另外占用连接池中的连接）
+        """
+        self.enabled = enabled
+        self.writer = writer
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def for_demand(
+        self,
+        db: Session,
+        demand_id: Optional[int],
+        demand_version: Optional[datetime],
+        version: str
+    ):
+        """预取某个需求与各供应商的缓存得分"""
+        if not self.enabled or demand_id is None:
+            return _DisabledPairScores()
+
+        rows = db.query(
+            MatchScore.vendor_id, MatchScore.vendor_version, MatchScore.score, MatchScore.components
+        ).filter(
+            MatchScore.demand_id == demand_id,
+            MatchScore.demand_version == demand_version,
+            MatchScore.scoring_version == version
+        ).all()
+        return PairScores(
+            self, db, "demand", demand_id, demand_version, version,
+            {vendor_id: (vendor_version, score, components) for vendor_id, vendor_version, score, components in rows}
+        )
+
+    def for_vendor(
+        self,
+        db: Session,
+        vendor_id: int,
+        vendor_version: Optional[datetime],
+        version: str
+    ):
+        """预取某个供应商与各需求的缓存得分"""
+        if not self.enabled:
+            return _DisabledPairScores()
+
+        rows = db.query(
+            MatchScore.demand_id, MatchScore.demand_version, MatchScore.score, MatchScore.components
+        ).filter(
+            MatchScore.vendor_id == vendor_id,
+            MatchScore.vendor_version == vendor_version,
+            MatchScore.scoring_version == version
+        ).all()
+        return PairScores(
+            self, db, "vendor", vendor_id, vendor_version, version,
+            {demand_id: (demand_version, score, components) for demand_id, demand_version, score, components in rows}
+        )
+
+    def uncached(self):
+        """不读写缓存的视图（批量重建等一次性评分使用）"""
+        return _DisabledPairScores()
+
+    def record(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def write(self, db: Session, rows: List[Dict[str, Any]]):
+        """
+        经写队列批量覆盖写入，不等待提交完成
+
+        Args:
+            db: 请求的会话；有未提交的写操作时跳过本次写回（缓存写入失败不影响匹配结果）
+        """
+        def upsert(session: Session) -> int:
+            for start in range(0, len(rows), self.WRITE_CHUNK_SIZE):
+                chunk = rows[start:start + self.WRITE_CHUNK_SIZE]
+                keys = [(r["demand_id"], r["vendor_id"]) for r in chunk]
+                session.execute(delete(MatchScore).where(
+                    tuple_(MatchScore.demand_id, MatchScore.vendor_id).in_(keys)
+                ))
+                session.bulk_insert_mappings(MatchScore, chunk)
+            return len(rows)
+
+        try:
+            future = self.writer.submit(upsert, session=db)
+        except RuntimeError as e:
+            logger.debug("跳过分数缓存写回: %s", e)
+            return
+        future.add_done_callback(self._written)
+
+    def _written(self, future: Future):
+        if future.exception() is not None:
+            logger.warning("分数缓存写回失败: %s", future.exception())
+            return
+        with self._lock:
+            self.writes += future.result()
+
+    def remove_demand(self, db: Session, demand_id: int):
+        """删除某个需求的全部缓存行（需求删除时调用，随请求事务提交）"""
+        db.query(MatchScore).filter(MatchScore.demand_id == demand_id).delete(synchronize_session=False)
+
+    def stats(self, db: Optional[Session] = None) -> Dict[str, Any]:
+        """命中统计；传入会话时附带缓存行数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            result = {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes
+            }
+        if db is not None:
+            result["cached_pairs"] = db.query(MatchScore).count()
+        return result
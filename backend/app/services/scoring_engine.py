@@ -0,0 +1,330 @@
+"""
+批量评分引擎
+将供应商特征保存为NumPy数组，对单个需求一次性向量化计算全部候选供应商的匹配分数
+"""
+from typing import List, Dict, Any, Sequence, Optional
+import json
+import os
+import numpy as np
+import scipy.sparse as sp
+from .tag_dictionary import TagDictionary, tag_dictionary, iter_bits, popcount
+from .vendor_snapshot import VendorProfile
+
+
+# 持久化的特征数组（文件名 = 属性名 + .npy）
+FEATURE_ARRAYS = (
+    "ids", "credit_scores", "geo_local",
+    "industry_bits", "has_industry", "capability_bits", "has_capability", "capability_counts"
+)
+
+# 各评分维度（与 MatchingService.weights 的键保持一致）
+SCORE_DIMENSIONS = (
+    "industry_match",
+    "semantic_similarity",
+    "success_rate",
+    "budget_match",
+    "geo_proximity",
+    "credit_score"
+)
+
+
+class VendorFeatures:
+    """供应商特征矩阵"""
+
+    def __init__(self, vendors: Sequence[Any], dictionary: TagDictionary = tag_dictionary):
+        """
+        从供应商档案构建特征数组
+
+        Args:
+            vendors: 供应商档案列表（VendorProfile，传入 Enterprise 时先转换为档案）
+            dictionary: 标签词典（随特征一起传给评分进程，保证位分配一致）
+        """
+        vendors = [VendorProfile.from_enterprise(v) for v in vendors]
+        n = len(vendors)
+
+        # 结果展示所需的原始字段，只在最终 top_k 中读取
+        self.ids = np.fromiter((v.id for v in vendors), dtype=np.int64, count=n)
+        self.names = [v.name for v in vendors]
+        self.eids = [v.eid for v in vendors]
+        self.contact_emails = [v.contact_email for v in vendors]
+        self.ai_capabilities = [v.ai_capabilities for v in vendors]
+
+        # 数值特征
+        self.credit_scores = np.fromiter(
+            (float(v.credit_score or 0.0) for v in vendors), dtype=np.float64, count=n
+        )
+        self.geo_local = np.fromiter((v.geo_local for v in vendors), dtype=bool, count=n)
+
+        # 标签位图：每个标签一列，行内求和即 popcount
+        self.dictionary = dictionary
+        masks = [dictionary.masks(v.industry_tags, v.ai_capabilities) for v in vendors]
+        self.industry_vocab, self.industry_bits = self._build_bits([m.industry for m in masks])
+        self.has_industry = np.fromiter((m.industry != 0 for m in masks), dtype=bool, count=n)
+
+        self.capability_vocab, self.capability_bits = self._build_bits([m.keywords for m in masks])
+        self.has_capability = np.fromiter((m.keywords != 0 for m in masks), dtype=bool, count=n)
+        self.capability_counts = self.capability_bits.sum(axis=1)
+
+        # 供应商文本的 TF-IDF 行（可选，与语义索引的某次拟合对应）
+        self.text_vectors: Optional[sp.csr_matrix] = None
+        self.text_fit_id: Optional[str] = None
+
+        # 从磁盘映射时的目录
+        self.path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __reduce_ex__(self, protocol):
+        # 映射自磁盘的特征只传递目录，评分进程各自映射同一组文件，不复制数组
+        if self.path is not None:
+            return (VendorFeatures.load, (self.path, self.dictionary))
+        return super().__reduce_ex__(protocol)
+
+    def save(self, path: str):
+        """
+        把特征写入目录：数组保存为 .npy，标签列按规范名称记录（位置是进程内分配的）
+
+        Args:
+            path: 目标目录（需已存在）
+        """
+        for name in FEATURE_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+
+        meta = {
+            "tag_version": self.dictionary.version,
+            "industry_vocab": self._vocab_names(self.industry_vocab),
+            "capability_vocab": self._vocab_names(self.capability_vocab),
+            "names": self.names,
+            "eids": self.eids,
+            "contact_emails": self.contact_emails,
+            "ai_capabilities": self.ai_capabilities,
+            "text_fit_id": None,
+            "text_shape": None
+        }
+        if self.text_vectors is not None:
+            vectors = self.text_vectors.tocsr()
+            vectors.sort_indices()
+            np.save(os.path.join(path, "text_data.npy"), vectors.data)
+            np.save(os.path.join(path, "text_indices.npy"), vectors.indices)
+            np.save(os.path.join(path, "text_indptr.npy"), vectors.indptr)
+            meta["text_fit_id"] = self.text_fit_id
+            meta["text_shape"] = list(vectors.shape)
+
+        with open(os.path.join(path, "features.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, dictionary: TagDictionary = tag_dictionary) -> "VendorFeatures":
+        """
+        以只读内存映射打开 save() 写入的特征，多个进程共享同一份页缓存
+
+        Raises:
+            ValueError: 标签同义词配置与写入时不同，标签列无法对应
+        """
+        with open(os.path.join(path, "features.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["tag_version"] != dictionary.version:
+            raise ValueError("标签词典版本不一致")
+
+        features = cls.__new__(cls)
+        for name in FEATURE_ARRAYS:
+            setattr(features, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        features.names = meta["names"]
+        features.eids = meta["eids"]
+        features.contact_emails = meta["contact_emails"]
+        features.ai_capabilities = meta["ai_capabilities"]
+        features.dictionary = dictionary
+        features.industry_vocab = cls._vocab_bits(meta["industry_vocab"], dictionary)
+        features.capability_vocab = cls._vocab_bits(meta["capability_vocab"], dictionary)
+
+        features.text_vectors = None
+        features.text_fit_id = meta["text_fit_id"]
+        if meta["text_shape"] is not None:
+            features.text_vectors = sp.csr_matrix(
+                tuple(
+                    np.load(os.path.join(path, f"text_{part}.npy"), mmap_mode="r")
+                    for part in ("data", "indices", "indptr")
+                ),
+                shape=tuple(meta["text_shape"]),
+                copy=False
+            )
+        features.path = path
+        return features
+
+    def take(self, rows: Sequence[int]) -> "VendorFeatures":
+        """取部分供应商的特征（复制所选行，标签列不变）"""
+        rows = np.asarray(rows, dtype=np.int64)
+        subset = VendorFeatures.__new__(VendorFeatures)
+        for name in FEATURE_ARRAYS:
+            setattr(subset, name, np.asarray(getattr(self, name)[rows]))
+        for name in ("names", "eids", "contact_emails", "ai_capabilities"):
+            values = getattr(self, name)
+            setattr(subset, name, [values[i] for i in rows])
+        subset.dictionary = self.dictionary
+        subset.industry_vocab = self.industry_vocab
+        subset.capability_vocab = self.capability_vocab
+        subset.text_vectors = None if self.text_vectors is None else self.text_vectors[rows]
+        subset.text_fit_id = self.text_fit_id
+        subset.path = None
+        return subset
+
+    def _vocab_names(self, vocab: Dict[int, int]) -> List[str]:
+        names = [""] * len(vocab)
+        for tag, col in vocab.items():
+            names[col] = self.dictionary.names(1 << tag)[0]
+        return names
+
+    @staticmethod
+    def _vocab_bits(names: List[str], dictionary: TagDictionary) -> Dict[int, int]:
+        vocab = {dictionary.bit(name): col for col, name in enumerate(names)}
+        if len(vocab) != len(names):
+            raise ValueError("标签列无法与标签词典对应")
+        return vocab
+
+    @staticmethod
+    def _build_bits(masks: List[int]):
+        """把整数位图展开为 N×V 布尔矩阵，返回 (标签位 -> 列, 矩阵)"""
+        vocab: Dict[int, int] = {}
+        rows, cols = [], []
+        for row, mask in enumerate(masks):
+            for tag in iter_bits(mask):
+                col = vocab.setdefault(tag, len(vocab))
+                rows.append(row)
+                cols.append(col)
+
+        bits = np.zeros((len(masks), len(vocab)), dtype=bool)
+        bits[rows, cols] = True
+        return vocab, bits
+
+
+def score_vendors(
+    features: VendorFeatures,
+    demand_data: Dict[str, Any],
+    weights: Dict[str, float],
+    semantic: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    向量化计算需求与全部供应商的各维度得分
+
+    各维度规则与 MatchingService 中的标量实现逐一对应，
+    加权求和的顺序也保持一致，保证浮点结果完全相同。
+
+    Args:
+        features: 供应商特征矩阵
+        demand_data: 需求数据
+        weights: 各维度权重
+        semantic: 预先计算的语义相似度数组（如文本索引的余弦相似度），为空时按标签规则计算
+
+    Returns:
+        各维度得分数组（0-1）以及 total 加权总分数组
+    """
+    n = len(features)
+
+    demand_masks = features.dictionary.masks(
+        demand_data.get("industry_tags", []), demand_data.get("scenario_tags", [])
+    )
+
+    # 1. 行业匹配度：无标签 0.5，有交集 1.0，否则 0.3
+    if demand_masks.industry:
+        vocab = features.industry_vocab
+        cols = [vocab[t] for t in iter_bits(demand_masks.industry) if t in vocab]
+        common = features.industry_bits[:, cols].any(axis=1)
+        industry = np.where(common, 1.0, 0.3)
+        industry[~features.has_industry] = 0.5
+    else:
+        industry = np.full(n, 0.5)
+
+    # 2. 语义相似度：Jaccard > 包含关系 0.7 > 0.4，无标签 0.5
+    if semantic is not None:
+        semantic = np.asarray(semantic, dtype=np.float64)
+    elif demand_masks.keywords:
+        vocab = features.capability_vocab
+        exact_cols = [vocab[t] for t in iter_bits(demand_masks.keywords) if t in vocab]
+        fuzzy_cols = [vocab[t] for t in iter_bits(demand_masks.related) if t in vocab]
+        common = features.capability_bits[:, exact_cols].sum(axis=1)
+        union = popcount(demand_masks.keywords) + features.capability_counts - common
+        fuzzy = features.capability_bits[:, fuzzy_cols].any(axis=1)
+
+        semantic = np.where(fuzzy, 0.7, 0.4)
+        has_common = common > 0
+        semantic[has_common] = common[has_common] / union[has_common]
+        semantic[~features.has_capability] = 0.5
+    else:
+        semantic = np.full(n, 0.5)
+
+    # 3. 历史成功率：按信用分阈值分段
+    credit = features.credit_scores
+    success = np.select(
+        [credit >= 90, credit >= 80, credit >= 70],
+        [0.95, 0.85, 0.75],
+        default=0.65
+    )
+
+    # 4. 预算匹配度：只取决于需求本身
+    demand_budget = demand_data.get("budget_max", 0)
+    if demand_budget == 0:
+        budget_value = 0.7
+    elif demand_budget >= 100000:
+        budget_value = 1.0
+    elif demand_budget >= 50000:
+        budget_value = 0.9
+    else:
+        budget_value = 0.7
+    budget = np.full(n, budget_value)
+
+    # 5. 地理位置
+    if "重庆" in demand_data.get("enterprise_location", "重庆"):
+        geo = np.where(features.geo_local, 1.0, 0.5)
+    else:
+        geo = np.where(features.geo_local, 0.8, 0.5)
+
+    # 6. 信用评分归一化
+    credit_norm = credit / 100.0
+
+    total = (
+        industry * weights["industry_match"] +
+        semantic * weights["semantic_similarity"] +
+        success * weights["success_rate"] +
+        budget * weights["budget_match"] +
+        geo * weights["geo_proximity"] +
+        credit_norm * weights["credit_score"]
+    )
+
+    return {
+        "industry_match": industry,
+        "semantic_similarity": semantic,
+        "success_rate": success,
+        "budget_match": budget,
+        "geo_proximity": geo,
+        "credit_score": credit_norm,
+        "total": total
+    }
+
+
+def rank_order(total: np.ndarray, ids: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    按展示分数（百分制保留两位小数）降序、ID 升序排列的全部下标，与 topk.rank_key 的排序一致
+
+    Args:
+        total: 加权总分（可含 -inf 表示排除）
+        ids: 各行的ID，为空时按原始顺序
+    """
+    display = np.round(total * 100, 2)
+    tie_break = np.arange(len(display)) if ids is None else np.asarray(ids)
+    return np.lexsort((tie_break, -display))
+
+
+def rank_top_k(total: np.ndarray, top_k: int, ids: Optional[Sequence[int]] = None) -> np.ndarray:
+    """按 rank_order 的排序取前 top_k 个下标"""
+    if top_k <= 0 or len(total) == 0:
+        return np.empty(0, dtype=np.int64)
+    return rank_order(total, ids)[:top_k]
+
+
+def breakdown_at(scores: Dict[str, np.ndarray], index: int) -> Dict[str, float]:
+    """构建单个候选的得分明细（格式与 _calculate_match_score 一致）"""
+    breakdown = {"total_score": round(float(scores["total"][index]) * 100, 2)}
+    for dim in SCORE_DIMENSIONS:
+        breakdown[dim] = round(float(scores[dim][index]) * 100, 2)
+    return breakdown
@@ -0,0 +1,488 @@
+"""
+语义相似度索引
+基于字符 n-gram 的 TF-IDF 稀疏向量，对中文文本无需分词即可计算相似度。
+向量化器只在建立索引或文档变化较多时拟合，请求路径上只做 transform 和稀疏矩阵-向量乘法。
+"""
+from typing import Dict, List, Any, Optional, Sequence, Iterable, Iterator, Tuple
+from datetime import datetime
+import os
+import threading
+import uuid
+import numpy as np
+import joblib
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy.orm import Session
+from ..models import Enterprise, EnterpriseStatus, Demand
+from .tag_index import VENDOR_TYPES, open_demand_filter
+from .vendor_snapshot import VendorProfile
+
+
+# 索引文件格式版本，结构变化时递增，旧文件将被忽略并重建
+INDEX_FORMAT_VERSION = 1
+
+
+def _flatten_text(value: Any) -> Iterable[str]:
+    """展开 JSON 字段（列表/字典）中的全部字符串"""
+    if value is None:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten_text(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten_text(item)
+
+
+def vendor_text(vendor: Any) -> Optional[str]:
+    """
+    供应商文本：主营业务 + 能力标签 + 行业标签 + 能力详情
+
+    供应商档案快照不含文本字段，返回 None（以索引中已有的向量为准）
+    """
+    if isinstance(vendor, VendorProfile):
+        return None
+    parts = [vendor.business_scope or ""]
+    parts.extend(_flatten_text(vendor.ai_capabilities))
+    parts.extend(_flatten_text(vendor.industry_tags))
+    parts.extend(_flatten_text(getattr(vendor, "capability_details", None)))
+    return " ".join(p for p in parts if p)
+
+
+def vendor_case_text(vendor: Any) -> str:
+    """供应商案例文本：成功案例 + 行业经验（不在语义索引中，供重排使用）"""
+    parts = list(_flatten_text(vendor.success_cases))
+    parts.extend(_flatten_text(vendor.industry_experience))
+    return " ".join(p for p in parts if p)
+
+
+def demand_text(demand: Any) -> str:
+    """需求文本：标题 + 描述 + 场景标签 + 行业标签（支持 Demand 对象或需求数据字典）"""
+    get = demand.get if isinstance(demand, dict) else lambda key, default=None: getattr(demand, key, default)
+    parts = [get("title") or "", get("description") or ""]
+    parts.extend(_flatten_text(get("scenario_tags")))
+    parts.extend(_flatten_text(get("industry_tags")))
+    return " ".join(p for p in parts if p)
+
+
+class SimilarityRanking:
+    """一次查询对全部已索引文档的相似度"""
+
+    def __init__(self, ids: np.ndarray, positions: Dict[int, int], sims: np.ndarray):
+        self._ids = ids
+        self._positions = positions
+        self._sims = sims
+
+    def get(self, doc_id: int) -> float:
+        """随机访问：未索引的文档相似度为 0"""
+        pos = self._positions.get(doc_id)
+        return 0.0 if pos is None else float(self._sims[pos])
+
+    def iter_desc(self) -> Iterator[Tuple[int, float]]:
+        """有序访问：按相似度降序产出 (id, similarity)"""
+        for pos in np.argsort(-self._sims, kind="stable"):
+            yield int(self._ids[pos]), float(self._sims[pos])
+
+
+class _DocumentStore:
+    """一类文档（供应商或需求）的向量行及版本信息"""
+
+    def __init__(self):
+        self.texts: Dict[int, str] = {}
+        self.versions: Dict[int, Optional[datetime]] = {}
+        self.rows: Dict[int, sp.csr_matrix] = {}
+        self._matrix: Optional[sp.csr_matrix] = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def put(self, doc_id: int, text: str, version: Optional[datetime], row: sp.csr_matrix):
+        self.texts[doc_id] = text
+        self.versions[doc_id] = version
+        self.rows[doc_id] = row
+        self._matrix = None
+
+    def remove(self, doc_id: int) -> bool:
+        if doc_id not in self.rows:
+            return False
+        self.texts.pop(doc_id, None)
+        self.versions.pop(doc_id, None)
+        self.rows.pop(doc_id, None)
+        self._matrix = None
+        return True
+
+    def is_current(self, doc_id: int, version: Optional[datetime]) -> bool:
+        return doc_id in self.rows and self.versions.get(doc_id) == version
+
+    def similarities(self, query: sp.csr_matrix, doc_ids: Sequence[int]) -> np.ndarray:
+        """一次稀疏矩阵-向量乘法计算查询与给定文档的余弦相似度（向量已 L2 归一化）"""
+        matrix = self._stacked(query.shape[1])
+        positions = np.fromiter(
+            (self._positions.get(int(i), -1) for i in doc_ids), dtype=np.int64, count=len(doc_ids)
+        )
+        result = np.zeros(len(doc_ids))
+        known = positions >= 0
+        if known.any() and matrix.shape[0]:
+            result[known] = (matrix[positions[known]] @ query.T).toarray().ravel()
+        return result
+
+    def vectors(self, doc_ids: Sequence[int], width: int) -> sp.csr_matrix:
+        """按给定顺序取文档向量，未索引的文档为零向量"""
+        empty = sp.csr_matrix((1, width))
+        if not doc_ids:
+            return sp.csr_matrix((0, width))
+        return sp.vstack([self.rows.get(int(i), empty) for i in doc_ids], format="csr")
+
+    def ranking(self, query: sp.csr_matrix) -> "SimilarityRanking":
+        """计算查询与全部文档的相似度，供有序访问和随机访问"""
+        matrix = self._stacked(query.shape[1])
+        if matrix.shape[0]:
+            sims = (matrix @ query.T).toarray().ravel()
+        else:
+            sims = np.zeros(0)
+        return SimilarityRanking(self._ids, self._positions, sims)
+
+    def _stacked(self, width: int) -> sp.csr_matrix:
+        if self._matrix is None:
+            ids = list(self.rows.keys())
+            self._ids = np.array(ids, dtype=np.int64)
+            self._positions = {doc_id: pos for pos, doc_id in enumerate(ids)}
+            if ids:
+                self._matrix = sp.vstack([self.rows[i] for i in ids], format="csr")
+            else:
+                self._matrix = sp.csr_matrix((0, width))
+        return self._matrix
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"texts": self.texts, "versions": self.versions, "rows": self.rows}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "_DocumentStore":
+        store = cls()
+        store.texts = state["texts"]
+        store.versions = state["versions"]
+        store.rows = state["rows"]
+        return store
+
+
+class SemanticIndex:
+    """供应商与需求文本的字符 n-gram TF-IDF 索引"""
+
+    def __init__(
+        self,
+        path: str,
+        ngram_range: tuple = (1, 3),
+        max_features: int = 200000,
+        refit_ratio: float = 0.5
+    ):
+        """
+        Args:
+            path: 索引持久化文件路径
+            ngram_range: 字符 n-gram 范围
+            max_features: 词表上限
+            refit_ratio: 自上次拟合后新增/变更的文档占比超过该值时，在后台重新拟合
+        """
+        self.path = path
+        self.ngram_range = ngram_range
+        self.max_features = max_features
+        self.refit_ratio = refit_ratio
+
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.fit_id: Optional[str] = None  # 每次拟合生成新标识，相似度随之变化
+        self.vendors = _DocumentStore()
+        self.demands = _DocumentStore()
+        self._changes_since_fit = 0
+        self._fitted_docs = 0
+        self._refitting = False
+        self._lock = threading.RLock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.vectorizer is not None
+
+    # ---- 加载与拟合 ----
+
+    def ensure_loaded(self, db: Session):
+        """首次使用时从磁盘加载索引，没有可用索引时用已认证供应商和开放需求拟合"""
+        if self.is_ready:
+            return
+        with self._lock:
+            if self.is_ready:
+                return
+            if not self.load():
+                vendors = db.query(Enterprise).filter(
+                    Enterprise.enterprise_type.in_(VENDOR_TYPES),
+                    Enterprise.status == EnterpriseStatus.VERIFIED
+                ).all()
+                demands = db.query(Demand).filter(
+                    open_demand_filter()
+                ).all()
+                self.fit(vendors, demands)
+
+    def fit(self, vendors: Sequence[Any], demands: Sequence[Any]):
+        """用给定的全部文档拟合向量化器并重建索引"""
+        vendor_docs = [(v.id, vendor_text(v), v.updated_at) for v in vendors]
+        demand_docs = [(d.id, demand_text(d), d.updated_at) for d in demands]
+        self._fit_documents(vendor_docs, demand_docs)
+        self.save()
+
+    def load(self) -> bool:
+        """从磁盘加载索引，成功返回 True"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            state = joblib.load(self.path)
+        except Exception:
+            return False
+        if state.get("format") != INDEX_FORMAT_VERSION:
+            return False
+
+        with self._lock:
+            self.vectorizer = state["vectorizer"]
+            self.fit_id = state.get("fit_id", "legacy")
+            self.vendors = _DocumentStore.from_state(state["vendors"])
+            self.demands = _DocumentStore.from_state(state["demands"])
+            self._fitted_docs = state["fitted_docs"]
+            self._changes_since_fit = state["changes_since_fit"]
+        return True
+
+    def save(self):
+        """原子写入索引文件"""
+        with self._lock:
+            if not self.is_ready:
+                return
+            state = {
+                "format": INDEX_FORMAT_VERSION,
+                "vectorizer": self.vectorizer,
+                "fit_id": self.fit_id,
+                "vendors": self.vendors.to_state(),
+                "demands": self.demands.to_state(),
+                "fitted_docs": self._fitted_docs,
+                "changes_since_fit": self._changes_since_fit
+            }
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # 多个进程（API、worker）可能同时保存，临时文件名按进程区分
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            joblib.dump(state, tmp_path)
+            os.replace(tmp_path, self.path)
+
+    def _fit_documents(self, vendor_docs: List[tuple], demand_docs: List[tuple]):
+        corpus = [text for _, text, _ in vendor_docs] + [text for _, text, _ in demand_docs]
+        vectorizer = TfidfVectorizer(
+            analyzer="char",
+            ngram_range=self.ngram_range,
+            max_features=self.max_features,
+            sublinear_tf=True
+        )
+        # 空语料时用占位文本拟合，保证后续 transform 可用
+        matrix = vectorizer.fit_transform(corpus or [" "])
+
+        vendors, demands = _DocumentStore(), _DocumentStore()
+        for pos, (doc_id, text, version) in enumerate(vendor_docs):
+            vendors.put(doc_id, text, version, matrix[pos])
+        offset = len(vendor_docs)
+        for pos, (doc_id, text, version) in enumerate(demand_docs):
+            demands.put(doc_id, text, version, matrix[offset + pos])
+
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.fit_id = uuid.uuid4().hex
+            self.vendors = vendors
+            self.demands = demands
+            self._fitted_docs = len(corpus)
+            self._changes_since_fit = 0
+
+    def _refit_in_background(self):
+        """文档变化累积较多时在后台线程重新拟合，不阻塞请求"""
+        with self._lock:
+            if self._refitting:
+                return
+            self._refitting = True
+
+        def run():
+            try:
+                with self._lock:
+                    vendor_docs = [
+                        (i, self.vendors.texts[i], self.vendors.versions[i]) for i in self.vendors.rows
+                    ]
+                    demand_docs = [
+                        (i, self.demands.texts[i], self.demands.versions[i]) for i in self.demands.rows
+                    ]
+                self._fit_documents(vendor_docs, demand_docs)
+                self.save()
+            finally:
+                self._refitting = False
+
+        threading.Thread(target=run, name="semantic-index-refit", daemon=True).start()
+
+    # ---- 增量维护 ----
+
+    def _snapshot(self, side: str) -> Tuple[TfidfVectorizer, _DocumentStore]:
+        """
+        同一次拟合的向量器与文档库
+
+        后台重新拟合会整体替换二者，每次操作都基于同一快照，避免向量维度不一致
+        """
+        with self._lock:
+            return self.vectorizer, (self.vendors if side == "vendor" else self.demands)
+
+    def upsert_vendor(self, vendor: Any):
+        self._upsert("vendor", vendor.id, vendor_text(vendor), vendor.updated_at)
+
+    def upsert_demand(self, demand: Any):
+        self._upsert("demand", demand.id, demand_text(demand), demand.updated_at)
+
+    def vendor_vectors(self, vendor_ids: Sequence[int]) -> Tuple[Optional[sp.csr_matrix], Optional[str]]:
+        """
+        按给定顺序取供应商向量及对应的拟合标识（写入共享特征文件）
+
+        Returns:
+            (向量矩阵, fit_id)；索引不可用时为 (None, None)
+        """
+        with self._lock:
+            if not self.is_ready:
+                return None, None
+            return self.vendors.vectors(vendor_ids, len(self.vectorizer.vocabulary_)), self.fit_id
+
+    def stale_vendor_ids(self, vendors: Sequence[Any]) -> List[int]:
+        """索引中缺失或版本已过期的供应商ID"""
+        if not self.is_ready:
+            return []
+        _, store = self._snapshot("vendor")
+        with self._lock:
+            return [v.id for v in vendors if not store.is_current(v.id, v.updated_at)]
+
+    def remove_vendor(self, vendor_id: int):
+        with self._lock:
+            self.vendors.remove(vendor_id)
+
+    def remove_demand(self, demand_id: int):
+        with self._lock:
+            self.demands.remove(demand_id)
+
+    def _upsert(self, side: str, doc_id: int, text: str, version: Optional[datetime]):
+        if not self.is_ready:
+            return
+        vectorizer, store = self._snapshot(side)
+        row = vectorizer.transform([text])
+        with self._lock:
+            store.put(doc_id, text, version, row)
+            self._changes_since_fit += 1
+            needs_refit = self._changes_since_fit > self.refit_ratio * max(self._fitted_docs, 1)
+        if needs_refit:
+            self._refit_in_background()
+
+    def _sync(
+        self, vectorizer: TfidfVectorizer, store: _DocumentStore, docs: Sequence[Any], to_text
+    ) -> bool:
+        """把版本已过期或缺失的文档补入索引（例如其他进程修改过的记录）；无法取得文本的文档跳过"""
+        stale, texts = [], []
+        for doc in docs:
+            if not store.is_current(doc.id, doc.updated_at):
+                text = to_text(doc)
+                if text is not None:
+                    stale.append(doc)
+                    texts.append(text)
+        if not stale:
+            return False
+        rows = vectorizer.transform(texts)
+        with self._lock:
+            for pos, doc in enumerate(stale):
+                store.put(doc.id, texts[pos], doc.updated_at, rows[pos])
+            self._changes_since_fit += len(stale)
+        return True
+
+    # ---- 相似度计算 ----
+
+    def score_vendors(self, demand: Any, vendors: Sequence[Any]) -> Optional[np.ndarray]:
+        """
+        计算需求文本与一组供应商文本的余弦相似度
+
+        Returns:
+            与 vendors 顺序一致的相似度数组；索引不可用或需求文本为空时返回 None
+        """
+        if not self.is_ready:
+            return None
+        vectorizer, store = self._snapshot("vendor")
+        query = vectorizer.transform([demand_text(demand)])
+        if query.nnz == 0:
+            return None
+        self._sync(vectorizer, store, vendors, vendor_text)
+        with self._lock:
+            return store.similarities(query, [v.id for v in vendors])
+
+    def score_demands(self, vendor: Any, demands: Sequence[Any]) -> Optional[np.ndarray]:
+        """计算供应商文本与一组需求文本的余弦相似度（反向匹配）"""
+        if not self.is_ready:
+            return None
+        vectorizer, store = self._snapshot("demand")
+        query = vectorizer.transform([vendor_text(vendor)])
+        if query.nnz == 0:
+            return None
+        self._sync(vectorizer, store, demands, demand_text)
+        with self._lock:
+            return store.similarities(query, [d.id for d in demands])
+
+    def score_texts(self, demand: Any, texts: Sequence[str]) -> Optional[np.ndarray]:
+        """
+        计算需求文本与一组不在索引中的文本的余弦相似度（不写入索引）
+
+        Returns:
+            与 texts 顺序一致的相似度数组；索引不可用或需求文本为空时返回 None
+        """
+        if not self.is_ready or not texts:
+            return None
+        vectorizer, _ = self._snapshot("vendor")
+        query = vectorizer.transform([demand_text(demand)])
+        if query.nnz == 0:
+            return None
+        return (vectorizer.transform(list(texts)) @ query.T).toarray().ravel()
+
+    def batch_vectors(
+        self, vendors: Sequence[Any], demands: Sequence[Any]
+    ) -> Tuple[Optional[sp.csr_matrix], Optional[sp.csr_matrix], Optional[str]]:
+        """
+        批量匹配用的供应商矩阵与需求矩阵（每行一个文档）
+
+        两者取自同一个向量器快照，避免后台重新拟合导致维度不一致；
+        供应商一侧直接取索引中已有的向量（供应商档案快照不含文本字段）
+
+        Returns:
+            (与 vendors 顺序一致的供应商矩阵, 与 demands 顺序一致的需求矩阵, fit_id)；
+            索引不可用时为 (None, None, None)
+        """
+        if not self.is_ready or not vendors or not demands:
+            return None, None, None
+        with self._lock:
+            vectorizer, store, fit_id = self.vectorizer, self.vendors, self.fit_id
+        self._sync(vectorizer, store, vendors, vendor_text)
+        with self._lock:
+            vendor_matrix = store.vectors([v.id for v in vendors], len(vectorizer.vocabulary_))
+        return vendor_matrix, vectorizer.transform([demand_text(d) for d in demands]), fit_id
+
+    def rank_vendors(self, demand: Any) -> Optional[SimilarityRanking]:
+        """需求与索引中全部供应商的相似度（阈值算法的有序访问列表）"""
+        if not self.is_ready:
+            return None
+        vectorizer, store = self._snapshot("vendor")
+        query = vectorizer.transform([demand_text(demand)])
+        if query.nnz == 0:
+            return None
+        with self._lock:
+            return store.ranking(query)
+
+    def rank_demands(self, vendor: Any) -> Optional[SimilarityRanking]:
+        """供应商与索引中全部开放需求的相似度（阈值算法的有序访问列表）"""
+        if not self.is_ready:
+            return None
+        vectorizer, store = self._snapshot("demand")
+        query = vectorizer.transform([vendor_text(vendor)])
+        if query.nnz == 0:
+            return None
+        with self._lock:
+            return store.ranking(query)
@@ -0,0 +1,296 @@
+"""
+标签词典
+把自由填写的标签解析为规范标签：同义词（如“计算机视觉”“图像识别”“computer_vision”）归为同一标签。
+匹配时每个企业/需求的标签表示为整数位图，交集、并集为位运算，Jaccard 由 popcount 计算，
+包含关系（模糊匹配）在标签登记时预先计算，不再逐对扫描字符串。
+"""
+from typing import Dict, List, Iterable, Iterator, Optional, NamedTuple
+import hashlib
+import json
+import threading
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from ..models import Tag, Demand, Enterprise
+
+
+# 内置同义词组：规范名称 -> 同义词（包括前端提交的能力编码）
+DEFAULT_SYNONYMS: Dict[str, List[str]] = {
+    "计算机视觉": ["图像识别", "视觉识别", "computer_vision", "CV"],
+    "自然语言处理": ["nlp", "文本分析"],
+    "语音识别": ["语音识别/合成", "speech", "ASR"],
+    "机器学习": ["machine_learning", "ML"],
+    "深度学习": ["deep_learning"],
+    "知识图谱": ["knowledge_graph"],
+    "推荐系统": ["recommendation"],
+    "智能搜索": ["intelligent_search"],
+    "数据挖掘": ["data_mining"],
+    "强化学习": ["reinforcement_learning"],
+    "边缘计算": ["edge_computing"],
+    "AI芯片": ["ai_chip"],
+    "金融": ["金融服务"],
+    "医疗": ["医疗健康"],
+    "零售": ["零售电商"],
+    "政务": ["政务服务"],
+    "教育": ["教育培训"],
+}
+
+# 词典表名称字段长度，超长的标签只在进程内参与匹配
+TAG_NAME_MAX_LENGTH = 100
+
+# 写入时登记到词典的标签字段
+TAG_COLUMNS = {
+    Demand: ("industry_tags", "scenario_tags"),
+    Enterprise: ("industry_tags", "ai_capabilities"),
+}
+
+
+if hasattr(int, "bit_count"):
+    def popcount(mask: int) -> int:
+        return mask.bit_count()
+else:  # Python < 3.10
+    def popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """位图中置位的位置（从低到高）"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def normalize(name) -> str:
+    """标签比较键：去空白、小写"""
+    return str(name).strip().lower()
+
+
+class TagMasks(NamedTuple):
+    """一个企业/需求的标签位图"""
+    industry: int  # 行业标签
+    keywords: int  # 能力/场景标签
+    related: int   # 与能力/场景标签存在包含关系的其他标签
+
+
+class TagDictionary:
+    """
+    规范标签词典
+
+    位图中的位置是进程内分配的（词典表 ID 可能很大且不连续）；
+    未登记的标签首次出现时也会在进程内分配位置，保证任何标签都能参与位运算。
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            synonyms: 内置同义词组，默认 DEFAULT_SYNONYMS
+        """
+        self._lock = threading.RLock()
+        self._bits: Dict[str, int] = {}      # 比较键（规范名称及同义词） -> 位
+        self._names: List[str] = []          # 位 -> 规范名称
+        self._synonyms: List[List[str]] = []  # 位 -> 同义词
+        self._related: List[int] = []        # 位 -> 存在包含关系的其他标签位图
+        self._ids: Dict[int, int] = {}       # 位 -> 词典表 ID
+        self._loaded = False
+        self.version = ""
+
+        with self._lock:
+            for name, group in (DEFAULT_SYNONYMS if synonyms is None else synonyms).items():
+                self._define(name, group)
+            self._update_version()
+
+    def __getstate__(self):
+        # 批量匹配的评分进程需要与主进程一致的位分配
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # ---- 加载与登记 ----
+
+    def ensure_loaded(self, db: Session):
+        """首次使用时合并词典表中的标签与同义词"""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load(db)
+
+    def load(self, db: Session):
+        rows = db.execute(select(Tag.id, Tag.name, Tag.synonyms).order_by(Tag.id)).all()
+        with self._lock:
+            for tag_id, name, synonyms in rows:
+                self._assign_id(self._define(name, synonyms or []), name, tag_id)
+            self._update_version()
+            self._loaded = True
+
+    def register(self, db: Session, names: Iterable[str]):
+        """
+        登记写入的标签：尚未入库的规范标签（连同内置同义词）插入词典表
+
+        在请求会话的事务中执行，随业务数据一起提交。
+        """
+        self.ensure_loaded(db)
+        bits = [
+            bit for bit in iter_bits(self.mask(names))
+            if bit not in self._ids and len(self._names[bit]) <= TAG_NAME_MAX_LENGTH
+        ]
+        if not bits:
+            return
+
+        rows = [{"name": self._names[bit], "synonyms": list(self._synonyms[bit])} for bit in bits]
+        connection = db.connection()
+        _insert_ignore(connection, rows)
+        saved = connection.execute(
+            select(Tag.id, Tag.name).where(Tag.name.in_([row["name"] for row in rows]))
+        ).all()
+        with self._lock:
+            for tag_id, name in saved:
+                self._assign_id(self._bits[normalize(name)], name, tag_id)
+
+    # ---- 解析 ----
+
+    def mask(self, names: Optional[Iterable[str]]) -> int:
+        """标签列表 -> 位图（同义词归并，未登记的标签在进程内分配位置）"""
+        result = 0
+        for name in names or []:
+            key = normalize(name)
+            if not key:
+                continue
+            bit = self._bits.get(key)
+            if bit is None:
+                with self._lock:
+                    bit = self._define(name, ())
+            result |= 1 << bit
+        return result
+
+    def bit(self, name: str) -> int:
+        """单个标签的位置"""
+        return self.mask([name]).bit_length() - 1
+
+    def related(self, mask: int) -> int:
+        """与位图中任一标签存在包含关系的标签（不含自身）"""
+        result = 0
+        for bit in iter_bits(mask):
+            result |= self._related[bit]
+        return result
+
+    def masks(self, industry_tags: Optional[Iterable[str]], keywords: Optional[Iterable[str]]) -> TagMasks:
+        keyword_mask = self.mask(keywords)
+        return TagMasks(self.mask(industry_tags), keyword_mask, self.related(keyword_mask))
+
+    def names(self, mask: int) -> List[str]:
+        """位图 -> 规范名称"""
+        return [self._names[bit] for bit in iter_bits(mask)]
+
+    def tag_ids(self, names: Optional[Iterable[str]]) -> List[int]:
+        """标签列表 -> 已入库的词典表 ID"""
+        return [self._ids[bit] for bit in iter_bits(self.mask(names)) if bit in self._ids]
+
+    def lookup_ids(self, db: Session, names: Iterable[str]) -> List[Optional[int]]:
+        """
+        查询条件中的标签 -> 词典表 ID（同义词归并，不在进程内登记新标签）
+
+        Returns:
+            与 names 一一对应的 ID，词典表中没有的标签为 None
+        """
+        self.ensure_loaded(db)
+        names = list(names)
+        ids = [self._lookup_id(name) for name in names]
+        if None in ids:
+            # 其他进程可能登记了新标签，重新合并词典表后再查一次
+            self.load(db)
+            ids = [self._lookup_id(name) for name in names]
+        return ids
+
+    # ---- 内部 ----
+
+    def _define(self, name: str, synonyms: Iterable[str]) -> int:
+        """登记规范标签及同义词，返回位置（调用方持有锁）"""
+        key = normalize(name)
+        bit = self._bits.get(key)
+        if bit is None:
+            bit = len(self._names)
+            self._names.append(str(name).strip())
+            self._synonyms.append([])
+            self._related.append(0)
+            self._link(bit, key)
+
+        for synonym in synonyms or []:
+            synonym_key = normalize(synonym)
+            # 已被其他标签占用的写法保持原有归属
+            if synonym_key and synonym_key not in self._bits:
+                self._synonyms[bit].append(str(synonym).strip())
+                self._link(bit, synonym_key)
+        return bit
+
+    def _link(self, bit: int, key: str):
+        """把比较键归入某个标签，并与其他标签的写法预先计算包含关系"""
+        for other_key, other in self._bits.items():
+            if other != bit and (key in other_key or other_key in key):
+                self._related[bit] |= 1 << other
+                self._related[other] |= 1 << bit
+        self._bits[key] = bit
+
+    def _lookup_id(self, name: str) -> Optional[int]:
+        bit = self._bits.get(normalize(name))
+        return None if bit is None else self._ids.get(bit)
+
+    def _assign_id(self, bit: int, name: str, tag_id: int):
+        # 作为其他标签同义词的名称不覆盖该标签的 ID
+        if normalize(self._names[bit]) == normalize(name):
+            self._ids[bit] = tag_id
+
+    def _update_version(self):
+        """同义词配置版本：同义词变化会改变评分，旧的分数缓存随之失效"""
+        groups = sorted(
+            (normalize(self._names[bit]), sorted(normalize(s) for s in self._synonyms[bit]))
+            for bit in range(len(self._names)) if self._synonyms[bit]
+        )
+        payload = json.dumps(groups, ensure_ascii=False)
+        self.version = hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def _insert_ignore(connection, rows: List[dict]):
+    """插入词典行，名称已存在（并发登记）时忽略"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        existing = set(connection.execute(
+            select(Tag.name).where(Tag.name.in_([row["name"] for row in rows]))
+        ).scalars())
+        rows = [row for row in rows if row["name"] not in existing]
+        if rows:
+            connection.execute(Tag.__table__.insert(), rows)
+        return
+    connection.execute(insert(Tag.__table__).on_conflict_do_nothing(index_elements=["name"]), rows)
+
+
+# 全局标签词典实例
+tag_dictionary = TagDictionary()
+
+
+@event.listens_for(Session, "before_flush")
+def _register_written_tags(session: Session, flush_context, instances):
+    """企业/需求的标签字段写入时登记到词典"""
+    names = []
+    for obj in list(session.new) + list(session.dirty):
+        columns = TAG_COLUMNS.get(type(obj))
+        if not columns:
+            continue
+        state = sa_inspect(obj)
+        for column in columns:
+            if state.pending or state.attrs[column].history.has_changes():
+                names.extend(getattr(obj, column) or [])
+    if names:
+        tag_dictionary.register(session, names)
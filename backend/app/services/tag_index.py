@@ -0,0 +1,373 @@
+"""
+标签倒排索引
+维护 标签 -> 供应商ID 以及 标签 -> 开放需求ID 的内存索引，用于匹配前的候选集生成
+"""
+from typing import Dict, Set, Optional, List, Tuple, Any, Iterator, Iterable
+from contextlib import contextmanager
+import heapq
+import threading
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from ..models import Enterprise, EnterpriseType, EnterpriseStatus, Demand, OPEN_DEMAND_STATUSES
+from .tag_dictionary import TagDictionary, TagMasks, tag_dictionary, iter_bits, popcount
+from .topk import SortedAttributeList
+
+
+# 参与匹配的供应方类型
+VENDOR_TYPES = (EnterpriseType.SUPPLY, EnterpriseType.BOTH)
+
+# 地理位置维度的本地城市
+LOCAL_CITY = "重庆"
+
+
+def is_local_address(address: Optional[str]) -> bool:
+    """地址是否在本地城市"""
+    return LOCAL_CITY in (address or "")
+
+
+def is_indexable_vendor(enterprise: Enterprise) -> bool:
+    """是否为可参与匹配的供应商（已认证的供应方）"""
+    return (
+        enterprise.enterprise_type in VENDOR_TYPES and
+        enterprise.status == EnterpriseStatus.VERIFIED
+    )
+
+
+def is_open_demand(demand: Demand) -> bool:
+    """是否为可推荐给供应商的开放需求"""
+    return demand.status in OPEN_DEMAND_STATUSES
+
+
+def open_demand_filter():
+    """开放需求的查询条件：状态列表按字面量渲染（而非绑定参数），数据库才能使用开放需求部分索引"""
+    return Demand.status.in_(bindparam(
+        "open_statuses", list(OPEN_DEMAND_STATUSES), expanding=True, literal_execute=True, type_=Demand.status.type
+    ))
+
+
+class _Postings:
+    """
+    一组倒排列表：行业标签 + 能力/场景标签 + 缺少标签的兜底集合（键为标签词典中的位）
+
+    同时按排序属性（供应商信用分 / 需求预算）维护降序列表，
+    并保存随机访问评分所需的少量属性，供阈值算法使用。
+    """
+
+    def __init__(self):
+        self.exact: Dict[int, Set[int]] = {}      # 行业标签（精确匹配）
+        self.keyword: Dict[int, Set[int]] = {}    # 能力/场景标签
+        self.untagged: Set[int] = set()           # 任一侧缺少标签，将得到默认分
+        self.missing_exact: Set[int] = set()      # 没有行业标签
+        self.entries: Dict[int, TagMasks] = {}
+        self.attributes: Dict[int, Any] = {}
+        self.ranked = SortedAttributeList()
+
+    def add(
+        self,
+        item_id: int,
+        masks: TagMasks,
+        sort_value: float = 0.0,
+        attributes: Any = None
+    ):
+        self.remove(item_id)
+
+        for tag in iter_bits(masks.industry):
+            self.exact.setdefault(tag, set()).add(item_id)
+        for tag in iter_bits(masks.keywords):
+            self.keyword.setdefault(tag, set()).add(item_id)
+        if not masks.industry or not masks.keywords:
+            self.untagged.add(item_id)
+        if not masks.industry:
+            self.missing_exact.add(item_id)
+
+        self.entries[item_id] = masks
+        self.attributes[item_id] = attributes
+        self.ranked.set(item_id, sort_value)
+
+    def remove(self, item_id: int):
+        masks = self.entries.pop(item_id, None)
+        if masks is None:
+            return
+
+        for tag in iter_bits(masks.industry):
+            self._discard(self.exact, tag, item_id)
+        for tag in iter_bits(masks.keywords):
+            self._discard(self.keyword, tag, item_id)
+        self.untagged.discard(item_id)
+        self.missing_exact.discard(item_id)
+        self.attributes.pop(item_id, None)
+        self.ranked.discard(item_id)
+
+    def clear(self):
+        self.exact.clear()
+        self.keyword.clear()
+        self.untagged.clear()
+        self.missing_exact.clear()
+        self.entries.clear()
+        self.attributes.clear()
+        self.ranked.clear()
+
+    def with_exact(self, mask: int) -> Set[int]:
+        """至少包含一个给定行业标签的记录"""
+        result: Set[int] = set()
+        for tag in iter_bits(mask):
+            result |= self.exact.get(tag, set())
+        return result
+
+    def candidates(
+        self,
+        masks: TagMasks,
+        fallback_limit: int,
+        min_count: int
+    ) -> Optional[Set[int]]:
+        """
+        查找至少共享一个标签（或标签间存在包含关系）的候选
+
+        Returns:
+            候选ID集合；查询侧没有任何标签时返回 None，表示所有记录得分相同，需全量评分
+        """
+        if not masks.industry and not masks.keywords:
+            return None
+
+        result = self.with_exact(masks.industry)
+
+        # 包含关系已在标签词典中预先计算，直接合并相关标签的倒排列表
+        for tag in iter_bits(masks.keywords | masks.related):
+            result |= self.keyword.get(tag, set())
+
+        # 缺少标签的记录会拿到默认中等分，按ID取有限数量作为兜底
+        fallback = self.untagged - result
+        if len(fallback) > fallback_limit:
+            fallback = heapq.nsmallest(fallback_limit, fallback)
+        result.update(fallback)
+
+        # 候选不足 top_k 时补齐，保证返回数量与全量评分一致
+        if len(result) < min_count:
+            rest = (item_id for item_id in self.entries if item_id not in result)
+            for item_id in rest:
+                result.add(item_id)
+                if len(result) >= min_count:
+                    break
+
+        return result
+
+    @staticmethod
+    def _discard(postings: Dict[int, Set[int]], key: int, item_id: int):
+        ids = postings.get(key)
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if not ids:
+            del postings[key]
+
+
+class TagIndex:
+    """供应商与开放需求的标签倒排索引"""
+
+    def __init__(self, fallback_limit: int = 50, dictionary: TagDictionary = tag_dictionary):
+        self.fallback_limit = fallback_limit
+        self.dictionary = dictionary
+        self._vendors = _Postings()
+        self._demands = _Postings()
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def ensure_loaded(self, db: Session, vendors: Iterable[Any]):
+        """首次使用时构建索引"""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.rebuild(db, vendors)
+
+    def rebuild(self, db: Session, vendors: Iterable[Any]):
+        """
+        全量重建索引
+
+        Args:
+            db: 数据库会话（读取开放需求）
+            vendors: 已认证供应商的档案（取自供应商快照，不再查询企业表）
+        """
+        demand_rows = db.query(
+            Demand.id, Demand.industry_tags, Demand.scenario_tags, Demand.budget_max, Demand.updated_at
+        ).filter(
+            open_demand_filter()
+        ).all()
+
+        with self._lock:
+            self._vendors.clear()
+            self._demands.clear()
+            for vendor in vendors:
+                self._put_vendor(vendor)
+            for demand_id, industry_tags, scenario_tags, budget_max, updated_at in demand_rows:
+                self._demands.add(
+                    demand_id, self.dictionary.masks(industry_tags, scenario_tags), budget_max or 0.0, updated_at
+                )
+            self._loaded = True
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    @contextmanager
+    def locked(self):
+        """在持有索引锁期间遍历有序列表，避免并发修改"""
+        with self._lock:
+            yield self
+
+    def invalidate(self):
+        """丢弃索引，下次使用时重建"""
+        with self._lock:
+            self._loaded = False
+
+    # ---- 增量维护 ----
+
+    def index_vendor(self, enterprise: Enterprise):
+        """企业创建/更新/审核后更新索引；不再满足条件的供应商会被移除"""
+        if not self._loaded:
+            return
+        with self._lock:
+            if is_indexable_vendor(enterprise):
+                self._vendors.add(
+                    enterprise.id, self.dictionary.masks(enterprise.industry_tags, enterprise.ai_capabilities),
+                    enterprise.credit_score or 0.0, (is_local_address(enterprise.address), enterprise.updated_at)
+                )
+            else:
+                self._vendors.remove(enterprise.id)
+
+    def index_vendor_profile(self, profile: Any):
+        """按供应商档案更新索引（其他进程发布了新版本的供应商快照）"""
+        if not self._loaded:
+            return
+        with self._lock:
+            self._put_vendor(profile)
+
+    def _put_vendor(self, profile: Any):
+        self._vendors.add(
+            profile.id, self.dictionary.masks(profile.industry_tags, profile.ai_capabilities),
+            profile.credit_score or 0.0, (profile.geo_local, profile.updated_at)
+        )
+
+    def remove_vendor(self, enterprise_id: int):
+        if not self._loaded:
+            return
+        with self._lock:
+            self._vendors.remove(enterprise_id)
+
+    def index_demand(self, demand: Demand):
+        """需求创建/更新/状态变化后更新索引；非开放状态的需求会被移除"""
+        if not self._loaded:
+            return
+        with self._lock:
+            if is_open_demand(demand):
+                self._demands.add(
+                    demand.id, self.dictionary.masks(demand.industry_tags, demand.scenario_tags),
+                    demand.budget_max or 0.0, demand.updated_at
+                )
+            else:
+                self._demands.remove(demand.id)
+
+    def remove_demand(self, demand_id: int):
+        if not self._loaded:
+            return
+        with self._lock:
+            self._demands.remove(demand_id)
+
+    # ---- 候选生成 ----
+
+    def vendor_candidates(
+        self,
+        industry_tags: List[str],
+        scenario_tags: List[str],
+        min_count: int = 0
+    ) -> Optional[Set[int]]:
+        """为需求查找候选供应商ID（None 表示需全量评分）"""
+        masks = self.dictionary.masks(industry_tags, scenario_tags)
+        with self._lock:
+            return self._vendors.candidates(masks, self.fallback_limit, min_count)
+
+    def vendors_with_keywords(self, scenario_tags: List[str]) -> Set[int]:
+        """能力标签与给定场景标签重合（或存在包含关系）的供应商ID"""
+        masks = self.dictionary.masks([], scenario_tags)
+        with self._lock:
+            result: Set[int] = set()
+            for tag in iter_bits(masks.keywords | masks.related):
+                result |= self._vendors.keyword.get(tag, set())
+            return result
+
+    def top_vendor_candidates(
+        self,
+        candidate_ids: Iterable[int],
+        industry_tags: List[str],
+        scenario_tags: List[str],
+        limit: int
+    ) -> List[int]:
+        """
+        候选过多时按标签重合度取前 limit 个：行业命中 > 共享能力标签数 > 存在包含关系 > 信用分
+        """
+        masks = self.dictionary.masks(industry_tags, scenario_tags)
+        with self._lock:
+            entries = self._vendors.entries
+            ranked = self._vendors.ranked
+
+            def overlap(vendor_id: int) -> tuple:
+                vendor_masks = entries.get(vendor_id)
+                if vendor_masks is None:
+                    return (False, -1, False, 0.0, -vendor_id)
+                return (
+                    bool(masks.industry & vendor_masks.industry),
+                    popcount(masks.keywords & vendor_masks.keywords),
+                    bool(masks.related & vendor_masks.keywords),
+                    ranked.get(vendor_id) or 0.0,
+                    -vendor_id
+                )
+
+            return heapq.nlargest(limit, candidate_ids, key=overlap)
+
+    def demand_candidates(
+        self,
+        industry_tags: List[str],
+        capabilities: List[str],
+        min_count: int = 0
+    ) -> Optional[Set[int]]:
+        """为供应商查找候选开放需求ID（None 表示需全量评分）"""
+        masks = self.dictionary.masks(industry_tags, capabilities)
+        with self._lock:
+            return self._demands.candidates(masks, self.fallback_limit, min_count)
+
+    # ---- 阈值算法所需的有序访问与随机访问（调用方需持有 locked()） ----
+
+    def vendors_by_credit(self) -> Iterator[Tuple[int, float]]:
+        """供应商按信用分降序"""
+        return self._vendors.ranked.iter_desc()
+
+    def demands_by_budget(self) -> Iterator[Tuple[int, float]]:
+        """开放需求按预算上限降序（预算档位随预算单调不减）"""
+        return self._demands.ranked.iter_desc()
+
+    def vendors_with_industry(self, industry_mask: int) -> Set[int]:
+        return self._vendors.with_exact(industry_mask)
+
+    def vendors_missing_industry(self) -> Set[int]:
+        return self._vendors.missing_exact
+
+    def demands_with_industry(self, industry_mask: int) -> Set[int]:
+        return self._demands.with_exact(industry_mask)
+
+    def demands_missing_industry(self) -> Set[int]:
+        return self._demands.missing_exact
+
+    def vendor_profile(self, vendor_id: int) -> Optional[Tuple[TagMasks, float, bool, Any]]:
+        """供应商 (标签位图, 信用分, 是否本地, 版本)"""
+        masks = self._vendors.entries.get(vendor_id)
+        if masks is None:
+            return None
+        geo_local, version = self._vendors.attributes[vendor_id]
+        return masks, self._vendors.ranked.get(vendor_id), geo_local, version
+
+    def demand_profile(self, demand_id: int) -> Optional[Tuple[TagMasks, float, Any]]:
+        """开放需求 (标签位图, 预算上限, 版本)"""
+        masks = self._demands.entries.get(demand_id)
+        if masks is None:
+            return None
+        return masks, self._demands.ranked.get(demand_id), self._demands.attributes[demand_id]
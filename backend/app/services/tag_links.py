@@ -0,0 +1,141 @@
+"""
+标签关联表
+需求的行业/场景标签、企业的行业标签/AI能力按规范标签同步到 demand_tags / enterprise_tags，
+列表接口的标签筛选通过 (tag_id, owner_id) 索引连接完成，不再读取 JSON 列
+"""
+from typing import Dict, Iterable, List, Optional
+import time
+from sqlalchemy import event, func, select, false
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from ..models import Demand, Enterprise, DemandTag, EnterpriseTag
+from .tag_dictionary import TAG_COLUMNS, tag_dictionary
+
+# 模型 -> (关联表, 关联表中的主体ID列)
+TAG_LINKS = {
+    Demand: (DemandTag.__table__, "demand_id"),
+    Enterprise: (EnterpriseTag.__table__, "enterprise_id"),
+}
+
+
+def tag_names(target) -> List[str]:
+    """需求/企业的全部标签（行业标签 + 场景标签 / AI能力）"""
+    names = []
+    for column in TAG_COLUMNS[type(target)]:
+        names.extend(getattr(target, column) or [])
+    return names
+
+
+def tag_filter(db: Session, model, names: Optional[Iterable[str]], mode: str = "and"):
+    """
+    按标签筛选的查询条件（同义词按同一标签处理）
+
+    Args:
+        db: 数据库会话
+        model: Demand 或 Enterprise
+        names: 标签列表，为空时不筛选
+        mode: and：包含全部标签；or：包含任一标签
+
+    Returns:
+        查询条件；names 为空时返回 None
+    """
+    names = [name for name in names or [] if str(name).strip()]
+    if not names:
+        return None
+
+    table, owner_column = TAG_LINKS[model]
+    ids = tag_dictionary.lookup_ids(db, names)
+    if mode == "and" and None in ids:
+        # 词典中没有的标签不可能被任何记录包含
+        return false()
+    tag_ids = sorted({tag_id for tag_id in ids if tag_id is not None})
+    if not tag_ids:
+        return false()
+
+    owners = select(table.c[owner_column]).where(table.c.tag_id.in_(tag_ids))
+    if mode == "and" and len(tag_ids) > 1:
+        owners = owners.group_by(table.c[owner_column]).having(func.count() == len(tag_ids))
+    return model.id.in_(owners)
+
+
+def sync_tag_links(db: Session, batch_size: int = 1000) -> Dict[str, float]:
+    """
+    按当前标签字段重建全部关联行（回填已有数据）
+
+    Args:
+        db: 数据库会话
+        batch_size: 每个事务处理的记录数
+
+    Returns:
+        {表名: 处理的记录数, "elapsed_seconds": 耗时}
+    """
+    started = time.time()
+    summary = {}
+    for model, (table, owner_column) in TAG_LINKS.items():
+        columns = [getattr(model, column) for column in TAG_COLUMNS[model]]
+        done = 0
+        last_id = 0
+        while True:
+            rows = db.query(model.id, *columns).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            names = {row.id: [name for values in row[1:] for name in values or []] for row in rows}
+            tag_dictionary.register(db, [name for row_names in names.values() for name in row_names])
+            links = {owner_id: tag_dictionary.tag_ids(row_names) for owner_id, row_names in names.items()}
+            connection = db.connection()
+            connection.execute(table.delete().where(table.c[owner_column].in_(list(links))))
+            _insert_links(connection, table, owner_column, links)
+            db.commit()
+
+            done += len(rows)
+            last_id = rows[-1].id
+        summary[table.name] = done
+    summary["elapsed_seconds"] = round(time.time() - started, 3)
+    return summary
+
+
+def _insert_links(connection, table, owner_column: str, links: Dict[int, List[int]]):
+    rows = [
+        {owner_column: owner_id, "tag_id": tag_id}
+        for owner_id, tag_ids in links.items()
+        for tag_id in set(tag_ids)
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+# ---- 写入时同步 ----
+
+def _sync_links(connection, target, replace: bool = True):
+    table, owner_column = TAG_LINKS[type(target)]
+    if replace:
+        connection.execute(table.delete().where(table.c[owner_column] == target.id))
+    # 标签已在 flush 前登记到词典表（见 tag_dictionary），超长等未入库的标签不建立关联
+    _insert_links(connection, table, owner_column, {target.id: tag_dictionary.tag_ids(tag_names(target))})
+
+
+def _tags_changed(target) -> bool:
+    attrs = sa_inspect(target).attrs
+    return any(attrs[column].history.has_changes() for column in TAG_COLUMNS[type(target)])
+
+
+def _links_inserted(mapper, connection, target):
+    _sync_links(connection, target, replace=False)
+
+
+def _links_updated(mapper, connection, target):
+    if _tags_changed(target):
+        _sync_links(connection, target)
+
+
+def _links_deleted(mapper, connection, target):
+    table, owner_column = TAG_LINKS[type(target)]
+    connection.execute(table.delete().where(table.c[owner_column] == target.id))
+
+
+for _model in TAG_LINKS:
+    event.listen(_model, "after_insert", _links_inserted)
+    event.listen(_model, "after_update", _links_updated)
+    event.listen(_model, "after_delete", _links_deleted)
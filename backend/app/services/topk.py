@@ -0,0 +1,157 @@
+"""
+Top-K 检索
+按维度维护的有序列表 + Fagin 阈值算法（TA），在剩余候选不可能进入前 K 名时提前终止
+"""
+from typing import Dict, List, Tuple, Iterable, Iterator, Callable, Optional
+import bisect
+import heapq
+
+
+class SortedAttributeList:
+    """按属性值降序维护的ID列表，支持增量插入/删除、有序访问和随机访问"""
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []  # (-value, id) 升序，即 value 降序
+        self._values: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._values
+
+    def get(self, item_id: int) -> Optional[float]:
+        return self._values.get(item_id)
+
+    def set(self, item_id: int, value: float):
+        self.discard(item_id)
+        self._values[item_id] = value
+        bisect.insort(self._keys, (-value, item_id))
+
+    def discard(self, item_id: int):
+        value = self._values.pop(item_id, None)
+        if value is None:
+            return
+        pos = bisect.bisect_left(self._keys, (-value, item_id))
+        if pos < len(self._keys) and self._keys[pos] == (-value, item_id):
+            del self._keys[pos]
+
+    def clear(self):
+        self._keys.clear()
+        self._values.clear()
+
+    def iter_desc(self) -> Iterator[Tuple[int, float]]:
+        """按值降序遍历 (id, value)"""
+        for neg_value, item_id in self._keys:
+            yield item_id, -neg_value
+
+
+class SortedAccess:
+    """
+    一个评分维度的有序访问流
+
+    Args:
+        items: 按加权贡献值非递增顺序产出的 (id, contribution)
+        floor: 未被该流产出的记录在此维度上贡献值的上界
+        complete: 是否覆盖全部记录；完整流遍历结束即说明所有记录都已见过
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, float]], floor: float = 0.0, complete: bool = False):
+        self._items = iter(items)
+        self.floor = floor
+        self.complete = complete
+        self.exhausted = False
+
+    def next(self) -> Optional[Tuple[int, float]]:
+        if self.exhausted:
+            return None
+        item = next(self._items, None)
+        if item is None:
+            self.exhausted = True
+        return item
+
+
+def display_score(score: float) -> float:
+    """展示分数：百分制保留两位小数，与匹配结果中的 score 一致"""
+    return round(score * 100, 2)
+
+
+def rank_key(score: float, item_id: int) -> Tuple[float, int]:
+    """
+    排名的排序键：展示分数降序，展示分数相同时 ID 升序
+
+    阈值检索、全量评分、批量匹配与推荐表使用同一排序，展示分数相同的记录在各路径中的先后一致。
+    """
+    return -display_score(score), item_id
+
+
+def threshold_top_k(
+    k: int,
+    streams: List[SortedAccess],
+    random_access: Callable[[int], Optional[float]],
+    constant_bound: float = 0.0
+) -> List[Tuple[float, int]]:
+    """
+    Fagin 阈值算法
+
+    轮流从各维度流中做有序访问，对新出现的记录做随机访问计算完整得分，
+    用大小为 k 的最小堆保存当前前 k 名（按 rank_key 排序）。当堆中最低的展示分数高于阈值
+    （各流最近一次访问的贡献值之和 + 无有序列表维度的上界）的展示分数时，
+    剩余记录不可能再进入前 k 名，提前终止；展示分数相同时剩余记录可能因 ID 更小而排在前面，
+    因此相等时继续访问。内存占用为 O(k)。
+
+    Args:
+        k: 返回数量
+        streams: 各维度有序访问流，至少包含一个完整流
+        random_access: 计算记录完整得分；记录已失效时返回 None
+        constant_bound: 没有有序列表的维度贡献值上界之和
+
+    Returns:
+        [(score, id)]，按 rank_key 排列
+    """
+    if k <= 0 or not streams:
+        return []
+
+    heap: List[Tuple[float, int, float, int]] = []  # (展示分数, -id, score, id)，堆顶为当前最差者
+    in_heap = set()
+    last = [None] * len(streams)
+
+    while True:
+        progressed = False
+        all_seen = False
+
+        for i, stream in enumerate(streams):
+            item = stream.next()
+            if item is None:
+                last[i] = stream.floor
+                if stream.complete:
+                    all_seen = True
+                continue
+
+            progressed = True
+            item_id, contribution = item
+            last[i] = contribution
+            if item_id in in_heap:
+                continue
+
+            score = random_access(item_id)
+            if score is None:
+                continue
+
+            entry = (display_score(score), -item_id, score, item_id)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+                in_heap.add(item_id)
+            elif entry > heap[0]:
+                evicted = heapq.heapreplace(heap, entry)[3]
+                in_heap.discard(evicted)
+                in_heap.add(item_id)
+
+        if all_seen or not progressed:
+            break
+
+        threshold = constant_bound + sum(last)
+        if len(heap) >= k and heap[0][0] > display_score(threshold):
+            break
+
+    return [(score, item_id) for _, _, score, item_id in sorted(heap, reverse=True)]
@@ -0,0 +1,259 @@
+"""
+供应商档案快照
+进程内只保存匹配所需的少量字段（ID、编码、名称、标签、信用分、是否本地、联系邮箱），
+不加载成功案例、能力详情、资质等大字段。快照启动时加载一次，之后由 Enterprise 的
+ORM 事件（after_insert / after_update / after_delete）在事务提交后同步，匹配请求不再查询供应商表。
+多进程部署时快照整体取自共享的供应商特征文件（见 feature_store）。
+
+注意：批量 UPDATE（query.update）不触发 ORM 事件，修改供应商字段需通过 ORM 对象。
+"""
+from typing import Dict, List, Optional, Iterable, Any, Tuple, Callable
+from datetime import datetime
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..models import Enterprise, EnterpriseStatus
+from .tag_index import VENDOR_TYPES, is_indexable_vendor, is_local_address
+
+
+# 会话中待提交的快照变更（供应商ID -> 档案，None 表示移除）
+_PENDING_KEY = "vendor_snapshot_changes"
+
+
+class VendorProfile:
+    """供应商精简档案"""
+
+    __slots__ = (
+        "id", "eid", "name", "industry_tags", "ai_capabilities",
+        "credit_score", "geo_local", "contact_email", "updated_at"
+    )
+
+    def __init__(
+        self,
+        id: int,
+        eid: str,
+        name: str,
+        industry_tags: Optional[List[str]],
+        ai_capabilities: Optional[List[str]],
+        credit_score: Optional[float],
+        geo_local: bool,
+        contact_email: Optional[str],
+        updated_at: Optional[datetime]
+    ):
+        self.id = id
+        self.eid = eid
+        self.name = name
+        self.industry_tags = industry_tags or []
+        self.ai_capabilities = ai_capabilities or []
+        self.credit_score = credit_score if credit_score is not None else 0.0
+        self.geo_local = geo_local
+        self.contact_email = contact_email
+        self.updated_at = updated_at  # 分数缓存的版本
+
+    @classmethod
+    def from_enterprise(cls, enterprise: Any) -> "VendorProfile":
+        if isinstance(enterprise, cls):
+            return enterprise
+        return cls(
+            enterprise.id,
+            enterprise.eid,
+            enterprise.name,
+            list(enterprise.industry_tags or []),
+            list(enterprise.ai_capabilities or []),
+            enterprise.credit_score,
+            is_local_address(enterprise.address),
+            enterprise.contact_email,
+            getattr(enterprise, "updated_at", None)
+        )
+
+    def __repr__(self) -> str:
+        return f"VendorProfile(id={self.id}, name={self.name!r})"
+
+
+def load_profiles(db: Session) -> List[VendorProfile]:
+    """从数据库读取全部已认证供应商的档案（只查询匹配所需的列，按ID升序）"""
+    rows = db.query(
+        Enterprise.id, Enterprise.eid, Enterprise.name,
+        Enterprise.industry_tags, Enterprise.ai_capabilities, Enterprise.credit_score,
+        Enterprise.address, Enterprise.contact_email, Enterprise.updated_at
+    ).filter(
+        Enterprise.enterprise_type.in_(VENDOR_TYPES),
+        Enterprise.status == EnterpriseStatus.VERIFIED
+    ).all()
+    # 在内存中排序：SQL 中按ID排序会使规划器放弃 (status, enterprise_type) 索引改为全表扫描
+    return [
+        VendorProfile(
+            row.id, row.eid, row.name, row.industry_tags, row.ai_capabilities,
+            row.credit_score, is_local_address(row.address), row.contact_email, row.updated_at
+        )
+        for row in sorted(rows, key=lambda row: row.id)
+    ]
+
+
+class VendorSnapshot:
+    """
+    已认证供应商的进程内档案快照
+
+    快照整体来自数据库或已发布的特征文件版本；本进程提交的变更立即生效，
+    并保留到包含它们的新版本被加载为止，避免切换到较旧的版本时丢失。
+    """
+
+    def __init__(self):
+        self._profiles: Dict[int, VendorProfile] = {}
+        self._ordered: Optional[List[VendorProfile]] = None
+        self._local: Dict[int, Tuple[float, Optional[VendorProfile]]] = {}  # 本进程提交的变更 (提交时间, 档案)
+        self._loaded = False
+        self._lock = threading.RLock()
+        self.version: Optional[str] = None  # 已加载的特征文件版本，从数据库加载时为 None
+        self.on_change: Optional[Callable[[], None]] = None  # 本进程提交供应商变更后的回调
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def has_local_changes(self) -> bool:
+        """是否有尚未包含在已加载版本中的本进程变更"""
+        return bool(self._local)
+
+    def ensure_loaded(self, db: Session):
+        """首次使用时从数据库加载快照"""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load(db)
+
+    def load(self, db: Session):
+        """从数据库加载全部已认证供应商"""
+        built_at = time.time()
+        self.replace(load_profiles(db), None, built_at)
+
+    def replace(
+        self,
+        profiles: List[VendorProfile],
+        version: Optional[str],
+        built_at: float
+    ) -> Tuple[List[VendorProfile], List[int]]:
+        """
+        整体替换快照
+
+        Args:
+            profiles: 新的全部档案
+            version: 特征文件版本（从数据库加载时为 None）
+            built_at: 档案读取数据库的时间，此前提交的本进程变更已包含在内
+
+        Returns:
+            (新增或变化的档案, 被移除的供应商ID)
+        """
+        with self._lock:
+            profiles_by_id = {p.id: p for p in profiles}
+            self._local = {
+                vendor_id: entry for vendor_id, entry in self._local.items() if entry[0] >= built_at
+            }
+            for vendor_id, (_, profile) in self._local.items():
+                if profile is None:
+                    profiles_by_id.pop(vendor_id, None)
+                else:
+                    profiles_by_id[vendor_id] = profile
+
+            old = self._profiles
+            changed = [
+                p for vendor_id, p in profiles_by_id.items()
+                if vendor_id not in old or old[vendor_id].updated_at != p.updated_at
+            ]
+            removed = [vendor_id for vendor_id in old if vendor_id not in profiles_by_id]
+
+            self._profiles = profiles_by_id
+            self._ordered = None
+            self.version = version
+            self._loaded = True
+            return changed, removed
+
+    def invalidate(self):
+        """丢弃快照，下次使用时重新加载"""
+        with self._lock:
+            self._loaded = False
+    # ---- 读取 ----
+
+    def get(self, vendor_id: int) -> Optional[VendorProfile]:
+        return self._profiles.get(vendor_id)
+
+    def get_many(self, vendor_ids: Iterable[int]) -> Dict[int, VendorProfile]:
+        """按ID取档案；不在快照中的ID（未认证或已删除）被忽略"""
+        profiles = self._profiles
+        return {vendor_id: profiles[vendor_id] for vendor_id in vendor_ids if vendor_id in profiles}
+
+    def profiles(self, vendor_ids: Optional[Iterable[int]] = None) -> List[VendorProfile]:
+        """按ID升序返回全部或指定的供应商档案"""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = [self._profiles[i] for i in sorted(self._profiles)]
+            ordered = self._ordered
+        if vendor_ids is None:
+            return ordered
+        wanted = set(vendor_ids)
+        return [profile for profile in ordered if profile.id in wanted]
+
+    # ---- 同步 ----
+
+    def apply(self, changes: Dict[int, Optional[VendorProfile]]):
+        """应用一个已提交事务中的供应商变更"""
+        committed_at = time.time()
+        with self._lock:
+            for vendor_id, profile in changes.items():
+                self._local[vendor_id] = (committed_at, profile)
+                if profile is None:
+                    self._profiles.pop(vendor_id, None)
+                else:
+                    self._profiles[vendor_id] = profile
+            self._ordered = None
+        if self.on_change is not None:
+            self.on_change()
+
+
+# 全局供应商快照实例
+vendor_snapshot = VendorSnapshot()
+
+
+def _record_change(target: Enterprise, deleted: bool = False):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    changes = session.info.setdefault(_PENDING_KEY, {})
+    if deleted or not is_indexable_vendor(target):
+        changes[target.id] = None
+    else:
+        # 在 flush 时取值，提交后对象属性会过期
+        changes[target.id] = VendorProfile.from_enterprise(target)
+
+
+@event.listens_for(Enterprise, "after_insert")
+def _vendor_inserted(mapper, connection, target):
+    _record_change(target)
+
+
+@event.listens_for(Enterprise, "after_update")
+def _vendor_updated(mapper, connection, target):
+    _record_change(target)
+
+
+@event.listens_for(Enterprise, "after_delete")
+def _vendor_deleted(mapper, connection, target):
+    _record_change(target, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_vendors(session: Session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        vendor_snapshot.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_vendors(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,24 @@
+"""
+标签关联表回填脚本
+按需求、企业当前的标签字段重建 demand_tags / enterprise_tags（可重复执行）
+"""
+import argparse
+from app.core.database import SessionLocal
+from app.services.tag_links import sync_tag_links
+
+
+def backfill_tag_links(batch_size: int):
+    """回填标签关联表"""
+    db = SessionLocal()
+    try:
+        print("开始回填标签关联表...")
+        summary = sync_tag_links(db, batch_size=batch_size)
+        print(f"✅ 需求 {summary['demand_tags']} 个，企业 {summary['enterprise_tags']} 个，耗时 {summary['elapsed_seconds']} 秒")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回填标签关联表")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每个事务处理的记录数")
+    backfill_tag_links(parser.parse_args().batch_size)
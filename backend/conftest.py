@@ -0,0 +1,57 @@
+"""
+测试公共夹具
+迁移创建的临时数据库、不共享全局状态的匹配服务，以及全局供应商快照的保存与还原
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.migrations import upgrade_database
+from app.services.feature_store import VendorFeatureStore
+from app.services.matching_service import MatchingService
+from app.services.recommendation_store import RecommendationStore
+from app.services.score_cache import ScoreCache
+from app.services.semantic_index import SemanticIndex
+from app.services.vendor_snapshot import VendorSnapshot, vendor_snapshot
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    """用 Alembic 迁移到最新版本的临时 SQLite 数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    upgrade_database(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_sessions(migrated_engine):
+    """临时数据库的会话工厂"""
+    return sessionmaker(bind=migrated_engine, autoflush=False)
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    """
+    创建不共享全局快照、语义索引、特征文件与推荐表的匹配服务，默认不读写分数缓存
+
+    同一个测试中创建的服务共用一个语义索引文件；需要特征文件或分数缓存的测试替换对应属性
+    """
+    def make() -> MatchingService:
+        service = MatchingService()
+        service.feature_store = VendorFeatureStore("")
+        service.vendor_snapshot = VendorSnapshot()
+        service.semantic_index = SemanticIndex(str(tmp_path / "semantic.joblib"))
+        service.recommendations = RecommendationStore(service)
+        service.score_cache = ScoreCache(enabled=False)
+        return service
+
+    return make
+
+
+@pytest.fixture
+def preserved_vendor_snapshot():
+    """经 ORM 写入企业时全局快照随之更新：测试结束后还原，测试期间不触发特征文件发布"""
+    saved_state = dict(vendor_snapshot.__dict__)
+    vendor_snapshot.on_change = None
+    yield vendor_snapshot
+    vendor_snapshot.__dict__.update(saved_state)
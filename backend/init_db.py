@@ -1,9 +1,11 @@
 """
 数据库初始化脚本 - 创建示例数据
 """
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal
+from app.core.migrations import upgrade_database
 from app.core.security import get_password_hash
 from app.models import Enterprise, User, Demand
+from app.services import tag_links  # noqa: F401  写入示例数据时同步标签关联表
 from app.models.enterprise import EnterpriseType, EnterpriseStatus
 from app.models.user import UserRole
 from app.models.demand import DemandStatus, ConfidentialityLevel
@@ -21,8 +23,8 @@ def generate_eid() -> str:
 
 def init_database():
     """初始化数据库并插入示例数据"""
-    print("创建数据库表...")
-    Base.metadata.create_all(bind=engine)
+    print("升级数据库到最新版本...")
+    upgrade_database()
     
     db = SessionLocal()
     
@@ -0,0 +1,130 @@
+"""
+异步数据库测试
+验证同步连接串到异步驱动的映射，并在迁移创建的临时数据库上经 get_async_db 完成写入与读取，
+以及异步详情接口（企业、需求）的权限检查
+"""
+import os
+import sys
+import asyncio
+import tempfile
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from app.api import demands, enterprises
+from app.core import async_database, create_access_token, get_async_db
+from app.core.async_database import async_database_url, dispose_async_engine
+from app.core.config import settings
+from app.core.migrations import upgrade_database
+from app.models import Demand, Enterprise, User, UserRole
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./ai_platform.db") == "sqlite+aiosqlite:///./ai_platform.db"
+    assert async_database_url("postgresql://app:secret@db:5432/platform") == (
+        "postgresql+asyncpg://app:secret@db:5432/platform"
+    )
+    try:
+        async_database_url("mysql://app@db/platform")
+        raise AssertionError("不支持的数据库应提示设置 DATABASE_ASYNC_URL")
+    except ValueError:
+        pass
+
+    # 显式配置的异步连接串优先
+    configured = settings.DATABASE_ASYNC_URL
+    settings.DATABASE_ASYNC_URL = "postgresql+psycopg://app@db/platform"
+    try:
+        assert async_database_url() == "postgresql+psycopg://app@db/platform"
+        assert async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    finally:
+        settings.DATABASE_ASYNC_URL = configured
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {"id": 1, "eid": "EID-1", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED},
+            {"id": 2, "eid": "EID-2", "name": "其他企业", "enterprise_type": EnterpriseType.SUPPLY,
+             "status": EnterpriseStatus.VERIFIED},
+        ])
+        connection.execute(insert(User), [
+            {"id": 1, "email": "demand@test.com", "hashed_password": "-", "role": UserRole.DEMAND, "enterprise_id": 1},
+        ])
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id), "user_id": user_id})}
+
+
+async def round_trip():
+    """经依赖注入的异步会话写入，再用新的会话读回"""
+    async def session_for(method: str):
+        dependency = get_async_db(Request({"type": "http", "method": method, "headers": []}))
+        return dependency, await dependency.__anext__()
+
+    dependency, db = await session_for("POST")
+    db.add(Demand(
+        id=1, enterprise_id=1, title="异步会话写入的需求", description="经 get_async_db 写入后重新读取",
+        status=DemandStatus.DRAFT, confidentiality=ConfidentialityLevel.PUBLIC, required_certifications=[]
+    ))
+    await db.commit()
+    await dependency.aclose()
+
+    dependency, db = await session_for("GET")
+    demand = await db.get(Demand, 1)
+    assert demand is not None and demand.title == "异步会话写入的需求"
+    await dependency.aclose()
+
+
+def test_async_session_round_trip():
+    state = (
+        settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+        async_database._async_sessions, async_database._async_read_sessions
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "async.db")
+        engine = create_engine(f"sqlite:///{path}")
+        upgrade_database(bind=engine)
+        seed(engine)
+        engine.dispose()
+
+        # 首次使用时按 DATABASE_ASYNC_URL 创建临时数据库的异步引擎
+        settings.DATABASE_ASYNC_URL = async_database_url(f"sqlite:///{path}")
+        async_database._async_engine = None
+        async_database._async_replica_engines = []
+        try:
+            asyncio.run(round_trip())
+            assert async_database.get_async_engine().dialect.driver == "aiosqlite"
+
+            app = FastAPI()
+            app.include_router(enterprises.router)
+            app.include_router(demands.router)
+            with TestClient(app) as client:
+                response = client.get("/enterprises/1", headers=auth(1))
+                assert response.status_code == 200, response.text
+                assert response.json()["name"] == "需求方"
+                assert client.get("/enterprises/2", headers=auth(1)).status_code == 403
+                assert client.get("/enterprises/99", headers=auth(1)).status_code == 404
+
+                response = client.get("/demands/1", headers=auth(1))
+                assert response.status_code == 200, response.text
+                assert response.json()["title"] == "异步会话写入的需求"
+        finally:
+            asyncio.run(dispose_async_engine())
+            (
+                settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+                async_database._async_sessions, async_database._async_read_sessions
+            ) = state
+    print("✅ 异步会话经 aiosqlite 写入并读回，异步详情接口检查权限")
+
+
+if __name__ == "__main__":
+    try:
+        test_async_database_url()
+        test_async_session_round_trip()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
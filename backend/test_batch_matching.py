@@ -0,0 +1,118 @@
+"""
+批量匹配一致性测试
+用 Alembic 迁移创建临时数据库，验证批量匹配写回的结果（含硬性要求过滤与重排阶段）
+与单个需求的匹配结果（读取推荐表 / 实时匹配流水线）完全一致
+"""
+import sys
+import random
+import pytest
+from sqlalchemy import insert
+from app.models import Demand, DemandMatch, Enterprise
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.batch_matching import BatchMatcher
+from app.services.match_pipeline import Reranker, ThresholdRetrievalStage, SEMANTIC_COLUMN
+from app.services.matching_service import MatchingService
+from app.services.recommendation_store import demand_match_data
+
+CAPABILITIES = ["视觉检测", "缺陷识别", "目标检测", "自然语言处理", "语音识别", "推荐系统"]
+VENDOR_IDS = range(1, 16)
+DEMAND_IDS = range(1, 9)
+TOP_K = 3
+
+
+class ParityReranker(Reranker):
+    """确定性的测试重排器：偶数ID供应商的语义维度减半"""
+
+    name = "parity"
+
+    def rerank(self, demand_data, vendors, components):
+        for i, vendor in enumerate(vendors):
+            if vendor.id % 2 == 0:
+                components[i, SEMANTIC_COLUMN] /= 2
+        return components
+
+
+def seed(engine):
+    rng = random.Random(11)
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"供应商{i}",
+                "enterprise_type": EnterpriseType.SUPPLY, "status": EnterpriseStatus.VERIFIED,
+                # 全部供应商共享行业标签，候选检索阶段不剪枝，实时流水线与全量评分可比
+                "industry_tags": ["制造业"], "ai_capabilities": rng.sample(CAPABILITIES, 2),
+                "credit_score": float(rng.choice([60, 70, 80, 85, 90, 95])),
+                "address": rng.choice(["重庆市渝北区", "四川省成都市"])
+            }
+            for i in VENDOR_IDS
+        ] + [
+            {
+                "id": 100, "eid": "EID-100", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+                "status": EnterpriseStatus.VERIFIED, "industry_tags": [], "ai_capabilities": [],
+                "credit_score": 0, "address": None
+            }
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": 100, "title": f"需求{i}",
+                "description": "、".join(rng.sample(CAPABILITIES, 2)),
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "industry_tags": ["制造业"], "scenario_tags": rng.sample(CAPABILITIES, 2),
+                "budget_max": rng.choice([50000, 200000, 800000]), "required_certifications": [],
+                # 部分需求有最低信用分要求
+                "min_vendor_credit": 85 if i % 3 == 0 else None
+            }
+            for i in DEMAND_IDS
+        ])
+
+
+def with_parity_reranker(service: MatchingService) -> MatchingService:
+    """启用测试重排器"""
+    rerank = service.pipeline.stages[-1]
+    rerank.reranker, rerank.budget_ms = ParityReranker(), 0
+    # 与 from_settings 相同：阈值检索只需检索出重排阶段要处理的数量
+    for stage in service.pipeline.stages:
+        if isinstance(stage, ThresholdRetrievalStage):
+            stage.cap = rerank.cap
+    return service
+
+
+def ranking(results: list) -> list:
+    return [(match["vendor_id"], match["score"]) for match in results]
+
+
+def test_batch_matches_single_demand(migrated_engine, db_sessions, make_service):
+    seed(migrated_engine)
+    db = db_sessions()
+    service = with_parity_reranker(make_service())
+    batcher = BatchMatcher(service, workers=1, chunk_size=3, write_size=4)
+    try:
+        demands = batcher.select_demands(db, statuses=[DemandStatus.SUBMITTED])
+        summary = batcher.rematch(db, demands, TOP_K)
+        assert summary["matched"] == len(DEMAND_IDS) and summary["vendor_count"] == len(VENDOR_IDS)
+        # 请求中不构建推荐表，读取前先构建
+        service.recommendations.ensure_built(db)
+
+        for demand in db.query(Demand).order_by(Demand.id):
+            assert demand.status == DemandStatus.MATCHED
+            saved = [
+                (row.vendor_id, row.score)
+                for row in db.query(DemandMatch).filter(DemandMatch.demand_id == demand.id).order_by(DemandMatch.rank)
+            ]
+            assert len(saved) == TOP_K, demand.id
+            materialized, stale = service.recommendations.vendors_for_demand(db, demand, TOP_K)
+            assert not stale, demand.id
+            live = service.match_vendors(demand_match_data(demand), db, TOP_K)
+            assert saved == ranking(materialized), (demand.id, saved, ranking(materialized))
+            assert saved == ranking(live), (demand.id, saved, ranking(live))
+            if demand.min_vendor_credit:
+                credits = {v.id: v.credit_score for v in service.vendor_snapshot.profiles()}
+                assert all(credits[vendor_id] >= demand.min_vendor_credit for vendor_id, _ in saved)
+    finally:
+        db.close()
+    print("✅ 批量匹配结果与单个需求的匹配结果一致")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,126 @@
+"""
+数据集上传测试
+用 Alembic 迁移创建临时数据库，验证上传接口在线程池中执行（同步处理函数）、
+直接扫描接收上传时的临时文件生成 data_summary，以及超限与不支持的文件类型的错误响应
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import zipfile
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.api import demands
+from app.core import create_access_token, get_db
+from app.core.config import settings
+from app.core.migrations import upgrade_database
+from app.models import Demand, Enterprise, User, UserRole
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {"id": 1, "eid": "EID-1", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED},
+            {"id": 2, "eid": "EID-2", "name": "其他企业", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED},
+        ])
+        connection.execute(insert(Demand), [
+            {"id": 1, "enterprise_id": 1, "title": "产线视觉质检需求", "description": "利用计算机视觉检测零部件表面缺陷",
+             "status": DemandStatus.DRAFT, "confidentiality": ConfidentialityLevel.PUBLIC,
+             "required_certifications": []}
+        ])
+        connection.execute(insert(User), [
+            {"id": 1, "email": "demand@test.com", "hashed_password": "-", "role": UserRole.DEMAND, "enterprise_id": 1},
+            {"id": 2, "email": "other@test.com", "hashed_password": "-", "role": UserRole.DEMAND, "enterprise_id": 2},
+        ])
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id), "user_id": user_id})}
+
+
+def zip_bytes(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_upload_dataset():
+    # 处理函数为同步函数，由 FastAPI 在线程池中执行
+    assert not asyncio.iscoroutinefunction(demands.upload_dataset)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'upload.db')}", connect_args={"check_same_thread": False})
+        upgrade_database(bind=engine)
+        seed(engine)
+        sessions = sessionmaker(bind=engine, autoflush=False)
+
+        def override_db():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = FastAPI()
+        app.include_router(demands.router)
+        app.dependency_overrides[get_db] = override_db
+
+        def upload(name: str, content: bytes, user_id: int = 1, **params):
+            return client.post(
+                "/demands/1/dataset", headers=auth(user_id), params=params, files={"file": (name, content)}
+            )
+
+        max_bytes = settings.DATASET_UPLOAD_MAX_BYTES
+        try:
+            with TestClient(app) as client:
+                # 小于 Starlette 内存缓冲（1MB）的 CSV 同样可以 mmap 扫描
+                csv_content = "path,label\n" + "".join(f"img/{i}.jpg,{'cat' if i % 2 else ''}\n" for i in range(10))
+                response = upload("train.csv", csv_content.encode())
+                assert response.status_code == 200, response.text
+                summary = response.json()["data_summary"]
+                assert summary["counts"] == {"image": 10} and summary["labeled_ratio"] == 0.5, summary
+
+                # 超过内存缓冲、已落盘的 JSONL，与已有摘要合并
+                lines = [json.dumps({"text": "x" * 200, "label": "正面"}) for _ in range(8000)]
+                response = upload("reviews.jsonl", "\n".join(lines).encode(), merge=True)
+                assert response.status_code == 200, response.text
+                summary = response.json()["data_summary"]
+                assert summary["counts"] == {"image": 10, "jsonl": 8000}, summary
+
+                # 压缩包：ImageFolder 目录即类别
+                response = upload("images.zip", zip_bytes({"cat/1.jpg": b"1", "dog/2.png": b"2", "3.wav": b"3"}))
+                assert response.status_code == 200, response.text
+                assert response.json()["data_summary"]["counts"] == {"image": 2, "audio": 1}
+
+                assert upload("notes.docx", b"x").status_code == 400
+                assert upload("broken.zip", b"not a zip").status_code == 400
+                assert upload("train.csv", b"a\n1\n", user_id=2).status_code == 403
+
+                settings.DATASET_UPLOAD_MAX_BYTES = 10
+                assert upload("train.csv", csv_content.encode()).status_code == 413
+        finally:
+            settings.DATASET_UPLOAD_MAX_BYTES = max_bytes
+            engine.dispose()
+
+        with sessions() as db:
+            assert db.get(Demand, 1).data_summary["counts"] == {"image": 2, "audio": 1}
+    print("✅ 数据集上传在线程池中扫描临时文件并写入数据摘要")
+
+
+if __name__ == "__main__":
+    try:
+        test_upload_dataset()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
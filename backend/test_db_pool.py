@@ -0,0 +1,153 @@
+"""
+数据库连接池测试
+验证：引擎参数按配置生成（SQLite 文件库与 PostgreSQL 使用记录指标的连接池，PostgreSQL 设置语句超时）；
+连接池状态中的借出/空闲/溢出连接数与实际一致；借出等待、慢等待与超时次数计数正确，并发借出时不丢失计数，
+引擎 dispose 后保留累计指标；连接池指标接口只对管理员开放
+"""
+import os
+import sys
+import tempfile
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import exc
+from sqlalchemy.pool import StaticPool
+from app.api import system
+from app.core.config import settings
+from app.core.database import create_database_engine, engine_options
+from app.core.db_pool import MeteredAsyncQueuePool, MeteredQueuePool, pool_status
+from app.core.permissions import PermissionChecker, get_permission_checker
+from app.models import User, UserRole
+
+POOL_SIZE = 2
+MAX_OVERFLOW = 1
+
+
+def test_engine_options():
+    assert engine_options("sqlite:///./platform.db")["poolclass"] is MeteredQueuePool
+    assert engine_options("sqlite+aiosqlite:///./platform.db", is_async=True)["poolclass"] is MeteredAsyncQueuePool
+    assert "poolclass" not in engine_options("sqlite://")
+
+    timeout = settings.DATABASE_STATEMENT_TIMEOUT_MS
+    settings.DATABASE_STATEMENT_TIMEOUT_MS = 5000
+    try:
+        options = engine_options("postgresql://app@db/platform")
+        assert options["poolclass"] is MeteredQueuePool
+        assert options["pool_size"] == settings.DATABASE_POOL_SIZE
+        assert options["max_overflow"] == settings.DATABASE_MAX_OVERFLOW
+        assert options["pool_timeout"] == settings.DATABASE_POOL_TIMEOUT
+        assert options["pool_recycle"] == settings.DATABASE_POOL_RECYCLE
+        assert options["pool_pre_ping"] == settings.DATABASE_POOL_PRE_PING
+        assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+        options = engine_options("postgresql+asyncpg://app@db/platform", is_async=True)
+        assert options["poolclass"] is MeteredAsyncQueuePool
+        assert options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+        settings.DATABASE_STATEMENT_TIMEOUT_MS = 0
+        assert "connect_args" not in engine_options("postgresql://app@db/platform")
+    finally:
+        settings.DATABASE_STATEMENT_TIMEOUT_MS = timeout
+
+
+def test_pool_counters():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database_engine(
+            f"sqlite:///{os.path.join(tmp, 'pool.db')}",
+            pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=0.3
+        )
+        metrics = engine.pool.metrics
+        metrics.slow_wait_ms = 50
+        try:
+            # 借满连接池（含溢出连接）
+            connections = [engine.connect() for _ in range(POOL_SIZE + MAX_OVERFLOW)]
+            status = pool_status(engine)
+            assert status["pool_class"] == "MeteredQueuePool" and status["pid"] == os.getpid()
+            assert (status["size"], status["max_overflow"]) == (POOL_SIZE, MAX_OVERFLOW)
+            assert (status["checked_out"], status["idle"], status["overflow"]) == (3, 0, 1)
+            assert status["checkouts"] == 3 and status["timeouts"] == 0
+
+            # 耗尽时等待超时
+            try:
+                engine.connect()
+                raise AssertionError("连接池耗尽时应超时")
+            except exc.TimeoutError:
+                pass
+            status = pool_status(engine)
+            assert status["timeouts"] == 1 and status["checkouts"] == 3
+            assert status["wait_ms_max"] >= 250
+
+            # 其他线程稍后归还连接：记录为一次慢等待（慢等待次数包含之前超时的那次）
+            releaser = threading.Timer(0.1, connections.pop().close)
+            releaser.start()
+            connections.append(engine.connect())
+            releaser.join()
+            status = pool_status(engine)
+            assert status["checkouts"] == 4 and status["slow_checkouts"] == 2
+            assert 0 < status["wait_ms_avg"] < status["wait_ms_max"]
+
+            for connection in connections:
+                connection.close()
+            status = pool_status(engine)
+            assert (status["checked_out"], status["idle"], status["overflow"]) == (0, POOL_SIZE, 0)
+
+            # 并发借出时计数不丢失
+            threads_count, rounds = 8, 25
+
+            def borrow():
+                for _ in range(rounds):
+                    with engine.connect():
+                        pass
+
+            threads = [threading.Thread(target=borrow) for _ in range(threads_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+            status = pool_status(engine)
+            assert status["checkouts"] == 4 + threads_count * rounds, status
+            assert status["checked_out"] == 0
+
+            # dispose 重建连接池后保留累计指标
+            engine.dispose()
+            assert engine.pool.metrics is metrics
+            assert pool_status(engine)["checkouts"] == status["checkouts"]
+        finally:
+            engine.dispose()
+
+    # 不记录指标的连接池只返回基本信息
+    engine = create_database_engine("sqlite://", poolclass=StaticPool)
+    try:
+        assert set(pool_status(engine)) == {"pid", "pool_class"}
+    finally:
+        engine.dispose()
+
+
+def test_pool_endpoint():
+    users = {
+        UserRole.ADMIN: User(id=1, email="admin@test.com", role=UserRole.ADMIN),
+        UserRole.SUPPLY: User(id=2, email="supply@test.com", role=UserRole.SUPPLY, enterprise_id=1),
+    }
+    app = FastAPI()
+    app.include_router(system.router)
+    with TestClient(app) as client:
+        app.dependency_overrides[get_permission_checker] = lambda: PermissionChecker(users[UserRole.SUPPLY])
+        assert client.get("/system/db-pool").status_code == 403
+
+        app.dependency_overrides[get_permission_checker] = lambda: PermissionChecker(users[UserRole.ADMIN])
+        response = client.get("/system/db-pool")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert {"pool", "async_pool", "replicas", "write_queue"} <= set(data)
+        assert {"checked_out", "idle", "overflow", "checkouts", "timeouts", "wait_ms_avg"} <= set(data["pool"])
+    print("✅ 连接池参数按配置生成，借出/空闲/溢出连接数与等待指标计数正确")
+
+
+if __name__ == "__main__":
+    try:
+        test_engine_options()
+        test_pool_counters()
+        test_pool_endpoint()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
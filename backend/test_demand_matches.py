@@ -0,0 +1,168 @@
+"""
+需求匹配结果表测试
+验证：迁移把旧数据库 demands.match_results 字段回填到 demand_matches 表（跳过已删除的供应商与无效项，
+排名连续），降级时还原该字段；save_matches 写入的结果经 Demand.match_results 读回后与匹配服务返回的
+结构一致，再次保存时整体替换；供应商信息读取当前值，已删除的供应商跳过；删除需求时一并删除匹配结果
+"""
+import os
+import sys
+import tempfile
+import sqlalchemy as sa
+from alembic import command
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.migrations import alembic_config, upgrade_database
+from app.models import Demand, DemandMatch
+from app.services.demand_matches import save_matches
+
+ENTERPRISES = sa.table(
+    "enterprises",
+    sa.column("id", sa.Integer), sa.column("eid", sa.String), sa.column("name", sa.String),
+    sa.column("enterprise_type", sa.String), sa.column("status", sa.String),
+    sa.column("contact_email", sa.String), sa.column("credit_score", sa.Float), sa.column("ai_capabilities", sa.JSON)
+)
+LEGACY_DEMANDS = sa.table(
+    "demands",
+    sa.column("id", sa.Integer), sa.column("enterprise_id", sa.Integer), sa.column("title", sa.String),
+    sa.column("description", sa.Text), sa.column("status", sa.String), sa.column("confidentiality", sa.String),
+    sa.column("required_certifications", sa.JSON), sa.column("match_results", sa.JSON)
+)
+
+
+def vendor_result(vendor_id: int, score: float) -> dict:
+    """与匹配服务返回的单条匹配结果结构一致"""
+    return {
+        "vendor_id": vendor_id,
+        "vendor_name": f"供应商{vendor_id}",
+        "vendor_eid": f"EID-{vendor_id}",
+        "score": score,
+        "score_breakdown": {"industry_match": score, "credit_score": 0.8},
+        "reasons": [f"理由{vendor_id}"],
+        "contact_email": f"v{vendor_id}@example.com",
+        "credit_score": 80.0 + vendor_id,
+        "ai_capabilities": ["视觉检测"]
+    }
+
+
+def seed_legacy(connection):
+    connection.execute(ENTERPRISES.insert(), [
+        {
+            "id": i, "eid": f"EID-{i}", "name": f"供应商{i}", "enterprise_type": "SUPPLY", "status": "VERIFIED",
+            "contact_email": f"v{i}@example.com", "credit_score": 80.0 + i, "ai_capabilities": ["视觉检测"]
+        }
+        for i in range(1, 5)
+    ] + [
+        {
+            "id": 10, "eid": "EID-10", "name": "需求方", "enterprise_type": "DEMAND", "status": "VERIFIED",
+            "contact_email": None, "credit_score": 80.0, "ai_capabilities": []
+        }
+    ])
+    connection.execute(LEGACY_DEMANDS.insert(), [
+        {
+            "id": 1, "enterprise_id": 10, "title": "需求1", "description": "测试", "status": "MATCHED",
+            "confidentiality": "PUBLIC", "required_certifications": [],
+            # 供应商 99 已不存在、"invalid" 不是匹配结果，回填时跳过
+            "match_results": [vendor_result(3, 0.9), vendor_result(99, 0.8), "invalid", vendor_result(1, 0.7)]
+        },
+        {
+            "id": 2, "enterprise_id": 10, "title": "需求2", "description": "测试", "status": "MATCHED",
+            "confidentiality": "PUBLIC", "required_certifications": [], "match_results": [vendor_result(2, 0.6)]
+        },
+        {
+            "id": 3, "enterprise_id": 10, "title": "需求3", "description": "测试", "status": "SUBMITTED",
+            "confidentiality": "PUBLIC", "required_certifications": [], "match_results": None
+        },
+    ])
+
+
+def test_migration_backfill_and_downgrade():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'legacy.db')}")
+        try:
+            upgrade_database(bind=engine, revision="0004")
+            with engine.begin() as connection:
+                seed_legacy(connection)
+            upgrade_database(bind=engine)
+
+            with sessionmaker(bind=engine)() as db:
+                rows = [
+                    (m.demand_id, m.vendor_id, m.rank, m.score)
+                    for m in db.query(DemandMatch).order_by(DemandMatch.demand_id, DemandMatch.rank)
+                ]
+                assert rows == [(1, 3, 1, 0.9), (1, 1, 2, 0.7), (2, 2, 1, 0.6)], rows
+                assert db.get(Demand, 1).match_results == [vendor_result(3, 0.9), vendor_result(1, 0.7)]
+                assert db.get(Demand, 3).match_results == []
+
+            # 降级：由匹配结果表还原 match_results 字段
+            with engine.begin() as connection:
+                command.downgrade(alembic_config(connection), "0004")
+            with engine.connect() as connection:
+                restored = dict(connection.execute(
+                    sa.select(LEGACY_DEMANDS.c.id, LEGACY_DEMANDS.c.match_results)
+                ).all())
+                assert "demand_matches" not in sa.inspect(connection).get_table_names()
+            assert restored == {1: [vendor_result(3, 0.9), vendor_result(1, 0.7)], 2: [vendor_result(2, 0.6)], 3: None}
+        finally:
+            engine.dispose()
+
+
+def test_save_matches_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'matches.db')}")
+        try:
+            upgrade_database(bind=engine, revision="0004")
+            with engine.begin() as connection:
+                seed_legacy(connection)
+                connection.execute(LEGACY_DEMANDS.update().values(match_results=None))
+            upgrade_database(bind=engine)
+            sessions = sessionmaker(bind=engine)
+
+            first = [vendor_result(4, 0.95), vendor_result(2, 0.85), vendor_result(1, 0.5)]
+            with sessions() as db:
+                save_matches(db, {1: first, 2: [vendor_result(3, 0.4)]})
+                db.commit()
+            with sessions() as db:
+                assert db.get(Demand, 1).match_results == first
+                assert db.get(Demand, 2).match_results == [vendor_result(3, 0.4)]
+                assert [m.rank for m in db.get(Demand, 1).matches] == [1, 2, 3]
+                # 匹配到某供应商的需求
+                assert {m.demand_id for m in db.query(DemandMatch).filter(DemandMatch.vendor_id == 2)} == {1}
+
+            # 再次保存时整体替换，不影响其他需求
+            with sessions() as db:
+                save_matches(db, {1: [vendor_result(3, 0.7)]})
+                save_matches(db, {})
+                db.commit()
+            with sessions() as db:
+                assert db.get(Demand, 1).match_results == [vendor_result(3, 0.7)]
+                assert db.get(Demand, 2).match_results == [vendor_result(3, 0.4)]
+
+            # 供应商信息取当前值；供应商已删除时跳过该条结果
+            with engine.begin() as connection:
+                connection.execute(ENTERPRISES.update().where(ENTERPRISES.c.id == 3).values(credit_score=60.0))
+            with sessions() as db:
+                assert db.get(Demand, 1).match_results == [dict(vendor_result(3, 0.7), credit_score=60.0)]
+            with engine.begin() as connection:
+                connection.execute(ENTERPRISES.delete().where(ENTERPRISES.c.id == 3))
+            with sessions() as db:
+                assert db.get(Demand, 1).match_results == []
+                assert db.query(DemandMatch).filter(DemandMatch.demand_id == 1).count() == 1
+
+                # 删除需求时一并删除匹配结果
+                db.delete(db.get(Demand, 1))
+                db.commit()
+                assert db.query(DemandMatch).filter(DemandMatch.demand_id == 1).count() == 0
+                assert db.query(DemandMatch).count() == 1
+        finally:
+            engine.dispose()
+    print("✅ 匹配结果回填、降级还原与读写往返一致")
+
+
+if __name__ == "__main__":
+    try:
+        test_migration_backfill_and_downgrade()
+        test_save_matches_round_trip()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,153 @@
+"""
+需求评估一致性测试
+验证批量向量化评估结果与逐个需求评估的结果完全一致；保存评估结果时保留需求的 updated_at
+"""
+import sys
+import random
+from datetime import datetime
+from sqlalchemy import insert
+from app.models import Demand, Enterprise, Job
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services import demand_workflow
+from app.services.evaluation_service import EvaluationService
+from app.services.matching_service import matching_service
+
+INDUSTRIES = list(EvaluationService.INDUSTRY_MATURITY) + ["人工智能"]
+SCENARIOS = list(EvaluationService.SCENARIO_DIFFICULTY) + ["视觉"]
+
+
+def make_demand(rng: random.Random) -> dict:
+    """生成随机需求（数值取在各阶梯阈值附近）"""
+    data_summary = rng.choice([
+        {},
+        {"types": ["image"]},
+        {
+            "counts": {"train": rng.choice([0, 99, 100, 999, 1000, 4999, 5000, 9999, 10000, 50000])},
+            "labeled_ratio": rng.choice([0, 0.05, 0.2, 0.1999, 0.5, 0.79, 0.8, 1]),
+            "types": ["image", "text", "audio"][:rng.randint(0, 3)]
+        }
+    ])
+    return {
+        "title": "测试需求",
+        "description": rng.choice([None, "", "描" * 100, "描" * 101]),
+        "industry_tags": rng.sample(INDUSTRIES, rng.randint(0, 2)),
+        "scenario_tags": rng.sample(SCENARIOS, rng.randint(0, 2)),
+        "kpis": rng.choice([[], [{"name": "准确率", "target": 0.95}]]),
+        "budget_min": rng.choice([None, 0, 50000]),
+        "budget_max": rng.choice([None, 0, 99999, 100000, 500000]),
+        "timeline_start": rng.choice([None, datetime(2024, 1, 1)]),
+        "timeline_end": rng.choice([None, datetime(2024, 6, 30)]),
+        "data_summary": data_summary,
+        "confidentiality": rng.choice(["public", "internal", "confidential", "secret"])
+    }
+
+
+def test_evaluate_many_matches_scalar():
+    service = EvaluationService()
+    rng = random.Random(42)
+    demands = [make_demand(rng) for _ in range(2000)]
+
+    batch = service.evaluate_many(demands)
+    assert len(batch) == len(demands)
+    for demand_data, result in zip(demands, batch):
+        assert result == service.evaluate_demand(demand_data), demand_data
+    assert service.evaluate_many([]) == []
+
+
+
+def test_incremental_recomputes_changed_components():
+    service = EvaluationService()
+    rng = random.Random(7)
+    for _ in range(500):
+        demand_data = make_demand(rng)
+        result, cache, recomputed = service.evaluate_incremental(demand_data)
+        assert result == service.evaluate_demand(demand_data)
+        assert recomputed == list(service.COMPONENTS)
+
+        # 内容未变：直接返回上次的结果
+        again, _, recomputed = service.evaluate_incremental(demand_data, cache, result)
+        assert again is result and recomputed == []
+
+        # 修改一个字段：结果与全量评估一致，且只重新计算依赖该字段的组件
+        changed = dict(demand_data)
+        field = rng.choice([
+            "budget_max", "confidentiality", "scenario_tags", "industry_tags", "kpis", "data_summary", "timeline_end"
+        ])
+        changed[field] = make_demand(rng)[field]
+        updated, new_cache, recomputed = service.evaluate_incremental(changed, cache, result)
+        assert updated == service.evaluate_demand(changed), (field, changed)
+        if field == "confidentiality":
+            assert set(recomputed) <= {"risks"}
+        if field == "scenario_tags":
+            assert set(recomputed) <= {"technical_feasibility", "confidence"}
+
+        # 批量增量评估与单个增量评估一致
+        results, caches, flags = service.evaluate_many_incremental([demand_data, changed], [cache, cache], [result, result])
+        assert results == [result, updated] and flags[0] is False
+        assert caches[1]["components"] == new_cache["components"]
+
+    # 规则版本变化后缓存失效
+    stale = dict(cache, rules="old")
+    assert service.evaluate_incremental(demand_data, stale, result)[2] == list(service.COMPONENTS)
+
+
+def test_incremental_sees_all_industry_tags():
+    service = EvaluationService()
+    demand_data = make_demand(random.Random(1))
+    demand_data["industry_tags"] = ["制造业"]
+    result, cache, _ = service.evaluate_incremental(demand_data)
+
+    # 只改动第一个之后的行业标签：各组件得分不变，但建议中需要加入合规提示
+    changed = dict(demand_data, industry_tags=["制造业", "医疗"])
+    expected = service.evaluate_demand(changed)
+    assert "注意相关行业的合规性要求和数据隐私保护" in expected["notes"]
+
+    updated, _, recomputed = service.evaluate_incremental(changed, cache, result)
+    assert updated == expected and recomputed == []
+    results, _, flags = service.evaluate_many_incremental([changed], [cache], [result])
+    assert results == [expected] and flags == [True]
+
+
+def test_evaluate_demand_keeps_updated_at(migrated_engine, db_sessions):
+    version = datetime(2024, 5, 1, 9, 30)
+    with migrated_engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {"id": 1, "eid": "EID-1", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED}
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": 1, "enterprise_id": 1, "title": "产线缺陷检测", "description": "描" * 120,
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "required_certifications": [], "industry_tags": ["制造业"], "scenario_tags": ["视觉"],
+                "updated_at": version
+            }
+        ])
+    db = db_sessions()
+    try:
+        demand = db.get(Demand, 1)
+        result = demand_workflow.evaluate_demand(db, demand)
+        db.expire_all()
+        demand = db.get(Demand, 1)
+        assert demand.status == DemandStatus.EVALUATED and demand.evaluation_result == result
+        # 评估结果不是需求内容的变化：分数缓存仍然有效，已开放的需求不提交推荐刷新任务
+        assert demand.updated_at == version
+        assert db.query(Job).count() == 0
+    finally:
+        db.close()
+        matching_service.remove_demand(1)
+
+
+if __name__ == "__main__":
+    try:
+        test_evaluate_many_matches_scalar()
+        print("✅ 批量评估与逐个评估结果一致")
+        test_incremental_recomputes_changed_components()
+        print("✅ 增量评估只重新计算变化的组件，结果与全量评估一致")
+        test_incremental_sees_all_industry_tags()
+        print("✅ 修改非首个行业标签时增量评估结果与全量评估一致")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,157 @@
+"""
+供应商特征文件测试
+用 Alembic 迁移创建临时数据库，验证：首个进程构建并发布版本，其他进程以只读内存映射打开同一份特征，
+匹配结果与从数据库现场构建时一致；发布新版本后读取方切换并看到变更；只保留指定数量的历史版本，
+格式版本不符的目录被忽略
+"""
+import os
+import sys
+import json
+import pickle
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+from app.core.migrations import upgrade_database
+from app.models import Enterprise
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.feature_store import VendorFeatureStore, POINTER_FILE, VERSIONS_DIR
+from app.services.matching_service import MatchingService
+from app.services.recommendation_store import RecommendationStore
+from app.services.score_cache import ScoreCache
+from app.services.semantic_index import SemanticIndex
+from app.services.vendor_snapshot import VendorSnapshot
+
+VENDOR_IDS = range(1, 41)
+INDUSTRIES = ["制造业", "医疗", "金融", "零售"]
+CAPABILITIES = ["视觉检测", "缺陷识别", "自然语言处理", "语音识别", "推荐系统"]
+DEMANDS = [
+    {"title": "产线缺陷检测", "description": "视觉检测 缺陷识别", "industry_tags": ["制造业"],
+     "scenario_tags": ["视觉检测"], "budget_max": 100000, "enterprise_location": "重庆"},
+    {"title": "智能客服", "description": "自然语言处理", "industry_tags": ["金融", "零售"],
+     "scenario_tags": ["自然语言处理", "语音识别"], "budget_max": 0, "enterprise_location": "成都"},
+    {"title": "商品推荐", "description": "推荐系统", "industry_tags": [], "scenario_tags": [],
+     "budget_max": 500000, "enterprise_location": "重庆"},
+]
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"供应商{i}",
+                "enterprise_type": EnterpriseType.BOTH if i % 4 == 0 else EnterpriseType.SUPPLY,
+                "status": EnterpriseStatus.PENDING if i % 7 == 0 else EnterpriseStatus.VERIFIED,
+                "industry_tags": [INDUSTRIES[i % 4]],
+                "ai_capabilities": [CAPABILITIES[i % 5], CAPABILITIES[(i * 3) % 5]],
+                "business_scope": f"{CAPABILITIES[i % 5]}解决方案", "credit_score": 50 + i,
+                "address": "重庆市渝北区" if i % 3 else "四川省成都市"
+            }
+            for i in VENDOR_IDS
+        ])
+
+
+def make_service(tmp: str, features_dir: str) -> MatchingService:
+    """不共享全局快照的匹配服务；features_dir 为空时每次从数据库构建特征"""
+    service = MatchingService()
+    service.feature_store = VendorFeatureStore(features_dir, keep_versions=2, check_interval=0)
+    service.vendor_snapshot = VendorSnapshot()
+    service.semantic_index = SemanticIndex(os.path.join(tmp, "semantic.joblib"))
+    service.recommendations = RecommendationStore(service)
+    service.score_cache = ScoreCache(enabled=False)
+    return service
+
+
+def match_results(service: MatchingService, db) -> list:
+    return [
+        [(m["vendor_id"], m["score"], m["score_breakdown"]) for m in service.match_vendors(dict(demand), db, 10)]
+        for demand in DEMANDS
+    ]
+
+
+def test_publish_and_mmap():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'features.db')}")
+        upgrade_database(bind=engine)
+        seed(engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        features_dir = os.path.join(tmp, "vendor_features")
+        try:
+            # 首个进程发现没有发布版本，构建并发布
+            publisher = make_service(tmp, features_dir)
+            publisher.ensure_indexes(db)
+            with open(os.path.join(features_dir, POINTER_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+            assert publisher.vendor_snapshot.version == version
+
+            # 其他进程直接映射已发布的文件
+            reader = make_service(tmp, features_dir)
+            reader.ensure_indexes(db)
+            assert reader.vendor_snapshot.version == version
+            profiles = reader.vendor_snapshot.profiles()
+            assert [p.id for p in profiles] == [i for i in VENDOR_IDS if i % 7]
+            features = reader.vendor_features(profiles)
+            assert features.path is not None
+            assert isinstance(features.credit_scores, np.memmap) and isinstance(features.industry_bits, np.memmap)
+            assert not features.credit_scores.flags.writeable
+            assert reader.vendor_features(profiles) is features, "全部供应商时应直接使用映射的特征"
+            assert list(reader.vendor_features(profiles[:3]).ids) == [p.id for p in profiles[:3]]
+
+            # 跨进程传递时只传目录，接收方重新映射
+            restored = pickle.loads(pickle.dumps(features))
+            assert restored.path == features.path and isinstance(restored.credit_scores, np.memmap)
+            assert np.array_equal(restored.capability_bits, features.capability_bits)
+
+            # 与从数据库现场构建特征的结果一致
+            baseline = make_service(tmp, "")
+            baseline.ensure_indexes(db)
+            expected = match_results(baseline, db)
+            assert all(expected)
+            assert match_results(reader, db) == expected
+
+            # 其他进程修改供应商并发布新版本，读取方切换
+            with engine.begin() as connection:
+                connection.execute(update(Enterprise).where(Enterprise.id == 1).values(credit_score=100))
+                connection.execute(update(Enterprise).where(Enterprise.id == 2).values(
+                    status=EnterpriseStatus.SUSPENDED
+                ))
+            new_version = publisher.publish_vendor_features(db)
+            assert new_version != version
+            reader.ensure_indexes(db)
+            assert reader.vendor_snapshot.version == new_version
+            assert reader.vendor_snapshot.get(1).credit_score == 100 and reader.vendor_snapshot.get(2) is None
+            assert reader.vendor_features(reader.vendor_snapshot.profiles()).path.endswith(new_version + "/features")
+
+            baseline = make_service(tmp, "")
+            baseline.ensure_indexes(db)
+            assert match_results(reader, db) == match_results(baseline, db)
+
+            # 只保留 keep_versions 个版本
+            latest = publisher.publish_vendor_features(db)
+            versions = sorted(os.listdir(os.path.join(features_dir, VERSIONS_DIR)))
+            assert versions == [new_version, latest], versions
+
+            # 格式版本不符的目录被忽略
+            store = VendorFeatureStore(features_dir)
+            assert store.open(latest) is not None
+            profiles_path = os.path.join(features_dir, VERSIONS_DIR, latest, "profiles.json")
+            with open(profiles_path, encoding="utf-8") as f:
+                state = json.load(f)
+            state["format"] = -1
+            with open(profiles_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            assert store.open(latest) is None
+            assert store.open("missing") is None
+        finally:
+            db.close()
+            engine.dispose()
+    print("✅ 特征文件发布后以内存映射共享，匹配结果与现场构建一致，新版本发布后读取方切换")
+
+
+if __name__ == "__main__":
+    try:
+        test_publish_and_mmap()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
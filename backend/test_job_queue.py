@@ -0,0 +1,221 @@
+"""
+后台任务队列测试
+用 Alembic 迁移创建临时数据库，验证：多个 worker 并发领取时每个任务只被领取一次、按需求优先级领取；
+租约有效期内任务不会被重复领取，租约过期后由其他 worker 接手，原 worker 不能再续租或写入结果；
+超过最大领取次数的任务标记为失败；同一需求未完成的同类任务不重复提交，top_k 不同的匹配任务不复用；
+超过保留期的已结束任务被清理
+"""
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.migrations import upgrade_database
+from app.models import Demand, Enterprise, Job, JobType, JobStatus
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.job_queue import JobConflictError, JobQueue
+
+DEMAND_IDS = range(1, 31)
+WORKERS = 8
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {"id": 1, "eid": "EID-1", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED}
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": 1, "title": f"需求{i}", "description": "产线缺陷视觉检测",
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "required_certifications": [], "priority": i % 3 + 1
+            }
+            for i in DEMAND_IDS
+        ])
+
+
+def make_sessions(tmp: str):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmp, 'jobs.db')}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    upgrade_database(bind=engine)
+    seed(engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+
+def enqueue_all(queue: JobQueue, sessions) -> dict:
+    """为每个需求提交评估任务，返回 任务ID -> 需求优先级"""
+    with sessions() as db:
+        jobs = {}
+        for demand in db.query(Demand).order_by(Demand.id):
+            job = queue.enqueue(db, JobType.EVALUATE, demand)
+            jobs[job.id] = demand.priority
+        # 重复提交返回同一个未完成的任务
+        assert queue.enqueue(db, JobType.EVALUATE, db.get(Demand, 1)).id == min(jobs)
+        assert db.query(Job).count() == len(DEMAND_IDS)
+        return jobs
+
+
+def test_concurrent_claims_are_exclusive():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = make_sessions(tmp)
+        queue = JobQueue(lease_seconds=300)
+        jobs = enqueue_all(queue, sessions)
+        claimed = []
+        lock = threading.Lock()
+        start = threading.Barrier(WORKERS)
+
+        def worker(worker_id: str):
+            db = sessions()
+            try:
+                start.wait()
+                while True:
+                    job = queue.claim(db, worker_id)
+                    if job is None:
+                        return
+                    with lock:
+                        claimed.append((job.id, worker_id))
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker, args=(f"worker-{i}",)) for i in range(WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+
+        try:
+            counts = Counter(job_id for job_id, _ in claimed)
+            assert sorted(counts) == sorted(jobs), "有任务没有被领取"
+            assert max(counts.values()) == 1, f"任务被重复领取: {counts.most_common(3)}"
+            with sessions() as db:
+                owners = dict(claimed)
+                for job in db.query(Job):
+                    assert job.status == JobStatus.RUNNING and job.attempts == 1
+                    assert job.worker_id == owners[job.id]
+        finally:
+            engine.dispose()
+
+
+def test_priority_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = make_sessions(tmp)
+        queue = JobQueue()
+        jobs = enqueue_all(queue, sessions)
+        try:
+            with sessions() as db:
+                order = []
+                while (job := queue.claim(db, "worker")) is not None:
+                    order.append(job.id)
+            assert order == sorted(jobs, key=lambda job_id: (-jobs[job_id], job_id))
+        finally:
+            engine.dispose()
+
+
+def expire_lease(db, job_id: int):
+    db.query(Job).filter(Job.id == job_id).update(
+        {Job.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def test_lease_expiry_and_max_attempts():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = make_sessions(tmp)
+        queue = JobQueue(lease_seconds=300, max_attempts=2)
+        try:
+            with sessions() as db:
+                job_id = queue.enqueue(db, JobType.EVALUATE, db.get(Demand, 1)).id
+                assert queue.claim(db, "worker-a").id == job_id
+
+                # 租约有效期内不能被其他 worker 领取
+                assert queue.claim(db, "worker-b") is None
+                assert queue.renew(db, job_id, "worker-a")
+                assert not queue.renew(db, job_id, "worker-b")
+
+                # 租约过期后由其他 worker 接手，原 worker 不能再续租
+                expire_lease(db, job_id)
+                job = queue.claim(db, "worker-b")
+                assert job.id == job_id and job.worker_id == "worker-b" and job.attempts == 2
+                assert job.lease_expires_at > datetime.utcnow() + timedelta(seconds=290)
+                assert not queue.renew(db, job_id, "worker-a")
+                assert queue.renew(db, job_id, "worker-b")
+
+                # 原 worker 执行完成时不能覆盖新 worker 的任务
+                assert not queue._finish(db, job_id, "worker-a", JobStatus.SUCCEEDED, result={"stale": True})
+                db.expire_all()
+                job = queue.get(db, job_id)
+                assert job.status == JobStatus.RUNNING and job.result is None and job.worker_id == "worker-b"
+
+                # 超过最大领取次数：标记为失败，不再返回
+                expire_lease(db, job_id)
+                assert queue.claim(db, "worker-c") is None
+                db.expire_all()
+                job = queue.get(db, job_id)
+                assert job.status == JobStatus.FAILED and job.attempts == 3 and job.lease_expires_at is None
+
+                # 失败的任务不再算作未完成，可以重新提交
+                assert queue.enqueue(db, JobType.EVALUATE, db.get(Demand, 1)).id != job_id
+        finally:
+            engine.dispose()
+    print("✅ 任务只被领取一次，租约过期后由其他 worker 接手")
+
+
+def test_match_dedupe_and_prune():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = make_sessions(tmp)
+        queue = JobQueue()
+        try:
+            with sessions() as db:
+                demand = db.get(Demand, 1)
+                job_id = queue.enqueue(db, JobType.MATCH, demand, {"top_k": 5}).id
+                assert queue.enqueue(db, JobType.MATCH, demand, {"top_k": 5}).id == job_id
+                assert queue.enqueue(db, JobType.MATCH, demand).id == job_id
+                try:
+                    queue.enqueue(db, JobType.MATCH, demand, {"top_k": 20})
+                    raise AssertionError("top_k 不同的匹配任务不应复用已有任务")
+                except JobConflictError:
+                    pass
+
+                # 任务结束后可以按新的 top_k 提交
+                assert queue.claim(db, "worker").id == job_id
+                assert queue._finish(db, job_id, "worker", JobStatus.SUCCEEDED, result={"match_results": []})
+                assert not queue._finish(db, job_id, "worker", JobStatus.FAILED, error="重复写入")
+
+                # 只清理超过保留期的已结束任务，未完成的任务保留
+                queue.PRUNE_BATCH_SIZE = 2
+                finished = []
+                for i in range(2, 7):
+                    finished.append(queue.enqueue(db, JobType.EVALUATE, db.get(Demand, i)).id)
+                    job = queue.claim(db, "worker")
+                    queue._finish(db, job.id, "worker", JobStatus.FAILED if i % 2 else JobStatus.SUCCEEDED)
+                db.query(Job).filter(Job.id.in_(finished[:4])).update(
+                    {Job.finished_at: datetime.utcnow() - timedelta(days=8)}, synchronize_session=False
+                )
+                db.commit()
+                other_id = queue.enqueue(db, JobType.MATCH, demand, {"top_k": 20}).id
+                assert other_id != job_id
+                assert queue.prune(db, datetime.utcnow() - timedelta(days=7)) == 4
+                remaining = {job.id: job.status for job in db.query(Job)}
+                assert set(remaining) == {job_id, other_id, finished[4]}
+                assert remaining[other_id] == JobStatus.QUEUED
+        finally:
+            engine.dispose()
+    print("✅ top_k 不同的匹配任务不复用，超过保留期的已结束任务被清理")
+
+
+if __name__ == "__main__":
+    try:
+        test_concurrent_claims_are_exclusive()
+        test_priority_order()
+        test_lease_expiry_and_max_attempts()
+        test_match_dedupe_and_prune()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,146 @@
+"""
+匹配硬性约束测试
+用 Alembic 迁移创建临时数据库，验证：SQL 条件筛出的供应商与逐个判断 allows() 的结果一致（信用分、
+认证级别、预算档位、必备资质）；正向匹配的候选池加上机密需求的能力标签重合后仍与 allows() 一致；
+反向匹配在 SQL 中排除的需求与逐个判断一致（含未设置预算、信用分为 0 的需求）；认证资质索引表随企业的新增、修改、删除同步
+"""
+import sys
+import random
+import pytest
+from sqlalchemy import insert
+from app.models import Demand, Enterprise, EnterpriseCertification
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.match_constraints import MatchConstraints, certification_names, excluded_demand_ids
+from app.services.tag_index import is_indexable_vendor, is_open_demand
+
+CERTIFICATIONS = ["ISO9001", "ISO27001", "等保三级", "CMMI3"]
+LEVELS = ["普通会员", "认证企业", "优选企业"]
+CAPABILITIES = ["视觉检测", "缺陷识别", "自然语言处理", "语音识别", "推荐系统", "知识图谱"]
+
+
+def make_certifications(rng: random.Random) -> list:
+    """资质列表混用 {"name": ...} 与字符串，含空白与重复项"""
+    names = rng.sample(CERTIFICATIONS, rng.randint(0, 3))
+    items = [{"name": name} if rng.random() < 0.5 else f" {name} " for name in names]
+    if names and rng.random() < 0.3:
+        items.append(names[0])
+    return items
+
+
+def make_vendor(i: int, rng: random.Random) -> Enterprise:
+    return Enterprise(
+        id=i, eid=f"EID-{i}", name=f"企业{i}",
+        enterprise_type=rng.choice([EnterpriseType.SUPPLY, EnterpriseType.SUPPLY, EnterpriseType.BOTH,
+                                    EnterpriseType.DEMAND]),
+        status=rng.choice([EnterpriseStatus.VERIFIED] * 4 + [EnterpriseStatus.PENDING]),
+        industry_tags=["制造业"], ai_capabilities=rng.sample(CAPABILITIES, rng.randint(0, 3)),
+        certifications=make_certifications(rng), certification_level=rng.choice(LEVELS),
+        min_project_budget=rng.choice([None, 20000, 50000, 200000]), credit_score=rng.choice(range(60, 100, 5))
+    )
+
+
+def make_demand(rng: random.Random) -> dict:
+    return {
+        "title": "测试需求", "description": "测试需求描述",
+        "confidentiality": rng.choice(list(ConfidentialityLevel)),
+        "min_vendor_credit": rng.choice([None, None, 0, 70, 85]),
+        "required_certifications": rng.sample(CERTIFICATIONS, rng.choice([0, 0, 1, 2])),
+        "budget_max": rng.choice([0, 30000, 100000]),
+        "industry_tags": [], "scenario_tags": rng.sample(CAPABILITIES, rng.randint(0, 2))
+    }
+
+
+def index_rows(db) -> dict:
+    rows = {}
+    for row in db.query(EnterpriseCertification):
+        rows.setdefault(row.enterprise_id, set()).add(row.name)
+    return rows
+
+
+@pytest.mark.usefixtures("preserved_vendor_snapshot")
+def test_sql_constraints_match_python(migrated_engine, db_sessions, make_service):
+    rng = random.Random(20240611)
+    # 企业经 ORM 写入以同步资质索引表
+    db = db_sessions()
+    try:
+        db.add_all([make_vendor(i, rng) for i in range(1, 81)])
+        db.commit()
+        demands = [make_demand(rng) for _ in range(40)]
+        with migrated_engine.begin() as connection:
+            connection.execute(insert(Demand), [
+                # 数据库中未设置的预算既有 0 也有 NULL
+                dict(
+                    demand, id=i, enterprise_id=1, budget_max=demand["budget_max"] or rng.choice([0, None]),
+                    status=rng.choice([DemandStatus.SUBMITTED, DemandStatus.MATCHED, DemandStatus.DRAFT])
+                )
+                for i, demand in enumerate(demands, start=1)
+            ])
+
+        enterprises = db.query(Enterprise).order_by(Enterprise.id).all()
+        vendors = [e for e in enterprises if is_indexable_vendor(e)]
+        assert index_rows(db) == {
+            e.id: set(certification_names(e.certifications)) for e in enterprises if e.certifications
+        }
+
+        service = make_service()
+        service.ensure_indexes(db)
+
+        filtered = 0
+        for _ in range(300):
+            demand = make_demand(rng)
+            constraints = MatchConstraints.for_demand(demand)
+            allowed = {v.id for v in vendors if constraints.allows(v)}
+
+            # SQL 条件不含能力标签重合，与去掉该条件后的逐个判断一致
+            sql_only = MatchConstraints(
+                constraints.min_credit, constraints.certifications, constraints.levels, constraints.budget
+            )
+            ids = constraints.vendor_ids(db)
+            if sql_only.is_empty:
+                assert ids is None
+            else:
+                assert ids == {v.id for v in vendors if sql_only.allows(v)}, demand
+
+            pool = service.constrained_vendor_ids(db, demand)
+            if constraints.is_empty:
+                assert pool is None
+            else:
+                assert pool == allowed, demand
+                filtered += len(vendors) - len(pool)
+
+            # 匹配结果只包含满足硬性要求的供应商
+            for match in service.match_vendors(demand, db, 10):
+                assert match["vendor_id"] in allowed, (demand, match["vendor_id"])
+        assert filtered > 0, "随机需求应排除部分供应商"
+
+        # 反向匹配：开放需求中不满足要求的需求
+        open_demands = [d for d in db.query(Demand).order_by(Demand.id) if is_open_demand(d)]
+        excluded_total = 0
+        for vendor in vendors:
+            expected = {
+                d.id for d in open_demands if not MatchConstraints.for_demand(d).allows(vendor)
+            }
+            assert excluded_demand_ids(db, vendor) == expected, vendor.id
+            excluded_total += len(expected)
+        assert 0 < excluded_total < len(vendors) * len(open_demands)
+
+        # 资质索引表随修改与删除同步
+        changed = vendors[0]
+        changed.certifications = [{"name": "CMMI3"}, "等保三级"]
+        unchanged_name = vendors[1]
+        unchanged_name.name = "改名的企业"
+        db.delete(vendors[2])
+        db.commit()
+        rows = index_rows(db)
+        assert rows[changed.id] == {"CMMI3", "等保三级"}
+        assert rows.get(unchanged_name.id, set()) == set(certification_names(unchanged_name.certifications))
+        assert vendors[2].id not in rows
+        assert MatchConstraints(certifications=["CMMI3", "等保三级"]).vendor_ids(db) >= {changed.id}
+    finally:
+        db.close()
+    print("✅ 硬性约束的 SQL 条件与逐个判断一致，资质索引表同步")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,82 @@
+"""
+匹配流水线重排阶段测试
+验证：超时的重排在后台继续运行时占用名额，同时运行的重排数达到上限后直接跳过重排；
+名额释放后重排恢复；阶段与重排器基类不能直接实例化
+"""
+import sys
+import threading
+from types import SimpleNamespace
+import numpy as np
+from app.services.match_pipeline import MatchContext, MatchStage, Reranker, RerankStage
+
+CONCURRENCY = 2
+
+
+class BlockingReranker(Reranker):
+    """在 release 之前阻塞的重排器，记录开始执行的次数"""
+
+    name = "blocking"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = 0
+        self.lock = threading.Lock()
+
+    def rerank(self, demand_data, vendors, components):
+        with self.lock:
+            self.started += 1
+        self.release.wait(10)
+        return components * 2
+
+
+def make_context() -> MatchContext:
+    ctx = MatchContext({}, None, top_k=2)
+    components = np.ones((3, 6))
+    ctx.set_scored([SimpleNamespace(id=i) for i in range(3)], components.sum(axis=1), components)
+    return ctx
+
+
+def test_rerank_concurrency_bounded():
+    matching = SimpleNamespace(_weighted_total=lambda *scores: float(sum(scores)))
+    reranker = BlockingReranker()
+    stage = RerankStage(reranker, cap=0, budget_ms=20)
+    stage._slots = threading.BoundedSemaphore(CONCURRENCY)
+
+    # 前两次超时后重排仍在运行，之后的请求不再提交重排
+    contexts = [make_context() for _ in range(5)]
+    for ctx in contexts:
+        stage.run(matching, ctx)
+        assert ctx.degraded == ["rerank"] and ctx.totals.tolist() == [6.0, 6.0, 6.0]
+    assert reranker.started == CONCURRENCY, reranker.started
+
+    # 运行中的重排结束后释放名额
+    reranker.release.set()
+    for _ in range(CONCURRENCY):
+        assert stage._slots.acquire(timeout=5)
+    for _ in range(CONCURRENCY):
+        stage._slots.release()
+
+    ctx = make_context()
+    stage.run(matching, ctx)
+    assert ctx.degraded == [] and ctx.totals.tolist() == [12.0, 12.0, 12.0]
+    assert reranker.started == CONCURRENCY + 1
+
+
+def test_abstract_bases():
+    for base in (MatchStage, Reranker):
+        try:
+            base()
+            raise AssertionError(f"{base.__name__} 不应直接实例化")
+        except TypeError:
+            pass
+
+
+if __name__ == "__main__":
+    try:
+        test_rerank_concurrency_bounded()
+        test_abstract_bases()
+        print("✅ 同时运行的重排数有上限，已满时跳过重排")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,326 @@
+"""
+匹配评分引擎一致性测试
+验证向量化评分结果与逐个供应商计算的标量结果完全一致；标签倒排索引的候选与逐个扫描的结果一致；
+在迁移创建的临时数据库上，MatchingService.match_vendors 的结果与对全部供应商逐个评分的结果一致
+"""
+import sys
+import random
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import insert, select
+from app.models import Demand, Enterprise
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.matching_service import MatchingService
+from app.services.tag_index import TagIndex, is_indexable_vendor, is_open_demand
+from app.services.vendor_snapshot import load_profiles
+from app.services.scoring_engine import VendorFeatures, score_vendors, rank_top_k, breakdown_at
+from app.services.topk import SortedAttributeList, SortedAccess, rank_key, threshold_top_k
+from app.services.tag_dictionary import TagDictionary, popcount
+
+INDUSTRIES = ["制造业", "金融", "零售", "医疗", "政务", "人工智能", "汽车"]
+CAPABILITIES = ["计算机视觉", "图像识别", "目标检测", "自然语言处理", "NLP", "语音识别", "视觉", "推荐系统"]
+ADDRESSES = ["重庆市渝北区仙桃数据谷", "重庆市两江新区", "四川省成都市高新区", "", None]
+
+
+def make_vendor(vendor_id: int, rng: random.Random) -> SimpleNamespace:
+    """生成随机供应商"""
+    return SimpleNamespace(
+        id=vendor_id,
+        eid=f"EID-{vendor_id}",
+        name=f"供应商{vendor_id}",
+        contact_email=f"v{vendor_id}@example.com",
+        industry_tags=rng.sample(INDUSTRIES, rng.randint(0, 3)),
+        ai_capabilities=rng.sample(CAPABILITIES, rng.randint(0, 4)),
+        address=rng.choice(ADDRESSES),
+        credit_score=float(rng.choice([60, 70, 79.5, 80, 85, 90, 93, 96, 100]))
+    )
+
+
+def make_demand(rng: random.Random) -> dict:
+    """生成随机需求"""
+    return {
+        "title": "测试需求",
+        "description": "测试需求描述",
+        "industry_tags": rng.sample(INDUSTRIES, rng.randint(0, 2)),
+        "scenario_tags": rng.sample(CAPABILITIES, rng.randint(0, 3)),
+        "budget_max": rng.choice([0, 30000, 50000, 100000, 500000]),
+        "enterprise_location": rng.choice(["重庆", "成都"])
+    }
+
+
+def scalar_match(service: MatchingService, demand_data: dict, vendors: list, top_k: int) -> list:
+    """原始的逐个计算实现"""
+    matches = []
+    for vendor in vendors:
+        breakdown = service._calculate_match_score(demand_data, vendor)
+        matches.append({
+            "vendor_id": vendor.id,
+            "score": breakdown["total_score"],
+            "score_breakdown": breakdown,
+            "reasons": service._generate_match_reasons(breakdown)
+        })
+    matches.sort(key=lambda x: x["score"], reverse=True)
+    return matches[:top_k]
+
+
+def vectorized_match(service: MatchingService, demand_data: dict, vendors: list, top_k: int) -> list:
+    """向量化实现"""
+    features = VendorFeatures(vendors)
+    scores = score_vendors(features, demand_data, service.weights)
+    matches = []
+    for index in rank_top_k(scores["total"], top_k):
+        breakdown = breakdown_at(scores, index)
+        matches.append({
+            "vendor_id": int(features.ids[index]),
+            "score": breakdown["total_score"],
+            "score_breakdown": breakdown,
+            "reasons": service._generate_match_reasons(breakdown)
+        })
+    return matches
+
+
+def test_vectorized_matches_scalar():
+    """向量化结果与标量结果逐项一致"""
+    rng = random.Random(20240601)
+    service = MatchingService()
+
+    for _ in range(200):
+        vendors = [make_vendor(i + 1, rng) for i in range(rng.randint(1, 40))]
+        demand_data = make_demand(rng)
+        top_k = rng.randint(1, 10)
+
+        expected = scalar_match(service, demand_data, vendors, top_k)
+        actual = vectorized_match(service, demand_data, vendors, top_k)
+
+        assert len(actual) == len(expected), "返回数量不一致"
+        for exp, act in zip(expected, actual):
+            assert act["vendor_id"] == exp["vendor_id"], "排序结果不一致"
+            assert act["score_breakdown"] == exp["score_breakdown"], "得分明细不一致"
+            assert act["reasons"] == exp["reasons"], "匹配理由不一致"
+
+
+def test_threshold_top_k_matches_full_sort():
+    """阈值算法结果与全量排序一致"""
+    rng = random.Random(20240602)
+
+    for _ in range(200):
+        n = rng.randint(1, 300)
+        k = rng.randint(1, 20)
+        credit = {i: rng.choice([60.0, 75.0, 85.0, 92.0, 99.0]) for i in range(n)}
+        tagged = {i for i in range(n) if rng.random() < 0.2}
+        semantic = {i: rng.random() for i in range(n)}
+
+        def score(i):
+            return 0.2 * credit[i] / 100 + 0.3 * (1.0 if i in tagged else 0.3) + 0.5 * semantic[i]
+
+        credit_list = SortedAttributeList()
+        for i, value in credit.items():
+            credit_list.set(i, value)
+
+        streams = [
+            SortedAccess(((i, 0.2 * v / 100) for i, v in credit_list.iter_desc()), complete=True),
+            SortedAccess(((i, 0.3) for i in tagged), floor=0.3 * 0.3),
+            SortedAccess(
+                ((i, 0.5 * v) for i, v in sorted(semantic.items(), key=lambda x: -x[1])),
+                floor=0.0
+            )
+        ]
+        actual = threshold_top_k(k, streams, score)
+        # 展示分数相同的记录按ID升序（n 较大时必然出现同分）
+        expected = sorted(((score(i), i) for i in range(n)), key=lambda x: rank_key(*x))[:k]
+
+        assert actual == expected, "阈值算法结果与全量排序不一致"
+
+
+def test_tag_dictionary_synonyms():
+    """同义词解析为同一标签，位图 Jaccard 与集合计算一致"""
+    dictionary = TagDictionary({"计算机视觉": ["图像识别", "computer_vision"], "自然语言处理": ["NLP"]})
+
+    assert dictionary.mask(["图像识别"]) == dictionary.mask(["计算机视觉"]) == dictionary.mask(["Computer_Vision "])
+    assert dictionary.mask(["nlp"]) == dictionary.mask(["自然语言处理"])
+    assert dictionary.mask(["图像识别", "计算机视觉"]) == dictionary.mask(["图像识别"]), "同义词应只占一位"
+
+    rng = random.Random(20240603)
+    for _ in range(200):
+        a = rng.sample(CAPABILITIES, rng.randint(1, 4))
+        b = rng.sample(CAPABILITIES, rng.randint(1, 4))
+        ids_a = {dictionary.names(dictionary.mask([t]))[0] for t in a}
+        ids_b = {dictionary.names(dictionary.mask([t]))[0] for t in b}
+        mask_a, mask_b = dictionary.mask(a), dictionary.mask(b)
+        assert popcount(mask_a & mask_b) == len(ids_a & ids_b)
+        assert popcount(mask_a | mask_b) == len(ids_a | ids_b)
+
+    # 包含关系预先计算：“视觉”与“计算机视觉”相关
+    related = dictionary.related(dictionary.mask(["视觉"]))
+    assert related & dictionary.mask(["图像识别"]), "包含关系未生效"
+
+
+def seed_matching_db(engine, rng: random.Random, vendor_count: int = 60, demand_count: int = 30):
+    """随机供应商（含未认证与需求方企业）与随机需求（含非开放状态）"""
+    vendors = [make_vendor(i, rng) for i in range(1, vendor_count + 1)]
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": v.id, "eid": v.eid, "name": v.name, "contact_email": v.contact_email,
+                "enterprise_type": rng.choice([EnterpriseType.SUPPLY, EnterpriseType.SUPPLY, EnterpriseType.BOTH,
+                                               EnterpriseType.DEMAND]),
+                "status": rng.choice([EnterpriseStatus.VERIFIED] * 4 + [EnterpriseStatus.PENDING]),
+                "industry_tags": v.industry_tags, "ai_capabilities": v.ai_capabilities,
+                "address": v.address, "credit_score": v.credit_score
+            }
+            for v in vendors
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": 1, "title": f"需求{i}",
+                "description": "、".join(rng.sample(CAPABILITIES, 2)),
+                "status": rng.choice([DemandStatus.SUBMITTED, DemandStatus.MATCHED, DemandStatus.DRAFT]),
+                "confidentiality": ConfidentialityLevel.PUBLIC,
+                "industry_tags": rng.sample(INDUSTRIES, rng.randint(0, 2)),
+                "scenario_tags": rng.sample(CAPABILITIES, rng.randint(0, 3)),
+                "budget_max": rng.choice([0, 30000, 100000, 500000]), "required_certifications": []
+            }
+            for i in range(1, demand_count + 1)
+        ])
+
+
+def linear_candidates(index: TagIndex, items: dict, industry_tags: list, keyword_tags: list) -> tuple:
+    """
+    逐个扫描计算候选：共享行业标签或能力/场景标签（含包含关系）的记录，
+    加上缺少标签的记录中ID最小的 fallback_limit 个
+
+    Returns:
+        (候选ID集合, 全部记录数)；查询侧没有标签时候选为 None
+    """
+    masks = index.dictionary.masks(industry_tags, keyword_tags)
+    if not masks.industry and not masks.keywords:
+        return None, len(items)
+    matched, untagged = set(), []
+    for item_id, (item_industry, item_keywords) in sorted(items.items()):
+        item_masks = index.dictionary.masks(item_industry, item_keywords)
+        if masks.industry & item_masks.industry or (masks.keywords | masks.related) & item_masks.keywords:
+            matched.add(item_id)
+        elif not item_masks.industry or not item_masks.keywords:
+            untagged.append(item_id)
+    return matched | set(untagged[:index.fallback_limit]), len(items)
+
+
+def assert_candidates(actual, expected: tuple, min_count: int):
+    candidates, total = expected
+    if candidates is None:
+        assert actual is None, "查询侧没有标签时应全量评分"
+        return
+    # 候选不足 min_count 时补齐（补齐的记录不限），其余与逐个扫描一致
+    assert candidates <= actual, "倒排索引遗漏了候选"
+    assert len(actual) == max(len(candidates), min(min_count, total)), (len(actual), len(candidates), min_count)
+    if len(candidates) >= min_count:
+        assert actual == candidates, "倒排索引的候选与逐个扫描不一致"
+
+
+def test_tag_index_matches_linear_scan(migrated_engine, db_sessions):
+    """倒排索引的候选（含增量维护后）与逐个扫描一致"""
+    rng = random.Random(20240604)
+    seed_matching_db(migrated_engine, rng)
+    db = db_sessions()
+    try:
+        index = TagIndex(fallback_limit=5)
+        index.rebuild(db, load_profiles(db))
+        vendors = {
+            e.id: (e.industry_tags or [], e.ai_capabilities or [])
+            for e in db.query(Enterprise) if is_indexable_vendor(e)
+        }
+        demands = {
+            d.id: (d.industry_tags or [], d.scenario_tags or [])
+            for d in db.query(Demand) if is_open_demand(d)
+        }
+
+        def check(rounds: int):
+            for _ in range(rounds):
+                industry = rng.sample(INDUSTRIES, rng.randint(0, 2))
+                keywords = rng.sample(CAPABILITIES, rng.randint(0, 3))
+                min_count = rng.choice([0, 5, 40])
+                assert_candidates(
+                    index.vendor_candidates(industry, keywords, min_count),
+                    linear_candidates(index, vendors, industry, keywords), min_count
+                )
+                assert_candidates(
+                    index.demand_candidates(industry, keywords, min_count),
+                    linear_candidates(index, demands, industry, keywords), min_count
+                )
+
+        check(200)
+
+        # 增量维护：修改标签、取消认证、删除后仍与逐个扫描一致
+        for enterprise in db.query(Enterprise).filter(Enterprise.id.in_(list(vendors)[:15])):
+            enterprise.industry_tags = rng.sample(INDUSTRIES, rng.randint(0, 2))
+            enterprise.ai_capabilities = rng.sample(CAPABILITIES, rng.randint(0, 3))
+            if enterprise.id % 4 == 0:
+                enterprise.status = EnterpriseStatus.SUSPENDED
+            index.index_vendor(enterprise)
+            if is_indexable_vendor(enterprise):
+                vendors[enterprise.id] = (enterprise.industry_tags, enterprise.ai_capabilities)
+            else:
+                vendors.pop(enterprise.id)
+        for vendor_id in list(vendors)[-5:]:
+            index.remove_vendor(vendor_id)
+            vendors.pop(vendor_id)
+        for demand in db.query(Demand).filter(Demand.id.in_(list(demands)[:5])):
+            demand.status = DemandStatus.CLOSED
+            index.index_demand(demand)
+            demands.pop(demand.id)
+
+        check(200)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_match_vendors_matches_scalar(migrated_engine, db_sessions, make_service):
+    """
+    match_vendors（硬条件过滤、阈值检索、向量化评分）与对全部已认证供应商逐个评分的结果一致，
+    同分的供应商按ID升序排列
+    """
+    rng = random.Random(20240605)
+    seed_matching_db(migrated_engine, rng)
+    # 与已有企业各项属性相同的企业：分数与原企业相同
+    with migrated_engine.begin() as connection:
+        rows = connection.execute(select(Enterprise.__table__).where(Enterprise.id <= 20)).mappings().all()
+        connection.execute(insert(Enterprise), [
+            dict(row, id=row["id"] + 100, eid=f"EID-{row['id'] + 100}") for row in rows
+        ])
+    db = db_sessions()
+    service = make_service()
+    try:
+        vendors = [e for e in db.query(Enterprise).order_by(Enterprise.id) if is_indexable_vendor(e)]
+        ties = 0
+        for _ in range(50):
+            demand_data = make_demand(rng)
+            demand_data["description"] = "、".join(rng.sample(CAPABILITIES, 2))
+            top_k = rng.randint(1, 10)
+
+            actual = service.match_vendors(demand_data, db, top_k)
+
+            # 标量实现使用同一语义索引给出的文本相似度
+            semantic = service.semantic_index.score_vendors(demand_data, vendors)
+            expected = {}
+            for i, vendor in enumerate(vendors):
+                score = None if semantic is None else float(semantic[i])
+                expected[vendor.id] = service._calculate_match_score(demand_data, vendor, score)
+            ranked = sorted(expected, key=lambda vendor_id: (-expected[vendor_id]["total_score"], vendor_id))
+
+            assert len(actual) == min(top_k, len(vendors)), "返回数量不一致"
+            assert [m["vendor_id"] for m in actual] == ranked[:top_k], "排序结果不一致"
+            scores = [m["score"] for m in actual]
+            ties += len(scores) - len(set(scores))
+            for match in actual:
+                breakdown = expected[match["vendor_id"]]
+                assert match["score_breakdown"] == breakdown, "得分明细不一致"
+                assert match["reasons"] == service._generate_match_reasons(breakdown), "匹配理由不一致"
+        assert ties > 0, "应出现同分的供应商"
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,182 @@
+"""
+游标分页测试
+用 Alembic 迁移创建临时数据库，验证：游标逐页读取的结果与按 (created_at, id) 倒序全量读取一致，
+created_at 相同的记录不重复、不遗漏；翻页期间插入新记录或删除已返回的记录不影响后续页；
+偏移分页保持原有行为；无效游标返回 400；需求列表接口返回 next_cursor 且不统计总数
+"""
+import os
+import sys
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.api import demands
+from app.core import async_database, create_access_token
+from app.core.async_database import async_database_url, dispose_async_engine
+from app.core.config import settings
+from app.core.migrations import upgrade_database
+from app.core.pagination import decode_cursor, encode_cursor, paginate
+from app.models import Demand, Enterprise, User, UserRole
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+
+DEMAND_COUNT = 95
+START = datetime(2024, 3, 1, 8, 0, 0, 123456)
+
+
+def demand_row(i: int, created_at: datetime) -> dict:
+    return {
+        "id": i, "enterprise_id": 1, "title": f"分页测试需求{i}", "description": "游标分页的测试数据，按创建时间倒序",
+        "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+        "required_certifications": [], "created_at": created_at
+    }
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {"id": 1, "eid": "EID-1", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+             "status": EnterpriseStatus.VERIFIED}
+        ])
+        # 每 4 条共用同一创建时间，ID 与时间顺序不一致
+        connection.execute(insert(Demand), [
+            demand_row(i, START + timedelta(seconds=(i * 37 % DEMAND_COUNT) // 4)) for i in range(1, DEMAND_COUNT + 1)
+        ])
+        connection.execute(insert(User), [
+            {"id": 1, "email": "admin@test.com", "hashed_password": "-", "role": UserRole.ADMIN, "enterprise_id": None}
+        ])
+
+
+def ordered_ids(db) -> list:
+    return [d.id for d in db.query(Demand).order_by(Demand.created_at.desc(), Demand.id.desc())]
+
+
+def walk(db, limit: int, between_pages=None) -> list:
+    """从第一页开始按游标读取全部页，返回每页的ID"""
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        page = paginate(db.query(Demand), 0, limit, cursor, Demand.created_at, Demand.id)
+        assert page.total is None and len(page.items) <= limit
+        pages.append([d.id for d in page.items])
+        cursor = page.next_cursor
+        if between_pages is not None and cursor is not None:
+            between_pages(len(pages))
+    return pages
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id), "user_id": user_id})}
+
+
+def test_cursor_pages_are_stable():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pages.db')}")
+        upgrade_database(bind=engine)
+        seed(engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        try:
+            expected = ordered_ids(db)
+            for limit in (1, 4, 7, 20, DEMAND_COUNT, 200):
+                pages = walk(db, limit)
+                assert [i for page in pages for i in page] == expected, limit
+                assert all(len(page) == limit for page in pages[:-1])
+                # 恰好整除时最后一页之后不再返回游标
+                assert pages[-1], limit
+
+            # 翻页期间插入更新的记录、删除已返回的记录：后续页仍从游标位置继续
+            returned = []
+            next_id = [DEMAND_COUNT + 1]
+
+            def change(page_number: int):
+                with engine.begin() as connection:
+                    connection.execute(insert(Demand), [
+                        demand_row(next_id[0], START + timedelta(days=1, seconds=page_number))
+                    ])
+                    connection.execute(Demand.__table__.delete().where(Demand.id == expected[page_number * 10 - 1]))
+                next_id[0] += 1
+                returned.append(page_number)
+
+            pages = walk(db, 10, between_pages=change)
+            assert [i for page in pages for i in page] == expected
+            assert returned
+
+            # 偏移分页保持原有行为（返回总数，不返回游标）
+            total = db.query(Demand).count()
+            query = db.query(Demand).order_by(Demand.created_at.desc())
+            page = paginate(query, 10, 5, None, Demand.created_at, Demand.id)
+            assert page.total == total and page.next_cursor is None and len(page.items) == 5
+
+            # 游标往返与无效游标
+            created_at = START + timedelta(microseconds=7)
+            assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+            for bad in ("not-a-cursor", encode_cursor(START, 1)[:-3], "W10"):
+                try:
+                    paginate(db.query(Demand), 0, 10, bad, Demand.created_at, Demand.id)
+                    raise AssertionError(f"无效游标应返回 400: {bad}")
+                except HTTPException as e:
+                    assert e.status_code == 400
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def test_list_endpoint_cursor():
+    state = (
+        settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+        async_database._async_sessions, async_database._async_read_sessions
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pages.db")
+        engine = create_engine(f"sqlite:///{path}")
+        upgrade_database(bind=engine)
+        seed(engine)
+        with sessionmaker(bind=engine)() as db:
+            expected = ordered_ids(db)
+        engine.dispose()
+
+        settings.DATABASE_ASYNC_URL = async_database_url(f"sqlite:///{path}")
+        async_database._async_engine = None
+        async_database._async_replica_engines = []
+        try:
+            app = FastAPI()
+            app.include_router(demands.router)
+            with TestClient(app) as client:
+                ids = []
+                cursor = ""
+                while cursor is not None:
+                    response = client.get("/demands", params={"cursor": cursor, "limit": 30}, headers=auth(1))
+                    assert response.status_code == 200, response.text
+                    data = response.json()
+                    assert data["total"] is None
+                    ids.extend(item["id"] for item in data["items"])
+                    cursor = data["next_cursor"]
+                assert ids == expected
+
+                # 不传游标时按 skip/limit 分页并返回总数
+                data = client.get("/demands", params={"skip": 30, "limit": 30}, headers=auth(1)).json()
+                assert data["total"] == DEMAND_COUNT and data["next_cursor"] is None
+                assert [item["id"] for item in data["items"]] == expected[30:60]
+
+                response = client.get("/demands", params={"cursor": "invalid"}, headers=auth(1))
+                assert response.status_code == 400 and response.json()["detail"] == "无效的分页游标"
+        finally:
+            asyncio.run(dispose_async_engine())
+            (
+                settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+                async_database._async_sessions, async_database._async_read_sessions
+            ) = state
+    print("✅ 游标分页结果与全量排序一致，翻页期间的写入不造成重复或遗漏")
+
+
+if __name__ == "__main__":
+    try:
+        test_cursor_pages_are_stable()
+        test_list_endpoint_cursor()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""
+查询计划测试
+用 Alembic 迁移创建临时数据库，写入按状态分布的需求与企业数据后，验证主要查询命中预期索引
+"""
+import os
+import sys
+import random
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.core.migrations import upgrade_database
+from app.core.query_plans import check_query_plans
+from app.models import Demand, DemandMatch, DemandTag, Enterprise, Tag
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+
+# 需求状态分布：已完成/已关闭的需求占多数，开放需求约占一成
+STATUS_WEIGHTS = {
+    DemandStatus.DRAFT: 2,
+    DemandStatus.SUBMITTED: 1,
+    DemandStatus.EVALUATED: 1,
+    DemandStatus.MATCHED: 1,
+    DemandStatus.IN_PROGRESS: 5,
+    DemandStatus.COMPLETED: 30,
+    DemandStatus.CLOSED: 10,
+}
+# 企业分布：以需求方为主，已认证的供应商约占一成
+TYPE_WEIGHTS = {EnterpriseType.DEMAND: 8, EnterpriseType.SUPPLY: 1, EnterpriseType.BOTH: 1}
+ENTERPRISE_STATUS_WEIGHTS = {
+    EnterpriseStatus.PENDING: 3,
+    EnterpriseStatus.VERIFIED: 5,
+    EnterpriseStatus.REJECTED: 1,
+    EnterpriseStatus.SUSPENDED: 1,
+}
+
+
+def seed(engine, demand_count: int = 20000, enterprise_count: int = 5000):
+    rng = random.Random(3)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"企业{i}",
+                "enterprise_type": rng.choices(list(TYPE_WEIGHTS), list(TYPE_WEIGHTS.values()))[0],
+                "status": rng.choices(list(ENTERPRISE_STATUS_WEIGHTS), list(ENTERPRISE_STATUS_WEIGHTS.values()))[0]
+            }
+            for i in range(1, enterprise_count + 1)
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": rng.randint(1, enterprise_count),
+                "title": f"需求{i}", "description": "测试",
+                "status": rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0],
+                "confidentiality": ConfidentialityLevel.PUBLIC,
+                "required_certifications": [],
+                "created_at": start + timedelta(minutes=i)
+            }
+            for i in range(1, demand_count + 1)
+        ])
+        connection.execute(insert(Tag), [{"id": i, "name": f"标签{i}"} for i in range(1, 201)])
+        connection.execute(insert(DemandTag), [
+            {"demand_id": demand_id, "tag_id": tag_id}
+            for demand_id in range(1, demand_count + 1)
+            for tag_id in rng.sample(range(1, 201), 3)
+        ])
+        connection.execute(insert(DemandMatch), [
+            {
+                "demand_id": demand_id, "vendor_id": rng.randint(1, enterprise_count),
+                "rank": rank, "score": rng.random(), "breakdown": {}
+            }
+            for demand_id in range(1, demand_count + 1, 4)
+            for rank in range(1, 6)
+        ])
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        upgrade_database(bind=engine)
+        seed(engine)
+
+        with Session(engine) as db:
+            report = check_query_plans(db, analyze=True)
+        engine.dispose()
+
+    for name, item in report.items():
+        assert item["ok"], f"{name} 未使用 {item['index']}: {item['plan']}"
+
+
+if __name__ == "__main__":
+    try:
+        test_hot_queries_use_indexes()
+        print("✅ 需求列表与匹配查询均命中预期索引")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
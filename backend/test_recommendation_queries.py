@@ -0,0 +1,148 @@
+"""
+推荐接口查询次数测试
+用 Alembic 迁移创建临时数据库，验证推荐接口每页的 SQL 语句数固定（批量加载关联，没有 N+1 查询），
+与每页条数、匹配结果数量无关
+"""
+import os
+import sys
+import asyncio
+import random
+import tempfile
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.api import recommendations
+from app.core import create_access_token, get_async_db
+from app.core.migrations import upgrade_database
+from app.models import Demand, DemandMatch, Enterprise, User, UserRole
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+
+DEMAND_COUNT = 120
+VENDOR_COUNT = 30
+MATCHES_PER_DEMAND = 5
+# 1..VENDOR_COUNT 为供应方，其后为需求方企业
+DEMAND_ENTERPRISES = range(VENDOR_COUNT + 1, VENDOR_COUNT + 11)
+
+
+def seed(engine):
+    rng = random.Random(5)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"企业{i}",
+                "enterprise_type": EnterpriseType.SUPPLY if i <= VENDOR_COUNT else EnterpriseType.DEMAND,
+                "status": EnterpriseStatus.VERIFIED
+            }
+            for i in range(1, DEMAND_ENTERPRISES.stop)
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": DEMAND_ENTERPRISES[i % len(DEMAND_ENTERPRISES)],
+                "title": f"需求{i}", "description": "测试",
+                "status": DemandStatus.MATCHED,
+                "confidentiality": ConfidentialityLevel.PUBLIC,
+                "required_certifications": [],
+                "created_at": start + timedelta(minutes=i)
+            }
+            for i in range(1, DEMAND_COUNT + 1)
+        ])
+        connection.execute(insert(DemandMatch), [
+            {
+                "demand_id": demand_id, "vendor_id": vendor_id,
+                "rank": rank, "score": rng.random(), "breakdown": {}, "reasons": ["测试"]
+            }
+            for demand_id in range(1, DEMAND_COUNT + 1)
+            for rank, vendor_id in enumerate(rng.sample(range(1, VENDOR_COUNT + 1), MATCHES_PER_DEMAND), 1)
+        ])
+        connection.execute(insert(User), [
+            {"id": 1, "email": "admin@test.com", "hashed_password": "-", "role": UserRole.ADMIN, "enterprise_id": None},
+            {"id": 2, "email": "demand@test.com", "hashed_password": "-", "role": UserRole.DEMAND,
+             "enterprise_id": DEMAND_ENTERPRISES[0]},
+            {"id": 3, "email": "supply@test.com", "hashed_password": "-", "role": UserRole.SUPPLY, "enterprise_id": 1},
+        ])
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id), "user_id": user_id})}
+
+
+def test_recommendations_fixed_query_count():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "recommendations.db")
+        sync_engine = create_engine(f"sqlite:///{path}")
+        upgrade_database(bind=sync_engine)
+        seed(sync_engine)
+        sync_engine.dispose()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        statements = []
+        event.listen(
+            async_engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+
+        async def override_db():
+            async with sessions() as db:
+                yield db
+
+        app = FastAPI()
+        app.include_router(recommendations.router)
+        app.dependency_overrides[get_async_db] = override_db
+
+        def fetch(path: str, user_id: int, **params):
+            statements.clear()
+            response = client.get(path, headers=auth(user_id), params=params)
+            assert response.status_code == 200, response.text
+            return response.json(), len(statements)
+
+        # 用户 + 计数 + 分页 + 匹配结果 + 企业（供应商与需求方合并）；供应方另有企业类型校验
+        expected = {
+            ("/recommendations/my-suppliers", 2): 5,
+            ("/recommendations/admin/all-matches", 1): 5,
+            ("/recommendations/my-clients", 3): 6,
+        }
+        try:
+            with TestClient(app) as client:
+                for (path, user_id), count in expected.items():
+                    counts = set()
+                    for limit in (1, 10, 100):
+                        data, queries = fetch(path, user_id, limit=limit)
+                        assert data["items"], path
+                        counts.add(queries)
+                    assert counts == {count}, f"{path} 每页查询次数: {sorted(counts)}"
+
+                    # 游标分页不计算总数，少一次查询
+                    data, queries = fetch(path, user_id, limit=100, cursor="")
+                    assert queries == count - 1, f"{path} 游标分页查询次数: {queries}"
+
+                data, _ = fetch("/recommendations/admin/all-matches", 1, limit=100)
+                assert data["total"] == DEMAND_COUNT
+                item = data["items"][0]
+                assert item["demand_enterprise"]["name"] == f"企业{item['demand']['enterprise_id']}"
+                assert item["match_count"] == MATCHES_PER_DEMAND
+                for supplier, result in zip(item["matched_suppliers"], item["demand"]["match_results"]):
+                    assert supplier["enterprise"]["name"] == result["vendor_name"]
+                scores = [result["score"] for result in item["demand"]["match_results"]]
+                assert [s["score"] for s in item["matched_suppliers"]] == scores
+
+                data, _ = fetch("/recommendations/my-clients", 3, limit=100)
+                for item in data["items"]:
+                    assert item["client_enterprise"]["id"] == item["demand"]["enterprise_id"]
+                    assert 1 in [result["vendor_id"] for result in item["demand"]["match_results"]]
+        finally:
+            asyncio.run(async_engine.dispose())
+    print("✅ 推荐接口每页查询次数固定")
+
+
+if __name__ == "__main__":
+    try:
+        test_recommendations_fixed_query_count()
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
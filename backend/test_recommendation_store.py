@@ -0,0 +1,159 @@
+"""
+推荐物化表测试
+用 Alembic 迁移创建临时数据库，验证：读取不构建推荐表、不提交任务，推荐表为空时实时计算，由 worker 定期检查时构建；
+已物化的列表（包括空列表）直接读取而不实时计算；需求修改后提交后台刷新任务，刷新完成前读取过期的列表并标记，
+不接受过期结果时实时计算；评分配置变化后由 worker 定期检查为全部列表提交刷新任务；
+需求删除后受影响的供应商列表提交刷新任务
+"""
+import sys
+import pytest
+from sqlalchemy import insert
+from app.models import Demand, Enterprise, Job, JobType, JobStatus, Recommendation, RecommendationList
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.job_queue import job_queue
+from app.services.recommendation_store import RecommendationStore, VENDOR_SIDE, DEMAND_SIDE
+
+VENDOR_IDS = range(1, 7)
+DEMAND_IDS = range(1, 6)
+# 最低信用分无法满足，物化后为空列表
+EMPTY_DEMAND_ID = 5
+TOP_N = 3
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"供应商{i}",
+                "enterprise_type": EnterpriseType.SUPPLY, "status": EnterpriseStatus.VERIFIED,
+                "industry_tags": ["制造业"] if i % 2 else ["医疗"],
+                "ai_capabilities": ["视觉检测", "缺陷识别"] if i % 3 else ["自然语言处理"],
+                "credit_score": 60 + i * 5
+            }
+            for i in VENDOR_IDS
+        ] + [
+            {
+                "id": 10, "eid": "EID-10", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+                "status": EnterpriseStatus.VERIFIED, "industry_tags": [], "ai_capabilities": [], "credit_score": 0
+            }
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": 10, "title": f"需求{i}", "description": "产线缺陷视觉检测",
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "industry_tags": ["制造业"] if i % 2 else ["医疗"], "scenario_tags": ["视觉检测"],
+                "budget_max": 100000 * i, "required_certifications": [],
+                "min_vendor_credit": 1000 if i == EMPTY_DEMAND_ID else None
+            }
+            for i in DEMAND_IDS
+        ])
+
+
+def no_live_compute(*args, **kwargs):
+    raise AssertionError("已物化的列表不应实时计算")
+
+
+def refresh_jobs(db, job_type: JobType) -> list:
+    column = Job.enterprise_id if job_type == JobType.REFRESH_VENDOR else Job.demand_id
+    return sorted(
+        owner_id for (owner_id,) in db.query(column).filter(
+            Job.job_type == job_type, Job.status == JobStatus.QUEUED
+        )
+    )
+
+
+def test_materialized_reads_and_refresh(migrated_engine, db_sessions, make_service):
+    seed(migrated_engine)
+    db = db_sessions()
+    service = make_service()
+    service.recommendations = RecommendationStore(service, top_n=TOP_N)
+    store = service.recommendations
+    live = (service.match_vendors, service.match_demands_for_vendor)
+    try:
+        # 推荐表为空：读取时不构建、不提交任务，由 worker 定期检查时构建
+        assert store._read(db, DEMAND_SIDE, db.get(Demand, 1), TOP_N) is None
+        assert db.query(RecommendationList).count() == 0 and db.query(Job).count() == 0
+        assert store.schedule_stale(db) == 0
+        assert db.query(RecommendationList).count() == len(VENDOR_IDS) + len(DEMAND_IDS)
+
+        # 已物化：直接读取，空列表同样不实时计算
+        service.match_vendors = service.match_demands_for_vendor = no_live_compute
+        demands = {d.id: d for d in db.query(Demand)}
+        for demand_id, demand in demands.items():
+            results, stale = store.vendors_for_demand(db, demand, TOP_N)
+            assert len(results) == (0 if demand_id == EMPTY_DEMAND_ID else TOP_N) and not stale, demand_id
+        vendor = db.query(Enterprise).filter(Enterprise.id == 1).first()
+        results, stale = store.demands_for_vendor(db, vendor, TOP_N)
+        assert len(results) == TOP_N and not stale
+        assert store.schedule_stale(db) == 0 and db.query(Job).count() == 0
+
+        # 需求修改后提交刷新任务；刷新完成前读取过期的列表，不接受过期结果时实时计算
+        demand = demands[1]
+        expired = [row[0] for row in store._read(db, DEMAND_SIDE, demand, TOP_N)[0]]
+        demand.title = "需求1（修改）"
+        db.commit()
+        service.index_demand(demand, db)
+        assert refresh_jobs(db, JobType.REFRESH_DEMAND) == [1]
+        rows, stale = store._read(db, DEMAND_SIDE, demand, TOP_N)
+        assert stale and [row[0] for row in rows] == expired
+        results, stale = store.vendors_for_demand(db, demand, TOP_N)
+        assert stale and [r["vendor_id"] for r in results] == expired
+        try:
+            store.vendors_for_demand(db, demand, TOP_N, allow_stale=False)
+            raise RuntimeError("不接受过期结果时应实时计算")
+        except AssertionError:
+            pass
+        # 已有未完成的刷新任务，不重复提交
+        assert store.schedule_stale(db) == 0
+
+        # worker 领取并刷新后重新物化
+        job = job_queue.claim(db, "test-worker")
+        assert job.job_type == JobType.REFRESH_DEMAND and job.demand_id == 1
+        store.refresh_demand(db, demand)
+        results, stale = store.vendors_for_demand(db, demand, TOP_N, allow_stale=False)
+        assert len(results) == TOP_N and not stale
+
+        # 评分配置变化后全部列表过期：读取不提交任务，worker 定期检查时为全部列表提交刷新任务
+        service.weights = dict(service.weights, credit_score=0.11)
+        rows, stale = store._read(db, VENDOR_SIDE, vendor, TOP_N)
+        assert stale and len(rows) == TOP_N
+        assert refresh_jobs(db, JobType.REFRESH_VENDOR) == []
+        # 需求1的刷新任务仍在执行中，不重复提交
+        assert store.schedule_stale(db) == len(VENDOR_IDS) + len(DEMAND_IDS) - 1
+        assert refresh_jobs(db, JobType.REFRESH_VENDOR) == list(VENDOR_IDS)
+        assert store.schedule_stale(db) == 0
+        store.refresh_vendor(db, vendor)
+        results, stale = store.demands_for_vendor(db, vendor, TOP_N)
+        assert len(results) == TOP_N and not stale
+        db.expunge(job)
+        db.query(Job).delete()
+        db.commit()
+
+        # 删除需求：移出各供应商列表，原列表已满的供应商提交刷新任务（由 worker 补齐）
+        holders = sorted(owner_id for (owner_id,) in db.query(Recommendation.owner_id).filter(
+            Recommendation.owner_type == VENDOR_SIDE, Recommendation.target_id == 2
+        ))
+        assert holders
+        db.delete(demands[2])
+        db.commit()
+        service.remove_demand(2, db)
+        assert db.query(Recommendation).filter(
+            Recommendation.owner_type == VENDOR_SIDE, Recommendation.target_id == 2
+        ).count() == 0
+        assert refresh_jobs(db, JobType.REFRESH_VENDOR) == holders
+
+        for vendor_id in holders:
+            store.refresh_vendor(db, db.query(Enterprise).filter(Enterprise.id == vendor_id).first())
+        service.match_vendors, service.match_demands_for_vendor = live
+        for vendor_id in holders:
+            owner = db.query(Enterprise).filter(Enterprise.id == vendor_id).first()
+            results, stale = store.demands_for_vendor(db, owner, TOP_N)
+            assert len(results) == TOP_N and 2 not in [r["demand_id"] for r in results] and not stale, vendor_id
+    finally:
+        db.close()
+    print("✅ 推荐列表按物化标记读取，读取不写数据库，修改与删除后由后台任务刷新")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,153 @@
+"""
+只读副本路由测试
+主库与副本使用两个内容不同的临时 SQLite 数据库，验证：普通 SELECT 读副本、
+同一会话的查询固定使用同一个副本、写入后会话留在主库、副本不可用时回退到主库，
+以及按请求方法选择会话的依赖注入
+"""
+import os
+import sys
+import inspect
+import tempfile
+from fastapi import Request
+from sqlalchemy import column, create_engine, select, table, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.api import demands
+from app.core import database
+from app.core.database import get_db, get_primary_db
+from app.core.replicas import ReplicaSet, RoutingSession
+
+items = table("items", column("id"), column("source"))
+
+
+def make_engine(path: str, source: str):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, source TEXT NOT NULL)"))
+        conn.execute(text("INSERT INTO items (id, source) VALUES (1, :source)"), {"source": source})
+    return engine
+
+
+def sources(session) -> list:
+    return session.execute(select(items.c.source).order_by(items.c.id)).scalars().all()
+
+
+def make_request(method: str) -> Request:
+    return Request({"type": "http", "method": method, "headers": []})
+
+
+def test_reads_replica_and_sticks_to_primary_after_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = make_engine(os.path.join(tmp, "primary.db"), "primary")
+        replica = make_engine(os.path.join(tmp, "replica.db"), "replica")
+        sessions = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet([replica]))
+        try:
+            with sessions() as session:
+                # 无法判断是否只读的文本语句使用主库，并且之后留在主库
+                assert session.execute(text("SELECT source FROM items")).scalar() == "primary"
+                assert session.use_primary and sources(session) == ["primary"]
+
+            with sessions() as session:
+                # 普通 SELECT 读副本；SELECT ... FOR UPDATE 使用主库
+                assert sources(session) == ["replica"] and not session.use_primary
+                assert session.get_bind(clause=select(items).with_for_update()) is primary
+                assert session.use_primary
+
+            with sessions() as session:
+                assert sources(session) == ["replica"]
+
+                # 写入后同一会话的查询留在主库，读到自己的写入
+                session.execute(items.insert().values(id=2, source="written"))
+                assert session.use_primary
+                assert sources(session) == ["primary", "written"]
+                session.commit()
+                assert sources(session) == ["primary", "written"]
+
+            # 新会话重新读副本
+            with sessions() as session:
+                assert sources(session) == ["replica"]
+        finally:
+            primary.dispose()
+            replica.dispose()
+
+
+def test_session_pins_one_replica():
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = make_engine(os.path.join(tmp, "primary.db"), "primary")
+        replicas = [make_engine(os.path.join(tmp, f"replica{i}.db"), f"replica{i}") for i in range(2)]
+        sessions = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet(replicas))
+        try:
+            # 会话内多次查询使用同一个副本，不同会话轮询选择
+            seen = []
+            for _ in range(4):
+                with sessions() as session:
+                    first = sources(session)
+                    for _ in range(3):
+                        assert sources(session) == first
+                    seen.append(first[0])
+            assert seen == ["replica0", "replica1", "replica0", "replica1"]
+        finally:
+            primary.dispose()
+            for replica in replicas:
+                replica.dispose()
+
+
+def test_unhealthy_replica_falls_back_to_primary():
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = make_engine(os.path.join(tmp, "primary.db"), "primary")
+        replica = make_engine(os.path.join(tmp, "replica.db"), "replica")
+        # 所在目录不存在，连接失败
+        broken = create_engine(f"sqlite:///{os.path.join(tmp, 'missing', 'replica.db')}")
+        replica_set = ReplicaSet([broken, replica], check_interval=60)
+        sessions = sessionmaker(class_=RoutingSession, bind=primary, replicas=replica_set)
+        try:
+            # 不可用的副本被跳过，轮询总是落到健康的副本
+            for _ in range(4):
+                with sessions() as session:
+                    assert sources(session) == ["replica"]
+            assert [s["healthy"] for s in replica_set.status()] == [False, True]
+
+            # 全部副本不可用时使用主库
+            replica_set.mark_failed(replica)
+            with sessions() as session:
+                assert sources(session) == ["primary"]
+        finally:
+            primary.dispose()
+            replica.dispose()
+            broken.dispose()
+
+
+def test_get_db_selects_session_by_method():
+    parameter = inspect.signature(get_db).parameters["request"]
+    assert parameter.annotation is Request
+
+    replicas = database.replicas
+    database.replicas = ReplicaSet([database.engine])
+    try:
+        for method, routed in (("GET", True), ("HEAD", True), ("POST", False)):
+            dependency = get_db(make_request(method))
+            assert isinstance(next(dependency), RoutingSession) is routed, method
+            dependency.close()
+
+        dependency = get_primary_db()
+        db = next(dependency)
+        assert isinstance(db, Session) and not isinstance(db, RoutingSession)
+        dependency.close()
+    finally:
+        database.replicas = replicas
+
+    # 推荐列表未物化时实时计算并写回分数缓存，固定使用主库
+    db_parameter = inspect.signature(demands.get_recommended_demands).parameters["db"]
+    assert db_parameter.default.dependency is get_primary_db
+
+
+if __name__ == "__main__":
+    try:
+        test_reads_replica_and_sticks_to_primary_after_write()
+        test_session_pins_one_replica()
+        test_unhealthy_replica_falls_back_to_primary()
+        test_get_db_selects_session_by_method()
+        print("✅ 查询读副本，写入后留在主库，副本不可用时回退到主库")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
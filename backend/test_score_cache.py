@@ -0,0 +1,148 @@
+"""
+匹配分数缓存测试
+用 Alembic 迁移创建临时数据库，验证：重复评分命中缓存且与重新计算的结果一致；
+供应商或需求的 updated_at 变化、评分配置变化后缓存失效并重新计算写回；只写回前 top_k 名；
+阈值检索只写回返回的前 top_k 名，不写回随机访问过的其余供应商；删除需求时清除缓存行
+"""
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import insert
+from app.core.write_queue import WriteQueue
+from app.models import Demand, Enterprise, MatchScore
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.matching_service import MatchingService
+from app.services.recommendation_store import demand_match_data
+from app.services.scoring_engine import rank_top_k
+from app.services.score_cache import ScoreCache
+from app.services.vendor_snapshot import VendorProfile
+
+VENDOR_IDS = range(1, 11)
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"供应商{i}",
+                "enterprise_type": EnterpriseType.SUPPLY, "status": EnterpriseStatus.VERIFIED,
+                "industry_tags": ["制造业"] if i % 2 else ["医疗"],
+                "ai_capabilities": ["视觉检测", "缺陷识别"] if i % 3 else ["自然语言处理"],
+                "credit_score": 60 + i * 3, "address": "重庆市渝北区" if i % 4 else "四川省成都市"
+            }
+            for i in VENDOR_IDS
+        ] + [
+            {
+                "id": 100, "eid": "EID-100", "name": "需求方", "enterprise_type": EnterpriseType.DEMAND,
+                "status": EnterpriseStatus.VERIFIED, "industry_tags": [], "ai_capabilities": [],
+                "credit_score": 0, "address": None
+            }
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": 1, "enterprise_id": 100, "title": "产线缺陷视觉检测", "description": "检测零部件表面缺陷",
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "industry_tags": ["制造业"], "scenario_tags": ["视觉检测"], "budget_max": 200000,
+                "required_certifications": []
+            }
+        ])
+
+
+def score(service: MatchingService, db, demand, vendors, top_k: int = len(VENDOR_IDS)) -> tuple:
+    """评分一次（写回前 top_k 名），返回 (总分, 得分明细, 本次命中数, 本次未命中数)"""
+    cache = service.score_cache
+    hits, misses = cache.hits, cache.misses
+    _, totals, components = service.score_vendor_candidates(
+        demand_match_data(demand), db, vendors=vendors, top_k=top_k
+    )
+    return totals, components, cache.hits - hits, cache.misses - misses
+
+
+def with_version(profile: VendorProfile, updated_at: datetime) -> VendorProfile:
+    return VendorProfile(
+        profile.id, profile.eid, profile.name, profile.industry_tags, profile.ai_capabilities,
+        profile.credit_score, profile.geo_local, profile.contact_email, updated_at
+    )
+
+
+def test_cache_hits_and_invalidation(migrated_engine, db_sessions, make_service):
+    seed(migrated_engine)
+    db = db_sessions()
+    service = make_service()
+    # 分数缓存经（不启用写线程的）写队列写入临时数据库，写回在调用线程中完成
+    service.score_cache = ScoreCache(writer=WriteQueue(session_factory=db_sessions, enabled=False))
+    try:
+        service.ensure_indexes(db)
+        vendors = service.vendor_snapshot.profiles()
+        demand = db.get(Demand, 1)
+        count = len(VENDOR_IDS)
+
+        # 首次评分全部未命中并写回，再次评分全部命中，与不使用缓存的结果一致
+        totals, components, hits, misses = score(service, db, demand, vendors)
+        assert (hits, misses) == (0, count)
+        assert db.query(MatchScore).filter(MatchScore.demand_id == 1).count() == count
+        cached_totals, cached_components, hits, misses = score(service, db, demand, vendors)
+        assert (hits, misses) == (count, 0)
+        assert np.allclose(cached_totals, totals) and np.allclose(cached_components, components)
+        _, fresh_totals, _ = service.score_vendor_candidates(
+            demand_match_data(demand), db, vendors=vendors, use_cache=False
+        )
+        assert np.allclose(fresh_totals, totals)
+
+        # 供应商 updated_at 变化：只有该供应商重新计算，缓存行更新为新版本
+        changed_at = vendors[2].updated_at + timedelta(minutes=5)
+        vendors = [with_version(v, changed_at) if v.id == 3 else v for v in vendors]
+        _, _, hits, misses = score(service, db, demand, vendors)
+        assert (hits, misses) == (count - 1, 1)
+        row = db.query(MatchScore).filter(MatchScore.demand_id == 1, MatchScore.vendor_id == 3).one()
+        assert row.vendor_version == changed_at
+        _, _, hits, misses = score(service, db, demand, vendors)
+        assert (hits, misses) == (count, 0)
+
+        # 需求修改后 updated_at 变化：全部重新计算
+        demand.title = "产线缺陷视觉检测（修改）"
+        db.commit()
+        _, _, hits, misses = score(service, db, demand, vendors)
+        assert (hits, misses) == (0, count)
+        db.expire_all()
+        assert {row.demand_version for row in db.query(MatchScore)} == {demand.updated_at}
+
+        # 评分权重变化：评分配置版本变化，全部重新计算，只写回前 3 名
+        service.weights = dict(service.weights, credit_score=0.2, geo_proximity=0.0)
+        totals, _, hits, misses = score(service, db, demand, vendors, top_k=3)
+        assert (hits, misses) == (0, count)
+        top = {vendors[i].id for i in rank_top_k(totals, 3, [v.id for v in vendors])}
+        version = service.current_scoring_version()
+        assert {row.vendor_id for row in db.query(MatchScore).filter(MatchScore.scoring_version == version)} == top
+        _, _, hits, misses = score(service, db, demand, vendors, top_k=3)
+        assert (hits, misses) == (3, count - 3)
+
+        # 阈值检索：随机访问过的供应商多于返回的前 top_k 名，只写回返回的供应商
+        db.query(MatchScore).delete()
+        db.commit()
+        writes, misses = service.score_cache.writes, service.score_cache.misses
+        ranked = service.rank_vendors_threshold(demand_match_data(demand), db, 2)
+        assert ranked is not None and service.score_cache.misses - misses > 2
+        returned = {vendor.id for vendor in ranked[0]}
+        assert {row.vendor_id for row in db.query(MatchScore)} == returned and len(returned) == 2
+        assert service.score_cache.writes == writes + 2
+
+        # 需求数据不带 id 时不读写缓存
+        writes = service.score_cache.writes
+        service.score_vendor_candidates({"title": "临时需求", "industry_tags": ["制造业"]}, db, vendors=vendors)
+        assert service.score_cache.writes == writes
+
+        # 删除需求时清除缓存行
+        service.score_cache.remove_demand(db, 1)
+        db.commit()
+        assert db.query(MatchScore).count() == 0
+        assert service.score_cache.stats(db)["cached_pairs"] == 0
+    finally:
+        db.close()
+    print("✅ 分数缓存命中时不重新计算，updated_at 或评分配置变化后失效")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
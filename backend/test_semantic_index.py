@@ -0,0 +1,158 @@
+"""
+语义相似度索引测试
+验证 TF-IDF 索引给出的相似度与直接计算的余弦相似度一致、相关文本排在前面，
+以及增量更新、过期文档同步、删除、持久化与后台重新拟合
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import joblib
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from app.services.semantic_index import SemanticIndex, demand_text, vendor_text
+from app.services.vendor_snapshot import VendorProfile
+
+BASE_TIME = datetime(2024, 6, 1)
+
+VENDOR_TEXTS = {
+    1: ("工业视觉缺陷检测与产线质检", ["计算机视觉", "缺陷检测"], ["制造业"]),
+    2: ("智能客服与文本分析", ["自然语言处理", "智能问答"], ["金融"]),
+    3: ("语音识别与语音合成", ["语音识别"], ["政务"]),
+    4: ("商品推荐与用户画像", ["推荐系统"], ["零售"]),
+    5: ("医学影像辅助诊断", ["计算机视觉", "图像识别"], ["医疗"]),
+}
+
+
+def make_vendor(vendor_id: int, version: int = 0, scope: str = None) -> SimpleNamespace:
+    default_scope, capabilities, industries = VENDOR_TEXTS[vendor_id]
+    return SimpleNamespace(
+        id=vendor_id, business_scope=scope or default_scope, ai_capabilities=capabilities,
+        industry_tags=industries, capability_details=None, updated_at=BASE_TIME + timedelta(minutes=version)
+    )
+
+
+def make_demand(demand_id: int, title: str, description: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=demand_id, title=title, description=description, scenario_tags=[], industry_tags=[],
+        updated_at=BASE_TIME
+    )
+
+
+def fitted_index(path: str, **kwargs) -> SemanticIndex:
+    index = SemanticIndex(path, **kwargs)
+    index.fit(
+        [make_vendor(i) for i in VENDOR_TEXTS],
+        [make_demand(1, "产线视觉质检", "检测零部件表面缺陷"), make_demand(2, "政务热线", "语音识别转写")]
+    )
+    return index
+
+
+def test_similarity_matches_cosine():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = fitted_index(os.path.join(tmp, "semantic.joblib"))
+        vendors = [make_vendor(i) for i in VENDOR_TEXTS]
+        demand = {"title": "零部件表面缺陷视觉检测", "description": "产线质检", "scenario_tags": ["缺陷检测"]}
+
+        scores = index.score_vendors(demand, vendors)
+        expected = cosine_similarity(
+            index.vectorizer.transform([demand_text(demand)]),
+            index.vectorizer.transform([vendor_text(v) for v in vendors])
+        ).ravel()
+        assert np.allclose(scores, expected), (scores, expected)
+        assert int(np.argmax(scores)) == 0, "视觉质检供应商应最相关"
+
+        # 有序访问按相似度降序，随机访问与逐个计算一致；未索引的文档为 0
+        ranking = index.rank_vendors(demand)
+        ordered = list(ranking.iter_desc())
+        assert [s for _, s in ordered] == sorted((s for _, s in ordered), reverse=True)
+        assert ordered[0][0] == 1
+        for vendor, score in zip(vendors, scores):
+            assert abs(ranking.get(vendor.id) - score) < 1e-12
+        assert ranking.get(99) == 0.0
+
+        # 反向匹配
+        demand_scores = index.score_demands(make_vendor(3), [make_demand(1, "", ""), make_demand(2, "", "")])
+        assert demand_scores[1] > demand_scores[0], demand_scores
+
+        # 查询文本为空或索引不可用时不计算
+        assert index.score_vendors({"title": ""}, vendors) is None
+        assert SemanticIndex(os.path.join(tmp, "unused.joblib")).score_vendors(demand, vendors) is None
+
+
+def test_incremental_updates():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = fitted_index(os.path.join(tmp, "semantic.joblib"), refit_ratio=100)
+        demand = {"title": "语音识别", "description": "热线录音转写"}
+        before = index.score_vendors(demand, [make_vendor(4)])[0]
+
+        # 更新文本后相似度随之变化
+        index.upsert_vendor(make_vendor(4, version=1, scope="语音识别 热线录音转写"))
+        after = index.score_vendors(demand, [make_vendor(4, version=1, scope="语音识别 热线录音转写")])[0]
+        assert after > before, (before, after)
+
+        # 版本更新的记录在评分时同步；不含文本的档案沿用索引中的向量
+        newer = make_vendor(4, version=2)
+        assert index.stale_vendor_ids([newer]) == [4]
+        restored = index.score_vendors(demand, [newer])[0]
+        assert abs(restored - before) < 1e-12
+        profile = VendorProfile(4, "EID-4", "供应商4", [], [], 80.0, False, None, BASE_TIME + timedelta(minutes=3))
+        assert abs(index.score_vendors(demand, [profile])[0] - before) < 1e-12
+
+        # 删除后不再参与排序；之后按记录评分时重新补入索引
+        assert index.rank_vendors(demand).get(3) > 0
+        index.remove_vendor(3)
+        assert index.rank_vendors(demand).get(3) == 0.0
+        assert index.score_vendors(demand, [make_vendor(3)])[0] > 0
+        assert index.rank_vendors(demand).get(3) > 0
+
+
+def test_persistence_and_refit():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "semantic.joblib")
+        index = fitted_index(path, refit_ratio=0.5)
+        demand = {"title": "医学影像", "description": "辅助诊断"}
+        vendors = [make_vendor(i) for i in VENDOR_TEXTS]
+
+        # 拟合后已保存，新实例加载后相似度与拟合标识一致
+        loaded = SemanticIndex(path)
+        assert loaded.load()
+        assert loaded.fit_id == index.fit_id
+        assert np.allclose(loaded.score_vendors(demand, vendors), index.score_vendors(demand, vendors))
+
+        # 格式版本不一致的文件被忽略
+        state = joblib.load(path)
+        state["format"] = -1
+        joblib.dump(state, path)
+        assert not SemanticIndex(path).load()
+
+        # 变更的文档超过已拟合文档的一半时在后台重新拟合
+        fit_id = index.fit_id
+        for vendor_id in VENDOR_TEXTS:
+            index.upsert_vendor(make_vendor(vendor_id, version=1))
+        deadline = time.monotonic() + 10
+        while (index.fit_id == fit_id or index._refitting) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert index.fit_id != fit_id, "没有重新拟合"
+        assert SemanticIndex(path).load(), "重新拟合后应保存"
+        assert np.allclose(
+            index.score_vendors(demand, [make_vendor(i, version=1) for i in VENDOR_TEXTS]),
+            cosine_similarity(
+                index.vectorizer.transform([demand_text(demand)]),
+                index.vectorizer.transform([vendor_text(v) for v in vendors])
+            ).ravel()
+        )
+
+
+if __name__ == "__main__":
+    try:
+        test_similarity_matches_cosine()
+        test_incremental_updates()
+        test_persistence_and_refit()
+        print("✅ 语义索引相似度与余弦相似度一致，增量更新、持久化与重新拟合正确")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
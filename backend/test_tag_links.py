@@ -0,0 +1,176 @@
+"""
+标签关联表测试
+用 Alembic 迁移创建临时数据库，验证：回填后按标签筛选（AND/OR，同义词按同一标签处理，词典中没有的标签）
+与逐条比较标签字段的结果一致；经 ORM 新增、修改、删除需求与企业时关联表同步；
+需求与企业列表接口的 tags= / tag_mode= 参数按相同语义筛选
+"""
+import sys
+import random
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from app.api import demands, enterprises
+from app.core import async_database, create_access_token
+from app.core.async_database import async_database_url, dispose_async_engine
+from app.core.config import settings
+from app.models import Demand, DemandTag, Enterprise, EnterpriseTag, User, UserRole
+from app.models.demand import DemandStatus, ConfidentialityLevel
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services import tag_dictionary as tag_dictionary_module
+from app.services import tag_links
+from app.services.tag_dictionary import TagDictionary
+
+INDUSTRIES = ["制造业", "金融", "金融服务", "医疗", "医疗健康", "零售"]
+CAPABILITIES = ["计算机视觉", "图像识别", "CV", "自然语言处理", "nlp", "语音识别", "推荐系统", "缺陷检测"]
+QUERY_TAGS = INDUSTRIES + CAPABILITIES + ["不存在的标签"]
+
+
+def seed(engine, rng: random.Random):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"企业{i}",
+                "enterprise_type": EnterpriseType.SUPPLY if i > 1 else EnterpriseType.DEMAND,
+                "status": EnterpriseStatus.VERIFIED,
+                "industry_tags": rng.sample(INDUSTRIES, rng.randint(0, 2)),
+                "ai_capabilities": rng.sample(CAPABILITIES, rng.randint(0, 3))
+            }
+            for i in range(1, 41)
+        ])
+        connection.execute(insert(Demand), [
+            {
+                "id": i, "enterprise_id": 1, "title": f"标签筛选需求{i}",
+                "description": "按标签筛选需求列表的测试数据",
+                "status": DemandStatus.SUBMITTED, "confidentiality": ConfidentialityLevel.PUBLIC,
+                "required_certifications": [],
+                "industry_tags": rng.sample(INDUSTRIES, rng.randint(0, 2)),
+                "scenario_tags": rng.sample(CAPABILITIES, rng.randint(0, 3))
+            }
+            for i in range(1, 61)
+        ])
+        connection.execute(insert(User), [
+            {"id": 1, "email": "admin@test.com", "hashed_password": "-", "role": UserRole.ADMIN, "enterprise_id": None}
+        ])
+
+
+def expected_ids(dictionary: TagDictionary, records, names: list, mode: str) -> set:
+    """逐条比较标签字段：同义词归为同一标签"""
+    wanted = [dictionary.mask([name]) for name in names]
+    result = set()
+    for record in records:
+        mask = dictionary.mask(tag_links.tag_names(record))
+        hits = [bool(mask & bit) for bit in wanted]
+        if all(hits) if mode == "and" else any(hits):
+            result.add(record.id)
+    return result
+
+
+def filtered_ids(db, model, names: list, mode: str) -> set:
+    condition = tag_links.tag_filter(db, model, names, mode)
+    query = db.query(model.id)
+    if condition is not None:
+        query = query.filter(condition)
+    return {record_id for record_id, in query}
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(user_id), "user_id": user_id})}
+
+
+# 企业经 ORM 写入时全局快照随之更新
+@pytest.mark.usefixtures("preserved_vendor_snapshot")
+def test_tag_filters(migrated_engine, db_sessions):
+    rng = random.Random(20240619)
+    # 词典表 ID 随数据库而定：测试期间使用新的标签词典，不影响全局实例
+    saved_dictionary = tag_dictionary_module.tag_dictionary
+    dictionary = TagDictionary()
+    tag_dictionary_module.tag_dictionary = dictionary
+    tag_links.tag_dictionary = dictionary
+    saved_async = (
+        settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+        async_database._async_sessions, async_database._async_read_sessions
+    )
+    seed(migrated_engine, rng)
+    db = db_sessions()
+    try:
+        # 回填已有数据（可重复执行）
+        summary = tag_links.sync_tag_links(db, batch_size=7)
+        assert summary["demand_tags"] == 60 and summary["enterprise_tags"] == 40
+        link_count = db.query(DemandTag).count() + db.query(EnterpriseTag).count()
+        tag_links.sync_tag_links(db, batch_size=100)
+        assert db.query(DemandTag).count() + db.query(EnterpriseTag).count() == link_count
+
+        def check_all():
+            records = {
+                Demand: db.query(Demand).all(),
+                Enterprise: db.query(Enterprise).all()
+            }
+            for _ in range(60):
+                names = rng.sample(QUERY_TAGS, rng.randint(1, 3))
+                for mode in ("and", "or"):
+                    for model, rows in records.items():
+                        assert filtered_ids(db, model, names, mode) == expected_ids(
+                            dictionary, rows, names, mode
+                        ), (model.__name__, names, mode)
+
+        check_all()
+        assert filtered_ids(db, Demand, [], "and") == set(range(1, 61))
+        assert filtered_ids(db, Demand, ["不存在的标签"], "or") == set()
+        # 同义词筛选结果相同
+        assert filtered_ids(db, Enterprise, ["图像识别"], "and") == filtered_ids(db, Enterprise, ["CV"], "and")
+
+        # 经 ORM 写入时同步关联表
+        demand = db.get(Demand, 1)
+        demand.scenario_tags = ["知识图谱", "knowledge_graph"]
+        db.add(Demand(
+            id=61, enterprise_id=1, title="新增的标签需求", description="按标签筛选需求列表的测试数据",
+            status=DemandStatus.SUBMITTED, confidentiality=ConfidentialityLevel.PUBLIC, required_certifications=[],
+            industry_tags=["医疗健康"], scenario_tags=["全新场景"]
+        ))
+        db.get(Enterprise, 2).ai_capabilities = ["全新场景"]
+        db.delete(db.get(Demand, 2))
+        db.commit()
+        assert filtered_ids(db, Demand, ["knowledge_graph"], "and") >= {1}
+        assert filtered_ids(db, Demand, ["全新场景", "医疗"], "and") == {61}
+        assert filtered_ids(db, Enterprise, ["全新场景"], "or") == {2}
+        assert db.query(DemandTag).filter(DemandTag.demand_id == 2).count() == 0
+        check_all()
+
+        # 列表接口
+        settings.DATABASE_ASYNC_URL = async_database_url(str(migrated_engine.url))
+        async_database._async_engine = None
+        async_database._async_replica_engines = []
+        app = FastAPI()
+        app.include_router(demands.router)
+        app.include_router(enterprises.router)
+        all_demands = db.query(Demand).all()
+        all_enterprises = db.query(Enterprise).all()
+        with TestClient(app) as client:
+            for names, mode in ((["制造业", "计算机视觉"], "and"), (["金融", "nlp"], "or"), (["医疗"], "and")):
+                params = {"tags": names, "tag_mode": mode, "limit": 100}
+                response = client.get("/demands", params=params, headers=auth(1))
+                assert response.status_code == 200, response.text
+                expected = expected_ids(dictionary, all_demands, names, mode)
+                assert expected and {item["id"] for item in response.json()["items"]} == expected
+                response = client.get("/enterprises", params=params, headers=auth(1))
+                assert response.status_code == 200, response.text
+                assert {item["id"] for item in response.json()["items"]} == expected_ids(
+                    dictionary, all_enterprises, names, mode
+                )
+            assert client.get("/demands", params={"tag_mode": "xor"}, headers=auth(1)).status_code == 422
+    finally:
+        db.close()
+        asyncio.run(dispose_async_engine())
+        (
+            settings.DATABASE_ASYNC_URL, async_database._async_engine, async_database._async_replica_engines,
+            async_database._async_sessions, async_database._async_read_sessions
+        ) = saved_async
+        tag_dictionary_module.tag_dictionary = saved_dictionary
+        tag_links.tag_dictionary = saved_dictionary
+    print("✅ 标签筛选与逐条比较一致，关联表随写入同步")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
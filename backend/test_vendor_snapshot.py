@@ -0,0 +1,130 @@
+"""
+供应商快照测试
+用 Alembic 迁移创建临时数据库，验证：快照只包含已认证的供应方且与数据库一致；
+企业的新增、修改、取消认证与删除在事务提交后同步到快照，回滚的变更不生效；
+整体替换快照时保留比新版本更晚的本进程变更
+"""
+import sys
+import time
+import pytest
+from sqlalchemy import insert
+from app.models import Enterprise
+from app.models.enterprise import EnterpriseType, EnterpriseStatus
+from app.services.vendor_snapshot import VendorProfile, VendorSnapshot, load_profiles
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(Enterprise), [
+            {
+                "id": i, "eid": f"EID-{i}", "name": f"企业{i}",
+                "enterprise_type": [EnterpriseType.SUPPLY, EnterpriseType.BOTH, EnterpriseType.DEMAND][i % 3],
+                "status": EnterpriseStatus.PENDING if i % 5 == 0 else EnterpriseStatus.VERIFIED,
+                "industry_tags": ["制造业"], "ai_capabilities": ["视觉检测"], "credit_score": 60 + i,
+                "address": "重庆市渝北区" if i % 2 else "四川省成都市", "contact_email": f"e{i}@example.com"
+            }
+            for i in range(1, 13)
+        ])
+
+
+def profile_fields(profile: VendorProfile) -> tuple:
+    return (
+        profile.id, profile.eid, profile.name, profile.industry_tags, profile.ai_capabilities,
+        profile.credit_score, profile.geo_local, profile.contact_email, profile.updated_at
+    )
+
+
+def test_load_and_commit_sync(migrated_engine, db_sessions, preserved_vendor_snapshot):
+    # 全局快照由 ORM 事件同步
+    vendor_snapshot = preserved_vendor_snapshot
+    seed(migrated_engine)
+    db = db_sessions()
+    try:
+        vendor_snapshot.load(db)
+        expected = [
+            e for e in db.query(Enterprise).order_by(Enterprise.id)
+            if e.enterprise_type != EnterpriseType.DEMAND and e.status == EnterpriseStatus.VERIFIED
+        ]
+        assert [p.id for p in vendor_snapshot.profiles()] == [e.id for e in expected]
+        assert [profile_fields(p) for p in vendor_snapshot.profiles()] == [
+            profile_fields(VendorProfile.from_enterprise(e)) for e in expected
+        ]
+        assert vendor_snapshot.get(1).geo_local and not vendor_snapshot.get(4).geo_local
+        # 需求方与未认证的企业不在快照中
+        assert vendor_snapshot.get(2) is None and vendor_snapshot.get(10) is None
+        assert [p.id for p in vendor_snapshot.profiles([12, 1, 2, 99])] == [1, 12]
+        assert set(vendor_snapshot.get_many([1, 2, 99])) == {1}
+
+        # 新增的供应方在提交后进入快照，回滚的新增不生效
+        db.add(Enterprise(
+            id=20, eid="EID-20", name="新供应商", enterprise_type=EnterpriseType.SUPPLY,
+            status=EnterpriseStatus.VERIFIED, industry_tags=["医疗"], ai_capabilities=[], credit_score=90
+        ))
+        db.flush()
+        assert vendor_snapshot.get(20) is None
+        db.rollback()
+        assert vendor_snapshot.get(20) is None and not vendor_snapshot.has_local_changes
+
+        db.add(Enterprise(
+            id=20, eid="EID-20", name="新供应商", enterprise_type=EnterpriseType.SUPPLY,
+            status=EnterpriseStatus.VERIFIED, industry_tags=["医疗"], ai_capabilities=[], credit_score=90
+        ))
+        db.add(Enterprise(
+            id=21, eid="EID-21", name="新需求方", enterprise_type=EnterpriseType.DEMAND,
+            status=EnterpriseStatus.VERIFIED
+        ))
+        db.commit()
+        assert vendor_snapshot.get(20).industry_tags == ["医疗"] and vendor_snapshot.get(21) is None
+
+        # 修改、取消认证、删除
+        vendor = db.get(Enterprise, 1)
+        vendor.credit_score = 99
+        vendor.ai_capabilities = ["缺陷识别"]
+        db.get(Enterprise, 3).status = EnterpriseStatus.SUSPENDED
+        db.delete(db.get(Enterprise, 4))
+        db.commit()
+        assert vendor_snapshot.get(1).credit_score == 99
+        assert vendor_snapshot.get(1).ai_capabilities == ["缺陷识别"]
+        assert vendor_snapshot.get(1).updated_at == db.get(Enterprise, 1).updated_at
+        assert vendor_snapshot.get(3) is None and vendor_snapshot.get(4) is None
+
+        # 与重新从数据库加载的结果一致
+        assert [profile_fields(p) for p in vendor_snapshot.profiles()] == [
+            profile_fields(p) for p in load_profiles(db)
+        ]
+    finally:
+        db.close()
+
+
+def test_replace_keeps_newer_local_changes():
+    def profile(vendor_id: int, credit: float) -> VendorProfile:
+        return VendorProfile(vendor_id, f"EID-{vendor_id}", f"供应商{vendor_id}", [], [], credit, False, None, credit)
+
+    snapshot = VendorSnapshot()
+    changes = []
+    snapshot.on_change = lambda: changes.append(True)
+    built_at = time.time()
+    changed, removed = snapshot.replace([profile(1, 60), profile(2, 70), profile(3, 80)], "v1", built_at)
+    assert [p.id for p in changed] == [1, 2, 3] and removed == []
+
+    # 本进程在 v1 之后提交的变更
+    time.sleep(0.01)
+    snapshot.apply({1: profile(1, 65), 3: None})
+    assert changes == [True] and snapshot.has_local_changes
+    assert snapshot.get(1).credit_score == 65 and snapshot.get(3) is None
+
+    # 加载构建时间更早的版本：保留本进程的变更
+    changed, removed = snapshot.replace([profile(1, 60), profile(2, 70), profile(3, 80)], "v0", built_at)
+    assert snapshot.get(1).credit_score == 65 and snapshot.get(3) is None
+    assert changed == [] and removed == [] and snapshot.version == "v0"
+
+    # 加载包含这些变更的新版本：以新版本为准，本进程变更清空
+    changed, removed = snapshot.replace([profile(1, 66), profile(2, 70), profile(4, 90)], "v2", time.time())
+    assert not snapshot.has_local_changes
+    assert sorted(p.id for p in changed) == [1, 4] and removed == []
+    assert [p.id for p in snapshot.profiles()] == [1, 2, 4]
+    print("✅ 供应商快照与数据库一致，提交后同步，替换时保留较新的本进程变更")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
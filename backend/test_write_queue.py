@@ -0,0 +1,187 @@
+"""
+写队列测试
+在 WAL 模式的临时 SQLite 数据库上验证：并发写操作合并提交、失败的写操作不影响同批其他写操作、
+写事务进行中读操作不被阻塞、经过队列与不经过队列的写操作并发时都能提交、
+调用方会话有未提交的写操作时拒绝提交到队列；未启用写线程时写操作在调用方会话中提交，不另外借连接
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import column, create_engine, event, insert, table, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from app.core.database import _set_sqlite_pragmas
+from app.core.write_queue import WriteQueue, has_pending_writes
+
+counters = table("counters", column("id"), column("value"))
+
+
+def make_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS counters (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"))
+    return engine
+
+
+def insert_row(row_id: int):
+    def task(session):
+        session.execute(text("INSERT INTO counters (id, value) VALUES (:id, :id)"), {"id": row_id})
+        return row_id
+    return task
+
+
+def test_group_commit_and_failures():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "queue.db"))
+        queue = WriteQueue(sessionmaker(bind=engine), max_batch=32, max_wait_ms=20)
+
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(lambda i: queue.run(insert_row(i)), range(1, 101)))
+        assert results == list(range(1, 101))
+        assert queue.batches < queue.tasks, f"写操作没有合并提交: {queue.stats()}"
+
+        # 主键冲突的写操作失败，同批其他写操作照常提交
+        futures = [queue.submit(insert_row(1))] + [queue.submit(insert_row(i)) for i in range(101, 106)]
+        assert futures[0].exception() is not None
+        assert [f.result() for f in futures[1:]] == list(range(101, 106))
+
+        queue.stop()
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM counters")).scalar() == 105
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        engine.dispose()
+
+
+def test_readers_not_blocked_by_writer():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "queue.db"))
+        queue = WriteQueue(sessionmaker(bind=engine), max_wait_ms=0)
+        writing = threading.Event()
+
+        def slow_write(session):
+            insert_row(1)(session)
+            session.flush()
+            writing.set()
+            time.sleep(0.5)
+
+        future = queue.submit(slow_write)
+        assert writing.wait(5)
+        started = time.monotonic()
+        with engine.connect() as conn:
+            count = conn.execute(text("SELECT COUNT(*) FROM counters")).scalar()
+        elapsed = time.monotonic() - started
+
+        future.result()
+        queue.stop()
+        engine.dispose()
+
+    # 读到写事务开始前的数据，且不等待写事务提交
+    assert count == 0
+    assert elapsed < 0.25, f"读操作等待了 {elapsed:.3f} 秒"
+
+
+def test_mixed_queued_and_direct_writers():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "queue.db"))
+        sessions = sessionmaker(bind=engine)
+        queue = WriteQueue(sessions, max_batch=16, max_wait_ms=5)
+
+        def direct_write(row_id: int):
+            # 不经过队列的写操作：在自己的会话中持有写锁一段时间后提交，写线程由 busy_timeout 等待
+            with sessions() as session:
+                insert_row(row_id)(session)
+                time.sleep(0.01)
+                session.commit()
+            return row_id
+
+        def write(row_id: int):
+            return queue.run(insert_row(row_id)) if row_id % 2 else direct_write(row_id)
+
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(write, range(1, 81)))
+        assert results == list(range(1, 81))
+        assert queue.tasks == 40, queue.stats()
+
+        queue.stop()
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM counters")).scalar() == 80
+        engine.dispose()
+
+
+def test_rejects_caller_with_pending_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "queue.db"))
+        sessions = sessionmaker(bind=engine)
+        queue = WriteQueue(sessions, max_wait_ms=0)
+        session = sessions()
+        try:
+            session.execute(insert(counters).values(id=1, value=1))
+            assert has_pending_writes(session)
+            try:
+                queue.run(insert_row(2), session=session)
+                raise AssertionError("调用方持有写锁时不应提交到写队列")
+            except RuntimeError:
+                pass
+
+            # 提交后写锁释放，可以提交到队列
+            session.commit()
+            assert not has_pending_writes(session)
+            assert queue.run(insert_row(2), session=session) == 2
+
+            # 回滚同样清除标记
+            session.execute(insert(counters).values(id=3, value=3))
+            session.rollback()
+            assert queue.run(insert_row(3), session=session) == 3
+        finally:
+            session.close()
+            queue.stop()
+            engine.dispose()
+
+
+def test_disabled_queue_uses_caller_session():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "queue.db")
+        make_engine(path).dispose()
+        # 连接池只有一个连接：请求会话已借出时，另开会话会等待超时
+        engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False},
+            poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.5
+        )
+        sessions = sessionmaker(bind=engine)
+        queue = WriteQueue(sessions, enabled=False)
+        session = sessions()
+        try:
+            assert session.execute(text("SELECT COUNT(*) FROM counters")).scalar() == 0
+            assert queue.run(insert_row(1), session=session) == 1
+            assert not has_pending_writes(session)
+
+            # 失败的写操作在调用方会话中回滚，会话仍可继续使用
+            try:
+                queue.run(insert_row(1), session=session)
+                raise AssertionError("主键冲突应抛出异常")
+            except Exception as e:
+                assert not isinstance(e, AssertionError), e
+            assert queue.run(insert_row(2), session=session) == 2
+            assert session.execute(text("SELECT COUNT(*) FROM counters")).scalar() == 2
+        finally:
+            session.close()
+            engine.dispose()
+        assert queue.stats()["batches"] == 0
+
+
+if __name__ == "__main__":
+    try:
+        test_group_commit_and_failures()
+        test_readers_not_blocked_by_writer()
+        test_mixed_queued_and_direct_writers()
+        test_rejects_caller_with_pending_writes()
+        test_disabled_queue_uses_caller_session()
+        print("✅ 写操作合并提交，读操作不被写事务阻塞，与不经过队列的写操作并发时都能提交")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
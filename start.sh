@@ -46,6 +46,11 @@ python -m app.main &
 BACKEND_PID=$!
 echo "后端服务 PID: $BACKEND_PID"
 
+echo "启动后台任务 worker..."
+python -m app.cli worker &
+WORKER_PID=$!
+echo "任务 worker PID: $WORKER_PID"
+
 cd ..
 
 # 等待后端启动
@@ -83,6 +88,6 @@ echo "按 Ctrl+C 停止所有服务"
 echo "========================================="
 
 # 等待中断信号
-trap "kill $BACKEND_PID $FRONTEND_PID; exit" INT TERM
+trap "kill $BACKEND_PID $WORKER_PID $FRONTEND_PID; exit" INT TERM
 
 wait